@@ -2,14 +2,65 @@
 Create, read, update, and delete databases, containers, and items in Azure Cosmos DB SQL API databases.
 """
 
-__all__ = ["CosmosClient", "Database", "Container", "Item"]
-
+__all__ = [
+    "CosmosClient",
+    "Database",
+    "Container",
+    "Item",
+    "BulkOperationResult",
+    "MetadataCache",
+    "SessionTokenManager",
+    "ThrottlingRetryPolicy",
+    "RequestUnitRateLimiter",
+    "OperationObserver",
+    "LatencyAggregator",
+    "RequestChargeAggregator",
+    "QueryMetrics",
+    "RequestOptions",
+    "JsonCodec",
+    "RawItem",
+    "RawPage",
+    "ConnectionPool",
+    "ConnectionPoolStats",
+    "PartitionKeyRangeCache",
+]
+
+
+import contextlib
+import copy
+import re
+import threading
+import time
+import urllib.parse
 
 from internal.cosmos.errors import HTTPFailure
+from .bulk import BulkOperationResult
+from .codec import DEFAULT_CODEC, JsonCodec, RawItem, RawPage
+from .connection_pool import ConnectionPool, ConnectionPoolStats
+from .metadata_cache import MetadataCache
+from .session import SessionTokenManager
+from .throttling import (
+    RequestUnitRateLimiter,
+    ThrottlingRetryPolicy,
+    get_request_charge,
+)
+from .instrumentation import (
+    LatencyAggregator,
+    OperationEvent,
+    OperationObserver,
+    RequestChargeAggregator,
+    _notify_observers,
+)
+from .query_metrics import QUERY_METRICS_HEADER, QueryMetrics
 from .query_iterator import QueryResultIterator
+from .request_options import RequestOptions, build_request_options
+from .routing import PartitionKeyRangeCache, effective_partition_key
+from . import bulk, query_pipeline
 
 from typing import (
+    TYPE_CHECKING,
     Any,
+    Callable,
     List,
     Iterable,
     Iterator,
@@ -25,12 +76,656 @@ from typing import (
 DatabaseId = Union["Database", Dict[str, Any], str]
 ContainerId = Union["Container", Dict[str, Any], str]
 
+from internal.cosmos import retry_utility
 from internal.cosmos.cosmos_client import CosmosClient as _CosmosClient
-from internal.cosmos.errors import HTTPFailure
+from internal.cosmos.documents import ConnectionPolicy
+from internal.cosmos.errors import HTTPFailure, JSONParseFailure
+from internal.cosmos.retry_options import RetryOptions
 
 
-class ClientContext(_CosmosClient):
-    pass
+class _BaseClientContext:
+    """ Request pipeline shared by all handles created from a :class:`CosmosClient`.
+
+    Operations are issued through :meth:`_execute`, which returns the response metadata
+    of each request along with its result. The backend records the headers of each
+    response in `last_response_headers`, which is tracked per thread, so a single
+    client can be shared by operations issued concurrently from several threads (e.g.
+    by the bulk methods of :class:`Container`).
+
+    Throttled requests are retried according to `retry_policy`, and requests are paced by
+    `rate_limiter`; both are shared by every handle created from the same client. Every
+    completed operation is reported to the `observers`.
+
+    Subclasses provide the backend operations (`ReadItem`, `QueryItems`, ...), and send each
+    of their requests through :meth:`_send_request`: :class:`ClientContext` sends them to the
+    service, and :class:`~azure.cosmos.emulator.InMemoryClientContext` runs them in memory.
+    """
+
+    metadata_cache: "Optional[MetadataCache]" = None
+    session_tokens: "Optional[SessionTokenManager]" = None
+    retry_policy: "Optional[ThrottlingRetryPolicy]" = None
+    rate_limiter: "Optional[RequestUnitRateLimiter]" = None
+    codec: "JsonCodec" = DEFAULT_CODEC
+    connection_pool: "Optional[ConnectionPool]" = None
+    partition_key_ranges: "Optional[PartitionKeyRangeCache]" = None
+
+    if TYPE_CHECKING:
+        # The backend operations, implemented by both ClientContext (through the legacy
+        # client) and InMemoryClientContext. They are only declared for the type checker:
+        # defined at runtime, they would shadow those of the legacy client, which follows
+        # this class in the method resolution order of ClientContext.
+
+        def CreateDatabase(
+            self,
+            database: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadDatabase(
+            self,
+            database_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadDatabases(self, options: "Optional[Dict[str, Any]]" = None) -> "Any":
+            ...
+
+        def QueryDatabases(
+            self,
+            query: "Any",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def DeleteDatabase(
+            self,
+            database_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def CreateContainer(
+            self,
+            database_link: "str",
+            collection: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadContainer(
+            self,
+            collection_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadContainers(
+            self,
+            database_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def QueryContainers(
+            self,
+            database_link: "str",
+            query: "Any",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReplaceContainer(
+            self,
+            collection_link: "str",
+            collection: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def DeleteContainer(
+            self,
+            collection_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def CreateItem(
+            self,
+            database_or_Container_link: "str",
+            document: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def UpsertItem(
+            self,
+            database_or_Container_link: "str",
+            document: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadItem(
+            self,
+            document_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReplaceItem(
+            self,
+            document_link: "str",
+            new_document: "Dict[str, Any]",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def DeleteItem(
+            self,
+            document_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def ReadItems(
+            self,
+            collection_link: "str",
+            feed_options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def QueryItems(
+            self,
+            database_or_Container_link: "str",
+            query: "Any",
+            options: "Optional[Dict[str, Any]]" = None,
+            partition_key: "Any" = None,
+        ) -> "Any":
+            ...
+
+        def QueryItemsChangeFeed(
+            self,
+            collection_link: "str",
+            options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+        def _ReadPartitionKeyRanges(
+            self,
+            collection_link: "str",
+            feed_options: "Optional[Dict[str, Any]]" = None,
+        ) -> "Any":
+            ...
+
+    def __init__(self, *args, **kwargs):
+        self._thread_local = threading.local()
+        self.observers: "List[OperationObserver]" = []
+        super().__init__(*args, **kwargs)
+
+    @property
+    def _raw(self) -> "bool":
+        return getattr(self._thread_local, "raw", False)
+
+    @contextlib.contextmanager
+    def _raw_results(self):
+        """ Have the document requests of this thread return undecoded bodies.
+
+        Reads return a :class:`RawItem`, and each page of a query or a feed a list holding
+        a single :class:`RawPage`, or no :class:`RawPage` if the page has no results.
+        """
+        self._thread_local.raw = True
+        try:
+            yield
+        finally:
+            self._thread_local.raw = False
+
+    @property
+    def _operation_name(self) -> "str":
+        return getattr(self._thread_local, "operation_name", "")
+
+    @property
+    def _retry_count(self) -> "int":
+        return getattr(self._thread_local, "retry_count", 0)
+
+    @property
+    def _partition_key_range_id(self) -> "Optional[str]":
+        return getattr(self._thread_local, "partition_key_range_id", None)
+
+    @contextlib.contextmanager
+    def _routed_to(self, partition_key_range_id: "Optional[str]"):
+        """ Address the document requests of this thread to the partition key range `partition_key_range_id`.
+
+        A request addressed to a range that no longer exists fails with HTTP 410 and sub-status 1002.
+        """
+        previous = self._partition_key_range_id
+        self._thread_local.partition_key_range_id = partition_key_range_id
+        try:
+            yield
+        finally:
+            self._thread_local.partition_key_range_id = previous
+
+    def _read_properties(
+        self, resource_link: "str", read, options: "Optional[Dict[str, Any]]" = None
+    ) -> "Tuple[Dict[str, Any], Optional[ResponseMetadata]]":
+        """Read the properties of the resource at `resource_link` with `read`.
+
+        The metadata cache is consulted first, and populated with the result of a read.
+        Returns the properties and the response metadata of the read, or None if the
+        properties were cached.
+        """
+        if self.metadata_cache is not None:
+            properties = self.metadata_cache.get(resource_link)
+            if properties is not None:
+                return properties, None
+        properties, response_metadata = self._execute(
+            resource_link, read, resource_link, options=options
+        )
+        if self.metadata_cache is not None:
+            self.metadata_cache.set(resource_link, properties)
+        return properties, response_metadata
+
+    def _execute(
+        self, resource_link: "str", operation, *args, **kwargs
+    ) -> "Tuple[Any, ResponseMetadata]":
+        """Invoke `operation` on behalf of the resource at `resource_link`.
+
+        Returns the result of the operation and the metadata of the response it was
+        read from. The metadata is captured on the calling thread as soon as the
+        operation returns, so it always belongs to this request.
+
+        The requests of the operation are retried by :meth:`_send_request` while they are
+        throttled. If the failure shows that the resource (or its parent) no longer
+        exists as cached, its cached metadata is invalidated before the failure is re-raised.
+        """
+        options = kwargs.get("options") or {}
+        operation_name = getattr(operation, "__name__", "")
+        return self._send(
+            resource_link,
+            operation,
+            args,
+            kwargs,
+            options.get("partitionKey"),
+            _OPERATION_NAMES.get(operation_name, operation_name),
+        )
+
+    def _send(
+        self,
+        resource_link: "Optional[str]",
+        operation,
+        args,
+        kwargs,
+        partition_key: "Any" = None,
+        operation_name: "str" = "",
+    ) -> "Tuple[Any, ResponseMetadata]":
+        started = time.perf_counter()
+        # Read and updated by _send_request, for the requests the operation sends.
+        previous = (self._operation_name, self._retry_count)
+        self._thread_local.operation_name = operation_name
+        self._thread_local.retry_count = 0
+        try:
+            # Clear any headers left by an earlier request on this thread, so that an
+            # operation that sends no request isn't attributed someone else's response.
+            self.last_response_headers = None
+            try:
+                result = operation(*args, **kwargs)
+            except HTTPFailure as failure:
+                headers = getattr(failure, "headers", None)
+                self._track_session_token(resource_link, headers, partition_key)
+                if resource_link is not None and (
+                    failure.status_code == 410
+                    or (
+                        failure.status_code == 404
+                        and getattr(failure, "sub_status", None) == 1003
+                    )
+                ):
+                    # The cached state of the resource's container may be stale.
+                    if self.metadata_cache is not None:
+                        self.metadata_cache.invalidate(resource_link)
+                    if self.partition_key_ranges is not None:
+                        self.partition_key_ranges.invalidate(resource_link)
+                if self.observers:
+                    self._notify(
+                        operation_name,
+                        resource_link,
+                        partition_key,
+                        started,
+                        kwargs,
+                        headers,
+                        self._retry_count,
+                        error=failure,
+                    )
+                raise
+            response_metadata = ResponseMetadata(self.last_response_headers or {})
+            self._track_session_token(resource_link, response_metadata, partition_key)
+            # Fetching past the last page of a query sends no request and isn't reported.
+            if self.observers and self.last_response_headers is not None:
+                self._notify(
+                    operation_name,
+                    resource_link,
+                    partition_key,
+                    started,
+                    kwargs,
+                    response_metadata,
+                    self._retry_count,
+                )
+            return result, response_metadata
+        finally:
+            self._thread_local.operation_name, self._thread_local.retry_count = previous
+
+    def _send_request(
+        self, send: "Callable[[], Tuple[Any, Dict[str, Any]]]"
+    ) -> "Tuple[Any, Dict[str, Any]]":
+        """ Send a single request with `send`, which returns its result and the headers of its response.
+
+        Requests are paced by `rate_limiter`, and throttled requests are retried according to
+        `retry_policy`, after waiting as long as the service asked. Only the throttled request is
+        sent again, not the operation that sent it, whose state (e.g. the execution context of a
+        query) may not survive being started over.
+        """
+        operation_name = self._operation_name
+        attempt = 0
+        waited = 0.0
+        while True:
+            reserved = (
+                self.rate_limiter.acquire(operation_name)
+                if self.rate_limiter is not None
+                else 0.0
+            )
+            try:
+                result, headers = send()
+            except HTTPFailure as failure:
+                failure_headers = getattr(failure, "headers", None)
+                throttled = failure.status_code == 429
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record(
+                        operation_name,
+                        reserved,
+                        get_request_charge(failure_headers),
+                        throttled,
+                    )
+                if throttled and self.retry_policy is not None:
+                    delay = self.retry_policy.get_retry_delay(
+                        attempt, failure_headers, waited
+                    )
+                    if delay is not None:
+                        time.sleep(delay)
+                        attempt += 1
+                        waited += delay
+                        self._thread_local.retry_count = self._retry_count + 1
+                        continue
+                raise
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(
+                    operation_name, reserved, get_request_charge(headers)
+                )
+            return result, headers
+
+    def _notify(
+        self,
+        operation_name: "str",
+        resource_link: "Optional[str]",
+        partition_key: "Any",
+        started: "float",
+        kwargs: "Dict[str, Any]",
+        headers: "Optional[Dict[str, Any]]",
+        retry_count: "int",
+        error: "Optional[BaseException]" = None,
+    ):
+        latency = time.perf_counter() - started
+        body = next(
+            (kwargs[name] for name in _BODY_ARGUMENTS if kwargs.get(name) is not None),
+            None,
+        )
+        # The backend serializes the body itself; measuring it means serializing it
+        # again, which is only done while someone is observing.
+        request_size = len(self.codec.encode_bytes(body)) if body is not None else None
+        _notify_observers(
+            self.observers,
+            operation_name,
+            resource_link,
+            partition_key,
+            latency,
+            headers,
+            request_size=request_size,
+            retry_count=retry_count,
+            error=error,
+        )
+
+    def _track_session_token(
+        self,
+        resource_link: "Optional[str]",
+        headers: "Optional[Dict[str, Any]]",
+        partition_key: "Any" = None,
+    ):
+        if self.session_tokens is None or not headers or resource_link is None:
+            return
+        match = _COLLECTION_LINK_PATTERN.match(resource_link)
+        if match:
+            self.session_tokens.update(match.group(0), headers, partition_key)
+
+    def _apply_session_token(
+        self,
+        collection_link: "str",
+        request_options: "Dict[str, Any]",
+        partition_key: "Any" = None,
+        partition_key_range_id: "Optional[str]" = None,
+    ) -> "Dict[str, Any]":
+        """ Return `request_options` with the tracked session token for a read from `collection_link`.
+
+        An explicitly requested session token is left untouched.
+        """
+        if self.session_tokens is None or request_options.get("sessionToken"):
+            return request_options
+        session_token = self.session_tokens.get(
+            collection_link, partition_key, partition_key_range_id
+        )
+        if not session_token:
+            return request_options
+        return dict(request_options, sessionToken=session_token)
+
+    @property
+    def last_response_headers(self) -> "Optional[Dict[str, Any]]":
+        return getattr(self._thread_local, "last_response_headers", None)
+
+    @last_response_headers.setter
+    def last_response_headers(self, value: "Optional[Dict[str, Any]]"):
+        self._thread_local.last_response_headers = value
+
+
+class ClientContext(_BaseClientContext, _CosmosClient):
+    """ Client context sending the operations to an Azure Cosmos DB account.
+
+    Request bodies are encoded with :attr:`codec` straight to the bytes that are sent, and
+    response bodies are decoded straight from the bytes that are received. Requests are sent
+    over the connections of :attr:`connection_pool`.
+    """
+
+    # Always set, unlike on other client contexts.
+    connection_pool: "ConnectionPool"
+
+    def __init__(
+        self, *args, connection_pool: "Optional[ConnectionPool]" = None, **kwargs
+    ):
+        # Set before the backend sends its first request, from its constructor.
+        self.connection_pool = (
+            connection_pool if connection_pool is not None else ConnectionPool()
+        )
+        super().__init__(*args, **kwargs)
+        if self.connection_pool.prewarm:
+            endpoints = {
+                self._global_endpoint_manager.get_write_endpoint(),
+                self._global_endpoint_manager.get_read_endpoint(),
+            }
+            for endpoint in endpoints:
+                verify, cert = self._tls_settings(endpoint)
+                self.connection_pool.prewarm_connections(
+                    endpoint,
+                    verify=verify,
+                    cert=cert,
+                    proxies=self._requests_session.proxies or None,
+                )
+
+    def _tls_settings(
+        self, url: "str"
+    ) -> "Tuple[Union[bool, str], Optional[Tuple[str, str]]]":
+        """ The certificate verification and client certificate of requests to `url`.
+        """
+        ssl_configuration = self.connection_policy.SSLConfiguration
+        if ssl_configuration:
+            return (
+                ssl_configuration.SSLCaCerts,
+                (ssl_configuration.SSLCertFile, ssl_configuration.SSLKeyFile),
+            )
+        # Certificates of the local emulator aren't verified.
+        verify = (
+            urllib.parse.urlparse(url).hostname not in ("localhost", "127.0.0.1")
+            and not self.connection_policy.DisableSSLVerification
+        )
+        return verify, None
+
+    # The backend sends every request through these methods.
+
+    def _CosmosClient__Get(self, path, request, headers):
+        return self._send_http("GET", path, request, None, headers)
+
+    def _CosmosClient__Post(self, path, request, body, headers):
+        return self._send_http("POST", path, request, body, headers)
+
+    def _CosmosClient__Put(self, path, request, body, headers):
+        return self._send_http("PUT", path, request, body, headers)
+
+    def _CosmosClient__Delete(self, path, request, headers):
+        return self._send_http("DELETE", path, request, None, headers)
+
+    def _send_http(
+        self,
+        method: "str",
+        path: "str",
+        request,
+        body: "Any",
+        headers: "Dict[str, Any]",
+    ) -> "Tuple[Any, Dict[str, Any]]":
+        data = None
+        if body:
+            data = (
+                body.encode("utf-8")
+                if isinstance(body, str)
+                else self.codec.encode_bytes(body)
+            )
+        headers["Content-Length"] = len(data) if data else 0
+        partition_key_range_id = self._partition_key_range_id
+        if partition_key_range_id is not None and request.resource_type == "docs":
+            headers[_PARTITION_KEY_RANGE_ID_HEADER] = partition_key_range_id
+        # The retry policies of the backend expect the arguments of its own request function.
+        request_options = dict(path=path, method=method, headers=headers)
+        # Throttled requests aren't retried by the backend, which would rerun the whole fetch
+        # of a query page instead of the request.
+        return self._send_request(
+            lambda: retry_utility._Execute(
+                self,
+                self._global_endpoint_manager,
+                self._http_request,
+                request,
+                self.connection_policy,
+                self.connection_pool.session,
+                path,
+                request_options,
+                data,
+            )
+        )
+
+    def _http_request(
+        self,
+        global_endpoint_manager,
+        request,
+        connection_policy,
+        requests_session,
+        path: "str",
+        request_options: "Dict[str, Any]",
+        data: "Optional[bytes]",
+    ) -> "Tuple[Any, Dict[str, Any]]":
+        """ Send a single request; the counterpart of the backend's, decoding the body with :attr:`codec`.
+        """
+        global_endpoint_manager.refresh_endpoint_list(None)
+        url = (
+            request.endpoint_override
+            or global_endpoint_manager.resolve_service_endpoint(request)
+        ) + (path or "")
+        # The requests library only accepts header values that are strings.
+        request_options["headers"] = {
+            name: str(value) for name, value in request_options["headers"].items()
+        }
+        verify, cert = self._tls_settings(url)
+        response = requests_session.request(
+            request_options["method"],
+            url,
+            data=data,
+            headers=request_options["headers"],
+            timeout=connection_policy.RequestTimeout / 1000.0,
+            verify=verify,
+            cert=cert,
+            # Proxies of the connection policy, set up by the backend.
+            proxies=self._requests_session.proxies or None,
+        )
+        headers = dict(response.headers)
+        content = response.content
+        if response.status_code >= 400:
+            raise HTTPFailure(
+                response.status_code, content.decode("utf-8", "replace"), headers
+            )
+        if not content:
+            return None, headers
+        if request.resource_type == "docs" and self._raw:
+            if request.operation_type in _FEED_OPERATION_TYPES:
+                page = RawPage.from_body(None, content, self.codec)
+                return dict(Documents=[page] if page is not None else []), headers
+            return RawItem(None, content), headers
+        try:
+            return self.codec.decode(content), headers
+        except ValueError:
+            raise JSONParseFailure(content.decode("utf-8", "replace"))
+
+
+_COLLECTION_LINK_PATTERN = re.compile(r"dbs/[^/]+/colls/[^/]+")
+
+_PARTITION_KEY_RANGE_ID_HEADER = "x-ms-documentdb-partitionkeyrangeid"
+
+# Sub-statuses of HTTP 410 responses to requests addressed to a partition key range that
+# was split or merged.
+_PARTITION_KEY_RANGE_GONE_SUB_STATUSES = (1002, 1007, 1008)
+
+
+def _is_partition_key_range_gone(failure: "HTTPFailure") -> "bool":
+    return (
+        failure.status_code == 410
+        and getattr(failure, "sub_status", None)
+        in _PARTITION_KEY_RANGE_GONE_SUB_STATUSES
+    )
+
+
+# Names under which operations of the backend are reported to observers.
+_OPERATION_NAMES = {
+    "CreateDatabase": "create_database",
+    "ReadDatabase": "get_database",
+    "DeleteDatabase": "delete_database",
+    "CreateContainer": "create_container",
+    "ReadContainer": "get_container",
+    "ReplaceContainer": "reset_container_properties",
+    "DeleteContainer": "delete_container",
+    "ReadItem": "get_item",
+    "CreateItem": "create_item",
+    "UpsertItem": "upsert_item",
+    "ReplaceItem": "replace_item",
+    "DeleteItem": "delete_item",
+}
+
+# Operations of the backend whose responses are pages of results.
+_FEED_OPERATION_TYPES = ("ReadFeed", "Query", "SqlQuery")
+
+# Keyword arguments of backend operations that hold the request body.
+_BODY_ARGUMENTS = ("document", "new_document", "collection", "database", "query")
 
 
 class User:
@@ -45,11 +740,16 @@ class PartitionKey(dict):
 
     :ivar path: The path of the partition key
     :ivar kind: What kind of partition key is being defined
+    :ivar version: The version of the hash function of the partition key: 1, or 2 for large partition keys
     """
 
-    def __init__(self, path: "str", kind: "str" = "Hash"):
+    def __init__(
+        self, path: "str", kind: "str" = "Hash", version: "Optional[int]" = None
+    ):
         self.path = path
         self.kind = kind
+        if version is not None:
+            self.version = version
 
     @property
     def kind(self):
@@ -67,13 +767,134 @@ class PartitionKey(dict):
     def path(self, value: "str"):
         self["paths"] = [value]
 
+    @property
+    def version(self) -> "int":
+        return self.get("version", 1)
+
+    @version.setter
+    def version(self, value: "int"):
+        self["version"] = value
+
+
+def _get_partition_key_value(body: "Dict[str, Any]", path: "str") -> "Any":
+    value: "Any" = body
+    for part in path.strip("/").split("/"):
+        if not isinstance(value, dict) or part not in value:
+            # Documents without the partition key property belong to the
+            # 'undefined' partition, which the service addresses as {}.
+            return {}
+        value = value[part]
+    return value
+
+
+_SELECT_STAR_PATTERN = re.compile(
+    r"^\s*SELECT\s+(?P<top>TOP\s+\d+\s+)?\*\s+(?P<from>FROM)\s+(?P<source>\w+)"
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|ORDER|JOIN|GROUP|OFFSET)\b)(?P<alias>\w+))?",
+    re.IGNORECASE,
+)
+
+
+def _project_id_and_partition_key(query: "str", partition_key_path: "str") -> "Optional[str]":
+    """ Rewrite a `SELECT * FROM ...` query to return only the `id` and partition key (as `_pk`) of each document.
+
+    Returns None if the query doesn't select whole documents.
+    """
+    match = _SELECT_STAR_PATTERN.match(query)
+    if not match:
+        return None
+    alias = match.group("alias") or match.group("source")
+    accessor = "".join(
+        f'["{part}"]' for part in partition_key_path.strip("/").split("/")
+    )
+    projection = f"SELECT {match.group('top') or ''}{alias}.id, {alias}{accessor} AS _pk "
+    return projection + query[match.start("from") :]
+
 
 class AccessCondition(dict):
     pass
 
 
 class ResponseMetadata(dict):
-    pass
+    """ The headers of a response, with accessors for the most commonly used ones.
+    """
+
+    # One is kept per page of results, shared by every item in it.
+    __slots__ = ()
+
+    @property
+    def request_charge(self) -> "float":
+        """ Request units charged for the request.
+        """
+        return get_request_charge(self)
+
+    @property
+    def session_token(self) -> "Optional[str]":
+        return self.get("x-ms-session-token")
+
+    @property
+    def activity_id(self) -> "Optional[str]":
+        return self.get("x-ms-activity-id")
+
+    @property
+    def query_metrics(self) -> "Optional[QueryMetrics]":
+        """ The query metrics of the request, if they were requested with `populate_query_metrics`.
+        """
+        return QueryMetrics.from_header(self.get(QUERY_METRICS_HEADER))
+
+
+def _page_fetcher(
+    client_context: "_BaseClientContext",
+    results,
+    operation_name: "str",
+    collection_link: "Optional[str]" = None,
+    partition_key: "Any" = None,
+    raw: "bool" = False,
+    partition_key_range_id: "Optional[str]" = None,
+) -> "Callable[[], Tuple[List[Any], ResponseMetadata]]":
+    """ Adapt a backend query iterable to the page fetch function used by :class:`QueryResultIterator`.
+
+    Pages are fetched like any other request, so throttled fetches are retried. If
+    `collection_link` is given, the session token of each page is tracked for that container.
+    If `raw` is true, each page is a list holding a single :class:`RawPage`. If
+    `partition_key_range_id` is given, pages are requested from that partition key range.
+    """
+
+    def fetch_next_page():
+        with client_context._routed_to(partition_key_range_id):
+            return client_context._send(
+                collection_link,
+                results.fetch_next_block,
+                (),
+                {},
+                partition_key,
+                operation_name,
+            )
+
+    def fetch_next_raw_page():
+        with client_context._raw_results():
+            page, response_metadata = fetch_next_page()
+        for raw_page in page:
+            raw_page.response_headers = response_metadata
+        return page, response_metadata
+
+    return fetch_next_raw_page if raw else fetch_next_page
+
+
+def _retry_settings(retry_options: "RetryOptions") -> "Tuple[Any, Any, Any]":
+    return (
+        retry_options.MaxRetryAttemptCount,
+        retry_options.FixedRetryIntervalInMilliseconds,
+        retry_options.MaxWaitTimeInSeconds,
+    )
+
+
+def _set_continuation(request_options: "Dict[str, Any]", continuation_token: "Optional[str]"):
+    # The backend only applies the continuation option once a query has started, so
+    # resuming a query sends the token as an initial header of the first request.
+    if continuation_token:
+        initial_headers = dict(request_options.get("initialHeaders") or {})
+        initial_headers["x-ms-continuation"] = continuation_token
+        request_options["initialHeaders"] = initial_headers
 
 
 class CosmosClient:
@@ -83,12 +904,45 @@ class CosmosClient:
     """
 
     def __init__(
-        self, url: "str", key, consistency_level="Session", connection_policy=None
+        self,
+        url: "Optional[str]",
+        key,
+        consistency_level="Session",
+        connection_policy=None,
+        *,
+        metadata_cache_ttl: "Optional[float]" = None,
+        retry_policy: "Optional[ThrottlingRetryPolicy]" = None,
+        rate_limiter: "Optional[RequestUnitRateLimiter]" = None,
+        observers: "Optional[Iterable[OperationObserver]]" = None,
+        client_context: "Optional[_BaseClientContext]" = None,
+        codec: "Optional[JsonCodec]" = None,
+        connection_pool: "Optional[ConnectionPool]" = None,
     ):
-        """ Instantiate a new CosmosClient.
+        """Instantiate a new CosmosClient.
 
-        :param url: The URL of the Cosmos DB account.
+        :param url: The URL of the Cosmos DB account. May be None if `client_context` is given.
         :param consistency_level: Consistency level to use for the session.
+        :param connection_policy: The `ConnectionPolicy` of the connections to the account. Throttled requests are
+            retried by the client's `retry_policy` rather than by the connection, so if no `retry_policy` is given,
+            the `RetryOptions` of the policy are turned into one with :func:`ThrottlingRetryPolicy.from_retry_options`.
+        :param metadata_cache_ttl: Cache database and container properties (including partition key definitions)
+            for this many seconds, so that :func:`CosmosClient.get_database` and :func:`Database.get_container`
+            don't issue a network read for a recently seen resource. Disabled if None.
+        :param retry_policy: How requests that were throttled (HTTP 429) are retried. Defaults to a
+            :class:`ThrottlingRetryPolicy` with default settings, or following the `RetryOptions` of
+            `connection_policy`; use `ThrottlingRetryPolicy(max_retries=0)` to have every throttled request raise
+            :class:`HTTPFailure`. Giving it along with `RetryOptions` that aren't the defaults raises `ValueError`.
+        :param rate_limiter: Pace the requests of this client to a budget of request units per second. A
+            :class:`RequestUnitRateLimiter` can be shared by several clients using the same throughput.
+        :param observers: :class:`OperationObserver` instances notified of every operation of this client, e.g. a
+            :class:`LatencyAggregator` or a :class:`RequestChargeAggregator`. More can be added to :attr:`observers`.
+        :param client_context: Send the operations of this client to another backend instead of the account at `url`,
+            e.g. an :class:`~azure.cosmos.emulator.InMemoryClientContext`. `url`, `key`, `connection_policy` and
+            `connection_pool` are then ignored.
+        :param codec: The :class:`JsonCodec` serializing request and response bodies, e.g. `JsonCodec.orjson()`.
+            Defaults to the standard library.
+        :param connection_pool: The :class:`ConnectionPool` whose connections requests are sent over; it can be shared
+            by several clients. Defaults to a pool with default settings.
 
         .. literalinclude:: ../../examples/examples.py
             :start-after: [START create_client]
@@ -99,12 +953,91 @@ class CosmosClient:
             :name: create_client
 
         """
-        self.client_context = ClientContext(
-            url,
-            dict(masterKey=key),
-            consistency_level=consistency_level,
-            connection_policy=connection_policy,
+        if client_context is None:
+            # Throttled requests are retried by the retry policy, which can see the
+            # rate limiter, rather than by the backend.
+            connection_policy = (
+                copy.copy(connection_policy)
+                if connection_policy is not None
+                else ConnectionPolicy()
+            )
+            retry_options = connection_policy.RetryOptions
+            if retry_policy is None:
+                retry_policy = ThrottlingRetryPolicy.from_retry_options(retry_options)
+            elif _retry_settings(retry_options) != _retry_settings(RetryOptions()):
+                raise ValueError(
+                    "Pass either retry_policy or connection_policy.RetryOptions, not both"
+                )
+            connection_policy.RetryOptions = RetryOptions(max_retry_attempt_count=0)
+            if connection_pool is None:
+                connection_pool = ConnectionPool(
+                    max_retries=connection_policy.ConnectionRetryConfiguration or 0
+                )
+            client_context = ClientContext(
+                url,
+                dict(masterKey=key),
+                consistency_level=consistency_level,
+                connection_policy=connection_policy,
+                connection_pool=connection_pool,
+            )
+        self.client_context = client_context
+        self.client_context.retry_policy = (
+            retry_policy if retry_policy is not None else ThrottlingRetryPolicy()
         )
+        self.client_context.rate_limiter = rate_limiter
+        if codec is not None:
+            self.client_context.codec = codec
+        self.client_context.observers.extend(observers or ())
+        if metadata_cache_ttl is not None:
+            self.client_context.metadata_cache = MetadataCache(metadata_cache_ttl)
+        if consistency_level == "Session":
+            self.client_context.session_tokens = SessionTokenManager()
+        self.client_context.partition_key_ranges = PartitionKeyRangeCache()
+
+    @property
+    def metadata_cache(self) -> "Optional[MetadataCache]":
+        """The cache of database and container properties, or None if caching is disabled.
+
+        Use :func:`MetadataCache.invalidate` or :func:`MetadataCache.clear` to drop entries that are known to be stale.
+        """
+        return self.client_context.metadata_cache
+
+    @property
+    def observers(self) -> "List[OperationObserver]":
+        """ The observers notified of every operation of this client.
+
+        The list can be modified to add or remove observers.
+        """
+        return self.client_context.observers
+
+    @property
+    def session_tokens(self) -> "Optional[SessionTokenManager]":
+        """ The session tokens received by this client, or None unless the consistency level is Session.
+
+        Reads from a container are sent the tracked token of the partition key range they target.
+        Use :func:`SessionTokenManager.export_tokens` and :func:`SessionTokenManager.import_tokens`
+        to continue a session in another process.
+        """
+        return self.client_context.session_tokens
+
+    @property
+    def connection_pool(self) -> "Optional[ConnectionPool]":
+        """ The pool of the connections requests are sent over, or None if the client doesn't send requests over HTTP.
+
+        Use :func:`ConnectionPool.stats` to size the pool from the connections a workload uses.
+        """
+        return self.client_context.connection_pool
+
+    @property
+    def partition_key_ranges(self) -> "Optional[PartitionKeyRangeCache]":
+        """ The cached partition key range maps of the containers this client routes operations to.
+
+        Reads and deletes of items, and queries for a single partition key, are sent to the partition
+        key range of their partition key, computed by the client, once the partition key definition of
+        their container is known. Maps are refreshed when the service reports that a range was split;
+        use :func:`PartitionKeyRangeCache.invalidate` to refresh one sooner.
+        """
+        return self.client_context.partition_key_ranges
 
     @staticmethod
     def _get_database_link(database_or_id: DatabaseId) -> "str":
@@ -151,8 +1084,20 @@ class CosmosClient:
             :name: create_database
 
         """
-        result = self.client_context.CreateDatabase(database=dict(id=id))
-        return Database(self.client_context, id=result["id"], properties=result)
+        result, response_metadata = self.client_context._execute(
+            CosmosClient._get_database_link(id),
+            self.client_context.CreateDatabase,
+            database=dict(id=id),
+        )
+        database = Database(
+            self.client_context,
+            id=result["id"],
+            properties=result,
+            response_metadata=response_metadata,
+        )
+        if self.client_context.metadata_cache is not None:
+            self.client_context.metadata_cache.set(database.database_link, result)
+        return database
 
     def get_database(
         self,
@@ -162,6 +1107,7 @@ class CosmosClient:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Database":
         """
         Retrieve an existing database with the ID (name) `id`.
@@ -170,31 +1116,53 @@ class CosmosClient:
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raise `HTTPFailure`: If the given database couldn't be retrieved.
+
+        If the client caches metadata and the database properties are cached, no network request is made.
         """
         database_link = CosmosClient._get_database_link(database)
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        properties = self.client_context.ReadDatabase(
-            database_link, options=request_options
+        metadata_cache = self.client_context.metadata_cache
+        if metadata_cache is not None:
+            properties = metadata_cache.get(database_link)
+            if properties is not None:
+                return Database(
+                    self.client_context, properties["id"], properties=properties
+                )
+
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        properties, response_metadata = self.client_context._read_properties(
+            database_link, self.client_context.ReadDatabase, options=options
         )
         return Database(
             self.client_context,
             properties["id"],
             properties=properties,
-            response_metadata=ResponseMetadata(
-                self.client_context.last_response_headers
-            ),
+            response_metadata=response_metadata,
         )
 
+    def get_database_client(self, database: DatabaseId) -> "Database":
+        """
+        Get a handle for an existing database without contacting the service.
+
+        Unlike :func:`CosmosClient.get_database`, this doesn't verify that the database exists; its
+        properties are read the first time :attr:`Database.properties` is accessed.
+
+        :param database: The ID (name) of the database, or a :class:`Database` instance.
+        :returns: A :class:`Database` instance.
+        """
+        if isinstance(database, Database):
+            return database
+        database_link = CosmosClient._get_database_link(database)
+        return Database(self.client_context, database_link[len("dbs/") :])
+
     def list_databases(
         self,
         *,
@@ -205,7 +1173,9 @@ class CosmosClient:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
-    ) -> "Iterable[Database]":
+        continuation_token: "Optional[str]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "QueryResultIterator":
         """
         List the databases in a Cosmos DB SQL database account.
 
@@ -214,27 +1184,46 @@ class CosmosClient:
         :param max_item_count: Max number of items to be returned in the enumeration operation.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param continuation_token: Resume a previous enumeration from :attr:`QueryResultIterator.continuation_token`.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: A :class:`QueryResultIterator` of :class:`Database`, each carrying the response metadata of
+            the page it was listed in. The first page is requested before this method returns.
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if enable_cross_partition_query is not None:
-            request_options["enableCrossPartitionQuery"] = enable_cross_partition_query
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if max_item_count is not None:
-            request_options["maxItemCount"] = max_item_count
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        yield from [
-            Database(self.client_context, properties["id"], properties=properties)
-            for properties in self.client_context.ReadDatabases(options=request_options)
-        ]
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        _set_continuation(options, continuation_token)
+
+        fetch_next_page = _page_fetcher(
+            self.client_context,
+            self.client_context.ReadDatabases(options=options),
+            "list_databases",
+        )
+
+        def fetch_next_databases() -> "Tuple[List[Any], ResponseMetadata]":
+            page, response_metadata = fetch_next_page()
+            return (
+                [
+                    Database(
+                        self.client_context,
+                        properties["id"],
+                        properties=properties,
+                        response_metadata=response_metadata,
+                    )
+                    for properties in page
+                ],
+                response_metadata,
+            )
+
+        return QueryResultIterator(fetch_next_databases)
 
     def list_database_properties(
         self,
@@ -248,44 +1237,53 @@ class CosmosClient:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
-    ) -> "Iterable[Union[Dict, Any], Any]":
-
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if enable_cross_partition_query is not None:
-            request_options["enableCrossPartitionQuery"] = enable_cross_partition_query
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if max_item_count is not None:
-            request_options["maxItemCount"] = max_item_count
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+        continuation_token: "Optional[str]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "QueryResultIterator":
+        """
+        List the properties of the databases in a Cosmos DB SQL database account, optionally filtered by `query`.
+
+        :param query: The Azure Cosmos DB SQL query to execute.
+        :param parameters: Optional array of parameters to the query. Ignored if no query is provided.
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param max_degree_parallelism: The maximum number of concurrent operations that run client side during parallel query execution in the Azure Cosmos DB database service. Negative values make the system automatically decides the number of concurrent operations to run.
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        :param session_token: Token for use with Session consistency.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param continuation_token: Resume a previous enumeration from :attr:`QueryResultIterator.continuation_token`.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: A :class:`QueryResultIterator` over the database properties.
+        """
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        _set_continuation(options, continuation_token)
 
         if query:
-            # This is currently eagerly evaluated in order to capture the headers
-            # from the call.
-            # (just returning a generator did not initiate the first network call, so
-            # the headers were misleading)
-            # This needs to change for "real" implementation
-            results = iter(
-                list(self.client_context.QueryDatabases(query, options=request_options))
+            results = self.client_context.QueryDatabases(
+                query
+                if parameters is None
+                else dict(query=query, parameters=parameters),
+                options=options,
             )
         else:
-            results = iter(
-                list(self.client_context.ReadDatabases(options=request_options))
-            )
-        self.session_token = self.client_context.last_response_headers.get(
-            "x-ms-session-token"
-        )
-        return QueryResultIterator(
-            results,
-            metadata=ResponseMetadata(self.client_context.last_response_headers),
+            results = self.client_context.ReadDatabases(options=options)
+        # Constructing the iterator issues the first request, so the metadata
+        # below belongs to the first page of results.
+        result = QueryResultIterator(
+            _page_fetcher(self.client_context, results, "list_databases")
         )
+        if result.response_metadata is not None:
+            self.session_token = result.response_metadata.get("x-ms-session-token")
+        return result
 
     def delete_database(
         self,
@@ -297,6 +1295,7 @@ class CosmosClient:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ):
         """
         Delete the database with the given ID (name).
@@ -307,25 +1306,31 @@ class CosmosClient:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raise HTTPFailure: If the database couldn't be deleted.
         """
 
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            max_degree_parallelism=max_degree_parallelism,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
 
         database_link = CosmosClient._get_database_link(database)
-        self.client_context.DeleteDatabase(database_link, options=request_options)
+        if self.client_context.metadata_cache is not None:
+            self.client_context.metadata_cache.invalidate(database_link)
+        if self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.invalidate(database_link)
+        self.client_context._execute(
+            database_link,
+            self.client_context.DeleteDatabase,
+            database_link,
+            options=options,
+        )
 
 
 class Database:
@@ -353,7 +1358,7 @@ class Database:
 
     def __init__(
         self,
-        client_context: "ClientContext",
+        client_context: "_BaseClientContext",
         id: "str",
         *,
         properties: "Optional[Dict[str, Any]]" = None,
@@ -365,10 +1370,23 @@ class Database:
         """
         self.client_context = client_context
         self.id = id
-        self.properties = properties
+        self._properties = properties
         self.response_metadata = response_metadata
         self.database_link = CosmosClient._get_database_link(id)
 
+    @property
+    def properties(self) -> "Dict[str, Any]":
+        """The properties of the database, read from the service on first access if not yet known."""
+        if self._properties is None:
+            self._properties, _ = self.client_context._read_properties(
+                self.database_link, self.client_context.ReadDatabase
+            )
+        return self._properties
+
+    @properties.setter
+    def properties(self, value: "Optional[Dict[str, Any]]"):
+        self._properties = value
+
     def _get_container_link(self, container_or_id: ContainerId) -> "str":
         if isinstance(container_or_id, str):
             return f"{self.database_link}/colls/{container_or_id}"
@@ -392,6 +1410,7 @@ class Database:
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
         offer_throughput: "Optional[int]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Container":
         """
         Create a new container with the given ID (name).
@@ -407,6 +1426,7 @@ class Database:
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
         :param offer_throughput: The provisioned throughput for this offer.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
 
         :raise HTTPFailure: The container creation failed.
 
@@ -436,24 +1456,26 @@ class Database:
         if default_ttl:
             definition["defaultTtl"] = default_ttl
 
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        data = self.client_context.CreateContainer(
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        data, _ = self.client_context._execute(
+            self.database_link,
+            self.client_context.CreateContainer,
             database_link=self.database_link,
             collection=definition,
-            options=request_options,
+            options=options,
         )
-        return Container(self.client_context, self, data["id"], properties=data)
+        container = Container(self.client_context, self, data["id"], properties=data)
+        if self.client_context.metadata_cache is not None:
+            self.client_context.metadata_cache.set(container.collection_link, data)
+        return container
 
     def delete_container(
         self,
@@ -465,6 +1487,7 @@ class Database:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ):
         """ Delete the container
 
@@ -474,23 +1497,29 @@ class Database:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            max_degree_parallelism=max_degree_parallelism,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
 
         collection_link = self._get_container_link(container)
-        self.client_context.DeleteContainer(collection_link, options=request_options)
+        if self.client_context.metadata_cache is not None:
+            self.client_context.metadata_cache.invalidate(collection_link)
+        if self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.invalidate(collection_link)
+        self.client_context._execute(
+            collection_link,
+            self.client_context.DeleteContainer,
+            collection_link,
+            options=options,
+        )
 
     def get_container(
         self,
@@ -500,16 +1529,20 @@ class Database:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Container":
-        """ Get the specified `Container`, or a container with specified ID (name).
+        """Get the specified `Container`, or a container with specified ID (name).
 
         :param container: The ID (name) of the container, or a :class:`Container` instance.
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raise `HTTPFailure`: Raised if the container couldn't be retrieved. This includes if the container does not exist.
         :returns: :class:`Container`, if present in the container.
 
+        If the client caches metadata and the container properties are cached, no network request is made.
+
         .. literalinclude:: ../../examples/examples.py
             :start-after: [START get_container]
             :end-before: [END get_container]
@@ -519,19 +1552,17 @@ class Database:
             :name: get_container
 
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
 
         collection_link = self._get_container_link(container)
-        container_properties = self.client_context.ReadContainer(
-            collection_link, options=request_options
+        container_properties, _ = self.client_context._read_properties(
+            collection_link, self.client_context.ReadContainer, options=options
         )
         return Container(
             self.client_context,
@@ -540,6 +1571,24 @@ class Database:
             properties=container_properties,
         )
 
+    def get_container_client(
+        self, container: "str", partition_key: "Optional[PartitionKey]" = None
+    ) -> "Container":
+        """Get a handle for an existing container without contacting the service.
+
+        Unlike :func:`Database.get_container`, this doesn't verify that the container exists; its
+        properties are read the first time :attr:`Container.properties` is accessed. If the
+        container's partition key definition is given, item operations don't need to read the
+        container properties to route requests.
+
+        :param container: The ID (name) of the container.
+        :param partition_key: The partition key definition the container was created with.
+        :returns: A :class:`Container` instance.
+        """
+        return Container(
+            self.client_context, self, container, partition_key=partition_key
+        )
+
     def list_containers(
         self,
         *,
@@ -549,7 +1598,9 @@ class Database:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
-    ) -> "Iterable[Container]":
+        continuation_token: "Optional[str]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "QueryResultIterator":
         """ List the containers in the database.
 
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
@@ -557,6 +1608,9 @@ class Database:
         :param max_item_count: Max number of items to be returned in the enumeration operation.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param continuation_token: Resume a previous enumeration from :attr:`QueryResultIterator.continuation_token`.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: A :class:`QueryResultIterator` of :class:`Container`. The first page is requested before this method returns.
 
         .. literalinclude:: ../../examples/examples.py
             :start-after: [START list_containers]
@@ -567,26 +1621,37 @@ class Database:
             :name: list_containers
 
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if max_item_count is not None:
-            request_options["maxItemCount"] = max_item_count
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        yield from [
-            Container(self.client_context, self, container["id"], container)
-            for container in self.client_context.ReadContainers(
-                database_link=self.database_link, options=request_options
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        _set_continuation(options, continuation_token)
+
+        fetch_next_page = _page_fetcher(
+            self.client_context,
+            self.client_context.ReadContainers(
+                database_link=self.database_link, options=options
+            ),
+            "list_containers",
+        )
+
+        def fetch_next_containers() -> "Tuple[List[Any], ResponseMetadata]":
+            page, response_metadata = fetch_next_page()
+            return (
+                [
+                    Container(self.client_context, self, properties["id"], properties)
+                    for properties in page
+                ],
+                response_metadata,
             )
-        ]
+
+        return QueryResultIterator(fetch_next_containers)
 
     def list_container_properties(
         self,
@@ -599,7 +1664,9 @@ class Database:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
-    ):
+        continuation_token: "Optional[str]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "QueryResultIterator":
         """List properties for containers in the current database
 
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
@@ -607,32 +1674,29 @@ class Database:
         :param max_item_count: Max number of items to be returned in the enumeration operation.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param continuation_token: Resume a previous enumeration from :attr:`QueryResultIterator.continuation_token`.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
 
-    """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        result = iter(
-            list(
-                self.client_context.QueryContainers(
-                    database_link=self.database_link,
-                    query=query
-                    if parameters is None
-                    else dict(query=query, parameters=parameters),
-                    options=request_options,
-                )
-            )
+        """
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
         )
 
+        _set_continuation(options, continuation_token)
+
+        results = self.client_context.QueryContainers(
+            database_link=self.database_link,
+            query=query
+            if parameters is None
+            else dict(query=query, parameters=parameters),
+            options=options,
+        )
         return QueryResultIterator(
-            result, metadata=ResponseMetadata(self.client_context.last_response_headers)
+            _page_fetcher(self.client_context, results, "list_containers")
         )
 
     def reset_container_properties(
@@ -648,6 +1712,7 @@ class Database:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ):
         """ Reset the properties of the container. Property changes are persisted immediately.
 
@@ -657,6 +1722,7 @@ class Database:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
 
         .. literalinclude:: ../../examples/examples.py
             :start-after: [START reset_container_properties]
@@ -669,17 +1735,14 @@ class Database:
         """
         container_id = getattr(container, "id", container)
 
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
 
         parameters = {
             key: value
@@ -693,8 +1756,14 @@ class Database:
             if value is not None
         }
         collection_link = f"{self.database_link}/colls/{container_id}"
-        self.client_context.ReplaceContainer(
-            collection_link, collection=parameters, options=request_options
+        if self.client_context.metadata_cache is not None:
+            self.client_context.metadata_cache.invalidate(collection_link)
+        self.client_context._execute(
+            collection_link,
+            self.client_context.ReplaceContainer,
+            collection_link,
+            collection=parameters,
+            options=options,
         )
 
     def get_user_link(self, id_or_user: "Union[User, str]") -> "str":
@@ -746,46 +1815,125 @@ class Database:
         database.client_context.DeleteUser(self.get_user_link(user))
 
 
+# Upper bound on the number of IDs folded into a single query by Container.get_items.
+_MAX_IDS_PER_QUERY = 100
+
+
 class Item(dict):
     """ Represents a document in an Azure Cosmos DB SQL API container.
 
     To create, read, update, and delete Items, use the associated methods on the :class:`Container`.
     The Item must include an `id` key with a value that uniquely identifies the item within the container.
+
+    :ivar response_headers: The :class:`ResponseMetadata` of the response the item was returned in.
+        Items returned in the same page of results share it.
     """
 
+    # Items are created for every document yielded by a query or a listing; without
+    # an instance dictionary, an item costs little more than the document itself.
+    __slots__ = ("response_headers",)
+
     def __init__(self, headers: "Dict[str, Any]", data: "Dict[str, Any]"):
-        super().__init__()
+        # A dict can't adopt the contents of another, and the JSON decoders only build
+        # plain dicts, so the decoded document is shallow copied, in C rather than key by key.
+        dict.__init__(self, data)
         self.response_headers = headers
-        self.update(data)
+
+
+def _items_of_pages(
+    fetch_next_page: "Callable[[], Tuple[List[Any], ResponseMetadata]]"
+) -> "Iterator[Item]":
+    """ Wrap the documents of every page returned by `fetch_next_page` in :class:`Item` instances.
+
+    Each decoded document is dropped from its page as soon as it's wrapped, so that a page is
+    never held both as documents and as items.
+    """
+    while True:
+        page, response_metadata = fetch_next_page()
+        if not page:
+            return
+        page.reverse()
+        while page:
+            yield Item(headers=response_metadata, data=page.pop())
 
 
 class Container:
-    """ An Azure Cosmos DB container.
+    """An Azure Cosmos DB container.
 
     A container in an Azure Cosmos DB SQL API database is a collection of documents, each of which represented as an :class:`Item`.
 
     :ivar str id: ID (name) of the container
-    :ivar str session_token: The session token for the container.
 
     .. note::
 
         To create a new container in an existing database, use :func:`Database.create_container`.
+        To get a handle for an existing container without a network request, use :func:`Database.get_container_client`.
 
     """
 
     def __init__(
         self,
-        client_context: "ClientContext",
+        client_context: "_BaseClientContext",
         database: "Union[Database, str]",
         id: "str",
         properties: "Optional[Dict[str, Any]]" = None,
+        *,
+        partition_key: "Optional[PartitionKey]" = None,
     ):
         self.client_context = client_context
-        self.session_token = None
         self.id = id
-        self.properties = properties
+        self._properties = properties
+        self._partition_key = partition_key
         database_link = CosmosClient._get_database_link(database)
         self.collection_link = f"{database_link}/colls/{self.id}"
+        if partition_key is not None:
+            # The backend looks up the partition key definition of a container before
+            # its first write; seeding it here saves that metadata read.
+            definitions = getattr(
+                client_context, "partition_key_definition_cache", None
+            )
+            if definitions is not None:
+                definitions.setdefault(self.collection_link, partition_key)
+
+    @property
+    def properties(self) -> "Dict[str, Any]":
+        """The properties of the container, read from the service on first access if not yet known."""
+        if self._properties is None:
+            self._properties, _ = self.client_context._read_properties(
+                self.collection_link, self.client_context.ReadContainer
+            )
+        return self._properties
+
+    @properties.setter
+    def properties(self, value: "Optional[Dict[str, Any]]"):
+        self._properties = value
+
+    @property
+    def session_token(self) -> "Optional[str]":
+        """ The session token covering every partition key range of the container seen by this client.
+
+        None unless the client uses Session consistency. Setting it merges the given token into
+        the tokens tracked for the container.
+        """
+        if self.client_context.session_tokens is None:
+            return None
+        return self.client_context.session_tokens.get(self.collection_link)
+
+    @session_token.setter
+    def session_token(self, value: "Optional[str]"):
+        if value and self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.set(self.collection_link, value)
+
+    @property
+    def partition_key(self) -> "Optional[Dict[str, Any]]":
+        """The partition key definition of the container.
+
+        If a definition was given when the handle was created, it is returned without reading
+        the container properties.
+        """
+        if self._partition_key is not None:
+            return self._partition_key
+        return self.properties.get("partitionKey")
 
     def _get_document_link(
         self, item_or_link: "Union[str, Dict[str, Any], Item]"
@@ -794,6 +1942,156 @@ class Container:
             return f"{self.collection_link}/docs/{item_or_link}"
         return cast("str", cast("Item", item_or_link)["_self"])
 
+    def _read_partition_key_ranges(self) -> "List[Dict[str, Any]]":
+        ranges = self.client_context._ReadPartitionKeyRanges(self.collection_link)
+        fetch_next_page = _page_fetcher(
+            self.client_context,
+            ranges,
+            "read_partition_key_ranges",
+            self.collection_link,
+        )
+        result: "List[Dict[str, Any]]" = []
+        while True:
+            page, _ = fetch_next_page()
+            if not page:
+                return result
+            result.extend(page)
+
+    def _get_partition_key_range_id(self, partition_key: "Any") -> "Optional[str]":
+        """ The id of the partition key range holding `partition_key`, or None if operations on it aren't routed.
+
+        Operations are routed by clients with a partition key range cache, in containers whose
+        partition key definition is known to the client without a request, and can be hashed by it.
+        """
+        partition_key_ranges = self.client_context.partition_key_ranges
+        if partition_key_ranges is None:
+            return None
+        properties = self._properties
+        if properties is None and self.client_context.metadata_cache is not None:
+            properties = self.client_context.metadata_cache.get(self.collection_link)
+        definition = self._partition_key or (properties or {}).get("partitionKey")
+        if definition is None:
+            # Learned by the backend on the first write to the container.
+            definitions = getattr(
+                self.client_context, "partition_key_definition_cache", None
+            )
+            definition = definitions.get(self.collection_link) if definitions else None
+        if not definition:
+            return None
+        try:
+            key = effective_partition_key(definition, partition_key)
+        except (ValueError, TypeError):
+            # Left for the service to handle, or reject.
+            return None
+        key_range = partition_key_ranges.get(
+            self.collection_link, self._read_partition_key_ranges
+        ).get_range(key)
+        return key_range["id"] if key_range is not None else None
+
+    def _execute_in_range(
+        self,
+        partition_key: "Any",
+        partition_key_range_id: "Optional[str]",
+        operation,
+        **kwargs,
+    ) -> "Tuple[Any, ResponseMetadata]":
+        """ Execute the document `operation` in the partition key range `partition_key_range_id`.
+
+        If the range was split since the range map was read, the operation is retried once in the
+        range now holding `partition_key`.
+        """
+        if partition_key_range_id is None:
+            return self.client_context._execute(
+                self.collection_link, operation, **kwargs
+            )
+        try:
+            with self.client_context._routed_to(partition_key_range_id):
+                return self.client_context._execute(
+                    self.collection_link, operation, **kwargs
+                )
+        except HTTPFailure as failure:
+            if not _is_partition_key_range_gone(failure):
+                raise
+        # The failed request dropped the stale range map.
+        with self.client_context._routed_to(
+            self._get_partition_key_range_id(partition_key)
+        ):
+            return self.client_context._execute(
+                self.collection_link, operation, **kwargs
+            )
+
+    def _parallel_page_fetcher(
+        self,
+        open_range: "Callable[[Dict[str, Any], Optional[str]], Callable[[], Tuple[List[Any], ResponseMetadata]]]",
+        request_options: "Dict[str, Any]",
+        continuation_token: "Optional[str]" = None,
+        max_buffered_item_count: "Optional[int]" = None,
+        plan: "Optional[query_pipeline.QueryPlan]" = None,
+        max_in_memory_group_count: "Optional[int]" = None,
+    ) -> "Callable[[], Tuple[List[Any], ResponseMetadata]]":
+        """ Fetch the pages of a feed or query from every partition key range of the container concurrently.
+
+        `open_range` starts the operation in a range, from a continuation token of that range if one is
+        given, and returns the function fetching its pages. Pages are returned as they arrive, or merged
+        in order if `plan` orders the results, and their continuation token resumes the operation in
+        every range.
+        """
+        partition_key_ranges = cast(
+            "PartitionKeyRangeCache", self.client_context.partition_key_ranges
+        )
+
+        def overlapping_ranges(*bounds: "str") -> "List[Dict[str, Any]]":
+            return partition_key_ranges.get(
+                self.collection_link, self._read_partition_key_ranges
+            ).get_overlapping_ranges(*bounds)
+
+        def split(stream, error) -> "Optional[List[Dict[str, Any]]]":
+            if not isinstance(error, HTTPFailure) or not _is_partition_key_range_gone(
+                error
+            ):
+                return None
+            # The failed request dropped the stale range map.
+            return overlapping_ranges(
+                stream.key_range["minInclusive"], stream.key_range["maxExclusive"]
+            )
+
+        pages = query_pipeline.execute(
+            overlapping_ranges,
+            open_range,
+            split,
+            plan=plan,
+            continuation=continuation_token,
+            max_degree_parallelism=request_options.get("maxDegreeOfParallelism"),
+            max_buffered_item_count=max_buffered_item_count,
+            page_size=request_options.get("maxItemCount"),
+            max_in_memory_group_count=max_in_memory_group_count,
+        )
+
+        def fetch_next_page() -> "Tuple[List[Any], ResponseMetadata]":
+            page, metadata = next(pages, ([], None))
+            # Stages that emit pages without having fetched any have plain dicts as metadata.
+            if not isinstance(metadata, ResponseMetadata):
+                metadata = ResponseMetadata(metadata or {})
+            return page, metadata
+
+        return fetch_next_page
+
+    def _runs_in_parallel(
+        self,
+        request_options: "Dict[str, Any]",
+        continuation_token: "Optional[str]" = None,
+    ) -> "bool":
+        """ Whether a cross-partition operation is executed by the client, range by range.
+        """
+        return (
+            bool(request_options.get("enableCrossPartitionQuery"))
+            and self.client_context.partition_key_ranges is not None
+            and (
+                continuation_token is None
+                or query_pipeline.is_parallel_continuation(continuation_token)
+            )
+        )
+
     def get_item(
         self,
         id: "str",
@@ -803,7 +2101,9 @@ class Container:
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
-    ) -> "Item":
+        request_options: "Optional[RequestOptions]" = None,
+        raw: "bool" = False,
+    ) -> "Union[Item, RawItem]":
         """
         Get the item identified by `id`.
 
@@ -812,6 +2112,8 @@ class Container:
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :param raw: Return the item undecoded, as a :class:`RawItem` holding the bytes of the response body.
         :returns: :class:`Item`, if present in the container.
 
         .. literalinclude:: ../../examples/examples.py
@@ -825,24 +2127,249 @@ class Container:
         """
         doc_link = self._get_document_link(id)
 
-        request_options: "Dict[str, Any]" = {}
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+        partition_key_range_id = None
         if partition_key:
-            request_options["partitionKey"] = partition_key
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        result = self.client_context.ReadItem(
-            document_link=doc_link, options=request_options
-        )
-        headers = self.client_context.last_response_headers
-        self.session_token = headers.get("x-ms-session-token", self.session_token)
-        return Item(headers=headers, data=result)
+            options["partitionKey"] = partition_key
+            partition_key_range_id = self._get_partition_key_range_id(partition_key)
+
+        options = self.client_context._apply_session_token(
+            self.collection_link, options, partition_key, partition_key_range_id
+        )
+        if raw:
+            with self.client_context._raw_results():
+                result, response_metadata = self._execute_in_range(
+                    partition_key,
+                    partition_key_range_id,
+                    self.client_context.ReadItem,
+                    document_link=doc_link,
+                    options=options,
+                )
+            result.response_headers = response_metadata
+            return result
+        result, response_metadata = self._execute_in_range(
+            partition_key,
+            partition_key_range_id,
+            self.client_context.ReadItem,
+            document_link=doc_link,
+            options=options,
+        )
+        return Item(headers=response_metadata, data=result)
+
+    def get_items(
+        self,
+        items: "Sequence[Tuple[str, Any]]",
+        *,
+        max_concurrency: "int" = 8,
+        query_threshold: "int" = 5,
+        raise_on_error: "bool" = True,
+        disable_ru_per_minute_usage: "Optional[bool]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "List[Union[Item, BaseException, None]]":
+        """
+        Get many items identified by their ID and partition key.
+
+        Items are grouped by the partition key range holding their partition key, and the items of
+        each range are retrieved with a single query filtering on `id` if there are at least
+        `query_threshold` of them, or with concurrent point reads otherwise; the ranges are read
+        concurrently. Where operations aren't routed to partition key ranges, items are grouped by
+        partition key instead, and items whose partition key is None are retrieved with
+        cross-partition queries.
+
+        Every read is attempted, even if some of them fail. By default, the first failure is then
+        raised and the items that were read are discarded; with `raise_on_error=False`, the entry of
+        each item that couldn't be retrieved holds the exception raised while reading it instead.
+
+        :param items: Sequence of `(id, partition_key)` pairs identifying the items to retrieve.
+        :param max_concurrency: Maximum number of requests in flight at any time.
+        :param query_threshold: Minimum number of items in a partition key range (or sharing a partition key) for them to be retrieved with a query instead of point reads.
+        :param raise_on_error: Raise the first failure to retrieve an item, rather than returning the failures in place of the items.
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param session_token: Token for use with Session consistency.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: A list with one entry per pair in `items`, in the same order: the :class:`Item` if it exists, None if it
+            doesn't, or the exception raised while reading it if it couldn't be retrieved and `raise_on_error` is false.
+        :raises `HTTPFailure`: An item couldn't be retrieved for a reason other than not existing, and `raise_on_error` is true.
+        """
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+        )
+        partition_key_of = self._get_partition_key_of()
+
+        def group(
+            references: "Iterable[Tuple[str, Any]]",
+        ) -> "List[Tuple[Any, Optional[str], List[Tuple[str, Any]]]]":
+            # Groups of distinct references, as `(partition key, range id, references)`: the
+            # references of a partition key range, whose partition key is then None, or of a
+            # partition key whose operations aren't routed, whose range id is then None.
+            groups: "Dict[str, Tuple[Any, Optional[str], List[Tuple[str, Any]]]]" = {}
+            seen = set()
+            for id, partition_key in references:
+                if (id, repr(partition_key)) in seen:
+                    continue
+                seen.add((id, repr(partition_key)))
+                partition_key_range_id = (
+                    self._get_partition_key_range_id(partition_key)
+                    if partition_key is not None
+                    else None
+                )
+                if partition_key_range_id is not None:
+                    _, _, group_references = groups.setdefault(
+                        f"range {partition_key_range_id}", (None, partition_key_range_id, [])
+                    )
+                else:
+                    _, _, group_references = groups.setdefault(
+                        repr(partition_key), (partition_key, None, [])
+                    )
+                group_references.append((id, partition_key))
+            return list(groups.values())
+
+        def read_one(id: "str", partition_key: "Any") -> "Dict[Tuple[str, str], Item]":
+            read_options = options
+            partition_key_range_id = None
+            if partition_key is not None:
+                read_options = dict(options, partitionKey=partition_key)
+                partition_key_range_id = self._get_partition_key_range_id(partition_key)
+            read_options = self.client_context._apply_session_token(
+                self.collection_link, read_options, partition_key, partition_key_range_id
+            )
+            try:
+                result, response_metadata = self._execute_in_range(
+                    partition_key,
+                    partition_key_range_id,
+                    self.client_context.ReadItem,
+                    document_link=self._get_document_link(id),
+                    options=read_options,
+                )
+            except HTTPFailure as failure:
+                if failure.status_code == 404:
+                    return {}
+                raise
+            return {(id, repr(partition_key)): Item(headers=response_metadata, data=result)}
+
+        def query(
+            partition_key: "Any",
+            partition_key_range_id: "Optional[str]",
+            references: "List[Tuple[str, Any]]",
+        ) -> "Dict[Tuple[str, str], Item]":
+            if partition_key is not None:
+                read_options = dict(options, partitionKey=partition_key)
+            else:
+                read_options = dict(options, enableCrossPartitionQuery=True)
+            read_options = self.client_context._apply_session_token(
+                self.collection_link, read_options, partition_key, partition_key_range_id
+            )
+            ids = list(dict.fromkeys(id for id, _ in references))
+            parameters = [
+                dict(name=f"@id{index}", value=id) for index, id in enumerate(ids)
+            ]
+            documents = self.client_context.QueryItems(
+                database_or_Container_link=self.collection_link,
+                query=dict(
+                    query="SELECT * FROM root r WHERE r.id IN ({})".format(
+                        ", ".join(parameter["name"] for parameter in parameters)
+                    ),
+                    parameters=parameters,
+                ),
+                options=read_options,
+                partition_key=partition_key,
+            )
+            fetch_next_page = _page_fetcher(
+                self.client_context,
+                documents,
+                "get_items",
+                self.collection_link,
+                partition_key,
+                partition_key_range_id=partition_key_range_id,
+            )
+            # Documents of a range are matched on their partition key too, since the
+            # same id may be used under several partition keys of the range.
+            wanted = {(id, repr(partition_key)) for id, partition_key in references}
+            found: "Dict[Tuple[str, str], Item]" = {}
+            while True:
+                page, response_metadata = fetch_next_page()
+                if not page:
+                    return found
+                for document in page:
+                    key = (
+                        document["id"],
+                        repr(
+                            partition_key_of(document)
+                            if partition_key_range_id is not None
+                            else partition_key
+                        ),
+                    )
+                    if key in wanted:
+                        found[key] = Item(headers=response_metadata, data=document)
+
+        def read(unit, _) -> "Dict[Tuple[str, str], Item]":
+            partition_key, partition_key_range_id, references = unit
+            if len(references) == 1:
+                return read_one(*references[0])
+            try:
+                return query(partition_key, partition_key_range_id, references)
+            except HTTPFailure as failure:
+                if partition_key_range_id is None or not _is_partition_key_range_gone(
+                    failure
+                ):
+                    raise
+            # The range was split; the failed request dropped the stale range map.
+            found: "Dict[Tuple[str, str], Item]" = {}
+            for partition_key, partition_key_range_id, references in group(references):
+                found.update(query(partition_key, partition_key_range_id, references))
+            return found
+
+        # Each unit of work is either a single point read or a query for up to
+        # _MAX_IDS_PER_QUERY items of one partition key range or partition key.
+        units: "List[Tuple[Any, Optional[str], List[Tuple[str, Any]]]]" = []
+        for partition_key, partition_key_range_id, references in group(items):
+            if len(references) < query_threshold:
+                units.extend(
+                    (partition_key, partition_key_range_id, [reference])
+                    for reference in references
+                )
+            else:
+                units.extend(
+                    (
+                        partition_key,
+                        partition_key_range_id,
+                        references[start : start + _MAX_IDS_PER_QUERY],
+                    )
+                    for start in range(0, len(references), _MAX_IDS_PER_QUERY)
+                )
+
+        found: "Dict[Tuple[str, str], Union[Item, BaseException]]" = {}
+        errors: "List[Tuple[int, BaseException]]" = []
+        for result in bulk.execute(
+            units,
+            read,
+            # Units of different ranges run concurrently.
+            lambda unit: unit[1] if unit[1] is not None else unit[0],
+            max_concurrency=max_concurrency,
+            batch_size=max(len(units), 1),
+        ):
+            if result.error is not None:
+                errors.append((result.index, result.error))
+                for id, partition_key in result.input[2]:
+                    found[(id, repr(partition_key))] = result.error
+                continue
+            found.update(result.result)
+
+        if errors and raise_on_error:
+            # The failure of the first unit of work, whichever completed first.
+            raise min(errors, key=lambda error: error[0])[1]
+        return [found.get((id, repr(partition_key))) for id, partition_key in items]
 
     def list_items(
         self,
@@ -850,50 +2377,92 @@ class Container:
         disable_ru_per_minute_usage: "Optional[bool]" = None,
         enable_cross_partition_query: "Optional[bool]" = None,
         max_degree_parallelism: "Optional[int]" = None,
+        max_buffered_item_count: "Optional[int]" = None,
         max_item_count: "Optional[int]" = None,
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Iterable[Item]":
         """ List all items in the container.
 
+        Items are streamed one page at a time: a page of up to `max_item_count` items is
+        fetched, its items are yielded, and only then is the next page requested. Each
+        :class:`Item` carries the response headers of the page it was returned in.
+
+        With `enable_cross_partition_query`, the items of every partition key range are listed
+        separately, up to `max_degree_parallelism` ranges at a time, and pages are yielded as
+        they arrive from the ranges.
+
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
         :param enable_cross_partition_query: Allow scan on the queries which couldn't be served as indexing was opted out on the requested paths.
         :param max_degree_parallelism: The maximum number of concurrent operations that run client side during parallel query execution in the Azure Cosmos DB database service. Negative values make the system automatically decides the number of concurrent operations to run.
+        :param max_buffered_item_count: Maximum number of items fetched ahead of the iteration when `enable_cross_partition_query` is set. By default, as many pages are fetched ahead as are fetched concurrently.
         :param max_item_count: Max number of items to be returned in the enumeration operation.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if enable_cross_partition_query is not None:
-            request_options["enableCrossPartitionQuery"] = enable_cross_partition_query
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if max_item_count is not None:
-            request_options["maxItemCount"] = max_item_count
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        items = self.client_context.ReadItems(
-            collection_link=self.collection_link, feed_options=request_options
-        )
-        headers = self.client_context.last_response_headers
-        yield from [Item(headers=headers, data=item) for item in items]
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        if self._runs_in_parallel(options):
+
+            def open_range(key_range, continuation):
+                range_options = dict(options)
+                _set_continuation(range_options, continuation)
+                range_options = self.client_context._apply_session_token(
+                    self.collection_link, range_options, None, key_range["id"]
+                )
+                items = self.client_context.ReadItems(
+                    collection_link=self.collection_link, feed_options=range_options
+                )
+                return _page_fetcher(
+                    self.client_context,
+                    items,
+                    "list_items",
+                    self.collection_link,
+                    partition_key_range_id=key_range["id"],
+                )
+
+            fetch_next_page = self._parallel_page_fetcher(
+                open_range,
+                options,
+                max_buffered_item_count=max_buffered_item_count,
+            )
+        else:
+            options = self.client_context._apply_session_token(
+                self.collection_link, options
+            )
+            items = self.client_context.ReadItems(
+                collection_link=self.collection_link, feed_options=options
+            )
+            fetch_next_page = _page_fetcher(
+                self.client_context, items, "list_items", self.collection_link
+            )
+        yield from _items_of_pages(fetch_next_page)
 
     def query_items_change_feed(self, options=None):
         """ Get a sorted list of items that were changed, in the order in which they were modified.
         """
+        options = self.client_context._apply_session_token(
+            self.collection_link, dict(options or {})
+        )
         items = self.client_context.QueryItemsChangeFeed(
             self.collection_link, options=options
         )
-        headers = self.client_context.last_response_headers
-        yield from [Item(headers, item) for item in items]
+        fetch_next_page = _page_fetcher(
+            self.client_context, items, "query_items_change_feed", self.collection_link
+        )
+        yield from _items_of_pages(fetch_next_page)
 
     def query_items(
         self,
@@ -904,10 +2473,15 @@ class Container:
         disable_ru_per_minute_usage: "Optional[bool]" = None,
         enable_cross_partition_query: "Optional[bool]" = None,
         max_degree_parallelism: "Optional[int]" = None,
+        max_buffered_item_count: "Optional[int]" = None,
+        max_in_memory_group_count: "Optional[int]" = None,
         max_item_count: "Optional[int]" = None,
         session_token: "Optional[str]" = None,
         initial_headers: "Optional[Dict[str, Any]]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        continuation_token: "Optional[str]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+        raw: "bool" = False,
     ) -> "QueryResultIterator":
         """Return all results matching the given `query`.
 
@@ -917,10 +2491,30 @@ class Container:
         :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
         :param enable_cross_partition_query: Allow scan on the queries which couldn't be served as indexing was opted out on the requested paths.
         :param max_degree_parallelism: The maximum number of concurrent operations that run client side during parallel query execution in the Azure Cosmos DB database service. Negative values make the system automatically decides the number of concurrent operations to run.
+        :param max_buffered_item_count: Maximum number of results of a cross-partition query fetched ahead of the iterator. By default, as many pages are fetched ahead as are fetched concurrently.
+        :param max_in_memory_group_count: Maximum number of groups of a cross-partition `GROUP BY` query, or of distinct results of a `DISTINCT` query, held in memory while they're combined; more are spilled to temporary files. Defaults to 100000.
         :param max_item_count: Max number of items to be returned in the enumeration operation.
         :param session_token: Token for use with Session consistency.
         :param populate_query_metrics: Enable returning query metrics in response headers.
-        :returns: An `Iterator` containing each result returned by the query, if any.
+        :param continuation_token: Resume a previous query from :attr:`QueryResultIterator.continuation_token`.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :param raw: Iterate over undecoded pages of results instead: one :class:`RawPage` per page, holding a
+            `memoryview` of the JSON array of its results. Results that the client would have to merge
+            (e.g. of a cross-partition `ORDER BY` or aggregate) can't be returned raw.
+        :returns: A :class:`QueryResultIterator` containing each result returned by the query, if any.
+            The first page of results is requested before this method returns; later pages are
+            requested as the iterator is consumed.
+
+        A cross-partition query is sent to every partition key range of the container separately, up to
+        `max_degree_parallelism` ranges at a time, and its results are returned as they arrive from the
+        ranges. The results of an `ORDER BY` query are merged in order from the ranges, holding one page
+        of each range at a time, and `max_item_count` results per page. Ranges stop being queried once
+        the results of a query with `TOP` or `OFFSET ... LIMIT` are complete. Each range computes a partial
+        aggregate of a `SELECT VALUE` aggregate query (e.g. `SELECT VALUE AVG(p.price) FROM p`), from which
+        the aggregate is combined; likewise for the groups of a `GROUP BY` query, combined by key. The
+        results of a `DISTINCT` query are deduplicated across ranges. The results of `GROUP BY` and
+        `DISTINCT` queries can't be resumed from a continuation token. Queries whose results the client
+        can't merge yet are executed by the service.
 
         You can use any value for the container name in the FROM clause, but typically the container name is used.
         In the examples below, the container name is "products," and is aliased as "p" for easier referencing
@@ -943,34 +2537,103 @@ class Container:
             :name: query_items_param
 
         """
-        request_options: "Dict[str, Any]" = {}
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if enable_cross_partition_query is not None:
-            request_options["enableCrossPartitionQuery"] = enable_cross_partition_query
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if max_item_count is not None:
-            request_options["maxItemCount"] = max_item_count
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        items = self.client_context.QueryItems(
-            database_or_Container_link=self.collection_link,
-            query=query
-            if parameters is None
-            else dict(query=query, parameters=parameters),
-            options=request_options,
-            partition_key=partition_key,
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+        query_spec = (
+            query if parameters is None else dict(query=query, parameters=parameters)
+        )
+        plan = (
+            query_pipeline.plan_query(query, parameters)
+            if partition_key is None
+            and self._runs_in_parallel(options, continuation_token)
+            else None
+        )
+        if plan is not None and (plan.supports_raw or not raw):
+
+            def open_range(key_range, continuation):
+                range_options = dict(options)
+                _set_continuation(range_options, continuation)
+                range_options = self.client_context._apply_session_token(
+                    self.collection_link, range_options, None, key_range["id"]
+                )
+                items = self.client_context.QueryItems(
+                    database_or_Container_link=self.collection_link,
+                    query=(
+                        plan.range_query
+                        if parameters is None
+                        else dict(query=plan.range_query, parameters=parameters)
+                    ),
+                    options=range_options,
+                )
+                return _page_fetcher(
+                    self.client_context,
+                    items,
+                    "query_items",
+                    self.collection_link,
+                    raw=raw,
+                    partition_key_range_id=key_range["id"],
+                )
+
+            return QueryResultIterator(
+                self._parallel_page_fetcher(
+                    open_range,
+                    options,
+                    continuation_token,
+                    max_buffered_item_count,
+                    plan,
+                    max_in_memory_group_count,
+                )
+            )
+
+        _set_continuation(options, continuation_token)
+        partition_key_range_id = (
+            self._get_partition_key_range_id(partition_key)
+            if partition_key is not None
+            else None
+        )
+        options = self.client_context._apply_session_token(
+            self.collection_link, options, partition_key, partition_key_range_id
         )
-        headers = self.client_context.last_response_headers
-        self.session_token = headers["x-ms-session-token"]
-        items_iterator = iter(items)
-        return QueryResultIterator(items_iterator, metadata=ResponseMetadata(headers))
+
+        def start(partition_key_range_id: "Optional[str]") -> "QueryResultIterator":
+            items = self.client_context.QueryItems(
+                database_or_Container_link=self.collection_link,
+                query=query_spec,
+                # The backend keeps the continuation of the query in its options.
+                options=dict(options),
+                partition_key=partition_key,
+            )
+            return QueryResultIterator(
+                _page_fetcher(
+                    self.client_context,
+                    items,
+                    "query_items",
+                    self.collection_link,
+                    partition_key,
+                    raw,
+                    partition_key_range_id,
+                )
+            )
+
+        try:
+            return start(partition_key_range_id)
+        except HTTPFailure as failure:
+            if partition_key_range_id is None or not _is_partition_key_range_gone(
+                failure
+            ):
+                raise
+        # The range was split before the first page; later pages of a query started in a
+        # range that is split fail, as the continuation of the query is only valid in that range.
+        return start(self._get_partition_key_range_id(partition_key))
 
     def replace_item(
         self,
@@ -982,6 +2645,7 @@ class Container:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Item":
         """ Replaces the specified item if it exists in the container.
 
@@ -990,25 +2654,27 @@ class Container:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raises `HTTPFailure`:
         """
         item_link = self._get_document_link(item)
-        request_options: "Dict[str, Any]" = {}
-        request_options["disableIdGeneration"] = True
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-        data = self.client_context.ReplaceItem(
-            document_link=item_link, new_document=body, options=request_options
-        )
-        return Item(headers=self.client_context.last_response_headers, data=data)
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+        options["disableIdGeneration"] = True
+        data, response_metadata = self.client_context._execute(
+            self.collection_link,
+            self.client_context.ReplaceItem,
+            document_link=item_link,
+            new_document=body,
+            options=options,
+        )
+        return Item(headers=response_metadata, data=data)
 
     def upsert_item(
         self,
@@ -1019,6 +2685,7 @@ class Container:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Item":
         """ Insert or update the specified item.
 
@@ -1027,27 +2694,29 @@ class Container:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raises `HTTPFailure`:
 
         If the item already exists in the container, it is replaced. If it does not, it is inserted.
         """
-        request_options: "Dict[str, Any]" = {}
-        request_options["disableIdGeneration"] = True
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        result = self.client_context.UpsertItem(
-            database_or_Container_link=self.collection_link, document=body
-        )
-        return Item(headers=self.client_context.last_response_headers, data=result)
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+        options["disableIdGeneration"] = True
+
+        result, response_metadata = self.client_context._execute(
+            self.collection_link,
+            self.client_context.UpsertItem,
+            database_or_Container_link=self.collection_link,
+            document=body,
+            options=options,
+        )
+        return Item(headers=response_metadata, data=result)
 
     def create_item(
         self,
@@ -1058,6 +2727,7 @@ class Container:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "Item":
         """ Create an item in the container.
 
@@ -1066,31 +2736,171 @@ class Container:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :returns: The :class:`Item` inserted into the container.
         :raises `HTTPFailure`:
 
         To update or replace an existing item, use the :func:`Container.upsert_item` method.
 
         """
-        request_options: "Dict[str, Any]" = {}
-        request_options["disableIdGeneration"] = True
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
-
-        result = self.client_context.CreateItem(
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+        options["disableIdGeneration"] = True
+
+        result, response_metadata = self.client_context._execute(
+            self.collection_link,
+            self.client_context.CreateItem,
             database_or_Container_link=self.collection_link,
             document=body,
-            options=request_options,
+            options=options,
+        )
+        return Item(headers=response_metadata, data=result)
+
+    def _get_partition_key_of(self) -> "Callable[[Dict[str, Any]], Any]":
+        partition_key = self._partition_key or (self._properties or {}).get(
+            "partitionKey"
+        )
+        if not partition_key:
+            # Without the container definition the backend extracts the partition
+            # key from each document itself.
+            return lambda body: None
+        path = partition_key["paths"][0]
+        return lambda body: _get_partition_key_value(body, path)
+
+    def _write_items(
+        self,
+        write,
+        items: "Iterable[Dict[str, Any]]",
+        max_concurrency: "int",
+        batch_size: "int",
+        options: "Dict[str, Any]",
+    ) -> "Iterator[BulkOperationResult]":
+        def operation(body, partition_key):
+            item_options = options
+            if partition_key is not None:
+                item_options = dict(options, partitionKey=partition_key)
+            result, response_metadata = self.client_context._execute(
+                self.collection_link,
+                write,
+                database_or_Container_link=self.collection_link,
+                document=body,
+                options=item_options,
+            )
+            return Item(headers=response_metadata, data=result)
+
+        return bulk.execute(
+            items,
+            operation,
+            self._get_partition_key_of(),
+            max_concurrency=max_concurrency,
+            batch_size=batch_size,
+        )
+
+    def upsert_items(
+        self,
+        items: "Iterable[Dict[str, Any]]",
+        *,
+        max_concurrency: "int" = 8,
+        batch_size: "int" = 100,
+        disable_ru_per_minute_usage: "Optional[bool]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "Iterator[BulkOperationResult]":
+        """ Insert or update many items, keeping up to `max_concurrency` requests in flight.
+
+        `items` is consumed lazily, `batch_size` documents at a time, and each batch is grouped by
+        partition key before it is sent. A failed upsert doesn't stop the others: every document
+        produces a :class:`BulkOperationResult` holding either the upserted :class:`Item` or the
+        :class:`HTTPFailure` that was raised. Results are yielded as they complete, which is not
+        necessarily input order; use :attr:`BulkOperationResult.index` to correlate them.
+
+        The upserts only run as the returned iterator is consumed.
+
+        :param items: Dict-like objects representing the items to update or insert.
+        :param max_concurrency: Maximum number of upserts in flight at any time.
+        :param batch_size: Number of documents read from `items` and grouped by partition key at a time.
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param session_token: Token for use with Session consistency.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: An iterator of :class:`BulkOperationResult`, one per document.
+
+        .. literalinclude:: ../../examples/examples.py
+            :start-after: [START upsert_items_bulk]
+            :end-before: [END upsert_items_bulk]
+            :language: python
+            :dedent: 0
+            :caption: Upsert many items and report the ones that failed:
+            :name: upsert_items_bulk
+
+        """
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+        options["disableIdGeneration"] = True
+
+        return self._write_items(
+            self.client_context.UpsertItem,
+            items,
+            max_concurrency,
+            batch_size,
+            options,
+        )
+
+    def create_items(
+        self,
+        items: "Iterable[Dict[str, Any]]",
+        *,
+        max_concurrency: "int" = 8,
+        batch_size: "int" = 100,
+        disable_ru_per_minute_usage: "Optional[bool]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "Iterator[BulkOperationResult]":
+        """ Create many items, keeping up to `max_concurrency` requests in flight.
+
+        Behaves like :func:`Container.upsert_items`, except that documents whose ID already exists
+        in the container fail with a `409` :class:`HTTPFailure` in their result.
+
+        :param items: Dict-like objects representing the items to create.
+        :param max_concurrency: Maximum number of creates in flight at any time.
+        :param batch_size: Number of documents read from `items` and grouped by partition key at a time.
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param session_token: Token for use with Session consistency.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: An iterator of :class:`BulkOperationResult`, one per document.
+        """
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            populate_query_metrics=populate_query_metrics,
+        )
+        options["disableIdGeneration"] = True
+
+        return self._write_items(
+            self.client_context.CreateItem,
+            items,
+            max_concurrency,
+            batch_size,
+            options,
         )
-        return Item(headers=self.client_context.last_response_headers, data=result)
 
     def delete_item(
         self,
@@ -1103,6 +2913,7 @@ class Container:
         initial_headers: "Optional[Dict[str, Any]]" = None,
         access_condition: "Optional[AccessCondition]" = None,
         populate_query_metrics: "Optional[bool]" = None,
+        request_options: "Optional[RequestOptions]" = None,
     ) -> "None":
         """ Delete the specified item from the container.
 
@@ -1113,30 +2924,148 @@ class Container:
         :param session_token: Token for use with Session consistency.
         :param access_condition: Conditions Associated with the request.
         :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
         :raises `HTTPFailure`: The item wasn't deleted successfully. If the item does not exist in the container, a `404` error is returned.
 
         """
-        request_options: "Dict[str, Any]" = {}
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            max_degree_parallelism=max_degree_parallelism,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+        partition_key_range_id = None
         if partition_key:
-            request_options["partitionKey"] = partition_key
-        if disable_ru_per_minute_usage is not None:
-            request_options["disableRUPerMinuteUsage"] = disable_ru_per_minute_usage
-        if max_degree_parallelism is not None:
-            request_options["maxDegreeOfParallelism"] = max_degree_parallelism
-        if session_token:
-            request_options["sessionToken"] = session_token
-        if initial_headers:
-            request_options["initialHeaders"] = initial_headers
-        if access_condition:
-            request_options["accessCondition"] = access_condition
-        if populate_query_metrics is not None:
-            request_options["populateQueryMetrics"] = populate_query_metrics
+            options["partitionKey"] = partition_key
+            partition_key_range_id = self._get_partition_key_range_id(partition_key)
 
         document_link = self._get_document_link(item)
-        self.client_context.DeleteItem(
-            document_link=document_link, options=request_options or None
+        self._execute_in_range(
+            partition_key,
+            partition_key_range_id,
+            self.client_context.DeleteItem,
+            document_link=document_link,
+            options=options or None,
         )
 
+    def delete_items(
+        self,
+        query: "str",
+        parameters: "Optional[List]" = None,
+        *,
+        partition_key: "Optional[str]" = None,
+        max_concurrency: "int" = 8,
+        batch_size: "int" = 100,
+        progress_callback: "Optional[Callable[[int, int], None]]" = None,
+        disable_ru_per_minute_usage: "Optional[bool]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        request_options: "Optional[RequestOptions]" = None,
+    ) -> "Iterator[BulkOperationResult]":
+        """ Delete every item matching `query`, keeping up to `max_concurrency` deletes in flight.
+
+        The query results are streamed page by page and the deletes are issued in parallel,
+        grouped by partition key. Like :func:`Container.delete_item`, each delete is sent to the
+        partition key range of its partition key. A `SELECT * FROM ...` query is rewritten to
+        return only the `id` and partition key of each document; any other query must project
+        both of them.
+
+        Each matching document produces a :class:`BulkOperationResult`, yielded as its delete
+        completes; a failed delete doesn't stop the others. The deletes only run as the returned
+        iterator is consumed.
+
+        :param query: The Azure Cosmos DB SQL query selecting the items to delete.
+        :param parameters: Optional array of parameters to the query.
+        :param partition_key: Restrict the query to a single partition. If omitted, the query runs across partitions.
+        :param max_concurrency: Maximum number of deletes in flight at any time.
+        :param batch_size: Number of query results grouped by partition key at a time.
+        :param progress_callback: Called after each completed delete with the number of items deleted and failed so far.
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param session_token: Token for use with Session consistency.
+        :param request_options: A :class:`RequestOptions` profile of options for the request. Options passed as keyword arguments take precedence.
+        :returns: An iterator of :class:`BulkOperationResult`, one per matching document.
+
+        .. literalinclude:: ../../examples/examples.py
+            :start-after: [START delete_items]
+            :end-before: [END delete_items]
+            :language: python
+            :dedent: 0
+            :caption: Delete all items matching a query:
+            :name: delete_items
+
+        """
+        partition_key_definition = self.partition_key
+        partition_key_path = (
+            partition_key_definition["paths"][0] if partition_key_definition else None
+        )
+        projected_query = (
+            _project_id_and_partition_key(query, partition_key_path)
+            if partition_key_path
+            else None
+        )
+
+        if projected_query:
+            partition_key_of = lambda document: document.get("_pk", {})
+        elif partition_key_path:
+            partition_key_of = lambda document: _get_partition_key_value(
+                document, partition_key_path
+            )
+        else:
+            partition_key_of = lambda document: None
+
+        documents = self.query_items(
+            projected_query or query,
+            parameters,
+            partition_key=partition_key,
+            enable_cross_partition_query=partition_key is None,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            request_options=request_options,
+        )
+
+        options = build_request_options(
+            request_options,
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+        )
+
+        def operation(document, partition_key_value):
+            item_options = options
+            partition_key_range_id = None
+            if partition_key_value is not None:
+                item_options = dict(options, partitionKey=partition_key_value)
+                partition_key_range_id = self._get_partition_key_range_id(
+                    partition_key_value
+                )
+            self._execute_in_range(
+                partition_key_value,
+                partition_key_range_id,
+                self.client_context.DeleteItem,
+                document_link=self._get_document_link(document["id"]),
+                options=item_options or None,
+            )
+
+        deleted = failed = 0
+        for result in bulk.execute(
+            documents,
+            operation,
+            partition_key_of,
+            max_concurrency=max_concurrency,
+            batch_size=batch_size,
+        ):
+            if result.succeeded:
+                deleted += 1
+            else:
+                failed += 1
+            if progress_callback:
+                progress_callback(deleted, failed)
+            yield result
+
     def list_stored_procedures(self, query):
         pass
 
@@ -0,0 +1,1077 @@
+"""
+Asynchronous counterparts of :class:`CosmosClient`, :class:`Database` and :class:`Container` for use with asyncio.
+
+Requests are sent over a single non-blocking connection pool shared by every handle created
+from the same :class:`AsyncCosmosClient`, so one process can keep many requests in flight
+without a thread per request. The asyncio client requires the optional `aiohttp` package.
+"""
+
+__all__ = ["AsyncCosmosClient", "AsyncDatabase", "AsyncContainer"]
+
+import asyncio
+import base64
+import json
+import time
+import urllib.parse
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, cast
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+
+from . import (
+    AccessCondition,
+    HTTPFailure,
+    Item,
+    PartitionKey,
+    ResponseMetadata,
+    _COLLECTION_LINK_PATTERN,
+    _get_partition_key_value,
+)
+from .auth import get_authorization_header, http_date
+from .codec import DEFAULT_CODEC, JsonCodec, RawItem, RawPage
+from .instrumentation import OperationObserver, _notify_observers
+from .query_iterator import AsyncQueryResultIterator
+from .session import SessionTokenManager
+from .throttling import RequestUnitRateLimiter, ThrottlingRetryPolicy, get_request_charge
+
+_API_VERSION = "2018-12-31"
+
+AsyncDatabaseId = Union["AsyncDatabase", Dict[str, Any], str]
+AsyncContainerId = Union["AsyncContainer", Dict[str, Any], str]
+
+
+def _build_headers(
+    *,
+    disable_ru_per_minute_usage: "Optional[bool]" = None,
+    enable_cross_partition_query: "Optional[bool]" = None,
+    max_item_count: "Optional[int]" = None,
+    session_token: "Optional[str]" = None,
+    initial_headers: "Optional[Dict[str, Any]]" = None,
+    access_condition: "Optional[AccessCondition]" = None,
+    populate_query_metrics: "Optional[bool]" = None,
+    partition_key: "Any" = None,
+    continuation: "Optional[str]" = None,
+) -> "Dict[str, str]":
+    headers: "Dict[str, str]" = dict(initial_headers or {})
+    if disable_ru_per_minute_usage is not None:
+        headers["x-ms-documentdb-disable-ru-per-minute-usage"] = str(
+            disable_ru_per_minute_usage
+        )
+    if enable_cross_partition_query is not None:
+        headers["x-ms-documentdb-query-enablecrosspartition"] = str(
+            enable_cross_partition_query
+        )
+    if max_item_count is not None:
+        headers["x-ms-max-item-count"] = str(max_item_count)
+    if session_token:
+        headers["x-ms-session-token"] = session_token
+    if access_condition:
+        header = "If-Match" if access_condition["type"] == "IfMatch" else "If-None-Match"
+        headers[header] = access_condition["condition"]
+    if populate_query_metrics is not None:
+        headers["x-ms-documentdb-populatequerymetrics"] = str(populate_query_metrics)
+    if partition_key is not None:
+        headers["x-ms-documentdb-partitionkey"] = json.dumps([partition_key])
+    if continuation:
+        headers["x-ms-continuation"] = continuation
+    return headers
+
+
+class AsyncClientContext:
+    """ Sends requests to the Cosmos DB REST API over a shared, non-blocking connection pool.
+
+    Requests go through the same pipeline pieces as those of :class:`~azure.cosmos.CosmosClient`:
+    session tokens are tracked per container and partition key range by `session_tokens`,
+    requests are paced by `rate_limiter` and retried according to `retry_policy` while they are
+    throttled, and every completed request is reported to the `observers`. Waits never block
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        url: "str",
+        key: "str",
+        *,
+        consistency_level: "Optional[str]" = "Session",
+        connection_limit: "int" = 100,
+        connection_limit_per_host: "int" = 0,
+        session: "Optional[aiohttp.ClientSession]" = None,
+        codec: "Optional[JsonCodec]" = None,
+        retry_policy: "Optional[ThrottlingRetryPolicy]" = None,
+        rate_limiter: "Optional[RequestUnitRateLimiter]" = None,
+        observers: "Optional[Iterable[OperationObserver]]" = None,
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "The asyncio client requires aiohttp. Install it with 'pip install aiohttp'."
+            )
+        self.url = url.rstrip("/")
+        self.master_key = base64.b64decode(key)
+        self.consistency_level = consistency_level
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self._session = session
+        self._owns_session = session is None
+        self.codec = codec if codec is not None else DEFAULT_CODEC
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else ThrottlingRetryPolicy()
+        )
+        self.rate_limiter = rate_limiter
+        self.observers: "List[OperationObserver]" = list(observers or ())
+        self.session_tokens: "Optional[SessionTokenManager]" = (
+            SessionTokenManager() if consistency_level == "Session" else None
+        )
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        # The session is created lazily since aiohttp requires a running event loop.
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(
+        self,
+        verb: "str",
+        resource_type: "str",
+        resource_link: "str",
+        *,
+        is_feed: "bool" = False,
+        body: "Any" = None,
+        headers: "Optional[Dict[str, str]]" = None,
+        is_query: "bool" = False,
+        is_upsert: "bool" = False,
+        raw: "bool" = False,
+        operation: "str" = "",
+        partition_key: "Any" = None,
+    ) -> "Tuple[Any, ResponseMetadata]":
+        """ Send a single request and return the decoded body along with the response headers.
+
+        :param verb: HTTP verb of the request.
+        :param resource_type: Type of the addressed resource (`dbs`, `colls`, `docs`).
+        :param resource_link: Name-based link of the addressed resource, or of its parent for feed requests.
+        :param is_feed: Whether the request addresses the feed of `resource_type` under `resource_link`.
+        :param raw: Return the body undecoded, as `bytes`.
+        :param operation: Name under which the request is paced and reported to observers, e.g. `get_item`.
+        :param partition_key: The partition key value the request targets, if any.
+        :raise `HTTPFailure`: The service returned an error status code.
+
+        Requests are paced by :attr:`rate_limiter`, and throttled requests (HTTP 429) are retried
+        according to :attr:`retry_policy`, after waiting as long as the service asked without
+        blocking the event loop. The session token of the response is tracked, and the request
+        is reported to the :attr:`observers` once it completes.
+        """
+        path = f"{resource_link}/{resource_type}".lstrip("/") if is_feed else resource_link
+        date = http_date()
+        request_headers = {
+            "x-ms-version": _API_VERSION,
+            "x-ms-date": date,
+            "authorization": get_authorization_header(
+                self.master_key, verb, resource_type, resource_link, date
+            ),
+            "Accept": "application/json",
+        }
+        if self.consistency_level:
+            request_headers["x-ms-consistency-level"] = self.consistency_level
+        if headers:
+            request_headers.update(headers)
+        data = None
+        if body is not None:
+            data = self.codec.encode_bytes(body)
+            if is_query:
+                request_headers["Content-Type"] = "application/query+json"
+                request_headers["x-ms-documentdb-isquery"] = "True"
+            else:
+                request_headers["Content-Type"] = "application/json"
+        if is_upsert:
+            request_headers["x-ms-documentdb-is-upsert"] = "True"
+
+        url = f"{self.url}/{urllib.parse.quote(path, safe='/')}"
+        started = time.perf_counter()
+        attempt = 0
+        waited = 0.0
+        while True:
+            reserved = 0.0
+            if self.rate_limiter is not None:
+                reserved, pacing_delay = self.rate_limiter._reserve(operation)
+                if pacing_delay:
+                    await asyncio.sleep(pacing_delay)
+            async with self._get_session().request(
+                verb, url, data=data, headers=request_headers
+            ) as response:
+                payload = await response.read()
+                response_headers = ResponseMetadata(
+                    (name.lower(), value) for name, value in response.headers.items()
+                )
+                status = response.status
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(
+                    operation, reserved, get_request_charge(response_headers), status == 429
+                )
+            if status == 429:
+                delay = self.retry_policy.get_retry_delay(
+                    attempt, response_headers, waited
+                )
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    waited += delay
+                    continue
+            break
+        self._track_session_token(resource_link, response_headers, partition_key)
+        failure = (
+            HTTPFailure(status, payload.decode("utf-8", "replace"), response_headers)
+            if status >= 400
+            else None
+        )
+        if self.observers:
+            _notify_observers(
+                self.observers,
+                operation,
+                resource_link,
+                partition_key,
+                time.perf_counter() - started,
+                response_headers,
+                request_size=len(data) if data is not None else None,
+                retry_count=attempt,
+                error=failure,
+            )
+        if failure is not None:
+            raise failure
+        if raw:
+            return payload, response_headers
+        return (self.codec.decode(payload) if payload else None), response_headers
+
+    def _track_session_token(
+        self, resource_link: "str", headers: "Dict[str, Any]", partition_key: "Any"
+    ):
+        if self.session_tokens is None:
+            return
+        match = _COLLECTION_LINK_PATTERN.match(resource_link)
+        if match:
+            self.session_tokens.update(match.group(0), headers, partition_key)
+
+    def _session_token(
+        self,
+        collection_link: "str",
+        session_token: "Optional[str]",
+        partition_key: "Any" = None,
+    ) -> "Optional[str]":
+        """ The session token to send with a read from `collection_link`.
+
+        An explicitly requested session token is used as is; otherwise the tracked token of
+        the partition key range of `partition_key` if it is known, or of every range of the container.
+        """
+        if session_token or self.session_tokens is None:
+            return session_token
+        return self.session_tokens.get(collection_link, partition_key)
+
+    def query_pages(
+        self,
+        resource_type: "str",
+        resource_link: "str",
+        result_key: "str",
+        *,
+        query: "Optional[Union[str, Dict[str, Any]]]" = None,
+        headers: "Optional[Dict[str, str]]" = None,
+        continuation: "Optional[str]" = None,
+        raw: "bool" = False,
+        operation: "str" = "",
+        partition_key: "Any" = None,
+    ):
+        """ Return a page fetch function for :class:`AsyncQueryResultIterator` over a feed or query.
+
+        :param result_key: Key of the results array in each response body (`Documents`, `Databases`, ...).
+        :param query: Query to run against the feed. Reads the whole feed if omitted.
+        :param continuation: Continuation token to resume from.
+        :param raw: Return each page as a list holding a single :class:`~azure.cosmos.RawPage`.
+        :param operation: Name under which each page is paced and reported to observers, e.g. `query_items`.
+        :param partition_key: The partition key value the query is scoped to, if any.
+        """
+        state = {"continuation": continuation, "started": False}
+        if isinstance(query, str):
+            query = dict(query=query, parameters=[])
+
+        async def fetch_next_page():
+            if state["started"] and not state["continuation"]:
+                return [], ResponseMetadata()
+            state["started"] = True
+            page_headers = dict(headers or {})
+            if state["continuation"]:
+                page_headers["x-ms-continuation"] = state["continuation"]
+            result, response_headers = await self.request(
+                "POST" if query is not None else "GET",
+                resource_type,
+                resource_link,
+                is_feed=True,
+                body=query,
+                headers=page_headers,
+                is_query=query is not None,
+                raw=raw,
+                operation=operation,
+                partition_key=partition_key,
+            )
+            state["continuation"] = response_headers.get("x-ms-continuation")
+            if raw:
+                page = (
+                    RawPage.from_body(response_headers, result, self.codec)
+                    if result
+                    else None
+                )
+                return ([page] if page is not None else []), response_headers
+            return result.get(result_key, []), response_headers
+
+        return fetch_next_page
+
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+
+class AsyncCosmosClient:
+    """
+    Asynchronous client-side logical representation of an Azure Cosmos DB account.
+
+    All :class:`AsyncDatabase` and :class:`AsyncContainer` handles obtained from the client share
+    its connection pool. Close the client with :meth:`close`, or use it as an async context manager.
+    """
+
+    def __init__(
+        self,
+        url: "str",
+        key: "str",
+        consistency_level: "Optional[str]" = "Session",
+        *,
+        connection_limit: "int" = 100,
+        connection_limit_per_host: "int" = 0,
+        session: "Optional[aiohttp.ClientSession]" = None,
+        codec: "Optional[JsonCodec]" = None,
+        retry_policy: "Optional[ThrottlingRetryPolicy]" = None,
+        rate_limiter: "Optional[RequestUnitRateLimiter]" = None,
+        observers: "Optional[Iterable[OperationObserver]]" = None,
+    ):
+        """ Instantiate a new AsyncCosmosClient.
+
+        :param url: The URL of the Cosmos DB account. Any HTTP endpoint implementing the Cosmos DB REST API can be used.
+        :param key: The account master key.
+        :param consistency_level: Consistency level to use for the session.
+        :param connection_limit: Maximum number of simultaneously open connections in the shared pool.
+        :param connection_limit_per_host: Maximum number of simultaneously open connections to a single host; 0 means unlimited.
+        :param session: An existing `aiohttp.ClientSession` to send requests with. It isn't closed by :meth:`close`.
+        :param codec: The :class:`~azure.cosmos.JsonCodec` serializing request and response bodies. Defaults to the standard library.
+        :param retry_policy: How requests that were throttled (HTTP 429) are retried. Defaults to a
+            :class:`~azure.cosmos.ThrottlingRetryPolicy` with default settings.
+        :param rate_limiter: Pace the requests of this client to a budget of request units per second. A
+            :class:`~azure.cosmos.RequestUnitRateLimiter` can be shared with other clients, synchronous or not,
+            using the same throughput.
+        :param observers: :class:`~azure.cosmos.OperationObserver` instances notified of every request of this client.
+            More can be added to :attr:`observers`.
+        """
+        self.client_context = AsyncClientContext(
+            url,
+            key,
+            consistency_level=consistency_level,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            session=session,
+            codec=codec,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            observers=observers,
+        )
+
+    @property
+    def observers(self) -> "List[OperationObserver]":
+        """ The observers notified of every request of this client.
+
+        The list can be modified to add or remove observers.
+        """
+        return self.client_context.observers
+
+    @property
+    def session_tokens(self) -> "Optional[SessionTokenManager]":
+        """ The session tokens received by this client, or None unless the consistency level is Session.
+
+        Reads from a container are sent the tracked token of the partition key range they target, when known.
+        """
+        return self.client_context.session_tokens
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """ Close the connection pool used by the client.
+        """
+        await self.client_context.close()
+
+    @staticmethod
+    def _get_database_link(database_or_id: AsyncDatabaseId) -> "str":
+        if isinstance(database_or_id, str):
+            return f"dbs/{database_or_id}"
+        try:
+            return cast("AsyncDatabase", database_or_id).database_link
+        except AttributeError:
+            pass
+        database_id = cast("Dict[str, str]", database_or_id)["id"]
+        return f"dbs/{database_id}"
+
+    async def create_database(
+        self,
+        id: "str",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+    ) -> "AsyncDatabase":
+        """Create a new database with the given ID (name).
+
+        :param id: ID (name) of the database to create.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :returns: An :class:`AsyncDatabase` instance representing the new database.
+        :raises `HTTPFailure`: If a database with the given ID already exists.
+        """
+        properties, headers = await self.client_context.request(
+            "POST",
+            "dbs",
+            "",
+            is_feed=True,
+            body=dict(id=id),
+            headers=_build_headers(
+                session_token=session_token,
+                initial_headers=initial_headers,
+                access_condition=access_condition,
+            ),
+            operation="create_database",
+        )
+        return AsyncDatabase(
+            self.client_context,
+            properties["id"],
+            properties=properties,
+            response_metadata=headers,
+        )
+
+    async def get_database(
+        self,
+        database: AsyncDatabaseId,
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+    ) -> "AsyncDatabase":
+        """
+        Retrieve an existing database with the ID (name) `id`.
+
+        :param database: The ID (name) or :class:`AsyncDatabase` instance of the database to retrieve.
+        :param session_token: Token for use with Session consistency.
+        :raise `HTTPFailure`: If the given database couldn't be retrieved.
+        """
+        properties, headers = await self.client_context.request(
+            "GET",
+            "dbs",
+            AsyncCosmosClient._get_database_link(database),
+            headers=_build_headers(
+                session_token=session_token, initial_headers=initial_headers
+            ),
+            operation="get_database",
+        )
+        return AsyncDatabase(
+            self.client_context,
+            properties["id"],
+            properties=properties,
+            response_metadata=headers,
+        )
+
+    def list_databases(
+        self,
+        *,
+        max_item_count: "Optional[int]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+    ) -> "AsyncQueryResultIterator":
+        """
+        List the properties of the databases in a Cosmos DB SQL database account.
+
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        :param session_token: Token for use with Session consistency.
+        """
+        return AsyncQueryResultIterator(
+            self.client_context.query_pages(
+                "dbs",
+                "",
+                "Databases",
+                headers=_build_headers(
+                    max_item_count=max_item_count,
+                    session_token=session_token,
+                    initial_headers=initial_headers,
+                ),
+                operation="list_databases",
+            )
+        )
+
+    async def delete_database(
+        self,
+        database: AsyncDatabaseId,
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+    ):
+        """
+        Delete the database with the given ID (name).
+
+        :param database: The ID (name) or :class:`AsyncDatabase` instance of the database to delete.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :raise HTTPFailure: If the database couldn't be deleted.
+        """
+        database_link = AsyncCosmosClient._get_database_link(database)
+        await self.client_context.request(
+            "DELETE",
+            "dbs",
+            database_link,
+            headers=_build_headers(
+                session_token=session_token,
+                initial_headers=initial_headers,
+                access_condition=access_condition,
+            ),
+            operation="delete_database",
+        )
+        if self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.invalidate(database_link)
+
+
+class AsyncDatabase:
+    """ Asynchronous representation of an Azure Cosmos DB SQL API database.
+
+    :ivar id: The ID (name) of the database.
+    :ivar properties: A dictionary of system-generated properties for this database.
+    """
+
+    def __init__(
+        self,
+        client_context: "AsyncClientContext",
+        id: "str",
+        *,
+        properties: "Optional[Dict[str, Any]]" = None,
+        response_metadata: "Optional[ResponseMetadata]" = None,
+    ):
+        """
+        :param client_context: Client from which this database was retrieved.
+        :param str id: ID (name) of the database.
+        """
+        self.client_context = client_context
+        self.id = id
+        self.properties = properties
+        self.response_metadata = response_metadata
+        self.database_link = AsyncCosmosClient._get_database_link(id)
+
+    def _get_container_link(self, container_or_id: AsyncContainerId) -> "str":
+        if isinstance(container_or_id, str):
+            return f"{self.database_link}/colls/{container_or_id}"
+        try:
+            return cast("AsyncContainer", container_or_id).collection_link
+        except AttributeError:
+            pass
+        container_id = cast("Dict[str, str]", container_or_id)["id"]
+        return f"{self.database_link}/colls/{container_id}"
+
+    async def create_container(
+        self,
+        id: "str",
+        partition_key: "PartitionKey",
+        *,
+        indexing_policy: "Optional[Dict[str, Any]]" = None,
+        default_ttl: "Optional[int]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        offer_throughput: "Optional[int]" = None,
+    ) -> "AsyncContainer":
+        """
+        Create a new container with the given ID (name).
+
+        :param id: ID (name) of container to create.
+        :param partition_key: The partition key to use for the container.
+        :param indexing_policy: The indexing policy to apply to the container.
+        :param default_ttl: Default time to live (TTL) for items in the container. If unspecified, items do not expire.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :param offer_throughput: The provisioned throughput for this offer.
+        :raise HTTPFailure: The container creation failed.
+        """
+        definition: "Dict[str, Any]" = dict(id=id)
+        if partition_key:
+            definition["partitionKey"] = partition_key
+        if indexing_policy:
+            definition["indexingPolicy"] = indexing_policy
+        if default_ttl:
+            definition["defaultTtl"] = default_ttl
+        headers = _build_headers(
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+        )
+        if offer_throughput is not None:
+            headers["x-ms-offer-throughput"] = str(offer_throughput)
+
+        properties, _ = await self.client_context.request(
+            "POST",
+            "colls",
+            self.database_link,
+            is_feed=True,
+            body=definition,
+            headers=headers,
+            operation="create_container",
+        )
+        return AsyncContainer(self.client_context, self, properties["id"], properties)
+
+    async def get_container(
+        self,
+        container: AsyncContainerId,
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+    ) -> "AsyncContainer":
+        """ Get the specified container, or a container with specified ID (name).
+
+        :param container: The ID (name) of the container, or an :class:`AsyncContainer` instance.
+        :param session_token: Token for use with Session consistency.
+        :raise `HTTPFailure`: Raised if the container couldn't be retrieved. This includes if the container does not exist.
+        """
+        properties, _ = await self.client_context.request(
+            "GET",
+            "colls",
+            self._get_container_link(container),
+            headers=_build_headers(
+                session_token=session_token, initial_headers=initial_headers
+            ),
+            operation="get_container",
+        )
+        return AsyncContainer(self.client_context, self, properties["id"], properties)
+
+    def list_containers(
+        self,
+        *,
+        max_item_count: "Optional[int]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+    ) -> "AsyncQueryResultIterator":
+        """ List the properties of the containers in the database.
+
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        :param session_token: Token for use with Session consistency.
+        """
+        return AsyncQueryResultIterator(
+            self.client_context.query_pages(
+                "colls",
+                self.database_link,
+                "DocumentCollections",
+                headers=_build_headers(
+                    max_item_count=max_item_count,
+                    session_token=session_token,
+                    initial_headers=initial_headers,
+                ),
+                operation="list_containers",
+            )
+        )
+
+    async def delete_container(
+        self,
+        container: AsyncContainerId,
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+    ):
+        """ Delete the container
+
+        :param container: The ID (name) of the container to delete, or an :class:`AsyncContainer` instance.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        """
+        collection_link = self._get_container_link(container)
+        await self.client_context.request(
+            "DELETE",
+            "colls",
+            collection_link,
+            headers=_build_headers(
+                session_token=session_token,
+                initial_headers=initial_headers,
+                access_condition=access_condition,
+            ),
+            operation="delete_container",
+        )
+        if self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.invalidate(collection_link)
+
+
+class AsyncContainer:
+    """ Asynchronous representation of an Azure Cosmos DB container.
+
+    :ivar str id: ID (name) of the container
+    """
+
+    def __init__(
+        self,
+        client_context: "AsyncClientContext",
+        database: "Union[AsyncDatabase, str]",
+        id: "str",
+        properties: "Optional[Dict[str, Any]]" = None,
+    ):
+        self.client_context = client_context
+        self.id = id
+        self.properties = properties
+        database_link = AsyncCosmosClient._get_database_link(database)
+        self.collection_link = f"{database_link}/colls/{self.id}"
+
+    def _get_document_link(
+        self, item_or_link: "Union[str, Dict[str, Any], Item]"
+    ) -> "str":
+        if isinstance(item_or_link, str):
+            return f"{self.collection_link}/docs/{item_or_link}"
+        return f"{self.collection_link}/docs/{cast('Dict[str, Any]', item_or_link)['id']}"
+
+    async def _get_partition_key(self, body: "Dict[str, Any]") -> "Any":
+        if self.properties is None:
+            self.properties, _ = await self.client_context.request(
+                "GET", "colls", self.collection_link, operation="get_container"
+            )
+        partition_key = self.properties.get("partitionKey")
+        if not partition_key:
+            return None
+        return _get_partition_key_value(body, partition_key["paths"][0])
+
+    @property
+    def session_token(self) -> "Optional[str]":
+        """ The session token covering every partition key range of the container seen by this client.
+
+        None unless the client uses Session consistency. Setting it merges the given token into
+        the tokens tracked for the container.
+        """
+        if self.client_context.session_tokens is None:
+            return None
+        return self.client_context.session_tokens.get(self.collection_link)
+
+    @session_token.setter
+    def session_token(self, value: "Optional[str]"):
+        if value and self.client_context.session_tokens is not None:
+            self.client_context.session_tokens.set(self.collection_link, value)
+
+    async def get_item(
+        self,
+        id: "str",
+        partition_key: "Any",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+        raw: "bool" = False,
+    ) -> "Union[Item, RawItem]":
+        """
+        Get the item identified by `id`.
+
+        :param id: ID of item to retrieve.
+        :param partition_key: Partition key for the item to retrieve.
+        :param session_token: Token for use with Session consistency. Defaults to the container's session token.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param raw: Return the item undecoded, as a :class:`~azure.cosmos.RawItem` holding the bytes of the response body.
+        :returns: :class:`Item`, if present in the container.
+        :raises `HTTPFailure`: The item couldn't be retrieved. If the item does not exist in the container, a `404` error is returned.
+        """
+        result, headers = await self.client_context.request(
+            "GET",
+            "docs",
+            self._get_document_link(id),
+            headers=_build_headers(
+                session_token=self.client_context._session_token(
+                    self.collection_link, session_token, partition_key
+                ),
+                initial_headers=initial_headers,
+                populate_query_metrics=populate_query_metrics,
+                partition_key=partition_key,
+            ),
+            raw=raw,
+            operation="get_item",
+            partition_key=partition_key,
+        )
+        if raw:
+            return RawItem(headers, result)
+        return Item(headers=headers, data=result)
+
+    def list_items(
+        self,
+        *,
+        enable_cross_partition_query: "Optional[bool]" = None,
+        max_item_count: "Optional[int]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "AsyncQueryResultIterator":
+        """ List all items in the container, one page at a time.
+
+        :param enable_cross_partition_query: Allow scan on the queries which couldn't be served as indexing was opted out on the requested paths.
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        :param session_token: Token for use with Session consistency.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :returns: An :class:`AsyncQueryResultIterator` of :class:`Item`.
+        """
+        fetch_next_page = self.client_context.query_pages(
+            "docs",
+            self.collection_link,
+            "Documents",
+            headers=_build_headers(
+                enable_cross_partition_query=enable_cross_partition_query,
+                max_item_count=max_item_count,
+                session_token=self.client_context._session_token(
+                    self.collection_link, session_token
+                ),
+                initial_headers=initial_headers,
+                populate_query_metrics=populate_query_metrics,
+            ),
+            operation="list_items",
+        )
+
+        async def fetch_next_items():
+            page, headers = await fetch_next_page()
+            return [Item(headers=headers, data=item) for item in page], headers
+
+        return AsyncQueryResultIterator(fetch_next_items)
+
+    def query_items(
+        self,
+        query: "str",
+        parameters: "Optional[List]" = None,
+        *,
+        partition_key: "Optional[Any]" = None,
+        enable_cross_partition_query: "Optional[bool]" = None,
+        max_item_count: "Optional[int]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+        continuation_token: "Optional[str]" = None,
+        raw: "bool" = False,
+    ) -> "AsyncQueryResultIterator":
+        """Return all results matching the given `query`.
+
+        :param query: The Azure Cosmos DB SQL query to execute.
+        :param parameters: Optional array of parameters to the query.
+        :param partition_key: Specifies the partition key value for the item.
+        :param enable_cross_partition_query: Allow scan on the queries which couldn't be served as indexing was opted out on the requested paths.
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        :param session_token: Token for use with Session consistency.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param continuation_token: Resume a previous query from :attr:`AsyncQueryResultIterator.continuation_token`.
+        :param raw: Iterate over undecoded pages of results instead: one :class:`~azure.cosmos.RawPage` per page,
+            holding a `memoryview` of the JSON array of its results.
+        :returns: An :class:`AsyncQueryResultIterator` containing each result returned by the query, if any.
+            Results that are documents or projections are returned as :class:`Item`; scalar results
+            (e.g. of `SELECT VALUE COUNT(1) ...`) are returned as is.
+
+        .. code-block:: python
+
+            async for item in container.query_items("SELECT * FROM c WHERE c.price > 10"):
+                print(item["id"])
+        """
+        fetch_next_page = self.client_context.query_pages(
+            "docs",
+            self.collection_link,
+            "Documents",
+            query=dict(query=query, parameters=parameters or []),
+            headers=_build_headers(
+                enable_cross_partition_query=enable_cross_partition_query,
+                max_item_count=max_item_count,
+                session_token=self.client_context._session_token(
+                    self.collection_link, session_token, partition_key
+                ),
+                initial_headers=initial_headers,
+                populate_query_metrics=populate_query_metrics,
+                partition_key=partition_key,
+            ),
+            continuation=continuation_token,
+            raw=raw,
+            operation="query_items",
+            partition_key=partition_key,
+        )
+        if raw:
+            return AsyncQueryResultIterator(fetch_next_page)
+
+        async def fetch_next_items():
+            page, headers = await fetch_next_page()
+            return (
+                [
+                    Item(headers=headers, data=result)
+                    if isinstance(result, dict)
+                    else result
+                    for result in page
+                ],
+                headers,
+            )
+
+        return AsyncQueryResultIterator(fetch_next_items)
+
+    async def _write_item(
+        self,
+        operation: "str",
+        verb: "str",
+        resource_link: "str",
+        body: "Dict[str, Any]",
+        *,
+        is_feed: "bool" = False,
+        is_upsert: "bool" = False,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "Item":
+        partition_key = await self._get_partition_key(body)
+        result, headers = await self.client_context.request(
+            verb,
+            "docs",
+            resource_link,
+            is_feed=is_feed,
+            is_upsert=is_upsert,
+            body=body,
+            headers=_build_headers(
+                session_token=session_token,
+                initial_headers=initial_headers,
+                access_condition=access_condition,
+                populate_query_metrics=populate_query_metrics,
+                partition_key=partition_key,
+            ),
+            operation=operation,
+            partition_key=partition_key,
+        )
+        return Item(headers=headers, data=result)
+
+    async def create_item(
+        self,
+        body: "Dict[str, Any]",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "Item":
+        """ Create an item in the container.
+
+        :param body: A dict-like object representing the item to create.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :returns: The :class:`Item` inserted into the container.
+        :raises `HTTPFailure`:
+        """
+        return await self._write_item(
+            "create_item",
+            "POST",
+            self.collection_link,
+            body,
+            is_feed=True,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+    async def upsert_item(
+        self,
+        body: "Dict[str, Any]",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "Item":
+        """ Insert or update the specified item.
+
+        :param body: A dict-like object representing the item to update or insert.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :raises `HTTPFailure`:
+        """
+        return await self._write_item(
+            "upsert_item",
+            "POST",
+            self.collection_link,
+            body,
+            is_feed=True,
+            is_upsert=True,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+    async def replace_item(
+        self,
+        item: "Union[Item, str]",
+        body: "Dict[str, Any]",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "Item":
+        """ Replaces the specified item if it exists in the container.
+
+        :param item: The ID or :class:`Item` of the item to replace.
+        :param body: A dict-like object representing the item to replace.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :raises `HTTPFailure`:
+        """
+        return await self._write_item(
+            "replace_item",
+            "PUT",
+            self._get_document_link(item),
+            body,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+        )
+
+    async def delete_item(
+        self,
+        item: "Union[Item, Dict[str, Any], str]",
+        partition_key: "Any",
+        *,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[AccessCondition]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+    ) -> "None":
+        """ Delete the specified item from the container.
+
+        :param item: The ID or :class:`Item` of the item to delete.
+        :param partition_key: Specifies the partition key value for the item.
+        :param session_token: Token for use with Session consistency.
+        :param access_condition: Conditions Associated with the request.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :raises `HTTPFailure`: The item wasn't deleted successfully. If the item does not exist in the container, a `404` error is returned.
+        """
+        await self.client_context.request(
+            "DELETE",
+            "docs",
+            self._get_document_link(item),
+            headers=_build_headers(
+                session_token=session_token,
+                initial_headers=initial_headers,
+                access_condition=access_condition,
+                populate_query_metrics=populate_query_metrics,
+                partition_key=partition_key,
+            ),
+            operation="delete_item",
+            partition_key=partition_key,
+        )
@@ -0,0 +1,35 @@
+"""
+Request signing for the Azure Cosmos DB REST API.
+"""
+
+import base64
+import hashlib
+import hmac
+import urllib.parse
+from email.utils import formatdate
+
+
+def http_date() -> "str":
+    """ The current time formatted for the `x-ms-date` header.
+    """
+    return formatdate(usegmt=True)
+
+
+def get_authorization_header(
+    master_key: "bytes", verb: "str", resource_type: "str", resource_link: "str", date: "str"
+) -> "str":
+    """ Compute the `authorization` header value for a request signed with an account master key.
+
+    See https://docs.microsoft.com/rest/api/cosmos-db/access-control-on-cosmosdb-resources for
+    the format of the signed payload.
+
+    :param master_key: The base64-decoded account key.
+    :param verb: HTTP verb of the request.
+    :param resource_type: Type of the resource the request addresses (`dbs`, `colls`, `docs`, ...).
+    :param resource_link: Name-based link of the addressed resource; for feed requests this is the link of the parent.
+    :param date: Value of the `x-ms-date` header sent with the request.
+    """
+    payload = f"{verb.lower()}\n{resource_type.lower()}\n{resource_link}\n{date.lower()}\n\n"
+    digest = hmac.new(master_key, payload.encode("utf-8"), hashlib.sha256).digest()
+    signature = base64.b64encode(digest).decode("utf-8")
+    return urllib.parse.quote(f"type=master&ver=1.0&sig={signature}", safe="-_.!~*'()")
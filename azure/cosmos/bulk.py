@@ -0,0 +1,134 @@
+"""
+Bounded-concurrency execution of many independent item operations.
+"""
+
+import concurrent.futures
+import itertools
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class BulkOperationResult:
+    """ The outcome of a single operation performed as part of a bulk request.
+
+    :ivar index: Position of the input in the iterable passed to the bulk method.
+    :ivar input: The document or item reference the operation was performed for.
+    :ivar partition_key: The partition key value the operation was grouped under, if known.
+    :ivar result: The value returned by the operation, or None if it failed.
+    :ivar error: The exception raised by the operation, or None if it succeeded.
+    """
+
+    __slots__ = ("index", "input", "partition_key", "result", "error")
+
+    def __init__(
+        self,
+        index: "int",
+        input: "Any",
+        partition_key: "Any" = None,
+        result: "Any" = None,
+        error: "Optional[BaseException]" = None,
+    ):
+        self.index = index
+        self.input = input
+        self.partition_key = partition_key
+        self.result = result
+        self.error = error
+
+    @property
+    def succeeded(self) -> "bool":
+        return self.error is None
+
+    def __repr__(self):
+        outcome = "succeeded" if self.error is None else f"failed: {self.error!r}"
+        return f"<BulkOperationResult index={self.index} {outcome}>"
+
+
+def _run_group(
+    operation: "Callable[[Any, Any], Any]",
+    partition_key: "Any",
+    group: "List[Tuple[int, Any]]",
+) -> "List[BulkOperationResult]":
+    results = []
+    for index, value in group:
+        try:
+            result = operation(value, partition_key)
+        except Exception as error:
+            # A failed operation is reported in its result instead of aborting
+            # the remaining operations of the bulk request.
+            results.append(BulkOperationResult(index, value, partition_key, error=error))
+        else:
+            results.append(BulkOperationResult(index, value, partition_key, result=result))
+    return results
+
+
+def _group_by_partition_key(
+    batch: "List[Tuple[int, Any]]",
+    partition_key_of: "Callable[[Any], Any]",
+    max_group_size: "int",
+) -> "Iterator[Tuple[Any, List[Tuple[int, Any]]]]":
+    groups: "Dict[str, Tuple[Any, List[Tuple[int, Any]]]]" = {}
+    for index, value in batch:
+        partition_key = partition_key_of(value)
+        # Partition key values may be unhashable (e.g. the {} used for undefined),
+        # so groups are keyed by their repr.
+        _, group = groups.setdefault(repr(partition_key), (partition_key, []))
+        group.append((index, value))
+    for partition_key, group in groups.values():
+        for start in range(0, len(group), max_group_size):
+            yield partition_key, group[start : start + max_group_size]
+
+
+def execute(
+    inputs: "Iterable[Any]",
+    operation: "Callable[[Any, Any], Any]",
+    partition_key_of: "Callable[[Any], Any]",
+    *,
+    max_concurrency: "int",
+    batch_size: "int",
+) -> "Iterator[BulkOperationResult]":
+    """ Apply `operation` to every input with at most `max_concurrency` operations in flight.
+
+    Inputs are consumed lazily, `batch_size` at a time. Each batch is grouped by partition
+    key and the groups are split into units of work that run on a thread pool; operations
+    within a unit run in order. Results are yielded as units complete, so they are not
+    necessarily in input order.
+
+    :param inputs: The values to apply `operation` to.
+    :param operation: Callable taking an input and its partition key value.
+    :param partition_key_of: Callable returning the partition key value of an input.
+    :param max_concurrency: Maximum number of operations in flight at any time.
+    :param batch_size: Number of inputs read from `inputs` at a time.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    indexed_inputs = enumerate(inputs)
+    pending: "set" = set()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        while True:
+            batch = list(itertools.islice(indexed_inputs, batch_size))
+            if not batch:
+                break
+            # Split partition groups so that a batch dominated by one partition key
+            # still spreads over all workers.
+            max_group_size = max(1, -(-len(batch) // max_concurrency))
+            for partition_key, group in _group_by_partition_key(
+                batch, partition_key_of, max_group_size
+            ):
+                while len(pending) >= max_concurrency:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield from future.result()
+                pending.add(executor.submit(_run_group, operation, partition_key, group))
+        for future in concurrent.futures.as_completed(pending):
+            yield from future.result()
+        pending = set()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
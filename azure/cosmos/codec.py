@@ -0,0 +1,160 @@
+"""
+Serialization of request and response bodies.
+"""
+
+import importlib
+import json
+import re
+
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+orjson: "Optional[ModuleType]"
+try:
+    orjson = importlib.import_module("orjson")
+except ImportError:
+    orjson = None
+
+
+def _encode(body: "Any") -> "bytes":
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+class JsonCodec:
+    """ Encodes request bodies to, and decodes response bodies from, the bytes sent over the connection.
+
+    The default codec uses the standard library. Any JSON library can be plugged in by passing
+    its functions, e.g. `JsonCodec(encode=ujson.dumps, decode=ujson.loads)`, or use
+    :meth:`JsonCodec.orjson`.
+
+    :ivar encode: Serializes a JSON-compatible object (including :class:`Item` and other `dict`
+        subclasses) to `bytes` or `str`.
+    :ivar decode: Deserializes a `bytes` response body.
+    """
+
+    __slots__ = ("encode", "decode")
+
+    def __init__(
+        self,
+        encode: "Optional[Callable[[Any], Any]]" = None,
+        decode: "Optional[Callable[[bytes], Any]]" = None,
+    ):
+        self.encode = encode or _encode
+        self.decode = decode or json.loads
+
+    @classmethod
+    def orjson(cls) -> "JsonCodec":
+        """ A codec using the `orjson` package, which is several times faster than the standard library.
+        """
+        if orjson is None:
+            raise ImportError(
+                "The orjson codec requires orjson. Install it with 'pip install orjson'."
+            )
+        return cls(orjson.dumps, orjson.loads)
+
+    def encode_bytes(self, body: "Any") -> "bytes":
+        """ `body` encoded as UTF-8 bytes, whatever the type returned by :attr:`encode`.
+        """
+        data = self.encode(body)
+        return data.encode("utf-8") if isinstance(data, str) else data
+
+    def __repr__(self):
+        return f"JsonCodec(encode={self.encode!r}, decode={self.decode!r})"
+
+
+DEFAULT_CODEC = JsonCodec()
+
+# What follows the results array in the body of a page of results, as sent by the service:
+# `{"_rid":"...","Documents":[...],"_count":2}`.
+_DOCUMENTS_KEY = b'"Documents"'
+_PAGE_TAIL = re.compile(rb'\s*,\s*"_count"\s*:\s*(\d+)\s*}\s*')
+
+
+class RawItem:
+    """ The undecoded JSON of an item, as returned by `get_item(..., raw=True)`.
+
+    Pass :attr:`data` on as is to skip both decoding and re-encoding the item.
+
+    :ivar data: The response body: the JSON of the item, encoded as UTF-8.
+    :ivar response_headers: The :class:`ResponseMetadata` of the response.
+    """
+
+    __slots__ = ("data", "response_headers")
+
+    def __init__(self, headers: "Optional[Dict[str, Any]]", data: "bytes"):
+        self.data = data
+        self.response_headers = headers
+
+    def decode(self, codec: "Optional[JsonCodec]" = None) -> "Dict[str, Any]":
+        """ The item, decoded with `codec` (by default the standard library).
+        """
+        return (codec or DEFAULT_CODEC).decode(self.data)
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"RawItem({len(self.data)} bytes)"
+
+
+class RawPage:
+    """ The undecoded results of a page of a query, as returned by `query_items(..., raw=True)`.
+
+    :ivar documents: A `memoryview` of the JSON array of the results, sliced out of the response
+        body without copying it.
+    :ivar count: The number of results in the array.
+    :ivar response_headers: The :class:`ResponseMetadata` of the response.
+    """
+
+    __slots__ = ("documents", "count", "response_headers")
+
+    def __init__(
+        self,
+        headers: "Optional[Dict[str, Any]]",
+        documents: "memoryview",
+        count: "int",
+    ):
+        self.documents = documents
+        self.count = count
+        self.response_headers = headers
+
+    @classmethod
+    def from_body(
+        cls,
+        headers: "Optional[Dict[str, Any]]",
+        body: "bytes",
+        codec: "Optional[JsonCodec]" = None,
+    ) -> "Optional[RawPage]":
+        """ The page of results in the response `body`, or None if it has no results.
+
+        The results array is located without decoding the body. Should the body not have the
+        layout used by the service, it is decoded with `codec` and the results re-encoded.
+        """
+        start = body.find(_DOCUMENTS_KEY)
+        end = body.rfind(b"]")
+        if start >= 0:
+            start = body.find(b"[", start + len(_DOCUMENTS_KEY))
+        tail = _PAGE_TAIL.fullmatch(body, end + 1) if 0 <= start < end else None
+        if tail is not None and not body[start + 1 : end].strip():
+            return None
+        if tail is not None:
+            return cls(headers, memoryview(body)[start : end + 1], int(tail.group(1)))
+        codec = codec or DEFAULT_CODEC
+        results = codec.decode(body).get("Documents") or []
+        if not results:
+            return None
+        return cls(headers, memoryview(codec.encode_bytes(results)), len(results))
+
+    def decode(self, codec: "Optional[JsonCodec]" = None) -> "List[Any]":
+        """ The results, decoded with `codec` (by default the standard library).
+        """
+        return (codec or DEFAULT_CODEC).decode(bytes(self.documents))
+
+    def __bytes__(self):
+        return bytes(self.documents)
+
+    def __repr__(self):
+        return f"RawPage(count={self.count}, {len(self.documents)} bytes)"
@@ -0,0 +1,337 @@
+"""
+Pooling of the HTTP connections used by :class:`CosmosClient` to send requests.
+"""
+
+import concurrent.futures
+import socket
+import threading
+import time
+
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, cast
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class ConnectionPoolStats:
+    """ A snapshot of the connections of a :class:`ConnectionPool`.
+
+    :ivar in_use: Connections currently serving a request.
+    :ivar idle: Open connections waiting in the pool for a request.
+    :ivar created: Connections opened since the pool was created, including those opened to replace
+        connections that were dropped by the service or closed after `idle_timeout`.
+    :ivar reused: Requests sent over a connection that was already open.
+    """
+
+    __slots__ = ("in_use", "idle", "created", "reused")
+
+    def __init__(self, in_use: "int", idle: "int", created: "int", reused: "int"):
+        self.in_use = in_use
+        self.idle = idle
+        self.created = created
+        self.reused = reused
+
+    def __repr__(self):
+        return (
+            f"<ConnectionPoolStats in_use={self.in_use} idle={self.idle} "
+            f"created={self.created} reused={self.reused}>"
+        )
+
+
+class _TrackedConnection(HTTPConnection):
+    """ Reports the connections it opens and closes, and the requests sent over them, to its :class:`ConnectionPool`.
+
+    Subclassed for each :class:`ConnectionPool` by :func:`_tracked_pool_classes`, which sets `owner`.
+    """
+
+    owner: "ConnectionPool"
+    opened = False
+    requests_sent = 0
+    idle_since = 0.0
+
+    def connect(self):
+        super().connect()
+        self.opened = True
+        self.requests_sent = 0
+        self.owner._opened()
+
+    def close(self):
+        if self.opened:
+            self.opened = False
+            self.owner._closed()
+        super().close()
+
+    def request(self, *args, **kwargs):
+        self.owner._check_out()
+        try:
+            # Plain HTTP connections are opened by the request itself.
+            super().request(*args, **kwargs)
+        except BaseException:
+            self.owner._check_in()
+            raise
+        self.requests_sent += 1
+        if self.requests_sent > 1:
+            self.owner._reused_connection()
+
+    def getresponse(self):
+        try:
+            return super().getresponse()
+        finally:
+            self.idle_since = time.monotonic()
+            self.owner._check_in()
+
+    @property
+    def is_connected(self) -> "bool":
+        # Checked by urllib3 before a pooled connection is reused; it closes and
+        # reopens connections that aren't connected.
+        idle_timeout = self.owner.idle_timeout
+        if (
+            idle_timeout is not None
+            and self.sock is not None
+            and time.monotonic() - self.idle_since > idle_timeout
+        ):
+            return False
+        return super().is_connected
+
+
+def _tracked_pool_classes(
+    owner: "ConnectionPool",
+) -> "Dict[str, Type[HTTPConnectionPool]]":
+    """ urllib3 pool classes, by scheme, whose connections report to `owner`.
+    """
+    pool_classes: "Dict[str, Type[HTTPConnectionPool]]" = {}
+    for scheme, pool_class, connection_class in (
+        ("http", HTTPConnectionPool, HTTPConnection),
+        ("https", HTTPSConnectionPool, HTTPSConnection),
+    ):
+        tracked_connection_class = type(
+            f"Tracked{connection_class.__name__}",
+            (_TrackedConnection, connection_class),
+            dict(owner=owner),
+        )
+        pool_classes[scheme] = type(
+            f"Tracked{pool_class.__name__}",
+            (pool_class,),
+            dict(ConnectionCls=tracked_connection_class),
+        )
+    return pool_classes
+
+
+class _PoolAdapter(HTTPAdapter):
+    def __init__(
+        self,
+        pool_classes: "Dict[str, Type[HTTPConnectionPool]]",
+        socket_options: "List[Tuple[int, int, int]]",
+        **kwargs,
+    ):
+        # Read by init_poolmanager, which the constructor calls.
+        self._pool_classes = pool_classes
+        self._socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(
+            connections,
+            maxsize,
+            block,
+            socket_options=self._socket_options,
+            **pool_kwargs,
+        )
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class _LimitedSession(requests.Session):
+    """ Session sending at most `limit` requests at a time.
+
+    Responses are read in full before `request` returns, which releases their connection, so
+    the number of connections in use never exceeds the number of requests in flight.
+    """
+
+    def __init__(self, limit: "int"):
+        super().__init__()
+        self._limit = threading.BoundedSemaphore(limit)
+
+    def request(self, *args, **kwargs):
+        with self._limit:
+            return super().request(*args, **kwargs)
+
+
+def _socket_options(
+    keep_alive: "Optional[float]", tcp_nodelay: "bool"
+) -> "List[Tuple[int, int, int]]":
+    options = []
+    if tcp_nodelay:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if keep_alive is not None:
+        interval = max(1, int(keep_alive))
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, interval))
+        elif hasattr(socket, "TCP_KEEPALIVE"):
+            # The name of TCP_KEEPIDLE on macOS.
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, interval))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval))
+    return options
+
+
+class ConnectionPool:
+    """ The HTTP connections of a :class:`CosmosClient`, kept open between requests.
+
+    Reusing connections saves the TCP and TLS handshakes of a new connection on every
+    request. A request waits for a connection once `connection_limit` requests are in flight,
+    rather than opening a connection that would be closed after the request.
+
+    A pool is thread-safe and can be shared by several clients. Use :meth:`stats` to see how
+    well the pool is sized for a workload: requests that mostly reuse connections, with few
+    created, are what a well-sized pool looks like.
+    """
+
+    def __init__(
+        self,
+        *,
+        connection_limit: "int" = 100,
+        connection_limit_per_host: "int" = 0,
+        idle_timeout: "Optional[float]" = None,
+        keep_alive: "Optional[float]" = None,
+        tcp_nodelay: "bool" = True,
+        prewarm: "int" = 0,
+        max_retries: "Union[int, Any]" = 0,
+    ):
+        """
+        :param connection_limit: Maximum number of simultaneously open connections in use, and of requests in flight.
+        :param connection_limit_per_host: Maximum number of simultaneously open connections to a single host; 0 means `connection_limit`.
+        :param idle_timeout: Close connections that have been idle for this many seconds rather than reusing them; None keeps them open until the service closes them.
+        :param keep_alive: Send TCP keep-alive probes on connections idle for this many seconds, so that idle connections aren't dropped by firewalls and load balancers; None disables them.
+        :param tcp_nodelay: Disable Nagle's algorithm, so that small requests are sent immediately.
+        :param prewarm: Number of connections opened to each endpoint of an account when a client is created with the pool.
+        :param max_retries: Retries of requests that failed to connect: a number or a `urllib3.util.Retry`.
+        """
+        if connection_limit < 1:
+            raise ValueError("connection_limit must be at least 1")
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host or connection_limit
+        self.idle_timeout = idle_timeout
+        self.keep_alive = keep_alive
+        self.tcp_nodelay = tcp_nodelay
+        self.prewarm = prewarm
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._open = 0
+        self._created = 0
+        self._reused = 0
+        self._adapter = _PoolAdapter(
+            _tracked_pool_classes(self),
+            _socket_options(keep_alive, tcp_nodelay),
+            pool_maxsize=self.connection_limit_per_host,
+            pool_block=True,
+            max_retries=max_retries,
+        )
+        self.session = _LimitedSession(connection_limit)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def _opened(self):
+        with self._lock:
+            self._open += 1
+            self._created += 1
+
+    def _closed(self):
+        with self._lock:
+            self._open -= 1
+
+    def _check_out(self):
+        with self._lock:
+            self._in_use += 1
+
+    def _check_in(self):
+        with self._lock:
+            self._in_use -= 1
+
+    def _reused_connection(self):
+        with self._lock:
+            self._reused += 1
+
+    def prewarm_connections(
+        self,
+        url: "str",
+        count: "Optional[int]" = None,
+        *,
+        verify: "Union[bool, str]" = True,
+        cert: "Optional[Tuple[str, str]]" = None,
+        proxies: "Optional[Dict[str, str]]" = None,
+    ) -> "int":
+        """ Open connections to `url` ahead of the requests that will use them.
+
+        The connections are opened concurrently, each by a `HEAD` request to `url` whose response is
+        discarded, and placed in the pool, up to `connection_limit_per_host`. `verify`, `cert` and `proxies`
+        must match those of the requests, whose connections are pooled separately for each combination.
+
+        :param count: Number of connections to have open; defaults to :attr:`prewarm`.
+        :returns: The number of connections opened.
+        """
+        count = min(
+            self.prewarm if count is None else count, self.connection_limit_per_host
+        )
+        if count <= 0:
+            return 0
+        request = requests.Request("HEAD", url).prepare()
+        if hasattr(self._adapter, "get_connection_with_tls_context"):
+            pool = self._adapter.get_connection_with_tls_context(
+                request, verify, proxies=proxies, cert=cert
+            )
+        else:
+            # requests < 2.32
+            pool = self._adapter.get_connection(url, proxies)
+            self._adapter.cert_verify(pool, url, verify, cert)
+
+        def send():
+            # The response holds on to its connection until it's released, so that
+            # the requests don't share connections.
+            return pool.urlopen(
+                "HEAD",
+                request.path_url,
+                retries=False,
+                redirect=False,
+                preload_content=False,
+                release_conn=False,
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(send) for _ in range(count)]
+        responses = [
+            future.result() for future in futures if future.exception() is None
+        ]
+        opened = sum(
+            1
+            for response in responses
+            if cast("_TrackedConnection", response.connection).requests_sent == 1
+        )
+        for response in responses:
+            response.drain_conn()
+            response.release_conn()
+        # Requests sent to fill the pool don't count as reusing connections.
+        with self._lock:
+            self._reused -= len(responses) - opened
+        for future in futures:
+            future.result()
+        return opened
+
+    def stats(self) -> "ConnectionPoolStats":
+        """ A snapshot of the connections of the pool.
+        """
+        with self._lock:
+            return ConnectionPoolStats(
+                self._in_use,
+                max(0, self._open - self._in_use),
+                self._created,
+                self._reused,
+            )
+
+    def close(self):
+        """ Close every connection of the pool.
+        """
+        self.session.close()
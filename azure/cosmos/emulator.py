@@ -0,0 +1,1101 @@
+"""
+In-memory emulation of an Azure Cosmos DB account, for tests and benchmarks that shouldn't need a live account.
+
+Pass an :class:`InMemoryClientContext` to :class:`~azure.cosmos.CosmosClient` to run the operations of
+the client in memory::
+
+    client = CosmosClient(None, None, client_context=InMemoryClientContext())
+
+The emulator implements the operations of the backend client with the semantics of the service that
+applications observe: documents are stored as JSON, so results never alias stored data; system
+properties, ETags and optimistic concurrency through access conditions; partitioned containers;
+time to live; paged queries with continuation tokens and query metrics; the change feed; and the
+status codes of failures. Queries are evaluated by :mod:`azure.cosmos.sql`.
+
+Every response carries a request charge, a session token and a partition key range id. Partitioned
+containers can be spread over several partition key ranges, which can be split like the service splits
+them. Latency and throttling (HTTP 429) can be simulated to exercise retries and rate limiting.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, cast
+
+from internal.cosmos.errors import HTTPFailure
+
+from . import _BaseClientContext
+from . import sql
+from .codec import RawItem, RawPage
+from .query_metrics import QUERY_METRICS_HEADER
+from .routing import (
+    MAX_EFFECTIVE_PARTITION_KEY,
+    MIN_EFFECTIVE_PARTITION_KEY,
+    PartitionKeyRangeMap,
+    _write_number,
+    effective_partition_key,
+)
+
+# Approximate request charges, in request units, modelled on those of the service.
+_READ_CHARGE_PER_KB = 1.0
+_WRITE_CHARGE_PER_KB = 5.0
+_METADATA_CHARGE = 1.0
+_QUERY_CHARGE = 2.3
+_QUERY_CHARGE_PER_RETRIEVED_DOCUMENT = 0.02
+
+_DEFAULT_PAGE_SIZE = 100
+
+# The key the service uses for documents without a partition key value.
+_UNDEFINED_PARTITION_KEY: "Dict[str, Any]" = {}
+
+
+def _failure(
+    status_code: "int",
+    message: "str",
+    sub_status: "Optional[int]" = None,
+    request_charge: "float" = 0.0,
+    headers: "Optional[Dict[str, Any]]" = None,
+) -> "HTTPFailure":
+    headers = dict(headers or {})
+    headers["x-ms-request-charge"] = str(request_charge)
+    headers["x-ms-activity-id"] = str(uuid.uuid4())
+    if sub_status is not None:
+        headers["x-ms-substatus"] = str(sub_status)
+    return HTTPFailure(status_code, json.dumps(dict(message=message)), headers)
+
+
+def _link_parts(link: "str") -> "List[str]":
+    return link.strip("/").split("/")
+
+
+def _kilobytes(size: "int") -> "int":
+    return max(1, math.ceil(size / 1024))
+
+
+def _query_text(query: "Any") -> "Tuple[str, Dict[str, Any]]":
+    if isinstance(query, dict):
+        return query["query"], sql.parameters_dict(query.get("parameters"))
+    return query, {}
+
+
+def _continuation(options: "Dict[str, Any]") -> "Optional[str]":
+    initial_headers = options.get("initialHeaders") or {}
+    return options.get("continuation") or initial_headers.get("x-ms-continuation")
+
+
+def _range_boundaries(count: "int", version: "int") -> "List[str]":
+    """ The effective partition keys splitting the hashes of partition key values into `count` equal ranges.
+    """
+    if version == 2:
+        # Hashes of 126 bits, as 32 hex digits.
+        return [f"{index * 2 ** 126 // count:032X}" for index in range(1, count)]
+    # The effective partition keys of version 1 start with the hash, a 32-bit number.
+    boundaries = []
+    for index in range(1, count):
+        encoded = bytearray()
+        _write_number(float(index * 2**32 // count), encoded)
+        boundaries.append(encoded.hex().upper())
+    return boundaries
+
+
+def _midpoint(low: "str", high: "str") -> "str":
+    # Effective partition keys compare like hex numbers padded with zeros on the right.
+    length = max(len(low), len(high), 2)
+    while True:
+        low_value = int(low.ljust(length, "0") or "0", 16)
+        high_value = int(high.ljust(length, "0"), 16)
+        if high_value - low_value >= 2:
+            return f"{(low_value + high_value) // 2:0{length}X}"
+        length += 2
+
+
+class _Container:
+
+    def __init__(self, properties: "Dict[str, Any]", range_count: "int" = 1):
+        self.properties = properties
+        # Documents by partition key (as canonical JSON) and id.
+        self.documents: "Dict[Tuple[str, str], Dict[str, Any]]" = {}
+        self.lsn = 0
+        definition = properties.get("partitionKey")
+        # Like the service, only containers with hashed partition keys are spread over several ranges.
+        self.hashed = bool(
+            definition
+            and definition.get("kind", "Hash") == "Hash"
+            and len(definition.get("paths") or ()) == 1
+        )
+        if not self.hashed:
+            range_count = 1
+        boundaries = (
+            [MIN_EFFECTIVE_PARTITION_KEY]
+            + _range_boundaries(range_count, self.partition_key_version)
+            + [MAX_EFFECTIVE_PARTITION_KEY]
+        )
+        self.ranges = PartitionKeyRangeMap(
+            dict(
+                id=str(index),
+                minInclusive=boundaries[index],
+                maxExclusive=boundaries[index + 1],
+                parents=[],
+            )
+            for index in range(range_count)
+        )
+        self.next_range_id = range_count
+        # Effective partition keys, and ids of the ranges holding them, by partition key (as
+        # canonical JSON).
+        self._effective_partition_keys: "Dict[str, str]" = {}
+        self._range_ids: "Dict[str, str]" = {}
+
+    @property
+    def partition_key_path(self) -> "Optional[str]":
+        definition = self.properties.get("partitionKey")
+        return definition["paths"][0] if definition else None
+
+    @property
+    def partition_key_version(self) -> "int":
+        definition = self.properties.get("partitionKey")
+        return (definition.get("version") or 1) if definition else 1
+
+    def effective_partition_key(self, partition_key: "str") -> "str":
+        """ The effective partition key of a partition key given as canonical JSON.
+        """
+        key = self._effective_partition_keys.get(partition_key)
+        if key is None:
+            key = effective_partition_key(
+                self.properties["partitionKey"], json.loads(partition_key)
+            )
+            self._effective_partition_keys[partition_key] = key
+        return key
+
+    def range_id_of(self, partition_key: "str") -> "str":
+        """ The id of the partition key range holding a partition key given as canonical JSON.
+        """
+        range_id = self._range_ids.get(partition_key)
+        if range_id is None:
+            if self.hashed:
+                key = self.effective_partition_key(partition_key)
+                # The ranges of a container cover every effective partition key.
+                range_id = cast("Dict[str, Any]", self.ranges.get_range(key))["id"]
+            else:
+                range_id = self.ranges.ranges[0]["id"]
+            self._range_ids[partition_key] = range_id
+        return range_id
+
+    def replace_ranges(self, ranges: "List[Dict[str, Any]]"):
+        self.ranges = PartitionKeyRangeMap(ranges)
+        self._range_ids.clear()
+
+    def partition_key_of(self, document: "Dict[str, Any]") -> "Any":
+        path = self.partition_key_path
+        if path is None:
+            return None
+        value: "Any" = document
+        for part in path.strip("/").split("/"):
+            if not isinstance(value, dict) or part not in value:
+                return _UNDEFINED_PARTITION_KEY
+            value = value[part]
+        return value
+
+
+class _Database:
+    def __init__(self, properties: "Dict[str, Any]"):
+        self.properties = properties
+        self.containers: "Dict[str, _Container]" = {}
+
+
+class _ResultIterable:
+    """ Paged results of a query or a read feed, with the interface of the backend's query iterables.
+
+    `compute` returns the results, the headers of every page and the number of documents
+    retrieved to compute them. It is called when the first page is fetched; `fetch_next_block`
+    returns an empty list once the results are exhausted.
+    """
+
+    def __init__(
+        self,
+        context: "InMemoryClientContext",
+        compute: "Callable[[], Tuple[List[Any], Dict[str, Any], int]]",
+        options: "Dict[str, Any]",
+        charge_per_page: "float" = _METADATA_CHARGE,
+    ):
+        self._context = context
+        self._compute = compute
+        self._options = options
+        self._charge_per_page = charge_per_page
+        self._results: "Optional[List[Any]]" = None
+        self._headers: "Dict[str, Any]" = {}
+        self._retrieved = 0
+        self._position = 0
+        continuation = _continuation(options)
+        if continuation:
+            try:
+                self._position = int(continuation)
+            except ValueError:
+                raise _failure(400, f"Invalid continuation token {continuation}")
+
+    def _next_page(self) -> "Tuple[List[Any], float, Dict[str, Any]]":
+        if self._results is None:
+            self._results, self._headers, self._retrieved = self._compute()
+            first_page = True
+        else:
+            first_page = False
+        page_size = self._options.get("maxItemCount") or _DEFAULT_PAGE_SIZE
+        if page_size < 0:
+            page_size = _DEFAULT_PAGE_SIZE
+        start = self._position
+        page = self._results[start : start + page_size]
+        self._position = start + len(page)
+        headers = dict(self._headers)
+        if self._position < len(self._results):
+            headers["x-ms-continuation"] = str(self._position)
+        headers["x-ms-item-count"] = str(len(page))
+        retrieved = self._retrieved if first_page else 0
+        charge = (
+            self._charge_per_page + retrieved * _QUERY_CHARGE_PER_RETRIEVED_DOCUMENT
+        )
+        if self._options.get("populateQueryMetrics"):
+            output_size = len(json.dumps(page))
+            headers[QUERY_METRICS_HEADER] = ";".join(
+                [
+                    f"retrievedDocumentCount={retrieved}",
+                    f"outputDocumentCount={len(page)}",
+                    f"outputDocumentSize={output_size}",
+                    f"indexUtilizationRatio={len(page) / retrieved if retrieved else 1.0:.2f}",
+                    "totalExecutionTimeInMs=0.00",
+                ]
+            )
+        return page, charge, headers
+
+    def fetch_next_block(self) -> "List[Any]":
+        if self._results is not None and self._position >= len(self._results):
+            return []
+        if not self._context._raw:
+            return self._context._perform(self._next_page)
+        # The body of a page is the array of its results.
+        start = self._position
+        body = self._context._perform(self._next_page, raw=True)
+        count = self._position - start
+        return [RawPage(None, memoryview(body), count)] if count else []
+
+    def __iter__(self) -> "Iterator[Any]":
+        while True:
+            page = self.fetch_next_block()
+            if not page:
+                return
+            yield from page
+
+
+class InMemoryClientContext(_BaseClientContext):
+    """ Client context storing databases, containers and items in memory instead of in an account.
+
+    The context is thread-safe and starts out empty. All clients created with the same context
+    see the same data.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: "float" = 0.0,
+        throttle_probability: "float" = 0.0,
+        request_units_per_second: "Optional[float]" = None,
+        seed: "Optional[int]" = None,
+        clock: "Callable[[], float]" = time.time,
+        partition_key_range_count: "int" = 1,
+    ):
+        """
+        :param latency: Seconds every request takes, to simulate the network round trip.
+        :param throttle_probability: Probability that a request is throttled (HTTP 429) regardless of load.
+        :param request_units_per_second: Throttle requests once this budget of request units per second is
+            exhausted, like an account with this provisioned throughput. Unlimited if None.
+        :param seed: Seed of the generator deciding which requests are throttled and generating ids.
+        :param clock: Source of the current time in seconds, for time to live and throughput budgets.
+        :param partition_key_range_count: Number of partition key ranges over which the partition key values of
+            each new partitioned container are spread. Use :meth:`split_partition_key_range` to split a range.
+        """
+        super().__init__()
+        self.latency = latency
+        self.throttle_probability = throttle_probability
+        self.request_units_per_second = request_units_per_second
+        self.partition_key_range_count = partition_key_range_count
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._databases: "Dict[str, _Database]" = {}
+        self._resource_count = 0
+        self._budget = request_units_per_second or 0.0
+        self._budget_updated = clock()
+
+    # Request processing
+
+    def _perform(
+        self,
+        operation: "Callable[..., Tuple[Any, float, Dict[str, Any]]]",
+        *args,
+        raw: "bool" = False,
+    ) -> "Any":
+        """ Run `operation`, which returns its result, request charge and response headers, as one request.
+
+        Returns the result as decoded from the response body, or the body itself if `raw` is true.
+        Like the requests of :class:`~azure.cosmos.ClientContext`, throttled requests are retried.
+        """
+        body, headers = self._send_request(lambda: self._respond(operation, args))
+        self.last_response_headers = headers
+        return body if raw else self.codec.decode(body)
+
+    def _respond(
+        self,
+        operation: "Callable[..., Tuple[Any, float, Dict[str, Any]]]",
+        args: "Tuple[Any, ...]",
+    ) -> "Tuple[bytes, Dict[str, Any]]":
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self._throttle()
+            try:
+                result, charge, headers = operation(*args)
+            except HTTPFailure as failure:
+                self._consume(float(failure.headers.get("x-ms-request-charge") or 0))
+                raise
+            self._consume(charge)
+            # Serialize the result like a response body, so that callers never share
+            # objects with the stored data.
+            body = self.codec.encode_bytes(result)
+        headers = dict(headers)
+        headers["x-ms-request-charge"] = str(round(charge, 2))
+        headers["x-ms-activity-id"] = str(uuid.uuid4())
+        headers["Content-Length"] = str(len(body))
+        return body, headers
+
+    def _throttle(self):
+        if (
+            self.throttle_probability
+            and self._random.random() < self.throttle_probability
+        ):
+            raise _failure(
+                429, "Request rate is large", headers={"x-ms-retry-after-ms": "10"}
+            )
+        if self.request_units_per_second is None:
+            return
+        now = self._clock()
+        self._budget = min(
+            self.request_units_per_second,
+            self._budget + (now - self._budget_updated) * self.request_units_per_second,
+        )
+        self._budget_updated = now
+        if self._budget < 0:
+            retry_after = -self._budget / self.request_units_per_second
+            raise _failure(
+                429,
+                "Request rate is large",
+                headers={
+                    "x-ms-retry-after-ms": str(max(1, math.ceil(retry_after * 1000)))
+                },
+            )
+
+    def _consume(self, charge: "float"):
+        if self.request_units_per_second is not None:
+            self._budget -= charge
+
+    def _system_properties(self, link: "str") -> "Dict[str, Any]":
+        self._resource_count += 1
+        return dict(
+            _rid=f"{self._resource_count:08x}",
+            _self=link,
+            _etag=f'"{uuid.UUID(int=self._random.getrandbits(128), version=4)}"',
+            _ts=int(self._clock()),
+        )
+
+    # Resolution of links
+
+    def _database(self, database_link: "str") -> "_Database":
+        parts = _link_parts(database_link)
+        database = self._databases.get(parts[1]) if len(parts) >= 2 else None
+        if database is None:
+            raise _failure(
+                404, f"Database {database_link} does not exist", request_charge=1.0
+            )
+        return database
+
+    def _container(
+        self, collection_link: "str", sub_status: "Optional[int]" = None
+    ) -> "_Container":
+        parts = _link_parts(collection_link)
+        database = self._databases.get(parts[1]) if len(parts) >= 4 else None
+        container = database.containers.get(parts[3]) if database is not None else None
+        if container is None:
+            raise _failure(
+                404,
+                f"Container {collection_link} does not exist",
+                sub_status=sub_status,
+                request_charge=1.0,
+            )
+        return container
+
+    def _session_headers(
+        self, container: "_Container", range_id: "Optional[str]"
+    ) -> "Dict[str, Any]":
+        """ The headers of a response from the partition key range `range_id`, or from every range if None.
+        """
+        if range_id is None:
+            return {
+                "x-ms-session-token": ",".join(
+                    f"{key_range['id']}:-1#{container.lsn}"
+                    for key_range in container.ranges.ranges
+                )
+            }
+        return {
+            "x-ms-session-token": f"{range_id}:-1#{container.lsn}",
+            "x-ms-documentdb-partitionkeyrangeid": range_id,
+        }
+
+    def _routed_range(
+        self, container: "_Container", partition_key: "Optional[str]" = None
+    ) -> "Optional[Dict[str, Any]]":
+        """ The partition key range a request is addressed to, or None if it isn't addressed to a range.
+
+        :param partition_key: The partition key (as canonical JSON) the request targets, if any.
+        :raises HTTPFailure: The range is gone (410), or doesn't hold `partition_key` (400).
+        """
+        range_id = self._partition_key_range_id
+        if range_id is None:
+            return None
+        key_range = container.ranges.get_range_by_id(range_id)
+        if key_range is None:
+            raise _failure(
+                410, f"Partition key range {range_id} is gone", sub_status=1002
+            )
+        if (
+            partition_key is not None
+            and container.range_id_of(partition_key) != range_id
+        ):
+            raise _failure(
+                400,
+                f"The partition key doesn't belong to partition key range {range_id}",
+                sub_status=1001,
+            )
+        return key_range
+
+    def _feed(
+        self,
+        resources: "Callable[[], List[Dict[str, Any]]]",
+        query: "Any",
+        options: "Optional[Dict[str, Any]]",
+    ) -> "_ResultIterable":
+        def compute():
+            found = resources()
+            if query is None:
+                return found, {}, len(found)
+            text, parameters = _query_text(query)
+            return self._run_query(text, parameters, found), {}, len(found)
+
+        return _ResultIterable(self, compute, dict(options or {}))
+
+    @staticmethod
+    def _run_query(
+        text: "str", parameters: "Dict[str, Any]", documents: "List[Any]"
+    ) -> "List[Any]":
+        try:
+            return sql.parse(text).execute(documents, parameters)
+        except sql.SqlSyntaxError as error:
+            raise _failure(400, str(error))
+
+    # Databases
+
+    def CreateDatabase(
+        self, database: "Dict[str, Any]", options: "Optional[Dict[str, Any]]" = None
+    ):
+        return self._perform(self._create_database, database)
+
+    def _create_database(self, database):
+        database_id = database.get("id")
+        if not database_id:
+            raise _failure(400, "The database id is required")
+        if database_id in self._databases:
+            raise _failure(
+                409, f"Database {database_id} already exists", request_charge=1.0
+            )
+        properties = dict(database)
+        properties.update(self._system_properties(f"dbs/{database_id}/"))
+        properties.update(_colls="colls/", _users="users/")
+        self._databases[database_id] = _Database(properties)
+        return properties, _METADATA_CHARGE, {}
+
+    def ReadDatabase(
+        self, database_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        return self._perform(
+            lambda: (self._database(database_link).properties, _METADATA_CHARGE, {})
+        )
+
+    def DeleteDatabase(
+        self, database_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        def delete():
+            database = self._database(database_link)
+            del self._databases[database.properties["id"]]
+            return None, _METADATA_CHARGE, {}
+
+        return self._perform(delete)
+
+    def ReadDatabases(
+        self, options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        return self.QueryDatabases(None, options)
+
+    def QueryDatabases(
+        self, query: "Any", options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        return self._feed(
+            lambda: [database.properties for database in self._databases.values()],
+            query,
+            options,
+        )
+
+    # Containers
+
+    def CreateContainer(
+        self,
+        database_link: "str",
+        collection: "Dict[str, Any]",
+        options: "Optional[Dict[str, Any]]" = None,
+    ):
+        def create():
+            database = self._database(database_link)
+            container_id = collection.get("id")
+            if not container_id:
+                raise _failure(400, "The container id is required")
+            if container_id in database.containers:
+                raise _failure(
+                    409, f"Container {container_id} already exists", request_charge=1.0
+                )
+            properties = dict(
+                collection,
+                indexingPolicy=collection.get("indexingPolicy")
+                or dict(
+                    indexingMode="consistent",
+                    automatic=True,
+                    includedPaths=[dict(path="/*")],
+                    excludedPaths=[],
+                ),
+            )
+            properties.update(
+                self._system_properties(
+                    f"dbs/{database.properties['id']}/colls/{container_id}/"
+                )
+            )
+            properties.update(_docs="docs/", _sprocs="sprocs/", _triggers="triggers/")
+            database.containers[container_id] = _Container(
+                properties, self.partition_key_range_count
+            )
+            return properties, _METADATA_CHARGE, {}
+
+        return self._perform(create)
+
+    def ReadContainer(
+        self, collection_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        return self._perform(
+            lambda: (self._container(collection_link).properties, _METADATA_CHARGE, {})
+        )
+
+    def ReplaceContainer(
+        self,
+        collection_link: "str",
+        collection: "Dict[str, Any]",
+        options: "Optional[Dict[str, Any]]" = None,
+    ):
+        def replace():
+            container = self._container(collection_link)
+            if collection.get(
+                "partitionKey", container.properties.get("partitionKey")
+            ) != container.properties.get("partitionKey"):
+                raise _failure(400, "The partition key of a container can't be changed")
+            system_properties = self._system_properties(container.properties["_self"])
+            properties = {
+                key: value
+                for key, value in container.properties.items()
+                if key.startswith("_")
+            }
+            properties.update(collection)
+            properties.update(
+                _etag=system_properties["_etag"], _ts=system_properties["_ts"]
+            )
+            container.properties = properties
+            return properties, _METADATA_CHARGE, {}
+
+        return self._perform(replace)
+
+    def DeleteContainer(
+        self, collection_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        def delete():
+            self._container(collection_link)
+            parts = _link_parts(collection_link)
+            del self._databases[parts[1]].containers[parts[3]]
+            return None, _METADATA_CHARGE, {}
+
+        return self._perform(delete)
+
+    def ReadContainers(
+        self, database_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        return self.QueryContainers(database_link, None, options)
+
+    def QueryContainers(
+        self,
+        database_link: "str",
+        query: "Any",
+        options: "Optional[Dict[str, Any]]" = None,
+    ) -> "_ResultIterable":
+        return self._feed(
+            lambda: [
+                container.properties
+                for container in self._database(database_link).containers.values()
+            ],
+            query,
+            options,
+        )
+
+    def _ReadPartitionKeyRanges(
+        self, collection_link: "str", feed_options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        def ranges():
+            return self._container(collection_link).ranges.ranges
+
+        return self._feed(ranges, None, feed_options)
+
+    def split_partition_key_range(
+        self, collection_link: "str", range_id: "str"
+    ) -> "Tuple[str, str]":
+        """ Split a partition key range of a container in two, like the service does when a partition grows.
+
+        The range is split at the median effective partition key of its items. Requests addressed to
+        the range then fail with HTTP 410 and sub-status 1002, like those of clients whose range map
+        predates a split.
+
+        :returns: The ids of the two ranges replacing the range.
+        """
+        with self._lock:
+            container = self._container(collection_link)
+            key_range = container.ranges.get_range_by_id(range_id)
+            if key_range is None:
+                raise _failure(404, f"Partition key range {range_id} does not exist")
+            low, high = key_range["minInclusive"], key_range["maxExclusive"]
+            keys = sorted(
+                {
+                    container.effective_partition_key(partition_key)
+                    for partition_key, _ in container.documents
+                }
+                if container.hashed
+                else ()
+            )
+            keys = [key for key in keys if low <= key < high]
+            split_at = keys[len(keys) // 2] if len(keys) >= 2 else _midpoint(low, high)
+            children: "List[Dict[str, Any]]" = []
+            for child_low, child_high in ((low, split_at), (split_at, high)):
+                children.append(
+                    dict(
+                        id=str(container.next_range_id),
+                        minInclusive=child_low,
+                        maxExclusive=child_high,
+                        parents=list(key_range.get("parents") or ()) + [range_id],
+                    )
+                )
+                container.next_range_id += 1
+            container.replace_ranges(
+                [other for other in container.ranges.ranges if other is not key_range]
+                + children
+            )
+            return children[0]["id"], children[1]["id"]
+
+    # Items
+
+    def _live_documents(
+        self,
+        container: "_Container",
+        partition_key: "Optional[str]" = None,
+        key_range: "Optional[Dict[str, Any]]" = None,
+    ) -> "List[Dict[str, Any]]":
+        """ The documents of `container` (or of one of its partitions, or partition key ranges) that haven't expired.
+        """
+        default_ttl = container.properties.get("defaultTtl")
+        if default_ttl is not None:
+            now = self._clock()
+            expired = [
+                key
+                for key, document in container.documents.items()
+                if self._expired(document, default_ttl, now)
+            ]
+            for key in expired:
+                del container.documents[key]
+        if key_range is not None:
+            return [
+                document
+                for (document_partition_key, _), document in container.documents.items()
+                if container.range_id_of(document_partition_key) == key_range["id"]
+            ]
+        if partition_key is None:
+            return list(container.documents.values())
+        return [
+            document
+            for (document_partition_key, _), document in container.documents.items()
+            if document_partition_key == partition_key
+        ]
+
+    @staticmethod
+    def _expired(
+        document: "Dict[str, Any]", default_ttl: "Optional[int]", now: "float"
+    ) -> "bool":
+        if default_ttl is None:
+            return False
+        ttl = document.get("ttl", default_ttl)
+        if not isinstance(ttl, int) or isinstance(ttl, bool) or ttl < 0:
+            return False
+        return document["_ts"] + ttl <= now
+
+    def _partition_key(
+        self,
+        container: "_Container",
+        options: "Dict[str, Any]",
+        document: "Optional[Dict[str, Any]]" = None,
+    ) -> "str":
+        if container.partition_key_path is None:
+            return "null"
+        if "partitionKey" in options:
+            partition_key = options["partitionKey"]
+            if document is not None and partition_key != container.partition_key_of(
+                document
+            ):
+                raise _failure(
+                    400,
+                    "PartitionKey extracted from document doesn't match the one specified in the header",
+                    sub_status=1001,
+                )
+        elif document is not None:
+            partition_key = container.partition_key_of(document)
+        else:
+            raise _failure(
+                400,
+                "PartitionKey value must be supplied for this operation",
+                sub_status=1001,
+            )
+        if isinstance(partition_key, list) or (
+            isinstance(partition_key, dict) and partition_key
+        ):
+            raise _failure(400, "Partition key values must be primitive values")
+        return sql.canonical_json(partition_key)
+
+    def _find(
+        self, document_link: "str", options: "Dict[str, Any]"
+    ) -> "Tuple[_Container, Tuple[str, str], Optional[Dict[str, Any]]]":
+        parts = _link_parts(document_link)
+        container = self._container("/".join(parts[:4]), sub_status=1003)
+        key = (self._partition_key(container, options), parts[5])
+        self._routed_range(container, key[0])
+        document = container.documents.get(key)
+        if document is not None and self._expired(
+            document, container.properties.get("defaultTtl"), self._clock()
+        ):
+            del container.documents[key]
+            document = None
+        return container, key, document
+
+    @staticmethod
+    def _check_access_condition(
+        options: "Dict[str, Any]", document: "Optional[Dict[str, Any]]"
+    ):
+        condition = options.get("accessCondition")
+        if not condition:
+            return
+        etag = document["_etag"] if document is not None else None
+        if condition.get("type") == "IfMatch" and condition.get("condition") != etag:
+            raise _failure(
+                412,
+                "The operation specified an ETag that doesn't match the current version",
+                request_charge=1.0,
+            )
+        if condition.get("type") == "IfNoneMatch":
+            expected = condition.get("condition")
+            if document is not None and (expected == "*" or expected == etag):
+                raise _failure(
+                    412,
+                    "The item matches the IfNoneMatch condition",
+                    request_charge=1.0,
+                )
+
+    def _write(
+        self,
+        container: "_Container",
+        key: "Tuple[str, str]",
+        document: "Dict[str, Any]",
+        collection_link: "str",
+    ) -> "Tuple[Any, float, Dict[str, Any]]":
+        container.lsn += 1
+        stored = {
+            name: value
+            for name, value in document.items()
+            if name not in ("_rid", "_self", "_etag", "_ts", "_lsn")
+        }
+        stored.update(
+            self._system_properties(f"{collection_link}/docs/{document['id']}")
+        )
+        stored["_lsn"] = container.lsn
+        # Round trip through JSON so that the caller's objects aren't stored.
+        body = json.dumps(stored)
+        stored = json.loads(body)
+        container.documents[key] = stored
+        return (
+            stored,
+            _kilobytes(len(body)) * _WRITE_CHARGE_PER_KB,
+            self._session_headers(container, container.range_id_of(key[0])),
+        )
+
+    def _prepare_document(
+        self,
+        document_link_or_container: "str",
+        document: "Dict[str, Any]",
+        options: "Dict[str, Any]",
+    ) -> "Tuple[_Container, str, Tuple[str, str], Dict[str, Any]]":
+        parts = _link_parts(document_link_or_container)
+        collection_link = "/".join(parts[:4])
+        container = self._container(collection_link, sub_status=1003)
+        document = dict(document)
+        if not document.get("id"):
+            if options.get("disableAutomaticIdGeneration"):
+                raise _failure(
+                    400,
+                    "The input content is invalid because the required property id is missing",
+                )
+            document["id"] = str(
+                uuid.UUID(int=self._random.getrandbits(128), version=4)
+            )
+        if not isinstance(document["id"], str) or "/" in document["id"]:
+            raise _failure(400, "The id of an item must be a string without '/'")
+        key = (self._partition_key(container, options, document), document["id"])
+        return container, collection_link, key, document
+
+    def CreateItem(
+        self,
+        database_or_Container_link: "str",
+        document: "Dict[str, Any]",
+        options: "Optional[Dict[str, Any]]" = None,
+    ):
+        options = options or {}
+
+        def create():
+            container, collection_link, key, prepared = self._prepare_document(
+                database_or_Container_link, document, options
+            )
+            existing = container.documents.get(key)
+            if existing is not None and not self._expired(
+                existing, container.properties.get("defaultTtl"), self._clock()
+            ):
+                raise _failure(
+                    409,
+                    f"An item with id {prepared['id']} already exists",
+                    request_charge=1.0,
+                )
+            return self._write(container, key, prepared, collection_link)
+
+        return self._perform(create)
+
+    def UpsertItem(
+        self,
+        database_or_Container_link: "str",
+        document: "Dict[str, Any]",
+        options: "Optional[Dict[str, Any]]" = None,
+    ):
+        options = options or {}
+
+        def upsert():
+            container, collection_link, key, prepared = self._prepare_document(
+                database_or_Container_link, document, options
+            )
+            self._check_access_condition(options, container.documents.get(key))
+            return self._write(container, key, prepared, collection_link)
+
+        return self._perform(upsert)
+
+    def ReplaceItem(
+        self,
+        document_link: "str",
+        new_document: "Dict[str, Any]",
+        options: "Optional[Dict[str, Any]]" = None,
+    ):
+        options = options or {}
+
+        def replace():
+            # Like the backend, the partition key is taken from the new body unless given.
+            container, collection_link, key, prepared = self._prepare_document(
+                document_link, new_document, options
+            )
+            item_id = _link_parts(document_link)[5]
+            if prepared["id"] != item_id:
+                raise _failure(400, "The id of an item can't be changed by a replace")
+            existing = container.documents.get(key)
+            if existing is None or self._expired(
+                existing, container.properties.get("defaultTtl"), self._clock()
+            ):
+                raise _failure(
+                    404, f"Item {item_id} does not exist", request_charge=1.0
+                )
+            self._check_access_condition(options, existing)
+            return self._write(container, key, prepared, collection_link)
+
+        return self._perform(replace)
+
+    def ReadItem(
+        self, document_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        options = options or {}
+
+        def read():
+            container, key, document = self._find(document_link, options)
+            headers = self._session_headers(container, container.range_id_of(key[0]))
+            if document is None:
+                raise _failure(
+                    404,
+                    f"Item {_link_parts(document_link)[5]} does not exist",
+                    request_charge=1.0,
+                    headers=headers,
+                )
+            self._check_access_condition(options, document)
+            size = len(json.dumps(document))
+            return document, _kilobytes(size) * _READ_CHARGE_PER_KB, headers
+
+        if self._raw:
+            return RawItem(None, self._perform(read, raw=True))
+        return self._perform(read)
+
+    def DeleteItem(
+        self, document_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ):
+        options = options or {}
+
+        def delete():
+            container, key, document = self._find(document_link, options)
+            if document is None:
+                raise _failure(
+                    404,
+                    f"Item {_link_parts(document_link)[5]} does not exist",
+                    request_charge=1.0,
+                )
+            self._check_access_condition(options, document)
+            del container.documents[key]
+            container.lsn += 1
+            size = len(json.dumps(document))
+            return (
+                None,
+                _kilobytes(size) * _WRITE_CHARGE_PER_KB,
+                self._session_headers(container, container.range_id_of(key[0])),
+            )
+
+        return self._perform(delete)
+
+    def ReadItems(
+        self, collection_link: "str", feed_options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        options = dict(feed_options or {})
+
+        def compute():
+            container = self._container(collection_link, sub_status=1003)
+            key_range = self._routed_range(container)
+            documents = self._live_documents(container, key_range=key_range)
+            headers = self._session_headers(
+                container, key_range["id"] if key_range is not None else None
+            )
+            return documents, headers, len(documents)
+
+        return _ResultIterable(self, compute, options)
+
+    def QueryItems(
+        self,
+        database_or_Container_link: "str",
+        query: "Any",
+        options: "Optional[Dict[str, Any]]" = None,
+        partition_key: "Any" = None,
+    ) -> "_ResultIterable":
+        options = dict(options or {})
+        if partition_key is not None:
+            options["partitionKey"] = partition_key
+
+        def compute():
+            container = self._container(database_or_Container_link, sub_status=1003)
+            text, parameters = _query_text(query)
+            try:
+                parsed = sql.parse(text)
+            except sql.SqlSyntaxError as error:
+                raise _failure(400, str(error))
+            key_range = None
+            if container.partition_key_path is None:
+                key_range = self._routed_range(container) or container.ranges.ranges[0]
+                documents = self._live_documents(container)
+            elif "partitionKey" in options:
+                partition_key = self._partition_key(container, options)
+                key_range = self._routed_range(container, partition_key)
+                if key_range is None:
+                    key_range = container.ranges.get_range_by_id(
+                        container.range_id_of(partition_key)
+                    )
+                documents = self._live_documents(container, partition_key)
+            elif self._partition_key_range_id is not None:
+                # A query addressed to a single range runs like a single-partition query.
+                key_range = self._routed_range(container)
+                documents = self._live_documents(container, key_range=key_range)
+            elif not options.get("enableCrossPartitionQuery"):
+                raise _failure(
+                    400,
+                    "Cross partition query is required but disabled. Please set "
+                    "x-ms-documentdb-query-enablecrosspartition to true.",
+                )
+            elif parsed.has_aggregates and parsed.select_value is None:
+                raise _failure(
+                    400,
+                    "Cross partition query only supports 'VALUE <AggregateFunc>' for aggregates.",
+                )
+            else:
+                documents = self._live_documents(container)
+            try:
+                results = parsed.execute(documents, parameters)
+            except sql.SqlSyntaxError as error:
+                raise _failure(400, str(error))
+            headers = self._session_headers(
+                container, key_range["id"] if key_range is not None else None
+            )
+            return results, headers, len(documents)
+
+        return _ResultIterable(self, compute, options, charge_per_page=_QUERY_CHARGE)
+
+    def QueryItemsChangeFeed(
+        self, collection_link: "str", options: "Optional[Dict[str, Any]]" = None
+    ) -> "_ResultIterable":
+        options = dict(options or {})
+        # The continuation of the change feed is the LSN of the last change seen, not an offset.
+        started = _continuation(options)
+        options.pop("continuation", None)
+        options.pop("initialHeaders", None)
+
+        def compute():
+            container = self._container(collection_link, sub_status=1003)
+            if started is not None:
+                start_lsn = int(started)
+            elif options.get("isStartFromBeginning"):
+                start_lsn = 0
+            else:
+                start_lsn = container.lsn
+            changed = sorted(
+                (
+                    document
+                    for document in self._live_documents(container)
+                    if document["_lsn"] > start_lsn
+                ),
+                key=lambda document: document["_lsn"],
+            )
+            headers = self._session_headers(container, None)
+            headers["etag"] = str(changed[-1]["_lsn"] if changed else start_lsn)
+            return changed, headers, len(changed)
+
+        return _ResultIterable(self, compute, options)
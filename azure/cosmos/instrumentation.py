@@ -0,0 +1,254 @@
+"""
+Per-operation instrumentation: observers notified of every request, and in-process aggregators.
+"""
+
+import math
+import threading
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .query_metrics import QUERY_METRICS_HEADER, QueryMetrics
+from .throttling import get_request_charge
+
+
+class OperationEvent:
+    """ Describes a completed operation: a single request, or a single page of a query.
+
+    :ivar operation: Name of the operation, e.g. `get_item`, `upsert_item` or `query_items`.
+    :ivar resource_link: Link of the resource the operation was performed on behalf of, typically the container.
+    :ivar partition_key: Partition key value the operation targeted, if any.
+    :ivar latency: Wall-clock duration of the operation in seconds, including retries.
+    :ivar request_charge: Request units charged for the operation.
+    :ivar request_size: Size in bytes of the request body, if it has one.
+    :ivar response_size: Size in bytes of the response body, if known.
+    :ivar retry_count: Number of times the request was retried after being throttled.
+    :ivar query_metrics: Query metrics returned with the response, if any were requested.
+    :ivar response_metadata: Headers of the response, if the operation succeeded.
+    :ivar error: The exception the operation failed with, or None if it succeeded.
+    """
+
+    __slots__ = (
+        "operation",
+        "resource_link",
+        "partition_key",
+        "latency",
+        "request_charge",
+        "request_size",
+        "response_size",
+        "retry_count",
+        "query_metrics",
+        "response_metadata",
+        "error",
+    )
+
+    def __init__(
+        self,
+        operation: "str",
+        resource_link: "Optional[str]",
+        partition_key: "Any",
+        latency: "float",
+        request_charge: "float",
+        request_size: "Optional[int]" = None,
+        response_size: "Optional[int]" = None,
+        retry_count: "int" = 0,
+        query_metrics: "Optional[QueryMetrics]" = None,
+        response_metadata: "Optional[Dict[str, Any]]" = None,
+        error: "Optional[BaseException]" = None,
+    ):
+        self.operation = operation
+        self.resource_link = resource_link
+        self.partition_key = partition_key
+        self.latency = latency
+        self.request_charge = request_charge
+        self.request_size = request_size
+        self.response_size = response_size
+        self.retry_count = retry_count
+        self.query_metrics = query_metrics
+        self.response_metadata = response_metadata
+        self.error = error
+
+    def __repr__(self):
+        return (
+            f"<OperationEvent {self.operation} {self.resource_link} "
+            f"latency={self.latency:.4f}s charge={self.request_charge}>"
+        )
+
+
+class OperationObserver:
+    """ Base class of observers notified of every operation performed by a :class:`CosmosClient`.
+
+    Observers are called synchronously on the thread that performed the operation, so they
+    should be cheap; operations of bulk methods may notify an observer from several threads
+    at once.
+    """
+
+    def on_operation(self, event: "OperationEvent"):
+        """ Called once an operation completed, successfully or not.
+        """
+
+
+def _notify_observers(
+    observers: "Iterable[OperationObserver]",
+    operation: "str",
+    resource_link: "Optional[str]",
+    partition_key: "Any",
+    latency: "float",
+    headers: "Optional[Dict[str, Any]]",
+    *,
+    request_size: "Optional[int]" = None,
+    retry_count: "int" = 0,
+    error: "Optional[BaseException]" = None,
+):
+    """ Report a completed operation, whose response had `headers`, to each of `observers`.
+    """
+    headers = headers or {}
+    response_size = headers.get("Content-Length", headers.get("content-length"))
+    event = OperationEvent(
+        operation,
+        resource_link,
+        partition_key,
+        latency,
+        get_request_charge(headers),
+        request_size=request_size,
+        response_size=int(response_size) if response_size is not None else None,
+        retry_count=retry_count,
+        query_metrics=QueryMetrics.from_header(headers.get(QUERY_METRICS_HEADER)),
+        response_metadata=None if error is not None else headers,
+        error=error,
+    )
+    for observer in observers:
+        observer.on_operation(event)
+
+
+class LatencyHistogram:
+    """ Histogram of latencies with logarithmic buckets.
+
+    Percentiles are exact to within `precision` (relative), regardless of the number of
+    recorded values, in constant memory per order of magnitude of latency.
+    """
+
+    def __init__(self, precision: "float" = 0.01):
+        self._log_base = math.log1p(precision)
+        self._buckets: "Dict[int, int]" = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: "float"):
+        bucket = math.floor(math.log(max(value, 1e-9)) / self._log_base)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> "float":
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: "float") -> "float":
+        """ The value below which `percentile` percent of the recorded values fall.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                # Report the upper bound of the bucket, capped by the largest value seen.
+                return min(math.exp((bucket + 1) * self._log_base), self.max)
+        return self.max
+
+
+class LatencyAggregator(OperationObserver):
+    """ Aggregates latency histograms per container and operation.
+    """
+
+    def __init__(self, precision: "float" = 0.01):
+        self.precision = precision
+        self._histograms: "Dict[Tuple[Optional[str], str], LatencyHistogram]" = {}
+        self._lock = threading.Lock()
+
+    def on_operation(self, event: "OperationEvent"):
+        key = (event.resource_link, event.operation)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.precision)
+            histogram.record(event.latency)
+
+    def histogram(
+        self, resource_link: "Optional[str]", operation: "str"
+    ) -> "Optional[LatencyHistogram]":
+        return self._histograms.get((resource_link, operation))
+
+    def summary(self) -> "Dict[Tuple[Optional[str], str], Dict[str, float]]":
+        """ Count, mean, p50, p99 and maximum latency in seconds per `(resource link, operation)`.
+        """
+        with self._lock:
+            return {
+                key: dict(
+                    count=histogram.count,
+                    mean=histogram.mean,
+                    p50=histogram.percentile(50),
+                    p99=histogram.percentile(99),
+                    max=histogram.max,
+                )
+                for key, histogram in self._histograms.items()
+            }
+
+
+class RequestChargeAggregator(OperationObserver):
+    """ Totals the request units charged per container and operation, and per partition key value.
+    """
+
+    def __init__(self):
+        self._by_operation: "Dict[Tuple[Optional[str], str], float]" = {}
+        self._by_partition_key: "Dict[Tuple[Optional[str], str], float]" = {}
+        self._lock = threading.Lock()
+
+    def on_operation(self, event: "OperationEvent"):
+        with self._lock:
+            key = (event.resource_link, event.operation)
+            self._by_operation[key] = (
+                self._by_operation.get(key, 0.0) + event.request_charge
+            )
+            if event.partition_key is not None:
+                key = (event.resource_link, repr(event.partition_key))
+                self._by_partition_key[key] = (
+                    self._by_partition_key.get(key, 0.0) + event.request_charge
+                )
+
+    def total(
+        self, resource_link: "Optional[str]" = None, operation: "Optional[str]" = None
+    ) -> "float":
+        """ Total request units charged, optionally restricted to a container and/or an operation.
+        """
+        with self._lock:
+            return sum(
+                charge
+                for (link, name), charge in self._by_operation.items()
+                if (resource_link is None or link == resource_link)
+                and (operation is None or name == operation)
+            )
+
+    def summary(self) -> "Dict[Tuple[Optional[str], str], float]":
+        """ Total request units charged per `(resource link, operation)`.
+        """
+        with self._lock:
+            return dict(self._by_operation)
+
+    def top_partition_keys(
+        self, resource_link: "str", count: "int" = 10
+    ) -> "List[Tuple[str, float]]":
+        """ The `count` partition key values of a container that were charged the most request units.
+
+        :returns: `(repr of partition key value, request units)` pairs, most expensive first.
+        """
+        with self._lock:
+            charges = [
+                (partition_key, charge)
+                for (link, partition_key), charge in self._by_partition_key.items()
+                if link == resource_link
+            ]
+        return sorted(charges, key=lambda pair: pair[1], reverse=True)[:count]
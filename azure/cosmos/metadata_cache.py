@@ -0,0 +1,68 @@
+"""
+Client-side cache of database and container properties.
+"""
+
+import threading
+import time
+
+from typing import Any, Dict, Optional, Tuple
+
+
+class MetadataCache:
+    """ Time-bounded cache of resource properties, keyed by resource link.
+
+    Entries expire `ttl` seconds after they were stored. Invalidating a link also
+    invalidates every resource below it, so invalidating a database drops the cached
+    properties of its containers.
+    """
+
+    def __init__(self, ttl: "float"):
+        """
+        :param ttl: Number of seconds a cached entry remains valid.
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self._entries: "Dict[str, Tuple[float, Dict[str, Any]]]" = {}
+        self._lock = threading.Lock()
+
+    def get(self, link: "str") -> "Optional[Dict[str, Any]]":
+        """ Return the cached properties of the resource at `link`, or None if absent or expired.
+        """
+        entry = self._entries.get(link)
+        if entry is None:
+            return None
+        expires_at, properties = entry
+        if expires_at <= time.monotonic():
+            with self._lock:
+                if self._entries.get(link) is entry:
+                    del self._entries[link]
+            return None
+        return properties
+
+    def set(self, link: "str", properties: "Dict[str, Any]"):
+        """ Cache the properties of the resource at `link`.
+        """
+        with self._lock:
+            self._entries[link] = (time.monotonic() + self.ttl, properties)
+
+    def invalidate(self, link: "str"):
+        """ Drop the cached properties of the resource at `link` and of every resource below it.
+        """
+        prefix = link + "/"
+        with self._lock:
+            for cached_link in [
+                cached_link
+                for cached_link in self._entries
+                if cached_link == link or cached_link.startswith(prefix)
+            ]:
+                del self._entries[cached_link]
+
+    def clear(self):
+        """ Drop all cached properties.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,5 +1,30 @@
 import collections.abc
 
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .query_metrics import QUERY_METRICS_HEADER, QueryMetrics
+
+
+def _add_query_metrics(
+    query_metrics: "Optional[QueryMetrics]", metadata: "Optional[Dict[str, Any]]"
+) -> "Optional[QueryMetrics]":
+    """ `query_metrics` plus those of the page whose response headers are `metadata`.
+    """
+    page_metrics = QueryMetrics.from_header((metadata or {}).get(QUERY_METRICS_HEADER))
+    if page_metrics is None:
+        return query_metrics
+    return page_metrics if query_metrics is None else query_metrics + page_metrics
+
 
 class QueryResultIterator(collections.abc.Iterator):
     """ Iterator over query results from Azure Cosmos SQL DB
@@ -7,14 +32,148 @@ class QueryResultIterator(collections.abc.Iterator):
     The type of each item returned by the iterator depends on the specific
     query used to generate the result set. It may be a scalar value for aggregate
     functions, or it may be a dictionary for projections.
+
+    Results are fetched one page at a time. The first page is requested when the
+    iterator is created; subsequent pages are only requested once the items of the
+    current page have been consumed.
+
+    :ivar response_metadata: The response headers of the most recently fetched page.
+    :ivar query_metrics: The :class:`QueryMetrics` of all pages fetched so far, if the query
+        was run with `populate_query_metrics`; otherwise None.
     """
 
-    def __init__(self, inner, metadata=None):
+    def __init__(
+        self, fetch_next_page: "Callable[[], Tuple[List[Any], Dict[str, Any]]]"
+    ):
+        """
+        :param fetch_next_page: Callable returning the next page of results along with the
+            response metadata for that page. An empty page signals the end of the results.
+        """
+        self._fetch_next_page = fetch_next_page
+        self._page: "List[Any]" = []
+        self._index = 0
+        self._exhausted = False
+        self.response_metadata: "Optional[Dict[str, Any]]" = None
+        self.query_metrics: "Optional[QueryMetrics]" = None
+        self._fetch()
+
+    def _fetch(self) -> "bool":
+        page, metadata = self._fetch_next_page()
+        self.query_metrics = _add_query_metrics(self.query_metrics, metadata)
+        if not page:
+            self._exhausted = True
+            if self.response_metadata is None:
+                self.response_metadata = metadata
+            return False
+        self._page = page
+        self._index = 0
         self.response_metadata = metadata
-        self._inner = inner
+        return True
+
+    @property
+    def continuation_token(self) -> "Optional[str]":
+        """ Token that resumes the query at the page following the current page.
+
+        Pass it as `continuation_token` to the method that created this iterator. `None`
+        once the last page has been fetched.
+        """
+        if self.response_metadata is None:
+            return None
+        return self.response_metadata.get("x-ms-continuation") or None
 
     def __next__(self):
-        return self._inner.__next__()
+        while self._index >= len(self._page):
+            if self._exhausted or not self._fetch():
+                raise StopIteration
+        item = self._page[self._index]
+        self._index += 1
+        return item
 
     def __iter__(self):
         return self
+
+    def by_page(self) -> "Iterator[List[Any]]":
+        """ Iterate over the remaining results one page at a time.
+
+        Items of the current page that have not yet been returned by the iterator are
+        yielded first as a (possibly partial) page. `response_metadata` always describes
+        the most recently yielded page.
+        """
+        while True:
+            if self._index < len(self._page):
+                page = self._page[self._index :]
+                self._index = len(self._page)
+                yield page
+            if self._exhausted or not self._fetch():
+                return
+
+
+class AsyncQueryResultIterator(collections.abc.AsyncIterator):
+    """ Asynchronous iterator over query results from Azure Cosmos SQL DB
+
+    The asynchronous counterpart of :class:`QueryResultIterator`. Because a constructor
+    can't await, the first page is requested by the first call to `__anext__` (or the
+    first step of :meth:`by_page`) rather than when the iterator is created.
+
+    :ivar response_metadata: The response headers of the most recently fetched page.
+    :ivar query_metrics: The :class:`QueryMetrics` of all pages fetched so far, if the query
+        was run with `populate_query_metrics`; otherwise None.
+    """
+
+    def __init__(
+        self,
+        fetch_next_page: "Callable[[], Awaitable[Tuple[List[Any], Dict[str, Any]]]]",
+    ):
+        """
+        :param fetch_next_page: Coroutine function returning the next page of results along
+            with the response metadata for that page. An empty page signals the end of the results.
+        """
+        self._fetch_next_page = fetch_next_page
+        self._page: "List[Any]" = []
+        self._index = 0
+        self._exhausted = False
+        self.response_metadata: "Optional[Dict[str, Any]]" = None
+        self.query_metrics: "Optional[QueryMetrics]" = None
+
+    async def _fetch(self) -> "bool":
+        page, metadata = await self._fetch_next_page()
+        self.query_metrics = _add_query_metrics(self.query_metrics, metadata)
+        if not page:
+            self._exhausted = True
+            if self.response_metadata is None:
+                self.response_metadata = metadata
+            return False
+        self._page = page
+        self._index = 0
+        self.response_metadata = metadata
+        return True
+
+    @property
+    def continuation_token(self) -> "Optional[str]":
+        """ Token that resumes the query at the page following the current page.
+        """
+        if self.response_metadata is None:
+            return None
+        return self.response_metadata.get("x-ms-continuation") or None
+
+    async def __anext__(self):
+        while self._index >= len(self._page):
+            if self._exhausted or not await self._fetch():
+                raise StopAsyncIteration
+        item = self._page[self._index]
+        self._index += 1
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def by_page(self) -> "AsyncIterator[List[Any]]":
+        """ Iterate over the remaining results one page at a time.
+        """
+        while True:
+            if self._index < len(self._page):
+                page = self._page[self._index :]
+                self._index = len(self._page)
+                yield page
+            if self._exhausted or not await self._fetch():
+                return
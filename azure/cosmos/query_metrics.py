@@ -0,0 +1,148 @@
+"""
+Structured access to the query metrics returned when a query is run with `populate_query_metrics`.
+"""
+
+from typing import Dict, Optional
+
+QUERY_METRICS_HEADER = "x-ms-documentdb-query-metrics"
+
+# Attribute names of the metrics, keyed by their name in the response header.
+_FIELDS = {
+    "retrievedDocumentCount": "retrieved_document_count",
+    "retrievedDocumentSize": "retrieved_document_size",
+    "outputDocumentCount": "output_document_count",
+    "outputDocumentSize": "output_document_size",
+    "totalExecutionTimeInMs": "total_execution_time",
+    "queryCompileTimeInMs": "query_compile_time",
+    "queryLogicalPlanBuildTimeInMs": "logical_plan_build_time",
+    "queryPhysicalPlanBuildTimeInMs": "physical_plan_build_time",
+    "queryOptimizationTimeInMs": "query_optimization_time",
+    "VMExecutionTimeInMs": "vm_execution_time",
+    "indexLookupTimeInMs": "index_lookup_time",
+    "documentLoadTimeInMs": "document_load_time",
+    "systemFunctionExecuteTimeInMs": "system_function_execution_time",
+    "userFunctionExecuteTimeInMs": "user_function_execution_time",
+    "documentWriteTimeInMs": "document_write_time",
+    "writeOutputTimeInMs": "write_output_time",
+}
+
+
+class QueryMetrics:
+    """ Execution metrics of a query, for one page of results or aggregated over several.
+
+    Times are in milliseconds and sizes in bytes. Metrics of several pages or partitions are
+    combined with `+`; use :attr:`QueryResultIterator.query_metrics` for the metrics of all
+    pages fetched by a query.
+
+    :ivar retrieved_document_count: Number of documents loaded to evaluate the query.
+    :ivar output_document_count: Number of documents returned by the query.
+    :ivar index_hit_ratio: Fraction of the retrieved documents that matched the filter, i.e. how
+        selective the index was. A ratio well below 1 means the query scans documents it
+        doesn't return.
+    :ivar index_lookup_time: Time spent looking up the index.
+    :ivar document_load_time: Time spent loading documents.
+    :ivar vm_execution_time: Time spent in the query runtime, including index lookup and document load.
+    :ivar total_execution_time: Time spent executing the query on the service.
+    """
+
+    retrieved_document_count = 0.0
+    retrieved_document_size = 0.0
+    output_document_count = 0.0
+    output_document_size = 0.0
+    index_hit_ratio = 0.0
+    total_execution_time = 0.0
+    query_compile_time = 0.0
+    logical_plan_build_time = 0.0
+    physical_plan_build_time = 0.0
+    query_optimization_time = 0.0
+    vm_execution_time = 0.0
+    index_lookup_time = 0.0
+    document_load_time = 0.0
+    system_function_execution_time = 0.0
+    user_function_execution_time = 0.0
+    document_write_time = 0.0
+    write_output_time = 0.0
+
+    def __init__(self, **metrics: "float"):
+        for name, value in metrics.items():
+            if not hasattr(QueryMetrics, name):
+                raise TypeError(f"unknown query metric {name!r}")
+            setattr(self, name, value)
+
+    @classmethod
+    def from_header(cls, header: "Optional[str]") -> "Optional[QueryMetrics]":
+        """ Parse the semicolon-delimited `name=value` pairs of the query metrics response header.
+
+        :returns: The parsed metrics, or None if `header` is empty.
+        """
+        if not header:
+            return None
+        metrics = {}
+        for pair in header.split(";"):
+            name, _, value = pair.partition("=")
+            name = name.strip()
+            field = (
+                "index_hit_ratio"
+                if name == "indexUtilizationRatio"
+                else _FIELDS.get(name)
+            )
+            if field is None:
+                continue
+            try:
+                metrics[field] = float(value)
+            except ValueError:
+                continue
+        return cls(**metrics)
+
+    def to_header(self) -> "str":
+        """ The metrics as the value of the query metrics response header, parsed by :meth:`from_header`.
+        """
+        pairs = [f"{name}={getattr(self, field)!r}" for name, field in _FIELDS.items()]
+        pairs.append(f"indexUtilizationRatio={self.index_hit_ratio!r}")
+        return ";".join(pairs)
+
+    @property
+    def runtime_execution_time(self) -> "float":
+        """ Time spent in the query runtime itself, excluding index lookup, document load, function execution and output.
+        """
+        return max(
+            0.0,
+            self.vm_execution_time
+            - self.index_lookup_time
+            - self.document_load_time
+            - self.system_function_execution_time
+            - self.user_function_execution_time
+            - self.write_output_time,
+        )
+
+    def __add__(self, other: "QueryMetrics") -> "QueryMetrics":
+        if not isinstance(other, QueryMetrics):
+            return NotImplemented
+        combined = QueryMetrics(
+            **{
+                field: getattr(self, field) + getattr(other, field)
+                for field in _FIELDS.values()
+            }
+        )
+        # The hit ratio is an average over retrieved documents, so it is weighted by them.
+        retrieved = self.retrieved_document_count + other.retrieved_document_count
+        if retrieved:
+            combined.index_hit_ratio = (
+                self.index_hit_ratio * self.retrieved_document_count
+                + other.index_hit_ratio * other.retrieved_document_count
+            ) / retrieved
+        return combined
+
+    def as_dict(self) -> "Dict[str, float]":
+        metrics = {field: getattr(self, field) for field in _FIELDS.values()}
+        metrics["index_hit_ratio"] = self.index_hit_ratio
+        metrics["runtime_execution_time"] = self.runtime_execution_time
+        return metrics
+
+    def __repr__(self):
+        return (
+            f"<QueryMetrics retrieved={self.retrieved_document_count:g} "
+            f"output={self.output_document_count:g} "
+            f"index_hit_ratio={self.index_hit_ratio:.2f} "
+            f"total_execution_time={self.total_execution_time:.2f}ms>"
+        )
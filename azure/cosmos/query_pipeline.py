@@ -0,0 +1,1062 @@
+"""
+Client-side execution of queries across the partition key ranges of a container.
+
+A cross-partition query is sent to every partition key range of its container separately, and the
+ranges are queried concurrently. The pages of results of most queries are returned as they arrive;
+the results of `ORDER BY` queries are merged, in order, from the results of every range,
+`SELECT VALUE` aggregates and the groups of `GROUP BY` queries are combined from the partial
+aggregates of every range, and the results of `DISTINCT` queries are deduplicated across ranges.
+"""
+
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import json
+import tempfile
+
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from . import sql
+from .query_iterator import _add_query_metrics
+from .query_metrics import QUERY_METRICS_HEADER, QueryMetrics
+from .throttling import get_request_charge
+
+PageFetcher = Callable[[], Tuple[List[Any], Dict[str, Any]]]
+
+# Ranges queried at a time when the degree of parallelism is left to the client.
+_AUTOMATIC_DEGREE_OF_PARALLELISM = 32
+
+# Results per page of a merged query that doesn't set a page size.
+_DEFAULT_PAGE_SIZE = 100
+
+# Groups, or distinct results, held in memory before they're spilled to temporary files.
+_DEFAULT_MAX_IN_MEMORY_GROUP_COUNT = 100000
+
+# Number of temporary files groups are spilled to, by hash of their key.
+_SPILL_FILE_COUNT = 16
+
+# The partial aggregate of the values of an argument in a range, from which the aggregate is
+# combined. An undefined sum or extreme is missing from the partial aggregate.
+_PARTIAL_AGGREGATES = {
+    "COUNT": '{{"count": COUNT({0})}}',
+    "SUM": '{{"sum": SUM({0})}}',
+    "AVG": '{{"sum": SUM({0}), "count": COUNT({0})}}',
+    "MIN": '{{"extreme": MIN({0}), "count": COUNT({0})}}',
+    "MAX": '{{"extreme": MAX({0}), "count": COUNT({0})}}',
+}
+
+
+class QueryPlan:
+    """ How the results of a cross-partition query are computed from the results of each range.
+
+    :ivar query: The parsed query.
+    :ivar skip: The number of results skipped (`OFFSET`).
+    :ivar take: The number of results returned at most (`TOP`, `LIMIT`), or None if unlimited.
+    :ivar aggregate: The aggregate of a `SELECT VALUE` aggregate query, or None.
+    :ivar group_aggregates: For `GROUP BY` queries, the aggregate of each projection of the select
+        clause, or None for projections that aren't aggregates.
+    :ivar distinct: Whether the results are deduplicated across ranges.
+    :ivar range_query: The query sent to each range. It returns no more results than the query
+        needs from a range, for `ORDER BY` queries, the values each result is ordered by, and for
+        aggregate queries, the partial aggregates of the range (of each group of the range, for
+        `GROUP BY` queries).
+    """
+
+    def __init__(self, query: "sql.Query", text: "str", parameters: "Dict[str, Any]"):
+        self.query = query
+        self.skip, self.take = query.limits(parameters)
+        limit = None if self.take is None else self.skip + self.take
+        self.aggregate: "Optional[sql.Aggregate]" = None
+        self.group_aggregates: "List[Optional[sql.Aggregate]]" = []
+        self.distinct = False
+        if query.group_by:
+            self.group_aggregates = [
+                expression if isinstance(expression, sql.Aggregate) else None
+                for expression in query.projections
+            ]
+            self.range_query = _group_by_range_query(query, self.group_aggregates)
+        elif query.has_aggregates:
+            self.aggregate = cast("sql.Aggregate", query.select_value)
+            partial = _PARTIAL_AGGREGATES[self.aggregate.name].format(
+                self.aggregate.text
+            )
+            self.range_query = f"SELECT VALUE {partial} {query.filter_text}"
+        elif query.distinct:
+            self.distinct = True
+            # A range can't tell which of its results are duplicates of other ranges' results,
+            # so TOP and OFFSET ... LIMIT only apply to the deduplicated results.
+            value = "VALUE " if query.select_value is not None else ""
+            self.range_query = (
+                f"SELECT DISTINCT {value}{query.select_text} {query.body_text}"
+            )
+        elif query.order_by:
+            self.range_query = _order_by_range_query(query, limit)
+        elif query.offset is not None:
+            self.range_query = _range_query(query, limit)
+        else:
+            self.range_query = text
+
+    @property
+    def ordered(self) -> "bool":
+        """ Whether the results of the ranges are merged in order.
+        """
+        return bool(self.query.order_by) and self.aggregate is None
+
+    @property
+    def grouped(self) -> "bool":
+        """ Whether the results are the groups of a `GROUP BY` query, combined across ranges.
+        """
+        return bool(self.query.group_by)
+
+    @property
+    def supports_raw(self) -> "bool":
+        """ Whether the pages of the ranges are returned as they are, so that they can be returned undecoded.
+        """
+        return (
+            not self.ordered
+            and not self.grouped
+            and not self.distinct
+            and self.aggregate is None
+            and not self.skip
+            and self.take is None
+        )
+
+
+def _top(limit: "Optional[int]") -> "str":
+    return "" if limit is None else f"TOP {limit} "
+
+
+def _range_query(query: "sql.Query", limit: "Optional[int]") -> "str":
+    value = "VALUE " if query.select_value is not None else ""
+    return f"SELECT {_top(limit)}{value}{query.select_text} {query.body_text}"
+
+
+def _order_by_range_query(query: "sql.Query", limit: "Optional[int]") -> "str":
+    # Each result is {"orderByItems": [{"item": <value>}, ...], "payload": <result>}, like the
+    # queries the service plans for its own clients.
+    items = ", ".join(f'{{"item": {item.text}}}' for item in query.order_by)
+    if query.select_star:
+        payload = query.alias
+    elif query.select_value is not None:
+        payload = query.select_text
+        # The payload of a result whose value is undefined is missing and the result dropped,
+        # so a range may have to return more results than are kept.
+        limit = None
+    else:
+        payload = "{%s}" % ", ".join(
+            f"{json.dumps(item.name)}: {item.text}" for item in query.select_items
+        )
+    return f"SELECT {_top(limit)}[{items}] AS orderByItems, {payload} AS payload {query.body_text}"
+
+
+def _group_by_range_query(
+    query: "sql.Query", aggregates: "List[Optional[sql.Aggregate]]"
+) -> "str":
+    # Each result is {"groupByItems": [{"item": <key>}, ...], "payload": {"<position>": <value>}},
+    # where the value of each aggregate of the select clause is its partial aggregate.
+    items = ", ".join(f'{{"item": {text}}}' for text in query.group_by_texts)
+    texts = (
+        [query.select_text]
+        if query.select_value is not None
+        else [item.text for item in query.select_items]
+    )
+    payload = ", ".join(
+        f'"{position}": '
+        + (
+            text
+            if aggregate is None
+            else _PARTIAL_AGGREGATES[aggregate.name].format(aggregate.text)
+        )
+        for position, (text, aggregate) in enumerate(zip(texts, aggregates))
+    )
+    group_by = ", ".join(query.group_by_texts)
+    return (
+        f'SELECT VALUE {{"groupByItems": [{items}], "payload": {{{payload}}}}} '
+        f"{query.filter_text} GROUP BY {group_by}"
+    )
+
+
+def plan_query(
+    query: "Any", parameters: "Optional[List]" = None
+) -> "Optional[QueryPlan]":
+    """ The plan of `query`, or None if the client can't execute it across ranges.
+
+    Queries outside of the grammar of :mod:`azure.cosmos.sql`, and those whose results the client
+    doesn't merge, are left to the service: aggregates other than a `SELECT VALUE` aggregate
+    function call or aggregate function calls of a `GROUP BY` select clause, and `GROUP BY` or
+    `DISTINCT` queries that are also ordered.
+    """
+    try:
+        parsed = sql.parse(query)
+        if parsed.group_by:
+            if (
+                parsed.order_by
+                or parsed.distinct
+                or parsed.select_star
+                or any(
+                    expression.is_aggregate
+                    and not isinstance(expression, sql.Aggregate)
+                    for expression in parsed.projections
+                )
+            ):
+                return None
+        elif parsed.has_aggregates:
+            if not isinstance(parsed.select_value, sql.Aggregate):
+                return None
+        elif parsed.distinct and parsed.order_by:
+            return None
+        return QueryPlan(parsed, query, sql.parameters_dict(parameters))
+    except sql.SqlSyntaxError:
+        return None
+
+
+class PartitionStream:
+    """ The pages of results of a query in one partition key range.
+
+    :ivar key_range: The partition key range.
+    :ivar continuation: The continuation token of the next page to fetch, or None to fetch the first page.
+    :ivar done: Whether the last page was fetched.
+    """
+
+    __slots__ = (
+        "key_range",
+        "continuation",
+        "done",
+        "_open",
+        "_fetch",
+        "_parent",
+        "_skip",
+        "_shared_skip",
+        "_resume",
+        "_consumed",
+        "_pending",
+        "_gone",
+    )
+
+    def __init__(
+        self,
+        key_range: "Dict[str, Any]",
+        open_range: "Callable[[Dict[str, Any], Optional[str]], PageFetcher]",
+        continuation: "Optional[str]" = None,
+        consumed: "int" = 0,
+        parent: "Optional[PartitionStream]" = None,
+        shared_skip: "Optional[List[int]]" = None,
+    ):
+        self.key_range = key_range
+        self.continuation = continuation
+        self.done = False
+        self._open = open_range
+        self._fetch: "Optional[PageFetcher]" = None
+        self._parent = parent
+        # Results of the first page that an earlier execution of the query already returned.
+        self._skip = consumed
+        # Results already returned from the merge of the ranges a range was split into, shared by
+        # the streams of those ranges.
+        self._shared_skip = shared_skip
+        # Where the results not yet returned to the caller start: the continuation token of a
+        # page, and the number of results of that page already returned. Also the number of
+        # pages fetched whose results weren't all returned yet.
+        self._resume = continuation
+        self._consumed = consumed
+        self._pending = 0
+        self._gone = False
+
+    def fetch(self) -> "Tuple[List[Any], Dict[str, Any]]":
+        """ Fetch the next page of results; an empty page once the results are exhausted.
+        """
+        if self._fetch is None:
+            self._fetch = self._open(self.key_range, self.continuation)
+        page, metadata = self._fetch()
+        self.continuation = (metadata or {}).get("x-ms-continuation") or None
+        self.done = not page or self.continuation is None
+        if self._skip:
+            page = page[self._skip :]
+            self._skip = 0
+        return page, metadata
+
+    def split(self, key_ranges: "List[Dict[str, Any]]") -> "List[PartitionStream]":
+        """ Streams resuming the query in the ranges `key_ranges` this stream's range was split into.
+        """
+        self._gone = True
+        # Results of the page to resume from that weren't skipped yet, the range being gone
+        # before it was fetched, are skipped from the merge of its children.
+        shared_skip = [self._skip] if self._skip else self._shared_skip
+        return [
+            PartitionStream(
+                key_range,
+                self._open,
+                self.continuation,
+                parent=self,
+                shared_skip=shared_skip,
+            )
+            for key_range in key_ranges
+        ]
+
+    def _unfinished(self) -> "bool":
+        return self._pending > 0 or not (self.done or self._gone)
+
+    def _reported_by_parent(self) -> "bool":
+        parent = self._parent
+        while parent is not None:
+            if parent._pending > 0:
+                return True
+            parent = parent._parent
+        return False
+
+
+def encode_continuation(
+    streams: "List[PartitionStream]", skip: "int" = 0, take: "Optional[int]" = None
+) -> "Optional[str]":
+    """ A token resuming a query after the results returned so far by `streams`, or None if they are all exhausted.
+
+    The token lists the effective partition keys of each range with results left, the
+    continuation token of the range, and the number of results of its page already returned;
+    and the number of results the query has left to skip and to return.
+    """
+    entries = []
+    for stream in streams:
+        if stream._unfinished() and not stream._reported_by_parent():
+            entry = [
+                stream.key_range["minInclusive"],
+                stream.key_range["maxExclusive"],
+                stream._resume,
+            ]
+            if stream._consumed:
+                entry.append(stream._consumed)
+            entries.append(entry)
+    if not entries:
+        return None
+    token: "Dict[str, Any]" = dict(ranges=entries)
+    if skip:
+        token["skip"] = skip
+    if take is not None:
+        token["take"] = take
+    return json.dumps(token, separators=(",", ":"))
+
+
+def _decode_continuation(continuation: "Optional[str]") -> "Optional[Dict[str, Any]]":
+    if not continuation or not continuation.startswith('{"ranges":'):
+        return None
+    try:
+        token = json.loads(continuation)
+    except ValueError:
+        return None
+    if not all(
+        isinstance(entry, list) and len(entry) in (3, 4) for entry in token["ranges"]
+    ):
+        return None
+    return token
+
+
+def is_parallel_continuation(continuation: "Optional[str]") -> "bool":
+    """ Whether `continuation` is a token returned by a query executed across ranges by the client.
+    """
+    return _decode_continuation(continuation) is not None
+
+
+def _degree_of_parallelism(
+    max_degree_parallelism: "Optional[int]", range_count: "int"
+) -> "int":
+    if max_degree_parallelism is None or max_degree_parallelism < 0:
+        return max(1, min(range_count, _AUTOMATIC_DEGREE_OF_PARALLELISM))
+    return max(1, max_degree_parallelism)
+
+
+def _with_continuation(
+    metadata: "Dict[str, Any]", continuation: "Optional[str]"
+) -> "Dict[str, Any]":
+    metadata = type(metadata)(metadata)
+    if continuation is None:
+        metadata.pop("x-ms-continuation", None)
+    else:
+        metadata["x-ms-continuation"] = continuation
+    return metadata
+
+
+class _ConsumedMetadata:
+    """ The response metadata of the pages a stage consumed since it last emitted one.
+
+    A page emitted by a stage has the headers of the latest page consumed, with the request charges
+    and query metrics of every page consumed for it added up, so that the pages of a query account
+    for every request it sent.
+    """
+
+    __slots__ = ("_latest", "_request_charge", "_query_metrics", "pending")
+
+    def __init__(self):
+        self._latest: "Dict[str, Any]" = {}
+        self._request_charge = 0.0
+        self._query_metrics: "Optional[QueryMetrics]" = None
+        # Whether pages were consumed since a page was last emitted.
+        self.pending = False
+
+    def add(self, metadata: "Dict[str, Any]"):
+        self.pending = True
+        self._latest = metadata
+        self._request_charge += get_request_charge(metadata)
+        self._query_metrics = _add_query_metrics(self._query_metrics, metadata)
+
+    def take(self, continuation: "Optional[str]") -> "Dict[str, Any]":
+        """ The metadata of the page emitted next, resumed by `continuation`; the next page adds up the pages consumed from then on.
+        """
+        metadata = _with_continuation(self._latest, continuation)
+        metadata["x-ms-request-charge"] = str(self._request_charge)
+        metadata.pop(QUERY_METRICS_HEADER, None)
+        if self._query_metrics is not None:
+            metadata[QUERY_METRICS_HEADER] = self._query_metrics.to_header()
+        self._request_charge = 0.0
+        self._query_metrics = None
+        self.pending = False
+        return metadata
+
+
+def execute(
+    overlapping_ranges: "Callable[..., List[Dict[str, Any]]]",
+    open_range: "Callable[[Dict[str, Any], Optional[str]], PageFetcher]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    *,
+    plan: "Optional[QueryPlan]" = None,
+    continuation: "Optional[str]" = None,
+    max_degree_parallelism: "Optional[int]" = None,
+    max_buffered_item_count: "Optional[int]" = None,
+    page_size: "Optional[int]" = None,
+    max_in_memory_group_count: "Optional[int]" = None,
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Execute a query, or read a feed if `plan` is None, in every range; yield its pages with their response metadata.
+
+    The continuation token in the metadata of each page resumes the query after that page.
+
+    :param overlapping_ranges: Callable returning the ranges overlapping the effective partition keys
+        from its first argument (inclusive) to its second (exclusive), or every range without arguments.
+    :param open_range: Callable starting the query in a range, from a continuation token or from the
+        first page if None, and returning the function fetching its pages.
+    :param split: Callable returning the ranges a stream's range was split into if the exception
+        raised by its fetch reports the range gone, or None to re-raise the exception.
+    :param continuation: A token returned by an earlier execution of the query, to resume from.
+    :param max_degree_parallelism: Maximum number of pages fetched at a time; automatic if None or negative.
+    :param max_buffered_item_count: Stop fetching pages ahead of the caller once this many results are
+        waiting to be yielded; with 0, pages are fetched one at a time as they're needed. By default, as
+        many pages are buffered as are fetched at a time.
+    :param page_size: Number of results per page of merged results.
+    :param max_in_memory_group_count: Maximum number of groups of a `GROUP BY` query, or of distinct
+        results of a `DISTINCT` query, held in memory; more are spilled to temporary files.
+    :raises ValueError: `continuation` wasn't returned by a query executed across ranges.
+    """
+    skip, take = (plan.skip, plan.take) if plan is not None else (0, None)
+    if continuation is None:
+        streams = [
+            PartitionStream(key_range, open_range) for key_range in overlapping_ranges()
+        ]
+    else:
+        token = _decode_continuation(continuation)
+        if token is None:
+            raise ValueError(f"Invalid continuation token {continuation}")
+        skip, take = token.get("skip", 0), token.get("take")
+        streams = []
+        for entry in token["ranges"]:
+            key_ranges = overlapping_ranges(entry[0], entry[1])
+            if len(key_ranges) == 1:
+                streams.append(PartitionStream(key_ranges[0], open_range, *entry[2:]))
+                continue
+            # A range split since the token was returned resumes in each of its children. The
+            # results of its page already returned come first in the merge of the children.
+            shared_skip = [entry[3] if len(entry) > 3 else 0]
+            streams.extend(
+                PartitionStream(
+                    key_range, open_range, entry[2], shared_skip=shared_skip
+                )
+                for key_range in key_ranges
+            )
+    degree = _degree_of_parallelism(max_degree_parallelism, len(streams))
+    if page_size is None or page_size <= 0:
+        page_size = _DEFAULT_PAGE_SIZE
+    if max_in_memory_group_count is None:
+        max_in_memory_group_count = _DEFAULT_MAX_IN_MEMORY_GROUP_COUNT
+    if plan is not None and plan.aggregate is not None:
+        return _aggregate(streams, split, plan.aggregate.name, degree, skip, take)
+    if plan is not None and plan.grouped:
+        return _group(
+            streams,
+            split,
+            plan,
+            degree,
+            max_buffered_item_count,
+            max_in_memory_group_count,
+            page_size,
+            skip,
+            take,
+        )
+    if plan is not None and plan.distinct:
+        return _distinct(
+            streams,
+            split,
+            degree,
+            max_buffered_item_count,
+            max_in_memory_group_count,
+            page_size,
+            skip,
+            take,
+        )
+    if plan is not None and plan.ordered:
+        return _merge_ordered(
+            streams,
+            split,
+            [item.descending for item in plan.query.order_by],
+            degree,
+            page_size,
+            skip,
+            take,
+        )
+    return _stream_pages(streams, split, degree, max_buffered_item_count, skip, take)
+
+
+def _stream_pages(
+    streams: "List[PartitionStream]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    degree: "int",
+    max_buffered_item_count: "Optional[int]",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Fetch the pages of `streams` concurrently, and yield each page as it arrives.
+
+    Pages of the same range are yielded in order. Pages left with no results are charged to the
+    next page yielded, or to an empty page yielded last.
+    """
+    all_streams = list(streams)
+    ready: "Deque[PartitionStream]" = collections.deque(streams)
+    in_flight: "Dict[concurrent.futures.Future, PartitionStream]" = {}
+    buffered: (
+        "Deque[Tuple[PartitionStream, List[Any], Dict[str, Any], Optional[str]]]"
+    ) = collections.deque()
+    buffered_items = 0
+    consumed = _ConsumedMetadata()
+
+    def has_room() -> "bool":
+        if max_buffered_item_count is None:
+            return len(buffered) + len(in_flight) < 2 * degree
+        # A page is fetched whenever there is none to yield, however low the limit.
+        return buffered_items < max_buffered_item_count or not (buffered or in_flight)
+
+    def harvest(done):
+        nonlocal buffered_items
+        for future in done:
+            stream = in_flight.pop(future)
+            try:
+                page, metadata = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                key_ranges = split(stream, error)
+                if not key_ranges or key_ranges == [stream.key_range]:
+                    raise
+                children = stream.split(key_ranges)
+                all_streams.extend(children)
+                ready.extend(children)
+                continue
+            if page:
+                stream._pending += 1
+                buffered.append((stream, page, metadata, stream.continuation))
+                buffered_items += len(page)
+            else:
+                consumed.add(metadata)
+            if not stream.done:
+                ready.append(stream)
+
+    if take == 0:
+        return
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=degree)
+    try:
+        while ready or in_flight or buffered:
+            while ready and len(in_flight) < degree and has_room():
+                stream = ready.popleft()
+                in_flight[executor.submit(stream.fetch)] = stream
+            if buffered:
+                # Collect the pages that arrived meanwhile, without waiting for more.
+                done, _ = concurrent.futures.wait(in_flight, timeout=0)
+            else:
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+            harvest(done)
+            if not buffered:
+                continue
+            stream, page, metadata, continuation = buffered.popleft()
+            buffered_items -= len(page)
+            stream._pending -= 1
+            stream._resume = continuation
+            if skip:
+                skipped = min(skip, len(page))
+                page = page[skipped:]
+                skip -= skipped
+            if take is not None:
+                page = page[:take]
+                take -= len(page)
+            consumed.add(metadata)
+            if not page:
+                continue
+            yield page, consumed.take(
+                None if take == 0 else encode_continuation(all_streams, skip, take)
+            )
+            if take == 0:
+                return
+        if consumed.pending:
+            yield [], consumed.take(None)
+    finally:
+        for future in in_flight:
+            future.cancel()
+        # Fetches still running when the caller stops are abandoned.
+        executor.shutdown(wait=False)
+
+
+class _Head:
+    """ The next result of a stream in the merge of the results of an `ORDER BY` query.
+    """
+
+    __slots__ = ("key", "descending", "order", "stream", "page", "index")
+
+    def __init__(
+        self,
+        descending: "List[bool]",
+        order: "int",
+        stream: "PartitionStream",
+        page: "List[Any]",
+        index: "int",
+    ):
+        self.key = [
+            sql.sort_key(item.get("item", sql.UNDEFINED))
+            for item in page[index]["orderByItems"]
+        ]
+        self.descending = descending
+        # Ties are broken by range, so that merging is deterministic.
+        self.order = order
+        self.stream = stream
+        self.page = page
+        self.index = index
+
+    def __lt__(self, other: "_Head") -> "bool":
+        for mine, theirs, descending in zip(self.key, other.key, self.descending):
+            if mine != theirs:
+                return mine > theirs if descending else mine < theirs
+        return self.order < other.order
+
+
+def _merge_ordered(
+    streams: "List[PartitionStream]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    descending: "List[bool]",
+    degree: "int",
+    page_size: "int",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Merge the ordered results of `streams` with a heap, and yield them in pages of `page_size`.
+
+    One page of each range is held at a time: the next page of a range is fetched once the
+    results of its current page are merged. The first pages are fetched concurrently. Each page
+    yielded is charged for the pages fetched since the previous one.
+    """
+    all_streams = list(streams)
+    heap: "List[_Head]" = []
+    consumed = _ConsumedMetadata()
+
+    def load(pending: "List[PartitionStream]"):
+        # Fetch the next page of each stream concurrently, and add its first result to the heap.
+        in_flight: "Dict[concurrent.futures.Future, PartitionStream]" = {}
+
+        def submit(stream: "PartitionStream"):
+            stream._resume = stream.continuation
+            stream._consumed = stream._skip
+            in_flight[executor.submit(stream.fetch)] = stream
+
+        for stream in pending:
+            submit(stream)
+        while in_flight:
+            done, _ = concurrent.futures.wait(
+                in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                stream = in_flight.pop(future)
+                try:
+                    page, metadata = future.result()
+                except Exception as error:  # pylint: disable=broad-except
+                    key_ranges = split(stream, error)
+                    if not key_ranges or key_ranges == [stream.key_range]:
+                        raise
+                    for child in stream.split(key_ranges):
+                        all_streams.append(child)
+                        submit(child)
+                    continue
+                consumed.add(metadata)
+                if page:
+                    stream._pending = 1
+                    heapq.heappush(
+                        heap,
+                        _Head(descending, all_streams.index(stream), stream, page, 0),
+                    )
+                elif not stream.done:
+                    submit(stream)
+
+    if take == 0:
+        return
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=degree)
+    try:
+        load(streams)
+        results: "List[Any]" = []
+        while heap:
+            head = heapq.heappop(heap)
+            stream = head.stream
+            stream._consumed += 1
+            if head.index + 1 < len(head.page):
+                heapq.heappush(
+                    heap,
+                    _Head(descending, head.order, stream, head.page, head.index + 1),
+                )
+            else:
+                stream._pending = 0
+                if not stream.done:
+                    load([stream])
+            if stream._shared_skip and stream._shared_skip[0]:
+                stream._shared_skip[0] -= 1
+                continue
+            row = head.page[head.index]
+            # Results whose value is undefined aren't returned.
+            if "payload" not in row:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            results.append(row["payload"])
+            if take is not None:
+                take -= 1
+            if len(results) == page_size or take == 0:
+                yield results, consumed.take(
+                    None if take == 0 else encode_continuation(all_streams, skip, take)
+                )
+                results = []
+                if take == 0:
+                    return
+        if results:
+            yield results, consumed.take(None)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _partial_accumulator(
+    name: "str", partial: "Dict[str, Any]"
+) -> "sql.AggregateAccumulator":
+    """ The accumulator of the values of a range, from the partial aggregate the range returned.
+    """
+    accumulator = sql.AggregateAccumulator(name)
+    accumulator.count = partial.get("count", 0)
+    if name in ("SUM", "AVG"):
+        if "sum" in partial:
+            accumulator.total = partial["sum"]
+        else:
+            accumulator.undefined = True
+    elif name in ("MIN", "MAX"):
+        if "extreme" in partial:
+            accumulator.extreme = partial["extreme"]
+        elif accumulator.count:
+            # Values were aggregated, but their extreme is undefined.
+            accumulator.undefined = True
+    return accumulator
+
+
+def _aggregate(
+    streams: "List[PartitionStream]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    name: "str",
+    degree: "int",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Combine the partial aggregates of `streams`, fetched concurrently, and yield the aggregate.
+
+    Partial aggregates are merged as they arrive, so that one accumulator is held at a time. The
+    aggregate is charged for the partial aggregates of every range.
+    """
+    accumulator = sql.AggregateAccumulator(name)
+    consumed = _ConsumedMetadata()
+    for page, metadata in _stream_pages(streams, split, degree, None, 0, None):
+        consumed.add(metadata)
+        for partial in page:
+            accumulator.merge(_partial_accumulator(name, partial))
+    result = accumulator.result()
+    # Like the service, an undefined aggregate is returned as None.
+    results = [None if result is sql.UNDEFINED else result][skip:]
+    if take is not None:
+        results = results[:take]
+    if results:
+        yield results, consumed.take(None)
+
+
+def _paginate(
+    results: "Iterator[Any]",
+    consumed: "_ConsumedMetadata",
+    page_size: "int",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Yield `results`, past the first `skip` and at most `take` of them, in pages of `page_size`.
+
+    The pages are charged for the pages `consumed` by the time they're complete, and can't be
+    resumed from a continuation token. Pages consumed after the last page is complete are charged
+    to an empty page yielded last.
+    """
+    page: "List[Any]" = []
+    try:
+        for result in itertools.islice(
+            results, skip, None if take is None else skip + take
+        ):
+            page.append(result)
+            if len(page) == page_size:
+                yield page, consumed.take(None)
+                page = []
+        if page:
+            yield page, consumed.take(None)
+        if consumed.pending:
+            yield [], consumed.take(None)
+    finally:
+        close = getattr(results, "close", None)
+        if close is not None:
+            close()
+
+
+class _GroupTable:
+    """ Hash table of the groups of a `GROUP BY` or `DISTINCT` query, spilled to temporary files beyond a number of groups.
+
+    A group added under the key of a group of the table is combined with it by `combine`. Once the
+    table holds more than `max_groups` groups, they're all encoded by `encode` and written to one of
+    the temporary files of the table, chosen by hash of their key, and removed from memory. Each file
+    holds the groups of its keys, which are combined once every group is added, the file's groups
+    read back into a table of their own (spilling again, by another hash, if they're too many).
+    """
+
+    def __init__(
+        self,
+        max_groups: "int",
+        combine: "Callable[[Any, Any], Any]",
+        encode: "Callable[[Any], Any]",
+        decode: "Callable[[Any], Any]",
+        depth: "int" = 0,
+    ):
+        self._max_groups = max(1, max_groups)
+        self._combine = combine
+        self._encode = encode
+        self._decode = decode
+        self._depth = depth
+        self._groups: "Dict[str, Any]" = {}
+        self._files: "Optional[List[IO[str]]]" = None
+
+    @property
+    def spilled(self) -> "bool":
+        """ Whether groups were spilled to temporary files.
+        """
+        return self._files is not None
+
+    def get(self, key: "str") -> "Any":
+        """ The group with the key `key` held in memory, or None.
+        """
+        return self._groups.get(key)
+
+    def add(self, key: "str", group: "Any"):
+        existing = self._groups.get(key)
+        self._groups[key] = (
+            group if existing is None else self._combine(existing, group)
+        )
+        if len(self._groups) > self._max_groups:
+            self._spill()
+
+    def _spill(self):
+        if self._files is None:
+            self._files = [
+                tempfile.TemporaryFile("w+", encoding="utf-8")
+                for _ in range(_SPILL_FILE_COUNT)
+            ]
+        for key, group in self._groups.items():
+            # Salted by depth, so that the groups of a file are spread over the files of its table.
+            file = self._files[hash(f"{self._depth}:{key}") % _SPILL_FILE_COUNT]
+            file.write(json.dumps([key, self._encode(group)]))
+            file.write("\n")
+        self._groups.clear()
+
+    def groups(self) -> "Iterator[Tuple[str, Any]]":
+        """ Remove the groups of the table, combined, and yield them with their key.
+        """
+        if self._files is None:
+            groups, self._groups = self._groups, {}
+            yield from groups.items()
+            return
+        self._spill()
+        files, self._files = self._files, None
+        try:
+            for file in files:
+                table = _GroupTable(
+                    self._max_groups,
+                    self._combine,
+                    self._encode,
+                    self._decode,
+                    self._depth + 1,
+                )
+                file.seek(0)
+                for line in file:
+                    key, encoded = json.loads(line)
+                    table.add(key, self._decode(encoded))
+                file.close()
+                yield from table.groups()
+        finally:
+            for file in files:
+                file.close()
+
+
+def _accumulator_state(accumulator: "sql.AggregateAccumulator") -> "List[Any]":
+    state = [accumulator.count, accumulator.total, accumulator.undefined]
+    if accumulator.extreme is not sql.UNDEFINED:
+        state.append(accumulator.extreme)
+    return state
+
+
+def _accumulator_from_state(
+    name: "str", state: "List[Any]"
+) -> "sql.AggregateAccumulator":
+    accumulator = sql.AggregateAccumulator(name)
+    accumulator.count, accumulator.total, accumulator.undefined = state[:3]
+    if len(state) > 3:
+        accumulator.extreme = state[3]
+    return accumulator
+
+
+def _group(
+    streams: "List[PartitionStream]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    plan: "QueryPlan",
+    degree: "int",
+    max_buffered_item_count: "Optional[int]",
+    max_groups: "int",
+    page_size: "int",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Combine the groups of `streams`, fetched concurrently, and yield the results of the groups.
+
+    A group is the values of the projections of the select clause that aren't aggregates, and an
+    accumulator of each aggregate; the groups of every range with the same key are combined as
+    they arrive.
+    """
+    aggregates = plan.group_aggregates
+    names = [aggregate.name for aggregate in aggregates if aggregate is not None]
+
+    def combine(group, other):
+        for accumulator, partial in zip(group[1], other[1]):
+            accumulator.merge(partial)
+        return group
+
+    table = _GroupTable(
+        max_groups,
+        combine,
+        lambda group: [group[0], [_accumulator_state(item) for item in group[1]]],
+        lambda encoded: [
+            encoded[0],
+            [
+                _accumulator_from_state(name, state)
+                for name, state in zip(names, encoded[1])
+            ],
+        ],
+    )
+    consumed = _ConsumedMetadata()
+
+    def results() -> "Iterator[Any]":
+        for page, metadata in _stream_pages(
+            streams, split, degree, max_buffered_item_count, 0, None
+        ):
+            consumed.add(metadata)
+            for row in page:
+                payload = row["payload"]
+                values = {}
+                accumulators = []
+                for position, aggregate in enumerate(aggregates):
+                    key = str(position)
+                    if aggregate is not None:
+                        accumulators.append(
+                            _partial_accumulator(aggregate.name, payload[key])
+                        )
+                    elif key in payload:
+                        values[key] = payload[key]
+                table.add(
+                    sql.canonical_json(row["groupByItems"]), [values, accumulators]
+                )
+        for _, (values, accumulators) in table.groups():
+            remaining = iter(accumulators)
+            projected = [
+                (
+                    values.get(str(position), sql.UNDEFINED)
+                    if aggregate is None
+                    else next(remaining).result()
+                )
+                for position, aggregate in enumerate(aggregates)
+            ]
+            if plan.query.select_value is None:
+                yield {
+                    item.name: value
+                    for item, value in zip(plan.query.select_items, projected)
+                    if value is not sql.UNDEFINED
+                }
+            elif projected[0] is not sql.UNDEFINED:
+                yield projected[0]
+
+    return _paginate(results(), consumed, page_size, skip, take)
+
+
+def _distinct(
+    streams: "List[PartitionStream]",
+    split: "Callable[[PartitionStream, BaseException], Optional[List[Dict[str, Any]]]]",
+    degree: "int",
+    max_buffered_item_count: "Optional[int]",
+    max_results: "int",
+    page_size: "int",
+    skip: "int",
+    take: "Optional[int]",
+) -> "Iterator[Tuple[List[Any], Dict[str, Any]]]":
+    """ Deduplicate the results of `streams`, fetched concurrently.
+
+    Results are returned as they arrive, until the results seen are spilled to temporary files.
+    From then on, results not returned yet are added to the table, and the results of the table that
+    were never returned are yielded once every range is exhausted.
+    """
+    table = _GroupTable(
+        max_results,
+        # A result is held as [True] once returned, or [False, result] otherwise.
+        lambda result, other: result if result[0] else other,
+        lambda result: result,
+        lambda encoded: encoded,
+    )
+    consumed = _ConsumedMetadata()
+
+    def results() -> "Iterator[Any]":
+        for page, metadata in _stream_pages(
+            streams, split, degree, max_buffered_item_count, 0, None
+        ):
+            consumed.add(metadata)
+            for result in page:
+                key = sql.canonical_json(result)
+                if table.spilled:
+                    table.add(key, [False, result])
+                elif table.get(key) is None:
+                    table.add(key, [True])
+                    yield result
+        for _, held in table.groups():
+            if not held[0]:
+                yield held[1]
+
+    return _paginate(results(), consumed, page_size, skip, take)
@@ -0,0 +1,159 @@
+"""
+Reusable request option profiles, and the assembly of the options sent with each request.
+"""
+
+from typing import Any, Dict, Optional
+
+# Backend option names, keyed by the name of the corresponding keyword argument.
+_OPTION_NAMES = {
+    "disable_ru_per_minute_usage": "disableRUPerMinuteUsage",
+    "session_token": "sessionToken",
+    "initial_headers": "initialHeaders",
+    "access_condition": "accessCondition",
+    "populate_query_metrics": "populateQueryMetrics",
+    "enable_cross_partition_query": "enableCrossPartitionQuery",
+    "max_degree_parallelism": "maxDegreeOfParallelism",
+    "max_item_count": "maxItemCount",
+}
+
+# Options that are only sent if they are non-empty.
+_NON_EMPTY_OPTIONS = ("session_token", "initial_headers", "access_condition")
+
+
+class RequestOptions:
+    """ An immutable set of request options, built once and passed to any number of operations.
+
+    Every operation accepts a profile as `request_options`. Options passed to an operation as
+    keyword arguments take precedence over those of the profile. The options understood by an
+    operation are documented with its keyword arguments; others are ignored by the service.
+
+    .. code-block:: python
+
+        fast_reads = RequestOptions(populate_query_metrics=False, max_item_count=1000)
+        item = container.get_item(id, partition_key, request_options=fast_reads)
+    """
+
+    __slots__ = tuple(_OPTION_NAMES) + ("_options",)
+
+    # The options as sent to the backend, assembled once.
+    _options: "Dict[str, Any]"
+
+    def __init__(
+        self,
+        *,
+        disable_ru_per_minute_usage: "Optional[bool]" = None,
+        session_token: "Optional[str]" = None,
+        initial_headers: "Optional[Dict[str, Any]]" = None,
+        access_condition: "Optional[Dict[str, Any]]" = None,
+        populate_query_metrics: "Optional[bool]" = None,
+        enable_cross_partition_query: "Optional[bool]" = None,
+        max_degree_parallelism: "Optional[int]" = None,
+        max_item_count: "Optional[int]" = None,
+    ):
+        """
+        :param disable_ru_per_minute_usage: Enable/disable Request Units(RUs)/minute capacity to serve the request if regular provisioned RUs/second is exhausted.
+        :param session_token: Token for use with Session consistency.
+        :param initial_headers: Headers to send with every request.
+        :param access_condition: Conditions associated with the request.
+        :param populate_query_metrics: Enable returning query metrics in response headers.
+        :param enable_cross_partition_query: Allow queries to span partitions.
+        :param max_degree_parallelism: The maximum number of concurrent operations that run client side during parallel query execution.
+        :param max_item_count: Max number of items to be returned in the enumeration operation.
+        """
+        # Copies of mutable values, so that the profile can't change after the fact.
+        values = dict(
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=dict(initial_headers) if initial_headers else None,
+            access_condition=dict(access_condition) if access_condition else None,
+            populate_query_metrics=populate_query_metrics,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+        )
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_options", _assemble({}, values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def replace(self, **changes: "Any") -> "RequestOptions":
+        """ A copy of this profile with the given options changed.
+        """
+        values = {name: getattr(self, name) for name in _OPTION_NAMES}
+        values.update(changes)
+        return RequestOptions(**values)
+
+    def as_dict(self) -> "Dict[str, Any]":
+        """ The options as sent to the backend.
+        """
+        return dict(self._options)
+
+    def __eq__(self, other):
+        if not isinstance(other, RequestOptions):
+            return NotImplemented
+        return self._options == other._options
+
+    def __repr__(self):
+        options = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in _OPTION_NAMES
+            if getattr(self, name) is not None
+        )
+        return f"RequestOptions({options})"
+
+
+def _assemble(options: "Dict[str, Any]", values: "Dict[str, Any]") -> "Dict[str, Any]":
+    for name, value in values.items():
+        if value is None or (not value and name in _NON_EMPTY_OPTIONS):
+            continue
+        options[_OPTION_NAMES[name]] = value
+    return options
+
+
+def build_request_options(
+    profile: "Optional[RequestOptions]",
+    *,
+    disable_ru_per_minute_usage: "Optional[bool]" = None,
+    session_token: "Optional[str]" = None,
+    initial_headers: "Optional[Dict[str, Any]]" = None,
+    access_condition: "Optional[Dict[str, Any]]" = None,
+    populate_query_metrics: "Optional[bool]" = None,
+    enable_cross_partition_query: "Optional[bool]" = None,
+    max_degree_parallelism: "Optional[int]" = None,
+    max_item_count: "Optional[int]" = None,
+) -> "Dict[str, Any]":
+    """ The backend options of a request: those of `profile`, overridden by the keyword arguments that are set.
+
+    Returns a new dictionary, which the caller may modify.
+    """
+    options = {} if profile is None else dict(profile._options)
+    # Most calls pass no options at all; skip assembling them.
+    if (
+        disable_ru_per_minute_usage is None
+        and session_token is None
+        and initial_headers is None
+        and access_condition is None
+        and populate_query_metrics is None
+        and enable_cross_partition_query is None
+        and max_degree_parallelism is None
+        and max_item_count is None
+    ):
+        return options
+    return _assemble(
+        options,
+        dict(
+            disable_ru_per_minute_usage=disable_ru_per_minute_usage,
+            session_token=session_token,
+            initial_headers=initial_headers,
+            access_condition=access_condition,
+            populate_query_metrics=populate_query_metrics,
+            enable_cross_partition_query=enable_cross_partition_query,
+            max_degree_parallelism=max_degree_parallelism,
+            max_item_count=max_item_count,
+        ),
+    )
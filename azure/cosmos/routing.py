@@ -0,0 +1,330 @@
+"""
+Client-side partition key hashing and the partition key range maps of containers.
+
+The service distributes the logical partitions of a container over physical partitions, each of
+which serves a range of *effective partition keys*: hex strings derived from the hash of a
+partition key value, between :data:`MIN_EFFECTIVE_PARTITION_KEY` (inclusive) and
+:data:`MAX_EFFECTIVE_PARTITION_KEY` (exclusive). Knowing the ranges of a container, the client
+can address an operation to the range of its partition key directly.
+"""
+
+import bisect
+import functools
+import struct
+import threading
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+MIN_EFFECTIVE_PARTITION_KEY = ""
+MAX_EFFECTIVE_PARTITION_KEY = "FF"
+
+# Markers of the types of partition key components, shared by the hashed and the encoded forms.
+_UNDEFINED = 0x00
+_NULL = 0x01
+_FALSE = 0x02
+_TRUE = 0x03
+_NUMBER = 0x05
+_STRING = 0x08
+
+# Strings are truncated before being hashed by version 1 of the hash function, and only
+# a prefix of them is appended to its effective partition keys.
+_MAX_STRING_CHARS = 100
+_MAX_STRING_BYTES_TO_APPEND = 100
+
+_MASK_32 = 0xFFFFFFFF
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _rotl32(value: "int", bits: "int") -> "int":
+    return ((value << bits) | (value >> (32 - bits))) & _MASK_32
+
+
+def _rotl64(value: "int", bits: "int") -> "int":
+    return ((value << bits) | (value >> (64 - bits))) & _MASK_64
+
+
+def _murmurhash3_32(data: "bytes", seed: "int" = 0) -> "int":
+    """ MurmurHash3 (x86, 32 bits) of `data`.
+    """
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed
+    length = len(data)
+    blocks_end = length - length % 4
+    for (k,) in struct.iter_unpack("<I", data[:blocks_end]):
+        k = (_rotl32((k * c1) & _MASK_32, 15) * c2) & _MASK_32
+        h = (_rotl32(h ^ k, 13) * 5 + 0xE6546B64) & _MASK_32
+    if blocks_end < length:
+        k = int.from_bytes(data[blocks_end:], "little")
+        h ^= (_rotl32((k * c1) & _MASK_32, 15) * c2) & _MASK_32
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK_32
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK_32
+    return h ^ (h >> 16)
+
+
+def _fmix64(k: "int") -> "int":
+    k ^= k >> 33
+    k = (k * 0xFF51AFD7ED558CCD) & _MASK_64
+    k ^= k >> 33
+    k = (k * 0xC4CEB9FE1A85EC53) & _MASK_64
+    return k ^ (k >> 33)
+
+
+def _murmurhash3_128(data: "bytes", seed: "int" = 0) -> "Tuple[int, int]":
+    """ MurmurHash3 (x64, 128 bits) of `data`, as its low and high 64 bits.
+    """
+    c1, c2 = 0x87C37B91114253D5, 0x4CF5AD432745937F
+    h1 = h2 = seed
+    length = len(data)
+    blocks_end = length - length % 16
+    for k1, k2 in struct.iter_unpack("<QQ", data[:blocks_end]):
+        h1 ^= (_rotl64((k1 * c1) & _MASK_64, 31) * c2) & _MASK_64
+        h1 = (((_rotl64(h1, 27) + h2) & _MASK_64) * 5 + 0x52DCE729) & _MASK_64
+        h2 ^= (_rotl64((k2 * c2) & _MASK_64, 33) * c1) & _MASK_64
+        h2 = (((_rotl64(h2, 31) + h1) & _MASK_64) * 5 + 0x38495AB5) & _MASK_64
+    tail = data[blocks_end:]
+    if len(tail) > 8:
+        k2 = int.from_bytes(tail[8:], "little")
+        h2 ^= (_rotl64((k2 * c2) & _MASK_64, 33) * c1) & _MASK_64
+    if tail:
+        k1 = int.from_bytes(tail[:8], "little")
+        h1 ^= (_rotl64((k1 * c1) & _MASK_64, 31) * c2) & _MASK_64
+    h1 ^= length
+    h2 ^= length
+    h1 = (h1 + h2) & _MASK_64
+    h2 = (h2 + h1) & _MASK_64
+    h1 = _fmix64(h1)
+    h2 = _fmix64(h2)
+    h1 = (h1 + h2) & _MASK_64
+    h2 = (h2 + h1) & _MASK_64
+    return h1, h2
+
+
+def _write_for_hashing(value: "Any", string_terminator: "int", out: "bytearray"):
+    if value is None:
+        out.append(_NULL)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, (int, float)):
+        out.append(_NUMBER)
+        out += struct.pack("<d", value)
+    elif isinstance(value, str):
+        out.append(_STRING)
+        out += value.encode("utf-8")
+        out.append(string_terminator)
+    elif value == {}:
+        out.append(_UNDEFINED)
+    else:
+        raise TypeError(f"Partition key values can't be of type {type(value).__name__}")
+
+
+def _encode_double(value: "float") -> "int":
+    # The bits of a double, transformed so that their unsigned order is that of the numbers.
+    (bits,) = struct.unpack("<Q", struct.pack("<d", value))
+    return (
+        bits ^ 0x8000000000000000
+        if bits < 0x8000000000000000
+        else (~bits + 1) & _MASK_64
+    )
+
+
+def _write_number(value: "float", out: "bytearray"):
+    out.append(_NUMBER)
+    payload = _encode_double(value)
+    out.append(payload >> 56)
+    payload = (payload << 8) & _MASK_64
+    # The remaining bits, 7 per byte; the low bit of each byte is set but on the last one.
+    byte = None
+    while True:
+        if byte is not None:
+            out.append(byte)
+        byte = (payload >> 56) | 0x01
+        payload = (payload << 7) & _MASK_64
+        if not payload:
+            break
+    out.append(byte & 0xFE)
+
+
+def _write_for_encoding(value: "Any", out: "bytearray"):
+    if value is None:
+        out.append(_NULL)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, (int, float)):
+        _write_number(value, out)
+    elif isinstance(value, str):
+        out.append(_STRING)
+        encoded = value.encode("utf-8")
+        short = len(encoded) <= _MAX_STRING_BYTES_TO_APPEND
+        out += bytes(
+            byte + 1 if byte < 0xFF else byte
+            for byte in encoded[
+                : len(encoded) if short else _MAX_STRING_BYTES_TO_APPEND + 1
+            ]
+        )
+        if short:
+            out.append(0x00)
+    else:
+        out.append(_UNDEFINED)
+
+
+def _effective_partition_key_v1(value: "Any") -> "str":
+    if isinstance(value, str):
+        value = value[:_MAX_STRING_CHARS]
+    hashed = bytearray()
+    _write_for_hashing(value, 0x00, hashed)
+    encoded = bytearray()
+    _write_number(float(_murmurhash3_32(bytes(hashed))), encoded)
+    _write_for_encoding(value, encoded)
+    return encoded.hex().upper()
+
+
+def _effective_partition_key_v2(value: "Any") -> "str":
+    hashed = bytearray()
+    _write_for_hashing(value, 0xFF, hashed)
+    low, high = _murmurhash3_128(bytes(hashed))
+    # The hash, big-endian, with its two most significant bits cleared.
+    return f"{high & 0x3FFFFFFFFFFFFFFF:016X}{low:016X}"
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _cached_effective_partition_key(value: "Any", version: "int") -> "str":
+    if version == 2:
+        return _effective_partition_key_v2(value)
+    return _effective_partition_key_v1(value)
+
+
+def effective_partition_key(definition: "Dict[str, Any]", value: "Any") -> "str":
+    """ The effective partition key of the partition key `value` in a container whose partition key is `definition`.
+
+    :param definition: The partition key definition of the container, e.g. a :class:`PartitionKey`.
+        Only definitions of kind `Hash` with a single path are supported.
+    :param value: The partition key value: a string, a number, a boolean, None, or `{}` for
+        items without a partition key value.
+    :raises ValueError: The partition key definition isn't supported.
+    :raises TypeError: The value can't be a partition key value.
+    """
+    if (
+        definition.get("kind", "Hash") != "Hash"
+        or len(definition.get("paths") or ()) != 1
+    ):
+        raise ValueError(
+            "Only partition key definitions of kind Hash with a single path are supported"
+        )
+    version = definition.get("version") or 1
+    if version not in (1, 2):
+        raise ValueError(f"Unsupported partition key version {version}")
+    if isinstance(value, dict):
+        # `{}` can't be cached, being unhashable.
+        return _cached_effective_partition_key.__wrapped__(value, version)
+    return _cached_effective_partition_key(value, version)
+
+
+class PartitionKeyRangeMap:
+    """ The partition key ranges of a container, ordered by the effective partition keys they serve.
+
+    :ivar ranges: The ranges, as returned by the service: dictionaries with an `id`, and the
+        `minInclusive` and `maxExclusive` effective partition keys of the range.
+    """
+
+    def __init__(self, ranges: "Iterable[Dict[str, Any]]"):
+        ranges = list(ranges)
+        # During a split, the service may return a range along with the ranges it was split into.
+        parents = {
+            parent for key_range in ranges for parent in key_range.get("parents") or ()
+        }
+        self.ranges: "List[Dict[str, Any]]" = sorted(
+            (key_range for key_range in ranges if key_range["id"] not in parents),
+            key=lambda key_range: key_range["minInclusive"],
+        )
+        self._max_keys = [key_range["maxExclusive"] for key_range in self.ranges]
+        self._ranges_by_id = {key_range["id"]: key_range for key_range in self.ranges}
+
+    def get_range(self, effective_partition_key: "str") -> "Optional[Dict[str, Any]]":
+        """ The range serving `effective_partition_key`, or None if no range of the map serves it.
+        """
+        index = bisect.bisect_right(self._max_keys, effective_partition_key)
+        if index == len(self.ranges):
+            return None
+        key_range = self.ranges[index]
+        return (
+            key_range if key_range["minInclusive"] <= effective_partition_key else None
+        )
+
+    def get_range_by_id(self, range_id: "str") -> "Optional[Dict[str, Any]]":
+        """ The range with the id `range_id`, or None if it isn't a range of the map.
+        """
+        return self._ranges_by_id.get(range_id)
+
+    def get_overlapping_ranges(
+        self,
+        min_inclusive: "str" = MIN_EFFECTIVE_PARTITION_KEY,
+        max_exclusive: "str" = MAX_EFFECTIVE_PARTITION_KEY,
+    ) -> "List[Dict[str, Any]]":
+        """ The ranges serving some of the effective partition keys from `min_inclusive` to `max_exclusive`, in order.
+        """
+        start = bisect.bisect_right(self._max_keys, min_inclusive)
+        return [
+            key_range
+            for key_range in self.ranges[start:]
+            if key_range["minInclusive"] < max_exclusive
+        ]
+
+    def __len__(self):
+        return len(self.ranges)
+
+
+class PartitionKeyRangeCache:
+    """ Client-side cache of the partition key range maps of containers, keyed by container link.
+
+    A map is read from the service the first time an operation of its container is routed, and
+    kept until the service reports that a range is gone (HTTP 410, e.g. after a split) or that
+    the container no longer exists, at which point it is read again. Invalidating a database
+    link invalidates the maps of all of its containers.
+    """
+
+    def __init__(self):
+        self._maps: "Dict[str, PartitionKeyRangeMap]" = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        collection_link: "str",
+        read_ranges: "Callable[[], Iterable[Dict[str, Any]]]",
+    ) -> "PartitionKeyRangeMap":
+        """ The range map of the container at `collection_link`, read with `read_ranges` if it isn't cached.
+        """
+        routing_map = self._maps.get(collection_link)
+        if routing_map is None:
+            # Read outside of the lock; concurrent misses read the same map.
+            routing_map = PartitionKeyRangeMap(read_ranges())
+            with self._lock:
+                self._maps[collection_link] = routing_map
+        return routing_map
+
+    def invalidate(self, link: "str"):
+        """ Drop the range map of the container at `link`, or of every container of the database at `link`.
+        """
+        prefix = link + "/"
+        with self._lock:
+            for collection_link in [
+                collection_link
+                for collection_link in self._maps
+                if collection_link == link or collection_link.startswith(prefix)
+            ]:
+                del self._maps[collection_link]
+
+    def clear(self):
+        """ Drop all cached range maps.
+        """
+        with self._lock:
+            self._maps.clear()
+
+    def __len__(self):
+        return len(self._maps)
@@ -0,0 +1,199 @@
+"""
+Client-side tracking of session tokens for Session consistency.
+"""
+
+import threading
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+_SESSION_TOKEN_HEADER = "x-ms-session-token"
+_PARTITION_KEY_RANGE_ID_HEADER = "x-ms-documentdb-partitionkeyrangeid"
+
+
+class _PartitionSessionToken:
+    """ The session token of a single partition key range.
+
+    Tokens are either simple (`<lsn>`) or vector tokens
+    (`<version>#<global lsn>[#<region id>=<local lsn>]...`).
+    """
+
+    __slots__ = ("version", "global_lsn", "local_lsns")
+
+    def __init__(
+        self,
+        version: "Optional[int]",
+        global_lsn: "int",
+        local_lsns: "Tuple[Tuple[str, int], ...]" = (),
+    ):
+        self.version = version
+        self.global_lsn = global_lsn
+        self.local_lsns = local_lsns
+
+    @classmethod
+    def parse(cls, token: "str") -> "_PartitionSessionToken":
+        parts = token.split("#")
+        if len(parts) == 1:
+            return cls(None, int(parts[0]))
+        local_lsns = []
+        for part in parts[2:]:
+            region, _, lsn = part.partition("=")
+            local_lsns.append((region, int(lsn)))
+        return cls(int(parts[0]), int(parts[1]), tuple(local_lsns))
+
+    def merge(self, other: "_PartitionSessionToken") -> "_PartitionSessionToken":
+        """ A token at least as recent as both `self` and `other`.
+        """
+        if self.version is None or other.version is None:
+            return self if self.global_lsn >= other.global_lsn else other
+        newer, older = (self, other) if self.version >= other.version else (other, self)
+        # A newer version of the range may have a different set of regions; only
+        # the regions it knows about are kept.
+        older_local_lsns = dict(older.local_lsns)
+        return _PartitionSessionToken(
+            newer.version,
+            max(newer.global_lsn, older.global_lsn),
+            tuple(
+                (region, max(lsn, older_local_lsns.get(region, lsn)))
+                for region, lsn in newer.local_lsns
+            ),
+        )
+
+    def __str__(self):
+        if self.version is None:
+            return str(self.global_lsn)
+        return "#".join(
+            [str(self.version), str(self.global_lsn)]
+            + [f"{region}={lsn}" for region, lsn in self.local_lsns]
+        )
+
+
+def _parse(session_token: "str") -> "Iterable[Tuple[str, _PartitionSessionToken]]":
+    # A session token is a comma-separated list of `<range id>:<token>` pairs.
+    for range_token in session_token.split(","):
+        range_token = range_token.strip()
+        if not range_token:
+            continue
+        range_id, _, token = range_token.partition(":")
+        yield range_id, _PartitionSessionToken.parse(token)
+
+
+class SessionTokenManager:
+    """ Tracks the session tokens of the responses received by a client.
+
+    Tokens are merged per container and per partition key range, so a read is sent only
+    the token of the partition key range it targets (when the range of its partition key
+    is known) instead of a token covering every range of the container.
+
+    The state can be moved between processes with :meth:`export_tokens` and
+    :meth:`import_tokens`, e.g. to read your own writes from a different worker.
+    """
+
+    def __init__(self, max_tracked_partition_keys: "int" = 10000):
+        """
+        :param max_tracked_partition_keys: Maximum number of partition key values per container
+            whose partition key range is remembered. Reads for other partition key values are
+            sent the token of every partition key range of the container.
+        """
+        self.max_tracked_partition_keys = max_tracked_partition_keys
+        self._tokens: "Dict[str, Dict[str, _PartitionSessionToken]]" = {}
+        self._range_ids: "Dict[str, Dict[str, str]]" = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        collection_link: "str",
+        headers: "Dict[str, Any]",
+        partition_key: "Any" = None,
+    ):
+        """ Merge the session token of a response into the tokens of its container.
+
+        :param collection_link: Link of the container the request was addressed to.
+        :param headers: The response headers.
+        :param partition_key: The partition key value the request targeted, if any.
+        """
+        session_token = headers.get(_SESSION_TOKEN_HEADER)
+        if not session_token:
+            return
+        parsed = list(_parse(session_token))
+        with self._lock:
+            tokens = self._tokens.setdefault(collection_link, {})
+            for range_id, token in parsed:
+                current = tokens.get(range_id)
+                tokens[range_id] = token if current is None else current.merge(token)
+            response_range_id = headers.get(_PARTITION_KEY_RANGE_ID_HEADER)
+            if (
+                partition_key is not None
+                and response_range_id is None
+                and len(parsed) == 1
+            ):
+                response_range_id = parsed[0][0]
+            if partition_key is not None and response_range_id is not None:
+                range_ids = self._range_ids.setdefault(collection_link, {})
+                range_ids.pop(repr(partition_key), None)
+                range_ids[repr(partition_key)] = str(response_range_id)
+                if len(range_ids) > self.max_tracked_partition_keys:
+                    # Forget the least recently updated partition key value.
+                    del range_ids[next(iter(range_ids))]
+
+    def get(
+        self,
+        collection_link: "str",
+        partition_key: "Any" = None,
+        partition_key_range_id: "Optional[str]" = None,
+    ) -> "Optional[str]":
+        """ The session token to send with a read from a container.
+
+        :param collection_link: Link of the container to read from.
+        :param partition_key: The partition key value the read targets, if any.
+        :param partition_key_range_id: The partition key range the read targets, if known.
+        :returns: The token of the partition key range of the read if it is known,
+            otherwise the tokens of all partition key ranges of the container. None if no
+            token has been received for the container.
+        """
+        with self._lock:
+            tokens = self._tokens.get(collection_link)
+            if not tokens:
+                return None
+            range_id = partition_key_range_id
+            if range_id is None and partition_key is not None:
+                range_id = self._range_ids.get(collection_link, {}).get(
+                    repr(partition_key)
+                )
+            if range_id is not None and range_id in tokens:
+                return f"{range_id}:{tokens[range_id]}"
+            return ",".join(f"{range_id}:{token}" for range_id, token in tokens.items())
+
+    def set(self, collection_link: "str", session_token: "str"):
+        """ Merge a session token obtained elsewhere into the tokens of a container.
+        """
+        self.update(collection_link, {_SESSION_TOKEN_HEADER: session_token})
+
+    def invalidate(self, link: "str"):
+        """ Drop the tokens of the container at `link`, or of every container of the database at `link`.
+        """
+        prefix = link + "/"
+        with self._lock:
+            for collection_link in [
+                collection_link
+                for collection_link in self._tokens
+                if collection_link == link or collection_link.startswith(prefix)
+            ]:
+                del self._tokens[collection_link]
+                self._range_ids.pop(collection_link, None)
+
+    def export_tokens(self) -> "Dict[str, str]":
+        """ The session tokens of all containers, keyed by container link.
+
+        The result is JSON-serializable and can be passed to :meth:`import_tokens` of a
+        manager in another process.
+        """
+        with self._lock:
+            links = list(self._tokens)
+        tokens = {link: self.get(link) for link in links}
+        return {link: token for link, token in tokens.items() if token}
+
+    def import_tokens(self, tokens: "Dict[str, str]"):
+        """ Merge session tokens exported with :meth:`export_tokens`.
+        """
+        for collection_link, session_token in tokens.items():
+            self.set(collection_link, session_token)
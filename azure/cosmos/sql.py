@@ -0,0 +1,1503 @@
+"""
+Parser and evaluator for a subset of the Azure Cosmos DB SQL query grammar.
+
+Supported::
+
+    SELECT [DISTINCT] [TOP <n>] { * | VALUE <expr> | <expr> [AS <name>], ... }
+    FROM <container> [[AS] <alias>]
+    [WHERE <expr>]
+    [GROUP BY <expr>, ...]
+    [ORDER BY <expr> [ASC | DESC], ...]
+    [OFFSET <n> LIMIT <m>]
+
+Expressions support property paths (`r.a.b`, `r["a"]`, `r.tags[0]`), literals, `@parameters`,
+object and array constructors, arithmetic, string concatenation (`||`), comparison, `IN`,
+`BETWEEN`, `LIKE`, logical operators, the conditional (`? :`) and coalesce (`??`) operators,
+the aggregates `COUNT`, `SUM`, `AVG`, `MIN` and `MAX`, and common type checking, string,
+math and array functions.
+
+Values follow the semantics of the service, including `undefined` (:data:`UNDEFINED`) for
+missing properties and for operations on operands of mismatched types, and the ordering of
+values of different types used by `ORDER BY`, `MIN` and `MAX`:
+undefined < null < false < true < numbers < strings < arrays < objects.
+"""
+
+import json
+import math
+import re
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+
+class _Undefined:
+    """ The `undefined` value of the query language.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "undefined"
+
+    def __bool__(self):
+        return False
+
+
+UNDEFINED = _Undefined()
+
+
+class SqlSyntaxError(ValueError):
+    """ Raised for queries that aren't valid in the supported grammar.
+    """
+
+
+def _is_number(value: "Any") -> "bool":
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _type_rank(value: "Any") -> "int":
+    if value is UNDEFINED:
+        return 0
+    if value is None:
+        return 1
+    if value is False:
+        return 2
+    if value is True:
+        return 3
+    if _is_number(value):
+        return 4
+    if isinstance(value, str):
+        return 5
+    if isinstance(value, list):
+        return 6
+    return 7
+
+
+def sort_key(value: "Any") -> "Tuple[Any, ...]":
+    """ A key that orders values of any type as the service does in `ORDER BY`.
+    """
+    rank = _type_rank(value)
+    if rank in (4, 5):
+        return (rank, value)
+    if rank >= 6:
+        # Arrays and objects are ordered by their canonical JSON representation.
+        return (rank, canonical_json(value))
+    return (rank,)
+
+
+def canonical_json(value: "Any") -> "str":
+    """ A representation of `value` that is equal for equal values, for hashing and deduplication.
+    """
+    if value is UNDEFINED:
+        return "undefined"
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _same_type(left: "Any", right: "Any") -> "bool":
+    left_rank = _type_rank(left)
+    right_rank = _type_rank(right)
+    # true and false are the same type.
+    return left_rank == right_rank or {left_rank, right_rank} == {2, 3}
+
+
+def _equals(left: "Any", right: "Any") -> "Any":
+    if left is UNDEFINED or right is UNDEFINED or not _same_type(left, right):
+        return UNDEFINED
+    return left == right
+
+
+def _compare(left: "Any", right: "Any") -> "Optional[int]":
+    if left is UNDEFINED or right is UNDEFINED or not _same_type(left, right):
+        return None
+    if not (_is_number(left) or isinstance(left, str)):
+        return None
+    return (left > right) - (left < right)
+
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<ws>\s+|--[^\n]*)
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<parameter>@[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<name>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<op>!=|<>|<=|>=|\|\||\?\?|[=<>+\-*/%(){}\[\],.:?!&|^~])
+    """,
+    re.VERBOSE,
+)
+
+_KEYWORDS = {
+    "SELECT",
+    "DISTINCT",
+    "TOP",
+    "VALUE",
+    "AS",
+    "FROM",
+    "WHERE",
+    "GROUP",
+    "BY",
+    "ORDER",
+    "ASC",
+    "DESC",
+    "OFFSET",
+    "LIMIT",
+    "AND",
+    "OR",
+    "NOT",
+    "IN",
+    "BETWEEN",
+    "LIKE",
+    "ESCAPE",
+    "TRUE",
+    "FALSE",
+    "NULL",
+    "UNDEFINED",
+    "JOIN",
+    "EXISTS",
+}
+
+_ESCAPES = {
+    "'": "'",
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+def _unescape(literal: "str") -> "str":
+    body = literal[1:-1]
+
+    def replace(match):
+        escaped = match.group(1)
+        if escaped[0] == "u":
+            return chr(int(escaped[1:], 16))
+        return _ESCAPES.get(escaped, escaped)
+
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)", replace, body)
+
+
+class _Token:
+    __slots__ = ("kind", "value", "position")
+
+    def __init__(self, kind: "str", value: "Any", position: "int"):
+        self.kind = kind
+        self.value = value
+        self.position = position
+
+    def __repr__(self):
+        return f"{self.kind}:{self.value!r}"
+
+
+def _tokenize(query: "str") -> "List[_Token]":
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = _TOKEN_PATTERN.match(query, position)
+        if match is None:
+            raise SqlSyntaxError(
+                f"Unexpected character {query[position]!r} at position {position}"
+            )
+        kind = cast("str", match.lastgroup)
+        text = match.group(kind)
+        if kind == "number":
+            value = (
+                int(text, 16)
+                if text[:2].lower() == "0x"
+                else (float(text) if re.search(r"[.eE]", text) else int(text))
+            )
+            tokens.append(_Token("number", value, position))
+        elif kind == "string":
+            tokens.append(_Token("string", _unescape(text), position))
+        elif kind == "parameter":
+            tokens.append(_Token("parameter", text, position))
+        elif kind == "name":
+            if text.upper() in _KEYWORDS:
+                # Keep the original spelling: keywords remain usable as property names, e.g. `r.value`.
+                tokens.append(_Token("keyword", (text.upper(), text), position))
+            else:
+                tokens.append(_Token("name", text, position))
+        elif kind == "op":
+            tokens.append(_Token("op", text, position))
+        position = match.end()
+    tokens.append(_Token("end", None, len(query)))
+    return tokens
+
+
+class Expression:
+    """ Base class of the nodes of a parsed expression.
+    """
+
+    #: Whether the expression contains an aggregate function.
+    is_aggregate = False
+
+    def evaluate(self, row: "Dict[str, Any]", parameters: "Dict[str, Any]") -> "Any":
+        raise NotImplementedError
+
+    def children(self) -> "Sequence[Expression]":
+        return ()
+
+    def find(self, predicate: "Callable[[Expression], bool]") -> "List[Expression]":
+        """ All nodes of the expression (including itself) for which `predicate` is true.
+        """
+        found = [self] if predicate(self) else []
+        for child in self.children():
+            found.extend(child.find(predicate))
+        return found
+
+
+class Literal(Expression):
+    def __init__(self, value: "Any"):
+        self.value = value
+
+    def evaluate(self, row, parameters):
+        return self.value
+
+    def __repr__(self):
+        return f"Literal({self.value!r})"
+
+
+class Parameter(Expression):
+    def __init__(self, name: "str"):
+        self.name = name
+
+    def evaluate(self, row, parameters):
+        return parameters.get(self.name, UNDEFINED)
+
+    def __repr__(self):
+        return f"Parameter({self.name})"
+
+
+class Reference(Expression):
+    """ A reference to the alias of the `FROM` clause.
+    """
+
+    def __init__(self, name: "str"):
+        self.name = name
+
+    def evaluate(self, row, parameters):
+        return row.get(self.name, UNDEFINED)
+
+    def __repr__(self):
+        return f"Reference({self.name})"
+
+
+class Member(Expression):
+    """ Property access or array indexing: `<target>.<name>` or `<target>[<key>]`.
+    """
+
+    def __init__(self, target: "Expression", key: "Expression"):
+        self.target = target
+        self.key = key
+        self.is_aggregate = target.is_aggregate or key.is_aggregate
+
+    def children(self):
+        return (self.target, self.key)
+
+    def evaluate(self, row, parameters):
+        target = self.target.evaluate(row, parameters)
+        key = self.key.evaluate(row, parameters)
+        if isinstance(target, dict) and isinstance(key, str):
+            return target.get(key, UNDEFINED)
+        if (
+            isinstance(target, list)
+            and _is_number(key)
+            and float(key).is_integer()
+            and 0 <= key < len(target)
+        ):
+            return target[int(key)]
+        return UNDEFINED
+
+    def path(self) -> "Optional[List[Any]]":
+        """ The property path of the member relative to the root alias, if it is a constant path.
+        """
+        if not isinstance(self.key, Literal):
+            return None
+        if isinstance(self.target, Reference):
+            return [self.key.value]
+        if isinstance(self.target, Member):
+            parent = self.target.path()
+            return None if parent is None else parent + [self.key.value]
+        return None
+
+    def __repr__(self):
+        return f"Member({self.target!r}, {self.key!r})"
+
+
+class Unary(Expression):
+    def __init__(self, operator: "str", operand: "Expression"):
+        self.operator = operator
+        self.operand = operand
+        self.is_aggregate = operand.is_aggregate
+
+    def children(self):
+        return (self.operand,)
+
+    def evaluate(self, row, parameters):
+        value = self.operand.evaluate(row, parameters)
+        if self.operator == "NOT":
+            return (not value) if isinstance(value, bool) else UNDEFINED
+        if not _is_number(value):
+            return UNDEFINED
+        if self.operator == "-":
+            return -value
+        if self.operator == "~":
+            return ~int(value)
+        return value
+
+    def __repr__(self):
+        return f"Unary({self.operator}, {self.operand!r})"
+
+
+def _arithmetic(operator: "str", left: "Any", right: "Any") -> "Any":
+    if not (_is_number(left) and _is_number(right)):
+        return UNDEFINED
+    if operator == "+":
+        return left + right
+    if operator == "-":
+        return left - right
+    if operator == "*":
+        return left * right
+    if operator == "/":
+        if right == 0:
+            return UNDEFINED
+        result = left / right
+        return (
+            int(result)
+            if result.is_integer() and isinstance(left, int) and isinstance(right, int)
+            else result
+        )
+    if operator == "%":
+        if right == 0:
+            return UNDEFINED
+        return (
+            math.fmod(left, right)
+            if isinstance(left, float) or isinstance(right, float)
+            else int(math.fmod(left, right))
+        )
+    if operator == "&":
+        return int(left) & int(right)
+    if operator == "|":
+        return int(left) | int(right)
+    if operator == "^":
+        return int(left) ^ int(right)
+    raise SqlSyntaxError(f"Unknown operator {operator}")
+
+
+class Binary(Expression):
+    def __init__(self, operator: "str", left: "Expression", right: "Expression"):
+        self.operator = operator
+        self.left = left
+        self.right = right
+        self.is_aggregate = left.is_aggregate or right.is_aggregate
+
+    def children(self):
+        return (self.left, self.right)
+
+    def evaluate(self, row, parameters):
+        operator = self.operator
+        left = self.left.evaluate(row, parameters)
+        if operator == "AND":
+            if left is False:
+                return False
+            right = self.right.evaluate(row, parameters)
+            if right is False:
+                return False
+            return True if left is True and right is True else UNDEFINED
+        if operator == "OR":
+            if left is True:
+                return True
+            right = self.right.evaluate(row, parameters)
+            if right is True:
+                return True
+            return False if left is False and right is False else UNDEFINED
+        if operator == "??":
+            return (
+                left if left is not UNDEFINED else self.right.evaluate(row, parameters)
+            )
+        right = self.right.evaluate(row, parameters)
+        if operator == "=":
+            return _equals(left, right)
+        if operator in ("!=", "<>"):
+            equal = _equals(left, right)
+            return UNDEFINED if equal is UNDEFINED else not equal
+        if operator in ("<", "<=", ">", ">="):
+            comparison = _compare(left, right)
+            if comparison is None:
+                return UNDEFINED
+            return {
+                "<": comparison < 0,
+                "<=": comparison <= 0,
+                ">": comparison > 0,
+                ">=": comparison >= 0,
+            }[operator]
+        if operator == "||":
+            if isinstance(left, str) and isinstance(right, str):
+                return left + right
+            return UNDEFINED
+        return _arithmetic(operator, left, right)
+
+    def __repr__(self):
+        return f"Binary({self.operator}, {self.left!r}, {self.right!r})"
+
+
+class Conditional(Expression):
+    def __init__(
+        self, condition: "Expression", if_true: "Expression", if_false: "Expression"
+    ):
+        self.condition = condition
+        self.if_true = if_true
+        self.if_false = if_false
+        self.is_aggregate = (
+            condition.is_aggregate or if_true.is_aggregate or if_false.is_aggregate
+        )
+
+    def children(self):
+        return (self.condition, self.if_true, self.if_false)
+
+    def evaluate(self, row, parameters):
+        if self.condition.evaluate(row, parameters) is True:
+            return self.if_true.evaluate(row, parameters)
+        return self.if_false.evaluate(row, parameters)
+
+
+class In(Expression):
+    def __init__(
+        self, operand: "Expression", candidates: "List[Expression]", negated: "bool"
+    ):
+        self.operand = operand
+        self.candidates = candidates
+        self.negated = negated
+        self.is_aggregate = operand.is_aggregate or any(
+            candidate.is_aggregate for candidate in candidates
+        )
+
+    def children(self):
+        return [self.operand] + self.candidates
+
+    def evaluate(self, row, parameters):
+        value = self.operand.evaluate(row, parameters)
+        if value is UNDEFINED:
+            return UNDEFINED
+        found = any(
+            _equals(value, candidate.evaluate(row, parameters)) is True
+            for candidate in self.candidates
+        )
+        return found != self.negated
+
+
+class Between(Expression):
+    def __init__(
+        self,
+        operand: "Expression",
+        low: "Expression",
+        high: "Expression",
+        negated: "bool",
+    ):
+        self.operand = operand
+        self.low = low
+        self.high = high
+        self.negated = negated
+        self.is_aggregate = (
+            operand.is_aggregate or low.is_aggregate or high.is_aggregate
+        )
+
+    def children(self):
+        return (self.operand, self.low, self.high)
+
+    def evaluate(self, row, parameters):
+        value = self.operand.evaluate(row, parameters)
+        low = _compare(value, self.low.evaluate(row, parameters))
+        high = _compare(value, self.high.evaluate(row, parameters))
+        if low is None or high is None:
+            return UNDEFINED
+        return (low >= 0 and high <= 0) != self.negated
+
+
+class Like(Expression):
+    def __init__(
+        self,
+        operand: "Expression",
+        pattern: "Expression",
+        escape: "Optional[str]",
+        negated: "bool",
+    ):
+        self.operand = operand
+        self.pattern = pattern
+        self.escape = escape
+        self.negated = negated
+        self.is_aggregate = operand.is_aggregate or pattern.is_aggregate
+
+    def children(self):
+        return (self.operand, self.pattern)
+
+    def evaluate(self, row, parameters):
+        value = self.operand.evaluate(row, parameters)
+        pattern = self.pattern.evaluate(row, parameters)
+        if not isinstance(value, str) or not isinstance(pattern, str):
+            return UNDEFINED
+        expression = []
+        index = 0
+        while index < len(pattern):
+            character = pattern[index]
+            if self.escape and character == self.escape and index + 1 < len(pattern):
+                index += 1
+                expression.append(re.escape(pattern[index]))
+            elif character == "%":
+                expression.append(".*")
+            elif character == "_":
+                expression.append(".")
+            else:
+                expression.append(re.escape(character))
+            index += 1
+        matched = re.fullmatch("".join(expression), value, re.DOTALL) is not None
+        return matched != self.negated
+
+
+class ObjectConstructor(Expression):
+    def __init__(self, properties: "List[Tuple[str, Expression]]"):
+        self.properties = properties
+        self.is_aggregate = any(value.is_aggregate for _, value in properties)
+
+    def children(self):
+        return [value for _, value in self.properties]
+
+    def evaluate(self, row, parameters):
+        result = {}
+        for name, expression in self.properties:
+            value = expression.evaluate(row, parameters)
+            if value is not UNDEFINED:
+                result[name] = value
+        return result
+
+
+class ArrayConstructor(Expression):
+    def __init__(self, items: "List[Expression]"):
+        self.items = items
+        self.is_aggregate = any(item.is_aggregate for item in items)
+
+    def children(self):
+        return self.items
+
+    def evaluate(self, row, parameters):
+        return [
+            value
+            for value in (item.evaluate(row, parameters) for item in self.items)
+            if value is not UNDEFINED
+        ]
+
+
+def _string_function(function: "Callable[..., Any]") -> "Callable[..., Any]":
+    def checked(*arguments):
+        if not isinstance(arguments[0], str):
+            return UNDEFINED
+        return function(*arguments)
+
+    return checked
+
+
+def _number_function(function: "Callable[..., Any]") -> "Callable[..., Any]":
+    def checked(*arguments):
+        if not all(_is_number(argument) for argument in arguments):
+            return UNDEFINED
+        return function(*arguments)
+
+    return checked
+
+
+def _to_string(value: "Any") -> "Any":
+    if value is UNDEFINED:
+        return UNDEFINED
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _substring(value, start, length):
+    if not (isinstance(value, str) and _is_number(start) and _is_number(length)):
+        return UNDEFINED
+    start = max(int(start), 0)
+    return value[start : start + max(int(length), 0)]
+
+
+def _array_contains(array, value, partial=False):
+    if not isinstance(array, list):
+        return UNDEFINED
+    for item in array:
+        if partial is True and isinstance(item, dict) and isinstance(value, dict):
+            if all(
+                _equals(item.get(key, UNDEFINED), v) is True for key, v in value.items()
+            ):
+                return True
+        elif _equals(item, value) is True:
+            return True
+    return False
+
+
+def _round(value):
+    # The service rounds half away from zero.
+    return math.floor(value + 0.5) if value >= 0 else -math.floor(-value + 0.5)
+
+
+_FUNCTIONS: "Dict[str, Callable[..., Any]]" = {
+    "IS_DEFINED": lambda value: value is not UNDEFINED,
+    "IS_NULL": lambda value: value is None,
+    "IS_BOOL": lambda value: isinstance(value, bool),
+    "IS_NUMBER": _is_number,
+    "IS_STRING": lambda value: isinstance(value, str),
+    "IS_ARRAY": lambda value: isinstance(value, list),
+    "IS_OBJECT": lambda value: isinstance(value, dict),
+    "IS_PRIMITIVE": lambda value: value is None
+    or isinstance(value, (bool, int, float, str)),
+    "LOWER": _string_function(str.lower),
+    "UPPER": _string_function(str.upper),
+    "LENGTH": _string_function(len),
+    "LTRIM": _string_function(str.lstrip),
+    "RTRIM": _string_function(str.rstrip),
+    "TRIM": _string_function(str.strip),
+    "REVERSE": _string_function(lambda value: value[::-1]),
+    "LEFT": _string_function(lambda value, length: value[: max(int(length), 0)]),
+    "RIGHT": _string_function(
+        lambda value, length: (
+            value[len(value) - max(int(length), 0) :] if length > 0 else ""
+        )
+    ),
+    "SUBSTRING": _substring,
+    "CONCAT": lambda *values: (
+        "".join(values)
+        if all(isinstance(value, str) for value in values)
+        else UNDEFINED
+    ),
+    "CONTAINS": lambda value, part, ignore_case=False: (
+        ((part.lower() in value.lower()) if ignore_case is True else (part in value))
+        if isinstance(value, str) and isinstance(part, str)
+        else UNDEFINED
+    ),
+    "STARTSWITH": lambda value, part, ignore_case=False: (
+        (
+            value.lower().startswith(part.lower())
+            if ignore_case is True
+            else value.startswith(part)
+        )
+        if isinstance(value, str) and isinstance(part, str)
+        else UNDEFINED
+    ),
+    "ENDSWITH": lambda value, part, ignore_case=False: (
+        (
+            value.lower().endswith(part.lower())
+            if ignore_case is True
+            else value.endswith(part)
+        )
+        if isinstance(value, str) and isinstance(part, str)
+        else UNDEFINED
+    ),
+    "INDEX_OF": lambda value, part, start=0: (
+        value.find(part, int(start))
+        if isinstance(value, str) and isinstance(part, str)
+        else UNDEFINED
+    ),
+    "REPLACE": lambda value, old, new: (
+        value.replace(old, new)
+        if all(isinstance(argument, str) for argument in (value, old, new))
+        else UNDEFINED
+    ),
+    "REPLICATE": lambda value, count: (
+        value * int(count)
+        if isinstance(value, str) and _is_number(count)
+        else UNDEFINED
+    ),
+    "TOSTRING": _to_string,
+    "ABS": _number_function(abs),
+    "CEILING": _number_function(math.ceil),
+    "FLOOR": _number_function(math.floor),
+    "ROUND": _number_function(_round),
+    "TRUNC": _number_function(math.trunc),
+    "SQRT": _number_function(
+        lambda value: math.sqrt(value) if value >= 0 else UNDEFINED
+    ),
+    "SQUARE": _number_function(lambda value: value * value),
+    "POWER": _number_function(lambda value, exponent: value**exponent),
+    "EXP": _number_function(math.exp),
+    "LOG": _number_function(
+        lambda value, base=math.e: math.log(value, base) if value > 0 else UNDEFINED
+    ),
+    "LOG10": _number_function(
+        lambda value: math.log10(value) if value > 0 else UNDEFINED
+    ),
+    "SIGN": _number_function(lambda value: (value > 0) - (value < 0)),
+    "PI": lambda: math.pi,
+    "ARRAY_LENGTH": lambda value: len(value) if isinstance(value, list) else UNDEFINED,
+    "ARRAY_CONTAINS": _array_contains,
+    "ARRAY_CONCAT": lambda *arrays: (
+        [item for array in arrays for item in array]
+        if all(isinstance(array, list) for array in arrays)
+        else UNDEFINED
+    ),
+    "ARRAY_SLICE": lambda array, start, length=None: (
+        (
+            array[int(start) :]
+            if length is None
+            else array[int(start) : int(start) + int(length)]
+        )
+        if isinstance(array, list) and _is_number(start)
+        else UNDEFINED
+    ),
+}
+
+AGGREGATE_FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+
+class Call(Expression):
+    """ A call of a built-in scalar function.
+    """
+
+    def __init__(self, name: "str", arguments: "List[Expression]"):
+        self.name = name
+        self.arguments = arguments
+        self.is_aggregate = any(argument.is_aggregate for argument in arguments)
+        self._function = _FUNCTIONS[name]
+
+    def children(self):
+        return self.arguments
+
+    def evaluate(self, row, parameters):
+        arguments = [argument.evaluate(row, parameters) for argument in self.arguments]
+        if (
+            self.name != "IS_DEFINED"
+            and self.name != "TOSTRING"
+            and any(argument is UNDEFINED for argument in arguments)
+        ):
+            # Functions of undefined arguments are undefined, except for the type checks.
+            return False if self.name.startswith("IS_") else UNDEFINED
+        try:
+            return self._function(*arguments)
+        except (TypeError, ValueError, OverflowError):
+            return UNDEFINED
+
+    def __repr__(self):
+        return f"Call({self.name}, {self.arguments!r})"
+
+
+class Aggregate(Expression):
+    """ A call of an aggregate function.
+
+    Evaluated against a group of rows (see :meth:`aggregate`); evaluating it against a single
+    row uses the rows of the group the row is the representative of.
+
+    :ivar text: The text of the argument in the query.
+    """
+
+    is_aggregate = True
+
+    def __init__(self, name: "str", argument: "Expression", text: "str" = ""):
+        if argument.is_aggregate:
+            raise SqlSyntaxError("Aggregate functions can't be nested")
+        self.name = name
+        self.argument = argument
+        self.text = text
+
+    def children(self):
+        return (self.argument,)
+
+    def evaluate(self, row, parameters):
+        group = row.get(_GROUP_ROWS)
+        if group is None:
+            group = [row]
+        return self.aggregate(
+            (self.argument.evaluate(member, parameters) for member in group)
+        )
+
+    def aggregate(self, values: "Iterable[Any]") -> "Any":
+        accumulator = AggregateAccumulator(self.name)
+        for value in values:
+            accumulator.add(value)
+        return accumulator.result()
+
+    def __repr__(self):
+        return f"Aggregate({self.name}, {self.argument!r})"
+
+
+class AggregateAccumulator:
+    """ Incrementally computes an aggregate function.
+
+    Accumulators can be merged, which is how partial aggregates computed for different
+    partitions are combined. `AVG` keeps its sum and count so that merged averages are exact.
+    """
+
+    __slots__ = ("name", "count", "total", "extreme", "undefined")
+
+    def __init__(self, name: "str"):
+        self.name = name
+        self.count = 0
+        self.total: "Any" = 0
+        self.extreme: "Any" = UNDEFINED
+        # Set once a value makes the result undefined, e.g. summing a string.
+        self.undefined = False
+
+    def add(self, value: "Any"):
+        if value is UNDEFINED:
+            return
+        name = self.name
+        if name == "COUNT":
+            self.count += 1
+        elif name in ("SUM", "AVG"):
+            if not _is_number(value):
+                self.undefined = True
+                return
+            self.total += value
+            self.count += 1
+        else:
+            if isinstance(value, (list, dict)):
+                self.undefined = True
+                return
+            if self.extreme is UNDEFINED:
+                self.extreme = value
+            elif (name == "MIN") == (sort_key(value) < sort_key(self.extreme)):
+                self.extreme = value
+
+    def merge(self, other: "AggregateAccumulator"):
+        self.count += other.count
+        self.total += other.total
+        self.undefined = self.undefined or other.undefined
+        if other.extreme is not UNDEFINED:
+            if self.extreme is UNDEFINED:
+                self.extreme = other.extreme
+            elif (self.name == "MIN") == (
+                sort_key(other.extreme) < sort_key(self.extreme)
+            ):
+                self.extreme = other.extreme
+
+    def result(self) -> "Any":
+        if self.undefined:
+            return UNDEFINED
+        if self.name == "COUNT":
+            return self.count
+        if self.name == "SUM":
+            return self.total
+        if self.name == "AVG":
+            return self.total / self.count if self.count else UNDEFINED
+        return self.extreme
+
+
+# Key under which the rows of a group are attached to the representative row of the group.
+_GROUP_ROWS = "\0group"
+
+
+class SelectItem:
+    """ An item of the select list: an expression and the name of its property in the result.
+
+    :ivar text: The text of the expression in the query.
+    """
+
+    def __init__(self, expression: "Expression", name: "str", text: "str" = ""):
+        self.expression = expression
+        self.name = name
+        self.text = text
+
+    def __repr__(self):
+        return f"SelectItem({self.expression!r}, {self.name!r})"
+
+
+class OrderByItem:
+
+    def __init__(self, expression: "Expression", descending: "bool", text: "str" = ""):
+        self.expression = expression
+        self.descending = descending
+        self.text = text
+
+    def __repr__(self):
+        return f"OrderByItem({self.expression!r}, descending={self.descending})"
+
+
+class Query:
+    """ A parsed query.
+
+    :ivar alias: The alias documents are bound to, as declared in the `FROM` clause.
+    :ivar select_star: Whether the query selects whole documents (`SELECT *`).
+    :ivar select_value: The expression of a `SELECT VALUE` query, or None.
+    :ivar select_items: The items of the select list of other queries.
+    :ivar select_text: The text of the select list in the query, after `TOP` and `VALUE`.
+    :ivar body_text: The text of the clauses from `FROM` to `ORDER BY` in the query.
+    :ivar filter_text: The text of the `FROM` and `WHERE` clauses in the query.
+    :ivar group_by_texts: The text of each expression of the `GROUP BY` clause in the query.
+    """
+
+    def __init__(self):
+        self.distinct = False
+        self.top: "Optional[Expression]" = None
+        self.select_star = False
+        self.select_value: "Optional[Expression]" = None
+        self.select_items: "List[SelectItem]" = []
+        self.select_text = ""
+        self.body_text = ""
+        self.filter_text = ""
+        self.container = "root"
+        self.alias = "root"
+        self.where: "Optional[Expression]" = None
+        self.group_by: "List[Expression]" = []
+        self.group_by_texts: "List[str]" = []
+        self.order_by: "List[OrderByItem]" = []
+        self.offset: "Optional[Expression]" = None
+        self.limit: "Optional[Expression]" = None
+
+    @property
+    def projections(self) -> "List[Expression]":
+        if self.select_value is not None:
+            return [self.select_value]
+        return [item.expression for item in self.select_items]
+
+    @property
+    def has_aggregates(self) -> "bool":
+        return any(expression.is_aggregate for expression in self.projections)
+
+    @property
+    def aggregates(self) -> "List[Aggregate]":
+        """ The aggregate function calls of the select clause, in order of appearance.
+        """
+        found: "List[Aggregate]" = []
+        for expression in self.projections:
+            found.extend(
+                cast("Aggregate", node)
+                for node in expression.find(lambda node: isinstance(node, Aggregate))
+            )
+        return found
+
+    def _bind(self, document: "Any") -> "Dict[str, Any]":
+        return {self.alias: document}
+
+    def _number(
+        self, expression: "Optional[Expression]", parameters
+    ) -> "Optional[int]":
+        if expression is None:
+            return None
+        value = expression.evaluate({}, parameters)
+        if not _is_number(value) or value < 0:
+            raise SqlSyntaxError("TOP, OFFSET and LIMIT require a non-negative number")
+        return int(value)
+
+    def limits(self, parameters: "Dict[str, Any]") -> "Tuple[int, Optional[int]]":
+        """ The number of results skipped (`OFFSET`), and returned at most (`LIMIT`, `TOP`) or None.
+        """
+        skip = self._number(self.offset, parameters) or 0
+        take = None
+        for bound in (
+            self._number(self.limit, parameters),
+            self._number(self.top, parameters),
+        ):
+            if bound is not None and (take is None or bound < take):
+                take = bound
+        return skip, take
+
+    def filter(
+        self, documents: "Iterable[Any]", parameters: "Dict[str, Any]"
+    ) -> "List[Dict[str, Any]]":
+        """ Bind the documents to the alias and keep those satisfying the `WHERE` clause.
+        """
+        rows = (self._bind(document) for document in documents)
+        if self.where is None:
+            return list(rows)
+        where = self.where
+        return [row for row in rows if where.evaluate(row, parameters) is True]
+
+    def group(
+        self, rows: "List[Dict[str, Any]]", parameters: "Dict[str, Any]"
+    ) -> "List[Dict[str, Any]]":
+        """ Group the rows of an aggregate or `GROUP BY` query; one representative row per group.
+        """
+        if self.group_by:
+            groups: "Dict[str, List[Dict[str, Any]]]" = {}
+            for row in rows:
+                key = canonical_json(
+                    [
+                        _undefined_marker(expression.evaluate(row, parameters))
+                        for expression in self.group_by
+                    ]
+                )
+                groups.setdefault(key, []).append(row)
+            grouped = list(groups.values())
+        else:
+            grouped = [rows]
+        representatives = []
+        for members in grouped:
+            representative = dict(members[0]) if members else {}
+            representative[_GROUP_ROWS] = members
+            representatives.append(representative)
+        return representatives
+
+    def sort(
+        self, rows: "List[Dict[str, Any]]", parameters: "Dict[str, Any]"
+    ) -> "List[Dict[str, Any]]":
+        """ Order the rows according to the `ORDER BY` clause.
+        """
+        # Sort by the least significant key first; Python's sort is stable.
+        for item in reversed(self.order_by):
+            expression = item.expression
+            rows = sorted(
+                rows,
+                key=lambda row: sort_key(expression.evaluate(row, parameters)),
+                reverse=item.descending,
+            )
+        return rows
+
+    def project(self, row: "Dict[str, Any]", parameters: "Dict[str, Any]") -> "Any":
+        """ The result of the select clause for a row, or :data:`UNDEFINED` if it produces no result.
+        """
+        if self.select_star:
+            return row[self.alias]
+        if self.select_value is not None:
+            return self.select_value.evaluate(row, parameters)
+        result = {}
+        for item in self.select_items:
+            value = item.expression.evaluate(row, parameters)
+            if value is not UNDEFINED:
+                result[item.name] = value
+        return result
+
+    def execute(
+        self,
+        documents: "Iterable[Any]",
+        parameters: "Optional[Dict[str, Any]]" = None,
+    ) -> "List[Any]":
+        """ Run the query over `documents`.
+
+        :param documents: The documents of the container.
+        :param parameters: Values of the query parameters, keyed by name (including the `@`).
+        :returns: The results of the query. An aggregate whose value is undefined is returned
+            as None.
+        """
+        parameters = parameters or {}
+        rows = self.filter(documents, parameters)
+        aggregated = self.has_aggregates or bool(self.group_by)
+        if aggregated:
+            rows = self.group(rows, parameters)
+        if self.order_by:
+            rows = self.sort(rows, parameters)
+        results = []
+        seen = set()
+        for row in rows:
+            value = self.project(row, parameters)
+            if value is UNDEFINED:
+                if not (
+                    aggregated and self.select_value is not None and not self.group_by
+                ):
+                    continue
+                value = None
+            if self.distinct:
+                key = canonical_json(value)
+                if key in seen:
+                    continue
+                seen.add(key)
+            results.append(value)
+        skip, take = self.limits(parameters)
+        return results[skip:] if take is None else results[skip : skip + take]
+
+
+def _undefined_marker(value: "Any") -> "Any":
+    return {"\0undefined": True} if value is UNDEFINED else value
+
+
+class _Parser:
+    def __init__(self, query: "str"):
+        self.query = query
+        self.tokens = _tokenize(query)
+        self.index = 0
+
+    # Token helpers
+
+    @property
+    def token(self) -> "_Token":
+        return self.tokens[self.index]
+
+    def advance(self) -> "_Token":
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def error(self, message: "str") -> "SqlSyntaxError":
+        return SqlSyntaxError(
+            f"{message} at position {self.token.position} of query: {self.query}"
+        )
+
+    def is_keyword(self, *keywords: "str") -> "bool":
+        return self.token.kind == "keyword" and self.token.value[0] in keywords
+
+    def is_op(self, *operators: "str") -> "bool":
+        return self.token.kind == "op" and self.token.value in operators
+
+    def accept_keyword(self, *keywords: "str") -> "Optional[str]":
+        if self.is_keyword(*keywords):
+            return self.advance().value[0]
+        return None
+
+    def expect_keyword(self, keyword: "str"):
+        if not self.accept_keyword(keyword):
+            raise self.error(f"Expected {keyword}")
+
+    def accept_op(self, *operators: "str") -> "Optional[str]":
+        if self.is_op(*operators):
+            return self.advance().value
+        return None
+
+    def expect_op(self, operator: "str"):
+        if not self.accept_op(operator):
+            raise self.error(f"Expected {operator!r}")
+
+    def identifier(self) -> "str":
+        token = self.token
+        if token.kind == "name":
+            self.advance()
+            return token.value
+        raise self.error("Expected an identifier")
+
+    def property_name(self) -> "str":
+        # After a dot any name is a property name, including keywords.
+        token = self.token
+        if token.kind == "name":
+            self.advance()
+            return token.value
+        if token.kind == "keyword":
+            self.advance()
+            return token.value[1]
+        raise self.error("Expected a property name")
+
+    def text_since(self, position: "int") -> "str":
+        """ The text of the query from `position` to the current token.
+        """
+        return self.query[position : self.token.position].strip()
+
+    # Clauses
+
+    def parse_query(self) -> "Query":
+        query = Query()
+        self.expect_keyword("SELECT")
+        if self.accept_keyword("DISTINCT"):
+            query.distinct = True
+        if self.accept_keyword("TOP"):
+            query.top = self.parse_primary()
+        if self.accept_op("*"):
+            query.select_star = True
+            query.select_text = "*"
+        elif self.accept_keyword("VALUE"):
+            start = self.token.position
+            query.select_value = self.parse_expression()
+            query.select_text = self.text_since(start)
+        else:
+            select_start = self.token.position
+            position = 0
+            while True:
+                position += 1
+                start = self.token.position
+                expression = self.parse_expression()
+                text = self.text_since(start)
+                if self.accept_keyword("AS"):
+                    name = self.property_name()
+                elif self.token.kind == "name":
+                    name = self.identifier()
+                else:
+                    name = self._default_name(expression, position)
+                query.select_items.append(SelectItem(expression, name, text))
+                if not self.accept_op(","):
+                    break
+            query.select_text = self.text_since(select_start)
+        body_start = self.token.position
+        if self.accept_keyword("FROM"):
+            query.container = self.identifier()
+            query.alias = query.container
+            if self.accept_keyword("AS"):
+                query.alias = self.identifier()
+            elif self.token.kind == "name":
+                query.alias = self.identifier()
+            if self.is_keyword("JOIN", "IN"):
+                raise self.error("JOIN and FROM ... IN are not supported")
+        if self.accept_keyword("WHERE"):
+            query.where = self.parse_expression()
+        query.filter_text = self.text_since(body_start)
+        if self.accept_keyword("GROUP"):
+            self.expect_keyword("BY")
+            while True:
+                start = self.token.position
+                query.group_by.append(self.parse_expression())
+                query.group_by_texts.append(self.text_since(start))
+                if not self.accept_op(","):
+                    break
+        if self.accept_keyword("ORDER"):
+            self.expect_keyword("BY")
+            while True:
+                start = self.token.position
+                expression = self.parse_expression()
+                text = self.text_since(start)
+                descending = self.accept_keyword("ASC", "DESC") == "DESC"
+                query.order_by.append(OrderByItem(expression, descending, text))
+                if not self.accept_op(","):
+                    break
+        query.body_text = self.text_since(body_start)
+        if self.accept_keyword("OFFSET"):
+            query.offset = self.parse_primary()
+            self.expect_keyword("LIMIT")
+            query.limit = self.parse_primary()
+        if self.token.kind != "end":
+            raise self.error("Unexpected token")
+        self._resolve_references(query)
+        return query
+
+    @staticmethod
+    def _default_name(expression: "Expression", position: "int") -> "str":
+        if isinstance(expression, Member) and isinstance(expression.key, Literal):
+            if isinstance(expression.key.value, str):
+                return expression.key.value
+        return f"${position}"
+
+    def _resolve_references(self, query: "Query"):
+        # Names are parsed as references; any that isn't the FROM alias is an error.
+        expressions = list(query.projections) + [
+            expression
+            for expression in [query.where]
+            + query.group_by
+            + [item.expression for item in query.order_by]
+            if expression is not None
+        ]
+        for expression in expressions:
+            for node in expression.find(lambda node: isinstance(node, Reference)):
+                reference = cast("Reference", node)
+                if reference.name != query.alias:
+                    raise SqlSyntaxError(
+                        f"Identifier '{reference.name}' could not be resolved in query: {self.query}"
+                    )
+
+    # Expressions, from lowest to highest precedence
+
+    def parse_expression(self) -> "Expression":
+        condition = self.parse_coalesce()
+        if self.accept_op("?"):
+            if_true = self.parse_expression()
+            self.expect_op(":")
+            if_false = self.parse_expression()
+            return Conditional(condition, if_true, if_false)
+        return condition
+
+    def parse_coalesce(self) -> "Expression":
+        left = self.parse_or()
+        while self.accept_op("??"):
+            left = Binary("??", left, self.parse_or())
+        return left
+
+    def parse_or(self) -> "Expression":
+        left = self.parse_and()
+        while self.accept_keyword("OR"):
+            left = Binary("OR", left, self.parse_and())
+        return left
+
+    def parse_and(self) -> "Expression":
+        left = self.parse_not()
+        while self.accept_keyword("AND"):
+            left = Binary("AND", left, self.parse_not())
+        return left
+
+    def parse_not(self) -> "Expression":
+        if self.accept_keyword("NOT"):
+            return Unary("NOT", self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> "Expression":
+        left = self.parse_bitwise()
+        while True:
+            operator = self.accept_op("=", "!=", "<>", "<", "<=", ">", ">=")
+            if operator:
+                left = Binary(operator, left, self.parse_bitwise())
+                continue
+            negated = False
+            if (
+                self.is_keyword("NOT")
+                and self.tokens[self.index + 1].kind == "keyword"
+                and (self.tokens[self.index + 1].value[0] in ("IN", "BETWEEN", "LIKE"))
+            ):
+                self.advance()
+                negated = True
+            if self.accept_keyword("IN"):
+                self.expect_op("(")
+                candidates = [self.parse_expression()]
+                while self.accept_op(","):
+                    candidates.append(self.parse_expression())
+                self.expect_op(")")
+                left = In(left, candidates, negated)
+            elif self.accept_keyword("BETWEEN"):
+                low = self.parse_bitwise()
+                self.expect_keyword("AND")
+                high = self.parse_bitwise()
+                left = Between(left, low, high, negated)
+            elif self.accept_keyword("LIKE"):
+                pattern = self.parse_bitwise()
+                escape = None
+                if self.accept_keyword("ESCAPE"):
+                    token = self.advance()
+                    if token.kind != "string":
+                        raise self.error("Expected an escape character")
+                    escape = token.value
+                left = Like(left, pattern, escape, negated)
+            elif negated:
+                raise self.error("Expected IN, BETWEEN or LIKE")
+            else:
+                return left
+
+    def parse_bitwise(self) -> "Expression":
+        left = self.parse_concat()
+        while True:
+            operator = self.accept_op("&", "|", "^")
+            if not operator:
+                return left
+            left = Binary(operator, left, self.parse_concat())
+
+    def parse_concat(self) -> "Expression":
+        left = self.parse_additive()
+        while self.accept_op("||"):
+            left = Binary("||", left, self.parse_additive())
+        return left
+
+    def parse_additive(self) -> "Expression":
+        left = self.parse_multiplicative()
+        while True:
+            operator = self.accept_op("+", "-")
+            if not operator:
+                return left
+            left = Binary(operator, left, self.parse_multiplicative())
+
+    def parse_multiplicative(self) -> "Expression":
+        left = self.parse_unary()
+        while True:
+            operator = self.accept_op("*", "/", "%")
+            if not operator:
+                return left
+            left = Binary(operator, left, self.parse_unary())
+
+    def parse_unary(self) -> "Expression":
+        operator = self.accept_op("-", "+", "~")
+        if operator:
+            operand = self.parse_unary()
+            if (
+                operator == "-"
+                and isinstance(operand, Literal)
+                and _is_number(operand.value)
+            ):
+                return Literal(-operand.value)
+            return Unary(operator, operand)
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> "Expression":
+        expression = self.parse_primary()
+        while True:
+            if self.accept_op("."):
+                expression = Member(expression, Literal(self.property_name()))
+            elif self.accept_op("["):
+                key = self.parse_expression()
+                self.expect_op("]")
+                expression = Member(expression, key)
+            else:
+                return expression
+
+    def parse_primary(self) -> "Expression":
+        token = self.token
+        if token.kind in ("number", "string"):
+            self.advance()
+            return Literal(token.value)
+        if token.kind == "parameter":
+            self.advance()
+            return Parameter(token.value)
+        if token.kind == "keyword":
+            keyword = token.value[0]
+            if keyword in ("TRUE", "FALSE", "NULL", "UNDEFINED"):
+                self.advance()
+                return Literal(
+                    {
+                        "TRUE": True,
+                        "FALSE": False,
+                        "NULL": None,
+                        "UNDEFINED": UNDEFINED,
+                    }[keyword]
+                )
+            raise self.error(f"Unexpected keyword {token.value[1]}")
+        if token.kind == "name":
+            self.advance()
+            if self.is_op("("):
+                return self.parse_call(token.value)
+            return Reference(token.value)
+        if self.accept_op("("):
+            expression = self.parse_expression()
+            self.expect_op(")")
+            return expression
+        if self.accept_op("{"):
+            properties = []
+            if not self.accept_op("}"):
+                while True:
+                    token = self.advance()
+                    if token.kind == "string" or token.kind == "name":
+                        name = token.value
+                    elif token.kind == "keyword":
+                        name = token.value[1]
+                    else:
+                        raise self.error("Expected a property name")
+                    self.expect_op(":")
+                    properties.append((name, self.parse_expression()))
+                    if self.accept_op("}"):
+                        break
+                    self.expect_op(",")
+            return ObjectConstructor(properties)
+        if self.accept_op("["):
+            items = []
+            if not self.accept_op("]"):
+                while True:
+                    items.append(self.parse_expression())
+                    if self.accept_op("]"):
+                        break
+                    self.expect_op(",")
+            return ArrayConstructor(items)
+        raise self.error("Expected an expression")
+
+    def parse_call(self, name: "str") -> "Expression":
+        self.expect_op("(")
+        arguments = []
+        texts = []
+        if not self.accept_op(")"):
+            while True:
+                start = self.token.position
+                arguments.append(self.parse_expression())
+                texts.append(self.text_since(start))
+                if self.accept_op(")"):
+                    break
+                self.expect_op(",")
+        upper = name.upper()
+        if upper in AGGREGATE_FUNCTIONS:
+            if len(arguments) != 1:
+                raise self.error(f"{upper} takes exactly one argument")
+            return Aggregate(upper, arguments[0], texts[0])
+        if upper not in _FUNCTIONS:
+            raise SqlSyntaxError(f"Unknown function {name} in query: {self.query}")
+        return Call(upper, arguments)
+
+
+def parse(query: "str") -> "Query":
+    """ Parse a query.
+
+    :raises SqlSyntaxError: If the query isn't valid in the supported grammar.
+    """
+    return _Parser(query).parse_query()
+
+
+def parameters_dict(
+    parameters: "Optional[Iterable[Dict[str, Any]]]",
+) -> "Dict[str, Any]":
+    """ Convert query parameters as sent to the service (`[{"name": ..., "value": ...}]`) to a dict.
+    """
+    return {parameter["name"]: parameter["value"] for parameter in parameters or ()}
@@ -0,0 +1,198 @@
+"""
+Handling of request rate throttling (HTTP 429) and client-side request unit pacing.
+"""
+
+import threading
+import time
+
+from typing import Any, Dict, Optional, Tuple
+
+_RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+_REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+
+
+def get_request_charge(headers: "Optional[Dict[str, Any]]") -> "float":
+    """ The request charge, in request units, recorded in the headers of a response.
+    """
+    if not headers:
+        return 0.0
+    try:
+        return float(headers.get(_REQUEST_CHARGE_HEADER) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ThrottlingRetryPolicy:
+    """ Retries requests that failed because the request rate was too large (HTTP 429).
+
+    A request is retried after the delay requested by the service in the `x-ms-retry-after-ms`
+    header, or after an exponentially growing delay if the header is missing.
+    """
+
+    def __init__(
+        self,
+        max_retries: "int" = 9,
+        max_wait_time: "float" = 30.0,
+        backoff: "float" = 0.1,
+        max_backoff: "float" = 5.0,
+        fixed_delay: "Optional[float]" = None,
+    ):
+        """
+        :param max_retries: Maximum number of times a request is retried. 0 disables retries.
+        :param max_wait_time: Maximum number of seconds spent waiting between retries of a request.
+        :param backoff: Delay in seconds before the first retry if the service doesn't request one.
+        :param max_backoff: Upper bound of the delay in seconds if the service doesn't request one.
+        :param fixed_delay: Wait this many seconds before every retry, whatever delay the service requests.
+        """
+        self.max_retries = max_retries
+        self.max_wait_time = max_wait_time
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.fixed_delay = fixed_delay
+
+    @classmethod
+    def from_retry_options(cls, retry_options) -> "ThrottlingRetryPolicy":
+        """ The policy retrying throttled requests as the `RetryOptions` of a `ConnectionPolicy` ask.
+        """
+        fixed_interval = retry_options.FixedRetryIntervalInMilliseconds
+        return cls(
+            max_retries=retry_options.MaxRetryAttemptCount,
+            max_wait_time=retry_options.MaxWaitTimeInSeconds,
+            fixed_delay=fixed_interval / 1000 if fixed_interval is not None else None,
+        )
+
+    def get_retry_delay(
+        self, attempt: "int", headers: "Optional[Dict[str, Any]]", waited: "float"
+    ) -> "Optional[float]":
+        """ The number of seconds to wait before retrying a throttled request, or None to give up.
+
+        :param attempt: Number of retries of the request so far.
+        :param headers: Headers of the throttled response.
+        :param waited: Number of seconds already spent waiting between retries of the request.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if self.fixed_delay is not None:
+            delay = self.fixed_delay
+        else:
+            try:
+                delay = float((headers or {})[_RETRY_AFTER_HEADER]) / 1000
+            except (KeyError, TypeError, ValueError):
+                delay = min(self.backoff * 2**attempt, self.max_backoff)
+        if waited + delay > self.max_wait_time:
+            return None
+        return delay
+
+
+class RequestUnitRateLimiter:
+    """ Token bucket pacing requests to a budget of request units (RU) per second.
+
+    The charge of a request is only known once it completes, so each request reserves the
+    average charge observed for its kind of operation and the difference is settled when
+    its actual charge is recorded. Requests wait while the bucket is in debt.
+
+    The rate adapts to throttling: it is halved whenever a request is throttled, and
+    recovers gradually towards the budget as requests succeed.
+
+    A limiter is thread-safe and can be shared by several clients drawing on the same
+    provisioned throughput.
+    """
+
+    #: Smoothing factor of the per-operation charge estimates.
+    estimate_smoothing = 0.2
+    #: Fraction of the budget regained by the rate after each successful request.
+    recovery_step = 0.01
+    #: Fraction of the budget below which throttling doesn't lower the rate.
+    min_rate_fraction = 0.1
+
+    def __init__(
+        self, request_units_per_second: "float", *, burst: "Optional[float]" = None
+    ):
+        """
+        :param request_units_per_second: The RU/s budget.
+        :param burst: Maximum number of request units that can be consumed at once after an
+            idle period. Defaults to one second worth of budget.
+        """
+        if request_units_per_second <= 0:
+            raise ValueError("request_units_per_second must be positive")
+        self.request_units_per_second = request_units_per_second
+        self.burst = request_units_per_second if burst is None else burst
+        self._rate = request_units_per_second
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._estimates: "Dict[str, float]" = {}
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> "float":
+        """ The current rate in RU/s, at most the budget.
+        """
+        return self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def _reserve(self, operation: "str") -> "Tuple[float, float]":
+        """ Reserve request units for a request for `operation` without waiting.
+
+        :returns: The number of request units reserved, and the number of seconds to wait before
+            sending the request. The asyncio client waits without blocking the event loop.
+        """
+        with self._lock:
+            self._refill()
+            estimate = self._estimates.get(operation, 1.0)
+            self._tokens -= estimate
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        return estimate, delay
+
+    def acquire(self, operation: "str") -> "float":
+        """ Wait until a request for `operation` may be sent.
+
+        :returns: The number of request units reserved for the request, to be passed to :meth:`record`.
+        """
+        estimate, delay = self._reserve(operation)
+        if delay:
+            time.sleep(delay)
+        return estimate
+
+    def record(
+        self,
+        operation: "str",
+        reserved: "float",
+        request_charge: "float",
+        throttled: "bool" = False,
+    ):
+        """ Settle the charge of a completed request.
+
+        :param operation: The operation passed to :meth:`acquire`.
+        :param reserved: The value returned by :meth:`acquire`.
+        :param request_charge: The charge of the request reported by the service.
+        :param throttled: Whether the request was throttled.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= request_charge - reserved
+            if request_charge > 0:
+                estimate = self._estimates.get(operation)
+                self._estimates[operation] = (
+                    request_charge
+                    if estimate is None
+                    else estimate
+                    + self.estimate_smoothing * (request_charge - estimate)
+                )
+            if throttled:
+                self._rate = max(
+                    self._rate / 2,
+                    self.request_units_per_second * self.min_rate_fraction,
+                )
+                # The service has no capacity left right now; don't burst into it.
+                self._tokens = min(self._tokens, 0.0)
+            else:
+                self._rate = min(
+                    self._rate + self.request_units_per_second * self.recovery_step,
+                    self.request_units_per_second,
+                )
@@ -0,0 +1,426 @@
+"""
+Benchmarks of the data-plane hot paths of the client, run against the in-memory emulator.
+
+The emulator has no latency and no throttling, so the results measure the overhead of the
+client itself (plus that of the emulator, which is the same from one commit to the next).
+
+Usage::
+
+    python benchmarks/benchmark.py --save-baseline benchmarks/baseline.json   # on the reference commit
+    python benchmarks/benchmark.py --baseline benchmarks/baseline.json        # on the commit under test
+
+Results are printed as a table and written as JSON with `--output`. With `--baseline`, the run
+exits with status 1 if any benchmark got slower, or allocates more, by more than `--tolerance`.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.cosmos import CosmosClient, Item, JsonCodec, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
+
+# Number of items in the container used by the query and list benchmarks.
+LARGE_CONTAINER_SIZE = 10000
+# Number of operations whose allocations are traced; tracing slows operations down a lot.
+TRACED_OPERATIONS = 200
+
+
+def make_document(index: "int", partition_key: "str" = "pk") -> "Dict[str, Any]":
+    """ A document of about 500 bytes, with nested properties like a typical application document.
+    """
+    return {
+        "id": f"item-{index}",
+        "pk": partition_key,
+        "n": index,
+        "name": f"Product {index}",
+        "price": round(index * 1.07, 2),
+        "discontinued": index % 10 == 0,
+        "tags": ["benchmark", f"group-{index % 7}", f"tier-{index % 3}"],
+        "address": {
+            "street": f"{index} Main Street",
+            "city": "Redmond",
+            "state": "WA",
+            "zip": "98052",
+        },
+        "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+    }
+
+
+def create_container(name: "str", client: "CosmosClient"):
+    database = client.create_database(name)
+    return database.create_container("items", partition_key=PartitionKey("/pk"))
+
+
+def populate(container, count: "int"):
+    for result in container.create_items(
+        make_document(index) for index in range(count)
+    ):
+        if not result.succeeded:
+            raise result.error
+
+
+# Each benchmark prepares its data, outside of the measurement, and returns the operation to
+# measure: a callable invoked with the index of each operation.
+
+
+def bench_create_item(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    container = create_container("create_item", client)
+    documents = [make_document(index) for index in range(iterations)]
+    return lambda index: container.create_item(documents[index])
+
+
+def bench_upsert_item(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    container = create_container("upsert_item", client)
+    documents = [make_document(index % 100) for index in range(iterations)]
+    return lambda index: container.upsert_item(documents[index])
+
+
+def bench_get_item(client: "CosmosClient", iterations: "int") -> "Callable[[int], Any]":
+    container = create_container("get_item", client)
+    populate(container, 100)
+    return lambda index: container.get_item(f"item-{index % 100}", partition_key="pk")
+
+
+def bench_get_item_raw(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    container = create_container("get_item_raw", client)
+    populate(container, 100)
+    return lambda index: container.get_item(
+        f"item-{index % 100}", partition_key="pk", raw=True
+    )
+
+
+def bench_delete_item(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    container = create_container("delete_item", client)
+    populate(container, iterations)
+    return lambda index: container.delete_item(f"item-{index}", partition_key="pk")
+
+
+def _query_benchmark(
+    name: "str",
+    query: "str",
+    expected: "int",
+    raw: "bool" = False,
+    cross_partition: "bool" = False,
+):
+    def bench(client: "CosmosClient", iterations: "int") -> "Callable[[int], Any]":
+        container = create_container(name, client)
+        populate(container, LARGE_CONTAINER_SIZE)
+
+        def run(index: "int"):
+            # Queries that don't use the @id parameter ignore it.
+            results = list(
+                container.query_items(
+                    query,
+                    [dict(name="@id", value=f"item-{index % LARGE_CONTAINER_SIZE}")],
+                    partition_key=None if cross_partition else "pk",
+                    enable_cross_partition_query=cross_partition or None,
+                    max_item_count=1000,
+                    raw=raw,
+                )
+            )
+            count = sum(page.count for page in results) if raw else len(results)
+            assert count == expected, (name, count)
+
+        return run
+
+    return bench
+
+
+def bench_list_items(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    container = create_container("list_items", client)
+    populate(container, LARGE_CONTAINER_SIZE)
+
+    def run(index: "int"):
+        count = sum(1 for _ in container.list_items(max_item_count=1000))
+        assert count == LARGE_CONTAINER_SIZE, count
+
+    return run
+
+
+def bench_item_construction(
+    client: "CosmosClient", iterations: "int"
+) -> "Callable[[int], Any]":
+    headers = {
+        "x-ms-request-charge": "1.0",
+        "x-ms-session-token": "0:-1#42",
+        "x-ms-activity-id": "00000000-0000-0000-0000-000000000000",
+    }
+    document = make_document(0)
+    return lambda index: Item(headers=headers, data=document)
+
+
+# Name, benchmark and default number of operations.
+BENCHMARKS = [
+    ("create_item", bench_create_item, 5000),
+    ("upsert_item", bench_upsert_item, 5000),
+    ("get_item", bench_get_item, 10000),
+    ("get_item_raw", bench_get_item_raw, 10000),
+    ("delete_item", bench_delete_item, 5000),
+    (
+        "query_items_1",
+        _query_benchmark("query_items_1", "SELECT * FROM r WHERE r.id = @id", 1),
+        500,
+    ),
+    (
+        "query_items_100",
+        _query_benchmark("query_items_100", "SELECT * FROM r WHERE r.n < 100", 100),
+        200,
+    ),
+    (
+        "query_items_10k",
+        _query_benchmark(
+            "query_items_10k",
+            "SELECT * FROM r",
+            LARGE_CONTAINER_SIZE,
+        ),
+        10,
+    ),
+    (
+        "query_items_10k_raw",
+        _query_benchmark(
+            "query_items_10k_raw",
+            "SELECT * FROM r",
+            LARGE_CONTAINER_SIZE,
+            raw=True,
+        ),
+        10,
+    ),
+    (
+        "query_items_10k_cross_partition",
+        _query_benchmark(
+            "query_items_10k_cross_partition",
+            "SELECT * FROM r",
+            LARGE_CONTAINER_SIZE,
+            cross_partition=True,
+        ),
+        10,
+    ),
+    ("list_items", bench_list_items, 10),
+    ("item_construction", bench_item_construction, 100000),
+]
+
+
+def _percentile(sorted_values: "List[float]", percentile: "float") -> "float":
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))
+    return sorted_values[index]
+
+
+def run_benchmark(
+    benchmark,
+    iterations: "int",
+    repeat: "int" = 3,
+    codec: "Optional[JsonCodec]" = None,
+) -> "Dict[str, float]":
+    """ Measure the throughput, latency and allocations of the operation of a benchmark.
+
+    The operation is timed `repeat` times over `iterations` operations; the throughput is that
+    of the fastest pass, which is the least disturbed by the rest of the system. Allocations
+    are then traced over separate operations.
+    """
+    client = CosmosClient(
+        None, None, client_context=InMemoryClientContext(seed=0), codec=codec
+    )
+    traced = min(iterations, TRACED_OPERATIONS)
+    operation = benchmark(client, iterations * repeat + traced)
+
+    latencies = []
+    elapsed = float("inf")
+    for start in range(0, iterations * repeat, iterations):
+        gc.collect()
+        started = time.perf_counter()
+        for index in range(start, start + iterations):
+            operation_started = time.perf_counter()
+            operation(index)
+            latencies.append(time.perf_counter() - operation_started)
+        elapsed = min(elapsed, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        peaks = 0
+        for index in range(iterations * repeat, iterations * repeat + traced):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            operation(index)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks += peak - current
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return dict(
+        iterations=iterations,
+        ops_per_sec=iterations / elapsed,
+        mean_us=elapsed / iterations * 1e6,
+        p50_us=_percentile(latencies, 50) * 1e6,
+        p99_us=_percentile(latencies, 99) * 1e6,
+        max_us=latencies[-1] * 1e6,
+        # The most memory allocated at once during an operation.
+        peak_alloc_bytes=peaks / traced,
+        # Memory still allocated after an operation; the emulator retains created items.
+        retained_bytes=(after - before) / traced,
+    )
+
+
+def _git_commit() -> "Optional[str]":
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    results: "Dict[str, Dict[str, float]]",
+    baseline: "Dict[str, Dict[str, float]]",
+    tolerance: "float",
+) -> "List[str]":
+    """ The regressions of `results` relative to `baseline`, as messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["ops_per_sec"] < reference["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:.0f} ops/s, "
+                f"{1 - result['ops_per_sec'] / reference['ops_per_sec']:.0%} slower than the baseline"
+            )
+        # Allocations are deterministic, so small absolute changes are still reported.
+        if (
+            result["peak_alloc_bytes"]
+            > reference["peak_alloc_bytes"] * (1 + tolerance) + 64
+        ):
+            regressions.append(
+                f"{name}: allocates {result['peak_alloc_bytes']:.0f} bytes per operation, "
+                f"{reference['peak_alloc_bytes']:.0f} in the baseline"
+            )
+    return regressions
+
+
+def main(argv: "Optional[List[str]]" = None) -> "int":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        help="Names of the benchmarks to run; all of them if none are given.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiply the number of operations of every benchmark by this factor.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed passes of every benchmark; the fastest is reported (default 3).",
+    )
+    parser.add_argument(
+        "--codec",
+        choices=["json", "orjson"],
+        default="json",
+        help="JSON codec of the client (default json, the standard library).",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--baseline", help="Compare the results with those of this JSON file."
+    )
+    parser.add_argument(
+        "--save-baseline", help="Write the results to this JSON file as a baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Fraction by which a benchmark may be slower than the baseline (default 0.1).",
+    )
+    args = parser.parse_args(argv)
+
+    names = [name for name, _, _ in BENCHMARKS]
+    unknown = set(args.benchmarks) - set(names)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    codec = JsonCodec.orjson() if args.codec == "orjson" else None
+    results = {}
+    print(
+        f"{'benchmark':<32} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'peak alloc B':>13}"
+    )
+    for name, benchmark, iterations in BENCHMARKS:
+        if args.benchmarks and name not in args.benchmarks:
+            continue
+        result = run_benchmark(
+            benchmark,
+            max(1, int(iterations * args.scale)),
+            max(1, args.repeat),
+            codec,
+        )
+        results[name] = result
+        print(
+            f"{name:<32} {result['ops_per_sec']:>12.1f} {result['p50_us']:>10.1f} "
+            f"{result['p99_us']:>10.1f} {result['peak_alloc_bytes']:>13.0f}"
+        )
+
+    report = dict(
+        commit=_git_commit(),
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        codec=args.codec,
+        results=results,
+    )
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(
+                f"\nRegressions relative to {baseline.get('commit') or args.baseline}:"
+            )
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(
+            f"\nNo regressions relative to {baseline.get('commit') or args.baseline}."
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
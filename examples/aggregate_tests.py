@@ -29,9 +29,11 @@ from six import with_metaclass
 from six.moves import xrange
 
 from azure.cosmos import CosmosClient, HTTPFailure, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
 
-URL = os.environ["ACCOUNT_URI"]
-KEY = os.environ["ACCOUNT_KEY"]
+# Without an account, the tests run against the in-memory emulator.
+URL = os.environ.get("ACCOUNT_URI")
+KEY = os.environ.get("ACCOUNT_KEY")
 
 
 class _config:
@@ -46,12 +48,19 @@ class _config:
     DOCS_WITH_SAME_PARTITION_KEY = 200
     docs_with_numeric_id = 0
     sum = 0
+    emulator = None if URL else InMemoryClientContext()
 
 
 class _helper:
+    @classmethod
+    def create_client(cls):
+        return CosmosClient(
+            _config.host, key=_config.master_key, client_context=_config.emulator
+        )
+
     @classmethod
     def clean_up_database(cls):
-        client = CosmosClient(_config.host, key=_config.master_key)
+        client = cls.create_client()
         query_iterable = client.list_database_properties(
             query="SELECT * FROM root r WHERE r.id='{}'".format(
                 _config.TEST_DATABASE_NAME
@@ -73,7 +82,7 @@ class AggregateQueryTestSequenceMeta(type):
             return test
 
         def _setup():
-            if not _config.master_key or not _config.host:
+            if _config.emulator is None and not _config.master_key:
                 raise Exception(
                     "You must specify your Azure Cosmos account values for "
                     "'masterKey' and 'host' at the top of this class to run the "
@@ -82,7 +91,7 @@ class AggregateQueryTestSequenceMeta(type):
 
             _helper.clean_up_database()
 
-            mcs.client = CosmosClient(_config.host, key=_config.master_key)
+            mcs.client = _helper.create_client()
             created_db = mcs.client.create_database(_config.TEST_DATABASE_NAME)
             created_collection = _create_collection(mcs.client, created_db)
             mcs.container = created_collection
@@ -241,9 +250,10 @@ class AggregateQueryTestSequenceMeta(type):
 
         def _insert_doc(collection, document_definitions):
             created_docs = []
-            for d in document_definitions:
-                created_doc = collection.create_item(d)
-                created_docs.append(created_doc)
+            for result in collection.create_items(document_definitions):
+                if not result.succeeded:
+                    raise result.error
+                created_docs.append(result.result)
 
             return created_docs
 
@@ -267,10 +277,14 @@ class AggregationQueryTest(
     ):
         print("Running test with query: " + query)
 
-        # executes the query and validates the results against the expected results
-        result_iterable = container.query_items(query, enable_cross_partition_query=True)
-
         def _verify_result():
+            # executes the query and validates the results against the expected results.
+            # The first page is requested by query_items itself, so query failures are
+            # raised from here rather than from the first call to next().
+            result_iterable = container.query_items(
+                query, enable_cross_partition_query=True
+            )
+
             ######################################
             # test next() behavior
             ######################################
@@ -84,6 +84,19 @@ for i in range(1, 10):
     )
 # [END upsert_items]
 
+# Insert or update many items with several requests in flight at once.
+# Each document produces a result; failures don't stop the remaining upserts.
+# [START upsert_items_bulk]
+container = database.get_container(container_name)
+new_items = (
+    dict(id=f"bulkitem{i}", productName="Gadget", productModel=f"Model {i}")
+    for i in range(1, 1000)
+)
+for result in container.upsert_items(new_items, max_concurrency=16):
+    if not result.succeeded:
+        print(f"Failed to upsert {result.input['id']}: {result.error}")
+# [END upsert_items_bulk]
+
 # Modify an existing item in the container
 # [START update_item]
 item = container.get_item("item2", partition_key="Widget")
@@ -117,12 +130,18 @@ for item in discontinued_items:
 # Delete items from the container.
 # The Cosmos DB SQL API does not support 'DELETE' queries,
 # so deletes must be done with the delete_item method
-# on the container.
+# on the container, or in bulk with delete_items, which
+# deletes everything a query returns.
 # [START delete_items]
-for item in container.query_items(
-    query='SELECT * FROM products p WHERE p.productModel = "DISCONTINUED" AND p.productName="Widget"'
-):
-    container.delete_item(item, partition_key="Widget")
+failures = [
+    result
+    for result in container.delete_items(
+        query='SELECT * FROM products p WHERE p.productModel = "DISCONTINUED"',
+        max_concurrency=16,
+    )
+    if not result.succeeded
+]
+print(f"{len(failures)} items could not be deleted")
 # [END delete_items]
 
 # Retrieve the properties of a database
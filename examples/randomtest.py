@@ -24,7 +24,7 @@ try:
     database.delete_container('publicmaster')
 except:
     pass
-    
+
 try:
     container = database.get_container(
         "publicmaster"
@@ -57,31 +57,40 @@ def upload():
     import glob
     import json
 
-    for file in glob.glob(
-        "/users/johanste/repos/azure-rest-api-specs/specification/Compute/**/*.json",
-        recursive=True,
-    ):
-        if not "/examples/" in file:
-            with open(file, "r", encoding="UTF-8") as f:
-                try:
-                    data = json.load(f)
-                    data["id"] = file.replace("/", ":")
-                    print(f"Uploading {file}...")
-                    item = container.upsert_item(body=data)
-                except (json.decoder.JSONDecodeError, UnicodeDecodeError):
-                    pass
+    def documents():
+        for file in glob.glob(
+            "/users/johanste/repos/azure-rest-api-specs/specification/Compute/**/*.json",
+            recursive=True,
+        ):
+            if not "/examples/" in file:
+                with open(file, "r", encoding="UTF-8") as f:
+                    try:
+                        data = json.load(f)
+                        data["id"] = file.replace("/", ":")
+                        print(f"Uploading {file}...")
+                        yield data
+                    except (json.decoder.JSONDecodeError, UnicodeDecodeError):
+                        pass
+
+    for result in container.upsert_items(documents(), max_concurrency=16):
+        if not result.succeeded:
+            print(f"Failed to upload {result.input['id']}: {result.error}")
 
 def find_stuff(query):
     items = container.query_items(query, enable_cross_partition_query=True)
 
-    for item in items:
-        item = container.get_item(item["id"], partition_key=item['info']['version'])
-        print(str(item)[0:50])
+    references = [(item["id"], item['info']['version']) for item in items]
+    for item in container.get_items(references):
+        if item is not None:
+            print(str(item)[0:50])
 
 def clear_stuff(query):
-    for item in container.query_items(query):
-        print(f"deleting {item['id']}")
-        container.delete_item(item, partition_key=item['info']['version'])
+    def report(deleted, failed):
+        print(f"deleted {deleted} items, {failed} failures")
+
+    for result in container.delete_items(query, progress_callback=report):
+        if not result.succeeded:
+            print(f"failed to delete {result.input['id']}: {result.error}")
 
 query = """
     SELECT * FROM root s
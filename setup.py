@@ -33,5 +33,11 @@ setup(
     packages=find_packages(exclude=["tests", "tests.*", 'samples', 'doc']),
     url=("https://github.com/johanste/azure-cosmos-python-prototype"),
     install_requires=[
+        'requests>=2.30',
+        'urllib3>=2.0',
     ],
+    extras_require={
+        'aio': ['aiohttp>=3.0'],
+        'orjson': ['orjson>=3.0'],
+    },
 )
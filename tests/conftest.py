@@ -0,0 +1,28 @@
+import pytest
+
+from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
+
+
+@pytest.fixture
+def client_context():
+    """ An emulated account spreading each partitioned container over four partition key ranges.
+    """
+    return InMemoryClientContext(partition_key_range_count=4, seed=0)
+
+
+@pytest.fixture
+def client(client_context):
+    return CosmosClient(None, None, client_context=client_context)
+
+
+@pytest.fixture
+def database(client):
+    return client.create_database("db")
+
+
+@pytest.fixture
+def container(database):
+    """ A container partitioned on `/pk`.
+    """
+    return database.create_container("things", PartitionKey("/pk"))
@@ -0,0 +1,319 @@
+"""
+Tests of the asyncio client against a local HTTP stand-in for the Cosmos DB REST API.
+"""
+
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from azure.cosmos import (
+    HTTPFailure,
+    Item,
+    OperationObserver,
+    PartitionKey,
+    RequestUnitRateLimiter,
+    ThrottlingRetryPolicy,
+    sql,
+)
+from azure.cosmos.aio import AsyncContainer, AsyncCosmosClient
+from azure.cosmos.codec import DEFAULT_CODEC
+
+KEY = base64.b64encode(b"stand-in key").decode("utf-8")
+
+
+class StandIn:
+    """ Serves the documents of a single container `dbs/db/colls/things`, partitioned on `/pk`.
+
+    Partition key values up to "p" are in partition key range 0, the others in range 1; the
+    session token of each range advances with every write to it. The next `throttle_count`
+    requests are throttled, asking to be retried after `retry_after_ms`.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.lsns = {"0": 0, "1": 0}
+        self.requests = []
+        self.throttle_count = 0
+        self.retry_after_ms = 1
+        self.app = web.Application()
+        self.app.router.add_route("*", "/{path:.*}", self.handle)
+
+    async def handle(self, request):
+        self.requests.append(request)
+        assert request.headers["authorization"].startswith("type%3Dmaster")
+        if self.throttle_count:
+            self.throttle_count -= 1
+            return web.json_response(
+                dict(code="TooManyRequests"),
+                status=429,
+                headers={"x-ms-retry-after-ms": str(self.retry_after_ms)},
+            )
+        parts = request.match_info["path"].strip("/").split("/")
+        headers = {"x-ms-request-charge": "1"}
+        if parts == ["dbs", "db", "colls", "things"]:
+            return web.json_response(
+                dict(id="things", partitionKey=PartitionKey("/pk")), headers=headers
+            )
+        partition_key = request.headers.get("x-ms-documentdb-partitionkey")
+        range_id = "0" if partition_key is None or json.loads(partition_key)[0] <= "p" else "1"
+        if request.method != "GET" and not request.headers.get("x-ms-documentdb-isquery"):
+            self.lsns[range_id] += 1
+        headers["x-ms-session-token"] = f"{range_id}:-1#{self.lsns[range_id]}"
+        if len(parts) == 5 and request.method == "POST":
+            body = await request.json()
+            if request.headers.get("x-ms-documentdb-isquery"):
+                return self.query(request, body, headers)
+            if body["id"] in self.documents and not request.headers.get(
+                "x-ms-documentdb-is-upsert"
+            ):
+                return web.json_response(dict(code="Conflict"), status=409)
+            assert json.loads(request.headers["x-ms-documentdb-partitionkey"]) == [
+                body["pk"]
+            ]
+            self.documents[body["id"]] = body
+            return web.json_response(body, status=201, headers=headers)
+        if len(parts) == 6:
+            document = self.documents.get(parts[5])
+            if document is None:
+                return web.json_response(dict(code="NotFound"), status=404)
+            if request.method == "DELETE":
+                del self.documents[parts[5]]
+                return web.Response(status=204, headers=headers)
+            return web.json_response(document, headers=headers)
+        return web.json_response(dict(code="BadRequest"), status=400)
+
+    def query(self, request, body, headers):
+        results = sql.parse(body["query"]).execute(
+            list(self.documents.values()), sql.parameters_dict(body["parameters"])
+        )
+        start = int(request.headers.get("x-ms-continuation") or 0)
+        page_size = int(request.headers.get("x-ms-max-item-count") or 100)
+        page = results[start : start + page_size]
+        if start + page_size < len(results):
+            headers["x-ms-continuation"] = str(start + page_size)
+        return web.json_response(dict(Documents=page, _count=len(page)), headers=headers)
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_operation(self, event):
+        self.events.append(event)
+
+
+def run(test, **kwargs):
+    """ Run the coroutine function `test` with a client connected to a fresh stand-in.
+
+    `kwargs` are passed on to the client.
+    """
+
+    async def main():
+        stand_in = StandIn()
+        server = TestServer(stand_in.app)
+        await server.start_server()
+        try:
+            async with AsyncCosmosClient(
+                str(server.make_url("/")),
+                KEY,
+                retry_policy=ThrottlingRetryPolicy(max_retries=3),
+                **kwargs,
+            ) as client:
+                await test(client, stand_in)
+        finally:
+            await server.close()
+
+    asyncio.run(main())
+
+
+def get_container(client):
+    return AsyncContainer(client.client_context, "db", "things")
+
+
+def test_item_round_trip():
+    async def test(client, stand_in):
+        container = get_container(client)
+        created = await container.create_item(dict(id="a", pk="p", value=1))
+        assert isinstance(created, Item)
+        assert created.response_headers.request_charge == 1.0
+        assert container.session_token == "0:-1#1"
+
+        item = await container.get_item("a", "p")
+        assert isinstance(item, Item)
+        assert item["value"] == 1
+
+        await container.delete_item("a", "p")
+        with pytest.raises(HTTPFailure) as failure:
+            await container.get_item("a", "p")
+        assert failure.value.status_code == 404
+
+    run(test)
+
+
+def test_query_items_returns_items_page_by_page():
+    async def test(client, stand_in):
+        container = get_container(client)
+        for index in range(5):
+            await container.upsert_item(dict(id=str(index), pk="p", value=index))
+
+        results = container.query_items(
+            "SELECT * FROM c WHERE c.value >= @low",
+            [dict(name="@low", value=1)],
+            max_item_count=2,
+        )
+        pages = [page async for page in results.by_page()]
+        assert [len(page) for page in pages] == [2, 2]
+        assert all(isinstance(item, Item) for page in pages for item in page)
+        assert [item["id"] for page in pages for item in page] == ["1", "2", "3", "4"]
+
+        values = [
+            value
+            async for value in container.query_items("SELECT VALUE c.value FROM c")
+        ]
+        assert values == [0, 1, 2, 3, 4]
+
+    run(test)
+
+
+def test_query_items_resumes_from_continuation_token():
+    async def test(client, stand_in):
+        container = get_container(client)
+        for index in range(4):
+            await container.upsert_item(dict(id=str(index), pk="p"))
+
+        results = container.query_items("SELECT * FROM c", max_item_count=3)
+        await results.__anext__()
+        resumed = container.query_items(
+            "SELECT * FROM c", continuation_token=results.continuation_token
+        )
+        assert [item["id"] async for item in resumed] == ["3"]
+
+    run(test)
+
+
+def test_throttled_requests_are_retried():
+    async def test(client, stand_in):
+        container = get_container(client)
+        await container.upsert_item(dict(id="a", pk="p"))
+
+        stand_in.throttle_count = 2
+        requests = len(stand_in.requests)
+        item = await container.get_item("a", "p")
+        assert item["id"] == "a"
+        assert len(stand_in.requests) - requests == 3
+
+        # The first page of a query is retried like any other request.
+        stand_in.throttle_count = 1
+        assert [item["id"] async for item in container.query_items("SELECT * FROM c")] == [
+            "a"
+        ]
+
+    run(test)
+
+
+def test_throttled_request_fails_once_retries_are_exhausted():
+    async def test(client, stand_in):
+        container = get_container(client)
+        stand_in.throttle_count = 10
+        with pytest.raises(HTTPFailure) as failure:
+            await container.get_item("a", "p")
+        assert failure.value.status_code == 429
+        # The first attempt and three retries.
+        assert len(stand_in.requests) == 4
+
+    run(test)
+
+
+def test_reads_are_sent_the_session_token_of_their_partition_key_range():
+    async def test(client, stand_in):
+        container = get_container(client)
+        await container.upsert_item(dict(id="a", pk="p"))
+        await container.upsert_item(dict(id="b", pk="q"))
+        await container.upsert_item(dict(id="c", pk="q"))
+        assert container.session_token == "0:-1#1,1:-1#2"
+
+        await container.get_item("a", "p")
+        assert stand_in.requests[-1].headers["x-ms-session-token"] == "0:-1#1"
+        await container.get_item("b", "q")
+        assert stand_in.requests[-1].headers["x-ms-session-token"] == "1:-1#2"
+        # An explicit session token takes precedence.
+        await container.get_item("b", "q", session_token="1:-1#1")
+        assert stand_in.requests[-1].headers["x-ms-session-token"] == "1:-1#1"
+        # A query across partition key ranges is sent the tokens of every range.
+        [item async for item in container.query_items("SELECT * FROM c")]
+        assert stand_in.requests[-1].headers["x-ms-session-token"] == "0:-1#1,1:-1#2"
+
+    run(test)
+
+
+def test_requests_are_reported_to_observers():
+    recorder = Recorder()
+
+    async def test(client, stand_in):
+        container = get_container(client)
+        await container.upsert_item(dict(id="a", pk="p"))
+        stand_in.throttle_count = 1
+        await container.get_item("a", "p")
+        with pytest.raises(HTTPFailure):
+            await container.get_item("missing", "p")
+        [item async for item in container.query_items("SELECT * FROM c", max_item_count=1)]
+
+        assert [event.operation for event in recorder.events] == [
+            "get_container",
+            "upsert_item",
+            "get_item",
+            "get_item",
+            "query_items",
+        ]
+        upsert, get, missing = recorder.events[1:4]
+        assert upsert.resource_link == "dbs/db/colls/things"
+        assert upsert.partition_key == "p"
+        assert upsert.request_charge == 1.0
+        assert upsert.request_size == len(DEFAULT_CODEC.encode_bytes(dict(id="a", pk="p")))
+        assert get.retry_count == 1
+        assert get.error is None
+        assert get.resource_link == "dbs/db/colls/things/docs/a"
+        assert missing.error.status_code == 404
+        assert missing.response_metadata is None
+
+    run(test, observers=[recorder])
+
+
+def test_requests_are_paced_without_blocking_the_event_loop():
+    rate_limiter = RequestUnitRateLimiter(100, burst=1)
+
+    async def test(client, stand_in):
+        container = get_container(client)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        started = time.monotonic()
+        for index in range(5):
+            await container.upsert_item(dict(id=str(index), pk="p"))
+        elapsed = time.monotonic() - started
+        ticker.cancel()
+
+        # Each request is charged 1 RU of a budget of 100 RU/s.
+        assert elapsed >= 0.04
+        assert ticks > 10
+
+        stand_in.throttle_count = 1
+        await container.get_item("0", "p")
+        # Halved by the throttled request, then recovering by 1% of the budget as its retry succeeds.
+        assert rate_limiter.rate == 51
+
+    run(test, rate_limiter=rate_limiter)
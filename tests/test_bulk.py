@@ -0,0 +1,247 @@
+import threading
+import time
+
+from azure.cosmos import CosmosClient, HTTPFailure, Item, OperationObserver, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
+
+import pytest
+
+
+class RecordingClientContext(InMemoryClientContext):
+    """ Records the partition key range each delete is addressed to.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.deleted_in = []
+
+    def DeleteItem(self, document_link, options=None):
+        self.deleted_in.append(self._partition_key_range_id)
+        return super().DeleteItem(document_link, options)
+
+
+@pytest.fixture
+def client_context():
+    return RecordingClientContext(partition_key_range_count=4, seed=0)
+
+
+def test_delete_items_routes_each_delete_to_its_range(client_context, container):
+    list(
+        container.upsert_items(
+            dict(id=str(index), pk=f"key{index % 10}", kind="old" if index % 2 else "new")
+            for index in range(40)
+        )
+    )
+    results = list(container.delete_items("SELECT * FROM c WHERE c.kind = 'old'"))
+
+    assert len(results) == 20
+    assert all(result.succeeded for result in results)
+    assert len(client_context.deleted_in) == 20
+    assert None not in client_context.deleted_in
+    assert len(set(client_context.deleted_in)) > 1
+    remaining = list(
+        container.query_items("SELECT * FROM c", enable_cross_partition_query=True)
+    )
+    assert sorted(item["kind"] for item in remaining) == ["new"] * 20
+
+
+def test_delete_items_retries_deletes_in_a_split_range(client_context, container):
+    for index in range(20):
+        container.upsert_item(dict(id=str(index), pk=f"key{index}"))
+    # Read the range map, then split every range behind the client's back.
+    container.get_item("0", "key0")
+    for range_id in ("0", "1", "2", "3"):
+        client_context.split_partition_key_range(container.collection_link, range_id)
+
+    results = list(
+        container.delete_items("SELECT * FROM c", max_concurrency=1, batch_size=5)
+    )
+
+    assert all(result.succeeded for result in results), [
+        result.error for result in results if not result.succeeded
+    ]
+    assert len(results) == 20
+    with pytest.raises(HTTPFailure):
+        container.get_item("0", "key0")
+
+
+def test_create_items_reports_conflicts_without_stopping(container):
+    for id in ("3", "7"):
+        container.create_item(dict(id=id, pk="a", existing=True))
+    documents = [dict(id=str(index), pk="a" if index % 2 else "b") for index in range(10)]
+
+    results = sorted(
+        container.create_items(documents, batch_size=4), key=lambda result: result.index
+    )
+
+    assert [result.index for result in results] == list(range(10))
+    assert [result.input for result in results] == documents
+    failed = [result for result in results if not result.succeeded]
+    assert [result.index for result in failed] == [3, 7]
+    assert all(result.error.status_code == 409 and result.result is None for result in failed)
+    assert all(
+        isinstance(result.result, Item) and result.partition_key == result.input["pk"]
+        for result in results
+        if result.succeeded
+    )
+    assert container.get_item("3", "a")["existing"]
+
+
+class SlowUpsertsClientContext(InMemoryClientContext):
+    """ Takes a while over each upsert, and records how many were in flight at once.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.in_flight_lock = threading.Lock()
+
+    def UpsertItem(self, database_or_Container_link, document, options=None):
+        with self.in_flight_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.005)
+            return super().UpsertItem(database_or_Container_link, document, options)
+        finally:
+            with self.in_flight_lock:
+                self.in_flight -= 1
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 3])
+def test_upsert_items_keeps_at_most_max_concurrency_requests_in_flight(max_concurrency):
+    client_context = SlowUpsertsClientContext(partition_key_range_count=4, seed=0)
+    container = (
+        CosmosClient(None, None, client_context=client_context)
+        .create_database("db")
+        .create_container("things", PartitionKey("/pk"))
+    )
+
+    results = list(
+        container.upsert_items(
+            (dict(id=str(index), pk=f"key{index % 5}") for index in range(30)),
+            max_concurrency=max_concurrency,
+            batch_size=10,
+        )
+    )
+
+    assert len(results) == 30 and all(result.succeeded for result in results)
+    assert client_context.max_in_flight == max_concurrency
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.operations = []
+
+    def on_operation(self, event):
+        self.operations.append(event.operation)
+
+
+def test_get_items_sends_one_query_per_partition_key_range(client, container):
+    for index in range(100):
+        container.upsert_item(dict(id=str(index), pk=f"key{index % 40}"))
+    recorder = Recorder()
+    client.observers.append(recorder)
+    references = [(str(index), f"key{index % 40}") for index in range(100)]
+    references += [("missing", "key0"), ("0", "key1")]
+
+    items = container.get_items(references)
+
+    assert [item["id"] if item is not None else None for item in items] == [
+        str(index) for index in range(100)
+    ] + [None, None]
+    assert all(item["pk"] == pk for item, (_, pk) in zip(items, references) if item)
+    # The four ranges are queried once each, once their map is read.
+    assert recorder.operations == ["read_partition_key_ranges"] + ["get_items"] * 4
+
+
+def test_get_items_matches_ids_shared_by_partition_keys_of_a_range(client_context, container):
+    for index in range(8):
+        container.upsert_item(dict(id="shared", pk=f"key{index}", index=index))
+    references = [("shared", f"key{index}") for index in range(0, 8, 2)]
+
+    items = container.get_items(references, query_threshold=1)
+
+    assert [item["index"] for item in items] == [0, 2, 4, 6]
+
+
+def test_get_items_regroups_the_items_of_a_split_range(client_context, container):
+    for index in range(40):
+        container.upsert_item(dict(id=str(index), pk=f"key{index}"))
+    # Read the range map, then split every range behind the client's back.
+    container.get_item("0", "key0")
+    for range_id in ("0", "1", "2", "3"):
+        client_context.split_partition_key_range(container.collection_link, range_id)
+
+    items = container.get_items([(str(index), f"key{index}") for index in range(40)])
+
+    assert [item["id"] for item in items] == [str(index) for index in range(40)]
+
+
+class FailingReadsClientContext(InMemoryClientContext):
+    """ Fails the point reads of items whose id starts with `bad`.
+    """
+
+    def ReadItem(self, document_link, options=None):
+        if document_link.rsplit("/", 1)[-1].startswith("bad"):
+            raise HTTPFailure(503, "Service unavailable")
+        return super().ReadItem(document_link, options)
+
+
+def test_get_items_in_unpartitioned_container(database):
+    unpartitioned = database.create_container("unpartitioned", None)
+    for index in range(6):
+        unpartitioned.upsert_item(dict(id=str(index)))
+
+    items = unpartitioned.get_items(
+        [(str(index), None) for index in (5, 0, 1, 9, 2, 3)], query_threshold=2
+    )
+
+    assert [item["id"] if item is not None else None for item in items] == [
+        "5",
+        "0",
+        "1",
+        None,
+        "2",
+        "3",
+    ]
+
+
+def test_get_items_without_partition_key_queries_across_partitions(container):
+    for index in range(6):
+        container.upsert_item(dict(id=str(index), pk=f"key{index}"))
+
+    items = container.get_items(
+        [(str(index), None) for index in range(7)], query_threshold=2
+    )
+
+    assert [item["id"] if item is not None else None for item in items] == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+        "5",
+        None,
+    ]
+
+
+def test_get_items_partial_failure():
+    client = CosmosClient(None, None, client_context=FailingReadsClientContext())
+    container = client.create_database("db").create_container(
+        "things", PartitionKey("/pk")
+    )
+    for id in ("a", "bad", "c"):
+        container.upsert_item(dict(id=id, pk=id))
+    references = [("a", "a"), ("bad", "bad"), ("c", "c"), ("missing", "missing")]
+
+    with pytest.raises(HTTPFailure) as failure:
+        container.get_items(references)
+    assert failure.value.status_code == 503
+
+    items = container.get_items(references, raise_on_error=False)
+    assert items[0]["id"] == "a"
+    assert isinstance(items[1], HTTPFailure)
+    assert items[2]["id"] == "c"
+    assert items[3] is None
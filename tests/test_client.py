@@ -0,0 +1,182 @@
+import concurrent.futures
+import threading
+
+from azure.cosmos import (
+    Container,
+    Database,
+    HTTPFailure,
+    OperationObserver,
+    PartitionKey,
+    ResponseMetadata,
+)
+
+import pytest
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.operations = []
+
+    def on_operation(self, event):
+        self.operations.append(event.operation)
+
+
+@pytest.fixture
+def recorder(client):
+    recorder = Recorder()
+    client.observers.append(recorder)
+    return recorder
+
+
+def test_list_databases_page_by_page(client):
+    for index in range(5):
+        client.create_database(f"db{index}")
+
+    databases = client.list_databases(max_item_count=2)
+    first_page = next(databases.by_page())
+
+    assert [database.id for database in first_page] == ["db0", "db1"]
+    assert all(isinstance(database, Database) for database in first_page)
+    assert first_page[0].response_metadata is databases.response_metadata
+    assert first_page[0].response_metadata.request_charge > 0
+
+    resumed = client.list_databases(
+        max_item_count=2, continuation_token=databases.continuation_token
+    )
+    assert [database.id for database in resumed] == ["db2", "db3", "db4"]
+
+
+def test_list_containers_page_by_page(database):
+    for index in range(3):
+        database.create_container(f"container{index}", PartitionKey("/pk"))
+
+    containers = database.list_containers(max_item_count=1)
+    pages = list(containers.by_page())
+
+    assert [[container.id for container in page] for page in pages] == [
+        ["container0"],
+        ["container1"],
+        ["container2"],
+    ]
+    assert all(isinstance(page[0], Container) for page in pages)
+    assert pages[0][0].properties["partitionKey"]["paths"] == ["/pk"]
+
+
+def test_database_client_reads_its_properties_on_first_access(client, recorder):
+    client.create_database("db")
+    del recorder.operations[:]
+
+    database = client.get_database_client("db")
+    assert recorder.operations == []
+
+    assert database.properties["id"] == "db"
+    assert database.properties["_self"]
+    assert recorder.operations == ["get_database"]
+
+    missing = client.get_database_client("missing")
+    with pytest.raises(HTTPFailure) as failure:
+        missing.properties
+    assert failure.value.status_code == 404
+
+
+def test_container_client_reads_its_properties_on_first_access(database, recorder):
+    database.create_container("things", PartitionKey("/pk"))
+    del recorder.operations[:]
+
+    container = database.get_container_client("things")
+    assert recorder.operations == []
+
+    assert container.partition_key["paths"] == ["/pk"]
+    assert container.properties["id"] == "things"
+    assert recorder.operations == ["get_container"]
+
+
+def test_container_client_with_partition_key_never_reads_its_properties(client, recorder):
+    client.create_database("db").create_container("things", PartitionKey("/pk"))
+    del recorder.operations[:]
+
+    container = client.get_database_client("db").get_container_client(
+        "things", PartitionKey("/pk")
+    )
+    container.upsert_item(dict(id="1", pk="a"))
+    assert container.get_item("1", "a")["id"] == "1"
+
+    assert "get_database" not in recorder.operations
+    assert "get_container" not in recorder.operations
+
+
+def test_list_items_fetches_one_page_at_a_time(container, recorder):
+    for index in range(10):
+        container.create_item(dict(id=str(index), pk="a"))
+    del recorder.operations[:]
+
+    items = container.list_items(max_item_count=4)
+    assert recorder.operations == []
+
+    first_page = [next(items) for _ in range(4)]
+    assert recorder.operations == ["list_items"]
+    second_page = [next(items) for _ in range(4)]
+    assert recorder.operations == ["list_items"] * 2
+    last_page = list(items)
+
+    assert len(last_page) == 2
+    # The items of a page share the metadata of its response.
+    for page in (first_page, second_page, last_page):
+        assert all(item.response_headers is page[0].response_headers for item in page)
+        assert page[0].response_headers.request_charge > 0
+    assert first_page[0].response_headers is not second_page[0].response_headers
+    assert first_page[0].response_headers["x-ms-continuation"]
+    assert not last_page[0].response_headers.get("x-ms-continuation")
+
+
+def test_execute_returns_the_metadata_of_its_response(client_context, container):
+    container.create_item(dict(id="1", pk="a"))
+
+    result, response_metadata = client_context._execute(
+        container.collection_link,
+        client_context.ReadItem,
+        document_link=f"{container.collection_link}/docs/1",
+        options=dict(partitionKey="a"),
+    )
+
+    assert result["id"] == "1"
+    assert isinstance(response_metadata, ResponseMetadata)
+    assert response_metadata == client_context.last_response_headers
+    assert response_metadata.request_charge > 0
+    assert response_metadata.activity_id
+    assert response_metadata.session_token
+
+    # An operation that sends no request isn't given the metadata of an earlier one.
+    assert client_context._execute(container.collection_link, lambda: 42) == (42, {})
+
+
+def test_execute_returns_the_metadata_of_the_calling_thread(client_context, container):
+    range_ids = {}
+    for index in range(8):
+        item = container.create_item(dict(id=str(index), pk=f"key{index}"))
+        range_ids[index] = item.response_headers["x-ms-documentdb-partitionkeyrangeid"]
+    first = 0
+    second = next(index for index in range_ids if range_ids[index] != range_ids[first])
+    barrier = threading.Barrier(2)
+
+    def read(index):
+        def read_then_wait(**kwargs):
+            result = client_context.ReadItem(**kwargs)
+            # Both threads have received their response before either returns.
+            barrier.wait(timeout=5)
+            return result
+
+        return client_context._execute(
+            container.collection_link,
+            read_then_wait,
+            document_link=f"{container.collection_link}/docs/{index}",
+            options=dict(partitionKey=f"key{index}"),
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(read, [first, second]))
+
+    assert [result["id"] for result, _ in results] == [str(first), str(second)]
+    assert [
+        response_metadata["x-ms-documentdb-partitionkeyrangeid"] for _, response_metadata in results
+    ] == [range_ids[first], range_ids[second]]
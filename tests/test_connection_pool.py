@@ -0,0 +1,110 @@
+import concurrent.futures
+import http.server
+import threading
+import time
+
+from azure.cosmos import ConnectionPool
+
+import pytest
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.respond(b"")
+
+    def do_GET(self):
+        barrier = self.server.barrier
+        if barrier is not None:
+            barrier.wait(timeout=5)
+        self.respond(b"{}")
+
+    def respond(self, body):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.close_connections:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.barrier = None
+    server.close_connections = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def stats_of(pool):
+    stats = pool.stats()
+    return dict(in_use=stats.in_use, idle=stats.idle, created=stats.created, reused=stats.reused)
+
+
+def test_sequential_requests_reuse_one_connection(server):
+    pool = ConnectionPool()
+    for _ in range(5):
+        pool.session.get(url_of(server)).raise_for_status()
+
+    assert stats_of(pool) == dict(in_use=0, idle=1, created=1, reused=4)
+    pool.close()
+    assert stats_of(pool)["idle"] == 0
+
+
+def test_concurrent_requests_open_a_connection_each(server):
+    server.barrier = threading.Barrier(3)
+    pool = ConnectionPool()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: pool.session.get(url_of(server)), range(3)))
+
+    assert stats_of(pool) == dict(in_use=0, idle=3, created=3, reused=0)
+
+
+def test_connections_idle_for_longer_than_the_timeout_are_replaced(server):
+    pool = ConnectionPool(idle_timeout=0.05)
+    pool.session.get(url_of(server))
+    pool.session.get(url_of(server))
+    time.sleep(0.1)
+    pool.session.get(url_of(server))
+
+    assert stats_of(pool) == dict(in_use=0, idle=1, created=2, reused=1)
+
+
+def test_connections_closed_by_the_service_are_not_idle(server):
+    server.close_connections = True
+    pool = ConnectionPool()
+    for _ in range(3):
+        pool.session.get(url_of(server))
+
+    assert stats_of(pool) == dict(in_use=0, idle=0, created=3, reused=0)
+
+
+def test_prewarmed_connections_are_reused(server):
+    pool = ConnectionPool(prewarm=3)
+    # Requests then use the same TLS settings as the prewarmed connections.
+    pool.session.trust_env = False
+
+    assert pool.prewarm_connections(url_of(server)) == 3
+    assert stats_of(pool) == dict(in_use=0, idle=3, created=3, reused=0)
+    # Connections that are already open aren't opened again.
+    assert pool.prewarm_connections(url_of(server)) == 0
+    assert stats_of(pool) == dict(in_use=0, idle=3, created=3, reused=0)
+
+    server.barrier = threading.Barrier(3)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: pool.session.get(url_of(server)), range(3)))
+
+    assert stats_of(pool) == dict(in_use=0, idle=3, created=3, reused=3)
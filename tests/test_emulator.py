@@ -0,0 +1,148 @@
+from azure.cosmos import AccessCondition, CosmosClient, HTTPFailure, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
+
+import pytest
+
+
+def test_create_read_replace_delete(client_context, container):
+    created = container.create_item(dict(id="1", pk="a", value=1))
+    assert created["_etag"]
+
+    item = container.get_item("1", "a")
+    assert item["value"] == 1
+    assert float(client_context.last_response_headers["x-ms-request-charge"]) > 0
+
+    container.replace_item(item, dict(id="1", pk="a", value=2))
+    assert container.get_item("1", "a")["value"] == 2
+
+    container.delete_item("1", "a")
+    with pytest.raises(HTTPFailure) as failure:
+        container.get_item("1", "a")
+    assert failure.value.status_code == 404
+
+
+def test_results_never_alias_stored_documents(container):
+    body = dict(id="1", pk="a", nested=dict(value=1))
+    container.create_item(body)
+    body["nested"]["value"] = 2
+    item = container.get_item("1", "a")
+    item["nested"]["value"] = 3
+
+    assert container.get_item("1", "a")["nested"]["value"] == 1
+
+
+def test_create_existing_item_conflicts(container):
+    container.create_item(dict(id="1", pk="a"))
+    with pytest.raises(HTTPFailure) as failure:
+        container.create_item(dict(id="1", pk="a"))
+    assert failure.value.status_code == 409
+    # Ids are unique within a partition key value only.
+    container.create_item(dict(id="1", pk="b"))
+
+
+def test_replace_with_stale_etag_fails(container):
+    item = container.create_item(dict(id="1", pk="a", value=1))
+    container.upsert_item(dict(id="1", pk="a", value=2))
+
+    with pytest.raises(HTTPFailure) as failure:
+        container.replace_item(
+            item,
+            dict(id="1", pk="a", value=3),
+            access_condition=AccessCondition(type="IfMatch", condition=item["_etag"]),
+        )
+    assert failure.value.status_code == 412
+    assert container.get_item("1", "a")["value"] == 2
+
+
+def test_items_expire_after_their_time_to_live():
+    now = [1000.0]
+    client_context = InMemoryClientContext(clock=lambda: now[0])
+    database = CosmosClient(None, None, client_context=client_context).create_database("db")
+    container = database.create_container("things", PartitionKey("/pk"), default_ttl=10)
+    container.create_item(dict(id="1", pk="a"))
+    container.create_item(dict(id="2", pk="a", ttl=-1))
+
+    now[0] += 10
+    with pytest.raises(HTTPFailure) as failure:
+        container.get_item("1", "a")
+    assert failure.value.status_code == 404
+    assert container.get_item("2", "a")["id"] == "2"
+
+
+def test_items_are_spread_over_partition_key_ranges(client_context, container):
+    for index in range(40):
+        container.create_item(dict(id=str(index), pk=f"key{index}"))
+    range_ids = set()
+    for index in range(40):
+        container.get_item(str(index), f"key{index}")
+        range_ids.add(client_context.last_response_headers["x-ms-documentdb-partitionkeyrangeid"])
+
+    assert len(range_ids) == 4
+
+
+def test_query_pages_resume_from_continuation(container):
+    for index in range(10):
+        container.create_item(dict(id=str(index), pk="a", index=index))
+
+    results = container.query_items(
+        "SELECT VALUE c.index FROM c ORDER BY c.index", partition_key="a", max_item_count=4
+    )
+    pages = results.by_page()
+    assert next(pages) == [0, 1, 2, 3]
+    token = results.continuation_token
+    assert token
+
+    resumed = container.query_items(
+        "SELECT VALUE c.index FROM c ORDER BY c.index",
+        partition_key="a",
+        max_item_count=4,
+        continuation_token=token,
+    )
+    assert list(resumed) == [4, 5, 6, 7, 8, 9]
+
+
+def test_cross_partition_query(container):
+    for index in range(20):
+        container.create_item(dict(id=str(index), pk=f"key{index}", index=index))
+
+    results = container.query_items(
+        "SELECT VALUE c.index FROM c WHERE c.index >= 5 ORDER BY c.index DESC",
+        enable_cross_partition_query=True,
+    )
+    assert list(results) == list(range(19, 4, -1))
+
+
+def test_split_partition_key_range_keeps_items_readable(client_context, container):
+    for index in range(40):
+        container.create_item(dict(id=str(index), pk=f"key{index}"))
+    container.get_item("0", "key0")
+    range_id = client_context.last_response_headers["x-ms-documentdb-partitionkeyrangeid"]
+
+    children = client_context.split_partition_key_range(container.collection_link, range_id)
+
+    assert range_id not in children
+    assert all(container.get_item(str(index), f"key{index}") for index in range(40))
+    results = container.query_items("SELECT VALUE COUNT(1) FROM c", enable_cross_partition_query=True)
+    assert list(results) == [40]
+
+
+def test_missing_database_and_container(client, database):
+    with pytest.raises(HTTPFailure) as failure:
+        client.get_database("missing").properties
+    assert failure.value.status_code == 404
+    with pytest.raises(HTTPFailure) as failure:
+        database.get_container("missing").properties
+    assert failure.value.status_code == 404
+
+
+def test_query_metrics_add_up_over_pages(container):
+    for index in range(10):
+        container.create_item(dict(id=str(index), pk="a"))
+
+    results = container.query_items(
+        "SELECT * FROM c", partition_key="a", max_item_count=4, populate_query_metrics=True
+    )
+    next(results)
+    assert results.query_metrics.output_document_count == 4
+    list(results)
+    assert results.query_metrics.output_document_count == 10
@@ -0,0 +1,147 @@
+import math
+
+from azure.cosmos import (
+    HTTPFailure,
+    LatencyAggregator,
+    OperationEvent,
+    OperationObserver,
+    RequestChargeAggregator,
+)
+from azure.cosmos.instrumentation import LatencyHistogram
+
+import pytest
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_operation(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def recorder(client):
+    recorder = Recorder()
+    client.observers.append(recorder)
+    return recorder
+
+
+def event(
+    operation, latency=0.01, request_charge=1.0, resource_link="dbs/db/colls/a", partition_key=None
+):
+    return OperationEvent(operation, resource_link, partition_key, latency, request_charge)
+
+
+def operations_of(recorder):
+    """ The events of the operations of a test, leaving out reads of the partition key ranges.
+    """
+    return [event for event in recorder.events if event.operation != "read_partition_key_ranges"]
+
+
+def test_operations_are_reported_with_their_response(container, recorder):
+    container.create_item(dict(id="1", pk="a", value="x" * 100))
+    container.get_item("1", "a")
+    with pytest.raises(HTTPFailure):
+        container.get_item("missing", "a")
+
+    create, read, missing = operations_of(recorder)
+    assert [create.operation, read.operation, missing.operation] == [
+        "create_item",
+        "get_item",
+        "get_item",
+    ]
+    assert create.resource_link == container.collection_link
+    assert create.request_size > 100
+    assert create.request_charge > 0
+    assert create.response_metadata is not None and create.error is None
+    assert read.partition_key == "a"
+    assert read.request_size is None
+    assert read.latency > 0
+    assert read.retry_count == 0
+    assert missing.error.status_code == 404
+    assert missing.response_metadata is None
+
+
+def test_each_page_of_a_query_is_reported(container, recorder):
+    for index in range(10):
+        container.create_item(dict(id=str(index), pk="a"))
+    del recorder.events[:]
+
+    list(
+        container.query_items(
+            "SELECT * FROM c", partition_key="a", max_item_count=4, populate_query_metrics=True
+        )
+    )
+
+    events = operations_of(recorder)
+    assert [event.operation for event in events] == ["query_items"] * 3
+    assert [event.query_metrics.output_document_count for event in events] == [4, 4, 2]
+
+
+def test_latency_histogram_percentiles_are_within_its_precision():
+    histogram = LatencyHistogram(precision=0.01)
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.mean == pytest.approx(0.5005)
+    assert histogram.max == 1.0
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+    assert histogram.percentile(100) == 1.0
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_latency_aggregator_summarizes_per_container_and_operation():
+    aggregator = LatencyAggregator()
+    for latency in (0.01, 0.02, 0.03):
+        aggregator.on_operation(event("get_item", latency=latency))
+    aggregator.on_operation(event("get_item", latency=0.5, resource_link="dbs/db/colls/b"))
+
+    summary = aggregator.summary()
+
+    assert set(summary) == {("dbs/db/colls/a", "get_item"), ("dbs/db/colls/b", "get_item")}
+    assert summary[("dbs/db/colls/a", "get_item")]["count"] == 3
+    assert summary[("dbs/db/colls/a", "get_item")]["mean"] == pytest.approx(0.02)
+    assert summary[("dbs/db/colls/a", "get_item")]["max"] == 0.03
+    assert aggregator.histogram("dbs/db/colls/b", "get_item").count == 1
+    assert aggregator.histogram("dbs/db/colls/b", "upsert_item") is None
+
+
+def test_request_charge_aggregator_totals_charges():
+    aggregator = RequestChargeAggregator()
+    aggregator.on_operation(event("get_item", request_charge=1.0, partition_key="a"))
+    aggregator.on_operation(event("upsert_item", request_charge=5.0, partition_key="a"))
+    aggregator.on_operation(event("upsert_item", request_charge=5.5, partition_key="b"))
+    aggregator.on_operation(event("query_items", request_charge=2.0))
+    aggregator.on_operation(event("get_item", request_charge=3.0, resource_link="dbs/db/colls/b"))
+
+    assert aggregator.total() == 16.5
+    assert aggregator.total("dbs/db/colls/a") == 13.5
+    assert aggregator.total(operation="get_item") == 4.0
+    assert aggregator.total("dbs/db/colls/a", "upsert_item") == 10.5
+    assert aggregator.summary()[("dbs/db/colls/b", "get_item")] == 3.0
+    assert aggregator.top_partition_keys("dbs/db/colls/a") == [("'a'", 6.0), ("'b'", 5.5)]
+    assert aggregator.top_partition_keys("dbs/db/colls/a", count=1) == [("'a'", 6.0)]
+
+
+def test_aggregators_observe_a_client(client, container):
+    latencies = LatencyAggregator()
+    charges = RequestChargeAggregator()
+    client.observers.extend([latencies, charges])
+    for index in range(5):
+        container.upsert_item(dict(id=str(index), pk=f"key{index % 2}"))
+    for index in range(5):
+        container.get_item(str(index), f"key{index % 2}")
+
+    summary = latencies.summary()
+    assert summary[(container.collection_link, "upsert_item")]["count"] == 5
+    assert summary[(container.collection_link, "get_item")]["count"] == 5
+    assert not math.isnan(summary[(container.collection_link, "upsert_item")]["p99"])
+    assert charges.total(container.collection_link, "upsert_item") > 0
+    # Three items of key0 were read, and two of key1.
+    assert [key for key, _ in charges.top_partition_keys(container.collection_link)] == [
+        "'key0'",
+        "'key1'",
+    ]
@@ -0,0 +1,114 @@
+from azure.cosmos import CosmosClient, HTTPFailure, OperationObserver, PartitionKey, metadata_cache
+from azure.cosmos.emulator import InMemoryClientContext
+
+import pytest
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """ The time seen by the cache, which only moves when a test moves it.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(metadata_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.operations = []
+
+    def on_operation(self, event):
+        self.operations.append(event.operation)
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def client(recorder):
+    return CosmosClient(
+        None,
+        None,
+        metadata_cache_ttl=60,
+        observers=[recorder],
+        client_context=InMemoryClientContext(),
+    )
+
+
+def test_entries_expire_after_the_ttl(now):
+    cache = metadata_cache.MetadataCache(10)
+    cache.set("dbs/db", dict(id="db"))
+
+    now[0] += 9.9
+    assert cache.get("dbs/db") == dict(id="db")
+    now[0] += 0.1
+    assert cache.get("dbs/db") is None
+    assert len(cache) == 0
+
+
+def test_invalidating_a_link_drops_the_resources_below_it():
+    cache = metadata_cache.MetadataCache(10)
+    for link in ("dbs/db", "dbs/db/colls/a", "dbs/db/colls/b", "dbs/db2", "dbs/db2/colls/a"):
+        cache.set(link, dict(id=link))
+
+    cache.invalidate("dbs/db/colls/a")
+    assert cache.get("dbs/db/colls/a") is None
+    assert cache.get("dbs/db/colls/b") is not None
+
+    cache.invalidate("dbs/db")
+    assert [cache.get(link) for link in ("dbs/db", "dbs/db/colls/b")] == [None, None]
+    # Links that merely share a prefix are left alone.
+    assert cache.get("dbs/db2") is not None
+    assert cache.get("dbs/db2/colls/a") is not None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_must_be_positive():
+    with pytest.raises(ValueError):
+        metadata_cache.MetadataCache(0)
+
+
+def test_cached_properties_are_read_once_per_ttl(now, client, recorder):
+    client.create_database("db").create_container("things", PartitionKey("/pk"))
+    client.metadata_cache.clear()
+
+    for _ in range(3):
+        database = client.get_database("db")
+        container = database.get_container("things")
+    assert container.properties["partitionKey"]["paths"] == ["/pk"]
+    assert recorder.operations == [
+        "create_database",
+        "create_container",
+        "get_database",
+        "get_container",
+    ]
+
+    now[0] += 60
+    client.get_database("db").get_container("things")
+    assert recorder.operations[4:] == ["get_database", "get_container"]
+
+
+def test_deleting_a_database_invalidates_its_containers(client):
+    database = client.create_database("db")
+    database.create_container("things", PartitionKey("/pk"))
+    assert database.get_container("things").id == "things"
+
+    client.delete_database("db")
+    client.create_database("db")
+
+    with pytest.raises(HTTPFailure) as failure:
+        client.get_database("db").get_container("things")
+    assert failure.value.status_code == 404
+
+
+def test_replacing_a_container_invalidates_its_properties(client):
+    database = client.create_database("db")
+    database.create_container("things", PartitionKey("/pk"))
+
+    database.reset_container_properties("things", PartitionKey("/pk"), default_ttl=10)
+
+    assert database.get_container("things").properties["defaultTtl"] == 10
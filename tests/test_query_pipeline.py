@@ -0,0 +1,352 @@
+from azure.cosmos import OperationObserver, query_pipeline, sql
+
+import pytest
+
+MIXED_VALUES = [1, 2.5, "a", "b", True, False, -3]
+
+
+@pytest.fixture
+def items(container):
+    """ The container, holding 40 items spread over its four partition key ranges.
+    """
+    for index in range(40):
+        container.create_item(
+            dict(
+                id=str(index),
+                pk=f"key{index % 8}",
+                index=index,
+                score=index % 7,
+                group=index % 10,
+                mixed=MIXED_VALUES[index % len(MIXED_VALUES)],
+            )
+        )
+    return container
+
+
+def query(container, text, **kwargs):
+    return container.query_items(text, enable_cross_partition_query=True, **kwargs)
+
+
+def reference(container, text):
+    """ The results of a query over every item at once, as a single range would return them.
+    """
+    return sql.parse(text).execute(list(query(container, "SELECT * FROM c")))
+
+
+def resume(container, text, pages_before, **kwargs):
+    """ The results of a query, read `pages_before` pages at a time and resumed from its continuation token.
+    """
+    results = []
+    continuation_token = None
+    while True:
+        iterator = query(container, text, continuation_token=continuation_token, **kwargs)
+        pages = iterator.by_page()
+        for _ in range(pages_before):
+            page = next(pages, None)
+            if page is None:
+                return results
+            results.extend(page)
+        continuation_token = iterator.continuation_token
+        if continuation_token is None:
+            return results
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_operation(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def recorder(client):
+    recorder = Recorder()
+    client.observers.append(recorder)
+    return recorder
+
+
+def charged(results):
+    """ The results, read page by page, and the request charges of their pages added up.
+    """
+    rows = []
+    request_charge = 0.0
+    for page in results.by_page():
+        rows.extend(page)
+        request_charge += results.response_metadata.request_charge
+    return rows, request_charge
+
+
+def assert_accounts_for_every_fetch(recorder, results, request_charge):
+    fetches = [event for event in recorder.events if event.operation == "query_items"]
+    assert request_charge == pytest.approx(sum(event.request_charge for event in fetches))
+    assert results.query_metrics.retrieved_document_count == sum(
+        event.query_metrics.retrieved_document_count for event in fetches
+    )
+    return fetches
+
+
+@pytest.mark.parametrize("max_buffered_item_count", [0, 1, 1000])
+def test_max_buffered_item_count(items, max_buffered_item_count):
+    results = items.query_items(
+        "SELECT VALUE c.index FROM c",
+        enable_cross_partition_query=True,
+        max_item_count=5,
+        max_buffered_item_count=max_buffered_item_count,
+    )
+
+    assert sorted(results) == list(range(40))
+
+
+def test_order_by_merges_ties_across_ranges(items):
+    results = list(query(items, "SELECT c.id, c.score FROM c ORDER BY c.score", max_item_count=6))
+
+    assert [result["score"] for result in results] == sorted(index % 7 for index in range(40))
+    assert sorted(int(result["id"]) for result in results) == list(range(40))
+
+
+def test_order_by_pages_account_for_every_page_merged(items, recorder):
+    results = query(
+        items, "SELECT c.id FROM c ORDER BY c.index", max_item_count=6, populate_query_metrics=True
+    )
+    rows, request_charge = charged(results)
+
+    assert len(rows) == 40
+    fetches = assert_accounts_for_every_fetch(recorder, results, request_charge)
+    # Several pages of each range are merged into each page.
+    assert len(fetches) > 4
+    assert results.query_metrics.retrieved_document_count == 40
+    assert results.query_metrics.output_document_count == 40
+
+
+def test_order_by_descending(items):
+    results = list(query(items, "SELECT VALUE c.score FROM c ORDER BY c.score DESC"))
+
+    assert results == sorted((index % 7 for index in range(40)), reverse=True)
+
+
+def test_order_by_several_keys(items):
+    text = "SELECT VALUE c.index FROM c ORDER BY c.score DESC, c.index"
+
+    assert list(query(items, text, max_item_count=7)) == reference(items, text)
+
+
+def test_order_by_values_of_mixed_types(items):
+    text = "SELECT VALUE c.mixed FROM c ORDER BY c.mixed"
+
+    assert list(query(items, text)) == reference(items, text)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("SELECT TOP 5 VALUE c.index FROM c ORDER BY c.index DESC", [39, 38, 37, 36, 35]),
+        ("SELECT VALUE c.index FROM c ORDER BY c.index OFFSET 10 LIMIT 3", [10, 11, 12]),
+    ],
+)
+def test_order_by_with_limits(items, text, expected):
+    assert list(query(items, text, max_item_count=2)) == expected
+
+
+@pytest.mark.parametrize("pages_before", [1, 2])
+def test_order_by_resumes_from_continuation_token(items, pages_before):
+    text = "SELECT c.id, c.score FROM c ORDER BY c.score DESC"
+    expected = list(query(items, text, max_item_count=6))
+
+    # Pages of 6 results end in the middle of runs of equal scores.
+    assert resume(items, text, pages_before, max_item_count=6) == expected
+
+
+def test_order_by_with_limits_resumes_from_continuation_token(items):
+    text = "SELECT VALUE c.index FROM c ORDER BY c.index OFFSET 5 LIMIT 12"
+
+    assert resume(items, text, 1, max_item_count=5) == list(range(5, 17))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("SELECT VALUE COUNT(1) FROM c", 40),
+        ("SELECT VALUE SUM(c.index) FROM c", 780),
+        ("SELECT VALUE AVG(c.index) FROM c", 19.5),
+        ("SELECT VALUE MIN(c.score) FROM c", 0),
+        ("SELECT VALUE MAX(c.index) FROM c WHERE c.score = 3", 38),
+        # Only some of the ranges have items matching the filter.
+        ("SELECT VALUE AVG(c.index) FROM c WHERE c.pk = 'key1'", 17),
+    ],
+)
+def test_aggregates(items, text, expected):
+    assert list(query(items, text)) == [expected] == reference(items, text)
+
+
+@pytest.mark.parametrize(
+    "text", ["SELECT VALUE COUNT(1) FROM c", "SELECT VALUE AVG(c.index) FROM c WHERE c.pk = 'key1'"]
+)
+def test_aggregates_account_for_every_partial_aggregate(items, recorder, text):
+    results = query(items, text, populate_query_metrics=True)
+    rows, request_charge = charged(results)
+
+    fetches = assert_accounts_for_every_fetch(recorder, results, request_charge)
+    # One partial aggregate per range.
+    assert len(fetches) == 4
+    assert rows == reference(items, text)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("SELECT VALUE COUNT(c.mixed) FROM c", 40),
+        # false < true < numbers < strings
+        ("SELECT VALUE MIN(c.mixed) FROM c", False),
+        ("SELECT VALUE MAX(c.mixed) FROM c", "b"),
+        ("SELECT VALUE MIN(c.mixed) FROM c WHERE IS_NUMBER(c.mixed)", -3),
+        ("SELECT VALUE MAX(c.mixed) FROM c WHERE NOT IS_STRING(c.mixed)", 2.5),
+    ],
+)
+def test_aggregates_over_values_of_mixed_types(items, text, expected):
+    assert list(query(items, text)) == [expected] == reference(items, text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Any value that isn't a number makes the sum or average undefined.
+        "SELECT VALUE SUM(c.mixed) FROM c",
+        "SELECT VALUE AVG(c.mixed) FROM c",
+        "SELECT VALUE AVG(c.missing) FROM c",
+        "SELECT VALUE MIN(c.missing) FROM c",
+        "SELECT VALUE MAX([c.index]) FROM c",
+    ],
+)
+def test_undefined_aggregates(items, text):
+    # Undefined aggregates come back as None.
+    assert list(query(items, text)) == [None] == reference(items, text)
+
+
+def test_sum_of_no_values(items):
+    assert list(query(items, "SELECT VALUE SUM(c.missing) FROM c")) == [0]
+
+
+@pytest.fixture
+def spills(monkeypatch):
+    """ The number of times groups were spilled to temporary files.
+    """
+    count = [0]
+    spill = query_pipeline._GroupTable._spill
+
+    def counting_spill(self):
+        count[0] += 1
+        spill(self)
+
+    monkeypatch.setattr(query_pipeline._GroupTable, "_spill", counting_spill)
+    return count
+
+
+def by_group(results):
+    return sorted(results, key=sql.canonical_json)
+
+
+@pytest.mark.parametrize("max_in_memory_group_count", [None, 3])
+def test_group_by(items, spills, max_in_memory_group_count):
+    text = (
+        "SELECT c.group, COUNT(1) AS n, SUM(c.index) AS total, AVG(c.score) AS score, "
+        "MIN(c.mixed) AS low, MAX(c.mixed) AS high FROM c GROUP BY c.group"
+    )
+    results = query(
+        items, text, max_item_count=4, max_in_memory_group_count=max_in_memory_group_count
+    )
+
+    assert by_group(results) == by_group(reference(items, text))
+    assert bool(spills[0]) == (max_in_memory_group_count is not None)
+
+
+def test_group_by_several_keys_with_spilling(items, spills):
+    text = "SELECT VALUE [c.score, c.group] FROM c GROUP BY c.score, c.group"
+    results = list(query(items, text, max_in_memory_group_count=2))
+
+    assert spills[0]
+    assert len(results) == 40
+    assert by_group(results) == by_group(reference(items, text))
+
+
+def test_group_by_undefined_sum(items, spills):
+    text = "SELECT c.score, SUM(c.mixed) AS total FROM c GROUP BY c.score"
+    results = list(query(items, text, max_in_memory_group_count=1))
+
+    assert spills[0]
+    # The sums of the groups with a value that isn't a number are undefined, and left out.
+    assert by_group(results) == by_group(reference(items, text))
+    assert any("total" not in result for result in results)
+
+
+@pytest.mark.parametrize("max_in_memory_group_count", [None, 2])
+def test_distinct(items, spills, max_in_memory_group_count):
+    text = "SELECT DISTINCT VALUE c.mixed FROM c"
+    results = list(
+        query(items, text, max_item_count=3, max_in_memory_group_count=max_in_memory_group_count)
+    )
+
+    assert by_group(results) == by_group(MIXED_VALUES)
+    assert bool(spills[0]) == (max_in_memory_group_count is not None)
+
+
+def test_distinct_objects_with_spilling(items, spills):
+    text = "SELECT DISTINCT c.score, c.group FROM c WHERE c.index < 30"
+    results = list(query(items, text, max_in_memory_group_count=4))
+
+    assert spills[0]
+    assert by_group(results) == by_group(reference(items, text))
+
+
+@pytest.mark.parametrize(
+    "text, max_in_memory_group_count",
+    [
+        ("SELECT c.group, COUNT(1) AS n FROM c GROUP BY c.group", None),
+        ("SELECT c.group, COUNT(1) AS n FROM c GROUP BY c.group", 3),
+        ("SELECT DISTINCT VALUE c.score FROM c", None),
+        ("SELECT DISTINCT VALUE c.score FROM c", 2),
+    ],
+)
+def test_group_by_and_distinct_account_for_every_page_combined(
+    items, recorder, text, max_in_memory_group_count
+):
+    results = query(
+        items,
+        text,
+        max_item_count=4,
+        max_in_memory_group_count=max_in_memory_group_count,
+        populate_query_metrics=True,
+    )
+    rows, request_charge = charged(results)
+
+    fetches = assert_accounts_for_every_fetch(recorder, results, request_charge)
+    # Several pages of each range are combined.
+    assert len(fetches) > 4
+    assert by_group(rows) == by_group(reference(items, text))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "SELECT c.group FROM c WHERE c.index > 100 GROUP BY c.group",
+        "SELECT DISTINCT VALUE c.score FROM c WHERE c.index > 100",
+    ],
+)
+def test_group_by_and_distinct_without_results_are_charged(items, recorder, text):
+    results = query(items, text, populate_query_metrics=True)
+
+    assert list(results) == []
+    # The charges are those of the last, empty, page.
+    assert_accounts_for_every_fetch(recorder, results, results.response_metadata.request_charge)
+
+
+def test_group_by_and_distinct_have_no_continuation_token(items):
+    for text in (
+        "SELECT c.group FROM c GROUP BY c.group",
+        "SELECT DISTINCT VALUE c.group FROM c",
+    ):
+        results = query(items, text, max_item_count=3)
+        next(results.by_page())
+
+        assert results.continuation_token is None
+        assert len(list(results)) == 7
@@ -0,0 +1,70 @@
+from azure.cosmos.request_options import RequestOptions, build_request_options
+
+import pytest
+
+
+def test_no_profile_and_no_keyword_arguments():
+    assert build_request_options(None) == {}
+
+
+def test_profile_options_are_used_when_no_keyword_argument_is_set():
+    profile = RequestOptions(populate_query_metrics=True, max_item_count=10)
+
+    assert build_request_options(profile) == dict(populateQueryMetrics=True, maxItemCount=10)
+
+
+def test_keyword_arguments_take_precedence_over_the_profile():
+    profile = RequestOptions(populate_query_metrics=True, max_item_count=10, session_token="a")
+    options = build_request_options(profile, max_item_count=5, session_token="b")
+
+    assert options == dict(populateQueryMetrics=True, maxItemCount=5, sessionToken="b")
+
+
+def test_false_keyword_arguments_override_the_profile():
+    profile = RequestOptions(populate_query_metrics=True, enable_cross_partition_query=True)
+    options = build_request_options(profile, populate_query_metrics=False)
+
+    assert options == dict(populateQueryMetrics=False, enableCrossPartitionQuery=True)
+
+
+@pytest.mark.parametrize(
+    "name, value", [("session_token", ""), ("initial_headers", {}), ("access_condition", {})]
+)
+def test_empty_keyword_arguments_leave_the_profile_option(name, value):
+    profile = RequestOptions(
+        session_token="a", initial_headers=dict(a="1"), access_condition=dict(type="IfMatch")
+    )
+
+    assert build_request_options(profile, **{name: value}) == profile.as_dict()
+
+
+def test_built_options_are_independent_of_the_profile():
+    profile = RequestOptions(max_item_count=10)
+    options = build_request_options(profile, populate_query_metrics=True)
+    options["maxItemCount"] = 1
+
+    assert build_request_options(profile) == dict(maxItemCount=10)
+    assert profile.as_dict() == dict(maxItemCount=10)
+
+
+def test_profiles_are_immutable():
+    profile = RequestOptions(max_item_count=10)
+    with pytest.raises(AttributeError):
+        profile.max_item_count = 5
+
+    assert profile.replace(max_item_count=5) == RequestOptions(max_item_count=5)
+    assert profile.max_item_count == 10
+
+
+def test_operations_apply_the_precedence(container):
+    for index in range(10):
+        container.create_item(dict(id=str(index), pk="a"))
+    profile = RequestOptions(max_item_count=2)
+
+    results = container.query_items("SELECT * FROM c", partition_key="a", request_options=profile)
+    assert len(next(results.by_page())) == 2
+
+    results = container.query_items(
+        "SELECT * FROM c", partition_key="a", request_options=profile, max_item_count=4
+    )
+    assert len(next(results.by_page())) == 4
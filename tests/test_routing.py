@@ -0,0 +1,236 @@
+from azure.cosmos import ConnectionPool, CosmosClient, PartitionKey
+from azure.cosmos.emulator import InMemoryClientContext
+from azure.cosmos.routing import (
+    MAX_EFFECTIVE_PARTITION_KEY,
+    MIN_EFFECTIVE_PARTITION_KEY,
+    PartitionKeyRangeMap,
+    effective_partition_key,
+)
+
+import pytest
+
+from .test_throttling import KEY, URL, StandInAdapter
+
+RANGES = [
+    dict(id="0", minInclusive=MIN_EFFECTIVE_PARTITION_KEY, maxExclusive="40"),
+    dict(id="1", minInclusive="40", maxExclusive="80"),
+    dict(id="2", minInclusive="80", maxExclusive=MAX_EFFECTIVE_PARTITION_KEY),
+]
+
+
+class RecordingClientContext(InMemoryClientContext):
+    """ Records the partition key range each point read is addressed to.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.read_in = []
+
+    def ReadItem(self, document_link, options=None):
+        self.read_in.append(self._partition_key_range_id)
+        return super().ReadItem(document_link, options)
+
+
+@pytest.fixture
+def client_context():
+    return RecordingClientContext(partition_key_range_count=4, seed=0)
+
+
+@pytest.fixture
+def adapter():
+    return StandInAdapter()
+
+
+@pytest.fixture
+def service_container(adapter):
+    """ A handle for a container hash partitioned on `/pk`, version 2, in the account answered by `adapter`.
+    """
+    connection_pool = ConnectionPool()
+    connection_pool.session.mount(URL, adapter)
+    client = CosmosClient(URL, KEY, connection_pool=connection_pool)
+    return client.get_database_client("db").get_container_client(
+        "things", PartitionKey("/pk", version=2)
+    )
+
+
+# Ranges of the service splitting the effective partition keys of hashes, which start with 00 to 3F.
+SERVICE_RANGES = [
+    dict(id="0", minInclusive=MIN_EFFECTIVE_PARTITION_KEY, maxExclusive="18"),
+    dict(id="1", minInclusive="18", maxExclusive=MAX_EFFECTIVE_PARTITION_KEY),
+]
+
+
+def routed_to(adapter, path):
+    """ The partition key range each request for `path` was addressed to.
+    """
+    return [
+        request.headers.get("x-ms-documentdb-partitionkeyrangeid")
+        for request in adapter.requests
+        if request.path_url.strip("/") == path
+    ]
+
+
+def test_effective_partition_key_version_1():
+    assert (
+        effective_partition_key(PartitionKey("/pk"), "redmond")
+        == "05C1EFE313830C087366656E706F6500"
+    )
+
+
+def test_effective_partition_key_version_2():
+    assert (
+        effective_partition_key(PartitionKey("/pk", version=2), "redmond")
+        == "22E342F38A486A088463DFF7838A5963"
+    )
+
+
+def test_effective_partition_key_version_1_truncates_long_strings():
+    definition = PartitionKey("/pk")
+    prefix = "x" * 100
+
+    assert effective_partition_key(definition, prefix + "a") == effective_partition_key(
+        definition, prefix + "b"
+    )
+    assert effective_partition_key(
+        PartitionKey("/pk", version=2), prefix + "a"
+    ) != effective_partition_key(PartitionKey("/pk", version=2), prefix + "b")
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_effective_partition_keys_of_other_types(version):
+    definition = PartitionKey("/pk", version=version)
+    keys = {
+        effective_partition_key(definition, value)
+        for value in (None, True, False, 0, 1, 1.5, -1, "", "1", {})
+    }
+    # Values of different types, or different values, don't share keys.
+    assert len(keys) == 10
+    assert all(MIN_EFFECTIVE_PARTITION_KEY <= key < MAX_EFFECTIVE_PARTITION_KEY for key in keys)
+    assert effective_partition_key(definition, 1) == effective_partition_key(definition, 1.0)
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        PartitionKey("/pk", kind="Range"),
+        dict(paths=["/a", "/b"], kind="Hash"),
+        dict(paths=["/pk"], kind="Hash", version=3),
+    ],
+)
+def test_unsupported_partition_key_definitions(definition):
+    with pytest.raises(ValueError):
+        effective_partition_key(definition, "redmond")
+
+
+def test_range_map_routes_effective_partition_keys():
+    routing_map = PartitionKeyRangeMap(reversed(RANGES))
+
+    assert [key_range["id"] for key_range in routing_map.ranges] == ["0", "1", "2"]
+    assert routing_map.get_range("")["id"] == "0"
+    assert routing_map.get_range("3FFF")["id"] == "0"
+    assert routing_map.get_range("40")["id"] == "1"
+    assert routing_map.get_range("05C1EFE313830C087366656E706F6500")["id"] == "0"
+    assert routing_map.get_range("FE")["id"] == "2"
+    assert routing_map.get_range("FF") is None
+    assert routing_map.get_range_by_id("1") is RANGES[1]
+
+
+def test_range_map_overlapping_ranges():
+    routing_map = PartitionKeyRangeMap(RANGES)
+
+    assert [key_range["id"] for key_range in routing_map.get_overlapping_ranges()] == [
+        "0",
+        "1",
+        "2",
+    ]
+    assert [
+        key_range["id"] for key_range in routing_map.get_overlapping_ranges("40", "80")
+    ] == ["1"]
+    assert [
+        key_range["id"] for key_range in routing_map.get_overlapping_ranges("3F", "41")
+    ] == ["0", "1"]
+
+
+def test_range_map_drops_the_parents_of_split_ranges():
+    children = [
+        dict(id="3", minInclusive="40", maxExclusive="60", parents=["1"]),
+        dict(id="4", minInclusive="60", maxExclusive="80", parents=["1"]),
+    ]
+    routing_map = PartitionKeyRangeMap(RANGES + children)
+
+    assert [key_range["id"] for key_range in routing_map.ranges] == ["0", "3", "4", "2"]
+    assert routing_map.get_range("70")["id"] == "4"
+
+
+def test_operations_in_hash_partitioned_containers_are_routed(client_context, container):
+    routing_map = PartitionKeyRangeMap(
+        client_context._ReadPartitionKeyRanges(container.collection_link)
+    )
+    for index in range(20):
+        container.create_item(dict(id=str(index), pk=f"key{index}"))
+        container.get_item(str(index), f"key{index}")
+
+    expected = [
+        routing_map.get_range(effective_partition_key(PartitionKey("/pk"), f"key{index}"))["id"]
+        for index in range(20)
+    ]
+    assert client_context.read_in == expected
+    assert len(set(expected)) > 1
+
+
+def test_operations_in_range_partitioned_containers_are_not_routed(client_context, database):
+    container = database.create_container("ranged", PartitionKey("/pk", kind="Range"))
+    for index in range(5):
+        container.create_item(dict(id=str(index), pk=f"key{index}"))
+
+    assert [container.get_item(str(index), f"key{index}")["id"] for index in range(5)] == [
+        str(index) for index in range(5)
+    ]
+    assert client_context.read_in == [None] * 5
+    assert len(list(client_context._ReadPartitionKeyRanges(container.collection_link))) == 1
+
+
+def test_requests_to_the_service_are_routed(adapter, service_container):
+    adapter.queue(
+        "dbs/db/colls/things/pkranges", 200, dict(PartitionKeyRanges=SERVICE_RANGES, _count=2)
+    )
+    keys = [f"key{index}" for index in range(10)]
+    for key in keys:
+        adapter.queue("dbs/db/colls/things/docs/a", 200, dict(id="a", pk=key))
+        assert service_container.get_item("a", key)["pk"] == key
+
+    routing_map = PartitionKeyRangeMap(SERVICE_RANGES)
+    expected = [
+        routing_map.get_range(effective_partition_key(PartitionKey("/pk", version=2), key))["id"]
+        for key in keys
+    ]
+    assert routed_to(adapter, "dbs/db/colls/things/docs/a") == expected
+    assert len(set(expected)) > 1
+    # The range map was read once.
+    assert len(routed_to(adapter, "dbs/db/colls/things/pkranges")) == 1
+
+
+def test_requests_to_split_ranges_are_rerouted(adapter, service_container):
+    children = [
+        dict(id="2", minInclusive="18", maxExclusive="20", parents=["1"]),
+        dict(id="3", minInclusive="20", maxExclusive=MAX_EFFECTIVE_PARTITION_KEY, parents=["1"]),
+    ]
+    adapter.queue(
+        "dbs/db/colls/things/pkranges", 200, dict(PartitionKeyRanges=SERVICE_RANGES, _count=2)
+    )
+    adapter.queue(
+        "dbs/db/colls/things/docs/a",
+        410,
+        dict(code="Gone", message="Partition key range is gone"),
+        {"x-ms-substatus": "1002"},
+    )
+    adapter.queue(
+        "dbs/db/colls/things/pkranges",
+        200,
+        dict(PartitionKeyRanges=SERVICE_RANGES + children, _count=4),
+    )
+    adapter.queue("dbs/db/colls/things/docs/a", 200, dict(id="a", pk="redmond"))
+
+    # The effective partition key of "redmond" is 22E342F3...
+    assert service_container.get_item("a", "redmond")["id"] == "a"
+    assert routed_to(adapter, "dbs/db/colls/things/docs/a") == ["1", "3"]
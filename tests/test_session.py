@@ -0,0 +1,68 @@
+from azure.cosmos.session import SessionTokenManager, _PartitionSessionToken
+
+LINK = "dbs/db/colls/things"
+
+
+def merge(left, right):
+    return str(_PartitionSessionToken.parse(left).merge(_PartitionSessionToken.parse(right)))
+
+
+def test_merge_simple_tokens_keeps_higher_lsn():
+    assert merge("10", "12") == "12"
+    assert merge("12", "10") == "12"
+
+
+def test_merge_keeps_higher_global_lsn_and_max_per_region():
+    assert merge("1#100#1=20#2=5", "1#90#1=15#2=7") == "1#100#1=20#2=7"
+    assert merge("1#90#1=15#2=7", "1#100#1=20#2=5") == "1#100#1=20#2=7"
+
+
+def test_merge_keeps_regions_of_newer_version():
+    # Region 3 is unknown to the newer version of the range, and dropped.
+    assert merge("2#50#1=10", "1#60#1=30#3=9") == "2#60#1=30"
+    assert merge("1#60#1=30#3=9", "2#50#1=10") == "2#60#1=30"
+
+
+def test_update_merges_tokens_per_range():
+    manager = SessionTokenManager()
+    manager.update(LINK, {"x-ms-session-token": "0:1#10#1=5,1:1#20"})
+    manager.update(LINK, {"x-ms-session-token": "0:1#8#1=7"})
+
+    assert manager.get(LINK) == "0:1#10#1=7,1:1#20"
+    assert manager.get(LINK, partition_key_range_id="1") == "1:1#20"
+
+
+def test_reads_are_sent_the_token_of_their_partition_key_range():
+    manager = SessionTokenManager()
+    manager.update(
+        LINK,
+        {"x-ms-session-token": "3:1#7", "x-ms-documentdb-partitionkeyrangeid": "3"},
+        partition_key="a",
+    )
+    manager.update(LINK, {"x-ms-session-token": "4:1#9"}, partition_key="b")
+
+    assert manager.get(LINK, partition_key="a") == "3:1#7"
+    assert manager.get(LINK, partition_key="b") == "4:1#9"
+    assert manager.get(LINK, partition_key="c") == "3:1#7,4:1#9"
+
+
+def test_partition_keys_beyond_the_limit_are_forgotten():
+    manager = SessionTokenManager(max_tracked_partition_keys=1)
+    manager.update(LINK, {"x-ms-session-token": "0:5"}, partition_key="a")
+    manager.update(LINK, {"x-ms-session-token": "1:6"}, partition_key="b")
+
+    assert manager.get(LINK, partition_key="a") == "0:5,1:6"
+    assert manager.get(LINK, partition_key="b") == "1:6"
+
+
+def test_export_and_import_tokens():
+    manager = SessionTokenManager()
+    manager.update(LINK, {"x-ms-session-token": "0:1#10"})
+    other = SessionTokenManager()
+    other.update(LINK, {"x-ms-session-token": "0:1#12"})
+
+    other.import_tokens(manager.export_tokens())
+
+    assert other.get(LINK) == "0:1#12"
+    manager.invalidate("dbs/db")
+    assert manager.export_tokens() == {}
@@ -0,0 +1,152 @@
+from azure.cosmos import sql
+
+import pytest
+
+DOCUMENTS = [
+    dict(id="1", name="apple", kind="fruit", price=3, tags=["red", "sweet"]),
+    dict(id="2", name="banana", kind="fruit", price=1, tags=["yellow"]),
+    dict(id="3", name="carrot", kind="vegetable", price=2),
+    dict(id="4", name="date", kind="fruit", price=5.5, tags=["sweet"]),
+    dict(id="5", name="eggplant", kind="vegetable"),
+]
+
+
+def run(query, parameters=None, documents=DOCUMENTS):
+    return sql.parse(query).execute(documents, parameters)
+
+
+def test_select_star_returns_whole_documents():
+    assert run("SELECT * FROM c") == DOCUMENTS
+
+
+def test_projection_of_properties_and_aliases():
+    assert run("SELECT c.id, c.price AS cost FROM c WHERE c.kind = 'vegetable'") == [
+        dict(id="3", cost=2),
+        # Undefined properties are left out of the result.
+        dict(id="5"),
+    ]
+
+
+def test_select_value_and_constructors():
+    assert run("SELECT VALUE [c.id, {n: c.name}] FROM c WHERE c.id = '2'") == [
+        ["2", dict(n="banana")]
+    ]
+
+
+def test_where_with_logical_and_comparison_operators():
+    results = run("SELECT VALUE c.id FROM c WHERE c.kind = 'fruit' AND c.price >= 3")
+    assert results == ["1", "4"]
+    assert run("SELECT VALUE c.id FROM c WHERE NOT (c.price > 1) OR c.id = '5'") == [
+        "2",
+        "5",
+    ]
+
+
+def test_where_with_in_between_like_and_functions():
+    assert run("SELECT VALUE c.id FROM c WHERE c.id IN ('1', '3')") == ["1", "3"]
+    assert run("SELECT VALUE c.id FROM c WHERE c.price BETWEEN 2 AND 3") == ["1", "3"]
+    assert run("SELECT VALUE c.id FROM c WHERE c.name LIKE '%a_e%'") == ["4"]
+    assert run("SELECT VALUE c.id FROM c WHERE ARRAY_CONTAINS(c.tags, 'sweet')") == [
+        "1",
+        "4",
+    ]
+    assert run("SELECT VALUE c.id FROM c WHERE NOT IS_DEFINED(c.price)") == ["5"]
+
+
+def test_where_comparing_different_types_is_undefined():
+    assert run("SELECT VALUE c.id FROM c WHERE c.price > 'a'") == []
+
+
+def test_parameters():
+    assert run(
+        "SELECT VALUE c.name FROM c WHERE c.price < @price",
+        sql.parameters_dict([dict(name="@price", value=2)]),
+    ) == ["banana"]
+
+
+def test_order_by_sorts_undefined_first_and_descending():
+    assert run("SELECT VALUE c.id FROM c ORDER BY c.price") == ["5", "2", "3", "1", "4"]
+    assert run("SELECT VALUE c.id FROM c ORDER BY c.price DESC") == [
+        "4",
+        "1",
+        "3",
+        "2",
+        "5",
+    ]
+
+
+def test_order_by_several_expressions():
+    assert run("SELECT VALUE c.id FROM c ORDER BY c.kind DESC, c.name DESC") == [
+        "5",
+        "3",
+        "4",
+        "2",
+        "1",
+    ]
+
+
+def test_top():
+    assert run("SELECT TOP 2 VALUE c.id FROM c ORDER BY c.name DESC") == ["5", "4"]
+    assert run("SELECT TOP @n VALUE c.id FROM c", {"@n": 1}) == ["1"]
+
+
+def test_offset_limit():
+    assert run("SELECT VALUE c.id FROM c ORDER BY c.id OFFSET 1 LIMIT 2") == ["2", "3"]
+    assert run("SELECT VALUE c.id FROM c OFFSET 4 LIMIT 10") == ["5"]
+
+
+def test_aggregates():
+    assert run("SELECT VALUE COUNT(1) FROM c") == [5]
+    assert run("SELECT VALUE SUM(c.price) FROM c") == [11.5]
+    assert run("SELECT VALUE MIN(c.price) FROM c") == [1]
+    assert run("SELECT VALUE MAX(c.name) FROM c") == ["eggplant"]
+    assert run("SELECT VALUE AVG(c.price) FROM c WHERE c.kind = 'fruit'") == [3.1666666666666665]
+    assert run("SELECT COUNT(1) AS n, MAX(c.price) AS top FROM c") == [dict(n=5, top=5.5)]
+
+
+def test_aggregates_over_no_values():
+    assert run("SELECT VALUE COUNT(1) FROM c WHERE c.price > 10") == [0]
+    # Undefined aggregates of `SELECT VALUE` queries come back as None.
+    assert run("SELECT VALUE AVG(c.price) FROM c WHERE c.price > 10") == [None]
+    assert run("SELECT VALUE SUM(c.name) FROM c") == [None]
+
+
+def test_group_by():
+    results = run(
+        "SELECT c.kind, COUNT(1) AS n, SUM(c.price) AS total FROM c GROUP BY c.kind"
+    )
+    assert sorted(results, key=lambda result: result["kind"]) == [
+        dict(kind="fruit", n=3, total=9.5),
+        dict(kind="vegetable", n=2, total=2),
+    ]
+
+
+def test_distinct():
+    assert run("SELECT DISTINCT VALUE c.kind FROM c") == ["fruit", "vegetable"]
+    assert run("SELECT DISTINCT c.kind FROM c ORDER BY c.kind DESC") == [
+        dict(kind="vegetable"),
+        dict(kind="fruit"),
+    ]
+
+
+def test_query_text_of_clauses():
+    query = sql.parse("SELECT TOP 3 c.id FROM c WHERE c.price > 1 GROUP BY c.id ORDER BY c.id")
+    assert query.select_text == "c.id"
+    assert query.group_by_texts == ["c.id"]
+    assert query.limits({}) == (0, 3)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT",
+        "SELECT * FROM",
+        "SELECT * FROM c WHERE",
+        "SELECT c.id FROM c ORDER",
+        "SELECT UNKNOWN_FUNCTION(c.id) FROM c",
+        "SELECT * FROM c 'trailing'",
+    ],
+)
+def test_syntax_errors(query):
+    with pytest.raises(sql.SqlSyntaxError):
+        sql.parse(query)
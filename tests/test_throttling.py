@@ -0,0 +1,190 @@
+import base64
+import json
+
+import pytest
+import requests
+
+from requests.adapters import BaseAdapter
+
+from internal.cosmos.documents import ConnectionPolicy
+from internal.cosmos.retry_options import RetryOptions
+
+from azure.cosmos import (
+    ConnectionPool,
+    CosmosClient,
+    HTTPFailure,
+    OperationObserver,
+    ThrottlingRetryPolicy,
+)
+from azure.cosmos.emulator import InMemoryClientContext
+
+URL = "https://stand-in.documents.azure.com:443/"
+KEY = base64.b64encode(b"stand-in key").decode("utf-8")
+
+
+class StandInAdapter(BaseAdapter):
+    """ Answers the requests of a client for the account at `URL` without a network.
+
+    Each response is the next of `responses` queued for the path of the request; the account is
+    always available.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.responses = {}
+
+    def queue(self, path, status, body, headers=None):
+        self.responses.setdefault(path, []).append((status, body, headers or {}))
+
+    def send(self, request, **kwargs):
+        path = requests.utils.urlparse(request.url).path.strip("/")
+        if path:
+            self.requests.append(request)
+            status, body, headers = self.responses[path].pop(0)
+        else:
+            status, body, headers = 200, {}, {}
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = json.dumps(body).encode("utf-8")
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class Recorder(OperationObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_operation(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def adapter():
+    return StandInAdapter()
+
+
+@pytest.fixture
+def service_client(adapter):
+    connection_pool = ConnectionPool()
+    connection_pool.session.mount(URL, adapter)
+    return CosmosClient(
+        URL,
+        KEY,
+        retry_policy=ThrottlingRetryPolicy(max_retries=2),
+        connection_pool=connection_pool,
+    )
+
+
+def throttled(adapter, path, count=1):
+    for _ in range(count):
+        adapter.queue(
+            path,
+            429,
+            dict(code="TooManyRequests"),
+            {"x-ms-retry-after-ms": "1", "x-ms-request-charge": "0.5"},
+        )
+
+
+def test_throttled_first_page_of_query_is_retried(adapter, service_client):
+    path = "dbs/db/colls/things/docs"
+    throttled(adapter, path)
+    adapter.queue(
+        path,
+        200,
+        dict(Documents=[dict(id="a", pk="p")], _count=1),
+        {"x-ms-request-charge": "2.5"},
+    )
+    recorder = Recorder()
+    service_client.observers.append(recorder)
+    container = service_client.get_database_client("db").get_container_client("things")
+
+    results = container.query_items("SELECT * FROM c", partition_key="p")
+
+    assert [item["id"] for item in results] == ["a"]
+    assert len(adapter.requests) == 2
+    assert recorder.events[0].retry_count == 1
+    assert recorder.events[0].request_charge == 2.5
+
+
+def test_throttled_read_fails_once_retries_are_exhausted(adapter, service_client):
+    throttled(adapter, "dbs/db/colls/things/docs/a", count=3)
+    container = service_client.get_database_client("db").get_container_client("things")
+
+    with pytest.raises(HTTPFailure) as failure:
+        container.get_item("a", "p")
+
+    assert failure.value.status_code == 429
+    assert len(adapter.requests) == 3
+
+
+def test_throttled_pages_are_retried_in_memory():
+    client = CosmosClient(
+        None,
+        None,
+        client_context=InMemoryClientContext(throttle_probability=0.3, seed=1),
+        retry_policy=ThrottlingRetryPolicy(max_retries=50),
+    )
+    container = client.create_database("db").create_container("things", None)
+    for index in range(30):
+        container.upsert_item(dict(id=str(index)))
+
+    results = container.query_items("SELECT * FROM c", max_item_count=4)
+
+    assert sorted(int(item["id"]) for item in results) == list(range(30))
+
+
+def test_fixed_delay_overrides_the_delay_requested_by_the_service():
+    policy = ThrottlingRetryPolicy(max_retries=2, fixed_delay=0.25)
+
+    assert policy.get_retry_delay(0, {"x-ms-retry-after-ms": "1000"}, 0) == 0.25
+    assert policy.get_retry_delay(1, None, 0.25) == 0.25
+    assert policy.get_retry_delay(2, None, 0.5) is None
+
+
+def test_retry_options_of_the_connection_policy_are_honored(adapter):
+    connection_policy = ConnectionPolicy()
+    connection_policy.RetryOptions = RetryOptions(
+        max_retry_attempt_count=1,
+        fixed_retry_interval_in_milliseconds=5,
+        max_wait_time_in_seconds=10,
+    )
+    connection_pool = ConnectionPool()
+    connection_pool.session.mount(URL, adapter)
+    client = CosmosClient(
+        URL, KEY, connection_policy=connection_policy, connection_pool=connection_pool
+    )
+    retry_policy = client.client_context.retry_policy
+    assert (retry_policy.max_retries, retry_policy.fixed_delay, retry_policy.max_wait_time) == (
+        1,
+        0.005,
+        10,
+    )
+    # The caller's policy is left as it was.
+    assert connection_policy.RetryOptions.MaxRetryAttemptCount == 1
+
+    throttled(adapter, "dbs/db/colls/things/docs/a", count=2)
+    container = client.get_database_client("db").get_container_client("things")
+    with pytest.raises(HTTPFailure) as failure:
+        container.get_item("a", "p")
+
+    assert failure.value.status_code == 429
+    assert len(adapter.requests) == 2
+
+
+def test_retry_policy_conflicting_with_retry_options_is_rejected():
+    connection_policy = ConnectionPolicy()
+    connection_policy.RetryOptions = RetryOptions(max_retry_attempt_count=1)
+
+    with pytest.raises(ValueError):
+        CosmosClient(
+            URL,
+            KEY,
+            connection_policy=connection_policy,
+            retry_policy=ThrottlingRetryPolicy(max_retries=3),
+        )